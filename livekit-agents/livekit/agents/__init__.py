@@ -29,6 +29,7 @@ from ._exceptions import (
     AssignmentTimeoutError,
 )
 from .job import (
+    AcceptPolicy,
     AutoSubscribe,
     JobContext,
     JobExecutorType,
@@ -121,6 +122,7 @@ __all__ = [
     "JobProcess",
     "JobContext",
     "JobRequest",
+    "AcceptPolicy",
     "get_job_context",
     "JobExecutorType",
     "AutoSubscribe",
@@ -16,6 +16,11 @@ _RunnersDict = dict[str, type["_InferenceRunner"]]
 class _InferenceRunner(ABC, _RunnerMeta):
     registered_runners: _RunnersDict = {}
 
+    MAX_BATCH_SIZE: ClassVar[int] = 1
+    """Maximum number of requests grouped into a single `run_batch` call (1 disables batching)"""
+    BATCH_WINDOW: ClassVar[float] = 0.0
+    """Time in seconds to wait for additional requests before running an incomplete batch"""
+
     @classmethod
     def register_runner(cls, runner_class: type[_InferenceRunner]) -> None:
         if threading.current_thread() != threading.main_thread():
@@ -35,3 +40,11 @@ class _InferenceRunner(ABC, _RunnerMeta):
     def run(self, data: bytes) -> bytes | None:
         """Run inference on the given data."""
         ...
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        """Run inference on multiple requests at once, results must be returned in order.
+
+        Only used when MAX_BATCH_SIZE > 1. Runners should override this to merge the
+        requests into a single model call, the default implementation runs them one by one.
+        """
+        return [self.run(d) for d in data]
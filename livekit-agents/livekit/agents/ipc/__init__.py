@@ -1,21 +1,29 @@
 from . import (
     channel,
     inference_proc_executor,
+    inference_proc_pool,
     job_executor,
     job_proc_executor,
+    job_shared_proc_executor,
     job_thread_executor,
     proc_pool,
+    proc_sampler,
     proto,
+    shared_assets,
 )
 
 __all__ = [
     "channel",
     "inference_proc_executor",
+    "inference_proc_pool",
     "job_executor",
     "job_proc_executor",
+    "job_shared_proc_executor",
     "job_thread_executor",
     "proc_pool",
+    "proc_sampler",
     "proto",
+    "shared_assets",
 ]
 
 # Cleanup docs of unexported modules
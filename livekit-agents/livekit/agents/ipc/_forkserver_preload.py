@@ -0,0 +1,6 @@
+"""Imported in the forkserver by AgentServer, maps the shared assets before the job processes
+are forked from it."""
+
+from . import shared_assets
+
+shared_assets._preload()
@@ -4,17 +4,24 @@ import asyncio
 import contextlib
 import multiprocessing as mp
 import socket
+import time
 from multiprocessing.context import BaseContext
 from typing import Any
 
 from ..inference_runner import _RunnersDict
 from ..log import logger
+from ..telemetry import metrics
 from ..utils import aio, log_exceptions, shortuuid
 from . import channel, proto
 from .inference_proc_lazy_main import ProcStartArgs, proc_main
+from .proc_sampler import ProcSampler
 from .supervised_proc import SupervisedProc
 
 
+class InferenceProcExited(RuntimeError):
+    """raised for the requests that were in flight when the inference process exited"""
+
+
 class InferenceProcExecutor(SupervisedProc):
     def __init__(
         self,
@@ -30,6 +37,8 @@ class InferenceProcExecutor(SupervisedProc):
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
         http_proxy: str | None,
+        shm_size: int = 0,
+        proc_sampler: ProcSampler | None = None,
     ) -> None:
         super().__init__(
             initialize_timeout=initialize_timeout,
@@ -42,10 +51,13 @@ class InferenceProcExecutor(SupervisedProc):
             mp_ctx=mp_ctx,
             loop=loop,
             http_proxy=http_proxy,
+            shm_size=shm_size,
+            proc_sampler=proc_sampler,
         )
 
         self._runners = runners
         self._active_requests: dict[str, asyncio.Future[proto.InferenceResponse]] = {}
+        self._exited = False
 
     def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process:
         proc_args = ProcStartArgs(
@@ -60,36 +72,62 @@ class InferenceProcExecutor(SupervisedProc):
             name="agents_inference_process",
         )
 
+    @property
+    def num_inflight(self) -> int:
+        """number of requests sent to the process that are still waiting for a response"""
+        return len(self._active_requests)
+
     @log_exceptions(logger=logger)
     async def _main_task(self, ipc_ch: aio.ChanReceiver[channel.Message]) -> None:
-        async for msg in ipc_ch:
-            if isinstance(msg, proto.InferenceResponse):
-                fut = self._active_requests.pop(msg.request_id, None)
-                if fut is None:
-                    logger.warning(
-                        "received unexpected inference response",
-                        extra={"request_id": msg.request_id},
-                    )
-                    return
-
-                with contextlib.suppress(asyncio.InvalidStateError):
-                    fut.set_result(msg)
+        try:
+            async for msg in ipc_ch:
+                if isinstance(msg, proto.InferenceResponse):
+                    fut = self._active_requests.pop(msg.request_id, None)
+                    if fut is None:
+                        logger.warning(
+                            "received unexpected inference response",
+                            extra={"request_id": msg.request_id},
+                        )
+                        continue
+
+                    with contextlib.suppress(asyncio.InvalidStateError):
+                        fut.set_result(msg)
+        finally:
+            # the process is gone, don't leave the pending requests hanging
+            self._exited = True
+            for fut in self._active_requests.values():
+                if not fut.done():
+                    fut.set_exception(InferenceProcExited("inference process exited"))
+
+            self._active_requests.clear()
 
     async def do_inference(self, method: str, data: bytes) -> bytes | None:
         if not self.started:
             raise RuntimeError("process not started")
 
+        if self._exited:
+            raise InferenceProcExited("inference process exited")
+
         request_id = shortuuid("inference_req_")
         fut = asyncio.Future[proto.InferenceResponse]()
-
-        await channel.asend_message(
-            self._pch,
-            proto.InferenceRequest(request_id=request_id, method=method, data=data),
-        )
+        start_time = time.perf_counter()
 
         self._active_requests[request_id] = fut
+        try:
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceRequest(request_id=request_id, method=method, data=data),
+            )
+        except Exception:
+            self._active_requests.pop(request_id, None)
+            raise
 
         inf_resp = await fut
+        metrics.inference_completed(
+            method=method,
+            time_elapsed=time.perf_counter() - start_time,
+            error=bool(inf_resp.error),
+        )
         if inf_resp.error:
             raise RuntimeError(f"inference of {method} failed: {inf_resp.error}")
 
@@ -101,4 +139,7 @@ class InferenceProcExecutor(SupervisedProc):
         return extra
 
     def is_alive(self) -> bool:
-        return self._proc.is_alive()
+        try:
+            return self._proc.is_alive()
+        except ValueError:
+            return False  # the process object is already closed
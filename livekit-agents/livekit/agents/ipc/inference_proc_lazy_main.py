@@ -16,8 +16,9 @@ import time
 from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
-from ..inference_runner import _RunnersDict
+from ..inference_runner import _InferenceRunner, _RunnersDict
 from ..log import logger
+from ..telemetry import metrics
 from ..utils import aio, hw, log_exceptions
 from . import proto
 from .channel import Message
@@ -50,6 +51,7 @@ class _InferenceProc:
         # create an instance of each runner (the ctor must not requires any argument)
         self._runners = {name: runner() for name, runner in runners.items()}
         self._executor = ThreadPoolExecutor(max_workers=math.ceil(hw.get_cpu_monitor().cpu_count()))
+        self._batchers: dict[str, _InferenceBatcher] = {}
 
     def initialize(self, init_req: proto.InitializeRequest, client: _ProcClient) -> None:
         self._client = client
@@ -77,13 +79,26 @@ class _InferenceProc:
 
     @log_exceptions(logger=logger)
     async def entrypoint(self, cch: aio.ChanReceiver[Message]) -> None:
-        async for msg in cch:
-            if isinstance(msg, proto.InferenceRequest):
-                await self._handle_inference_request(msg)
+        for method, runner in self._runners.items():
+            if runner.MAX_BATCH_SIZE > 1:
+                self._batchers[method] = _InferenceBatcher(
+                    runner, executor=self._executor, client=self._client
+                )
 
-            if isinstance(msg, proto.ShutdownRequest):
-                await self._client.send(proto.Exiting(reason=msg.reason))
-                break
+        try:
+            async for msg in cch:
+                if isinstance(msg, proto.InferenceRequest):
+                    batcher = self._batchers.get(msg.method)
+                    if batcher is not None:
+                        batcher.push(msg)
+                    else:
+                        await self._handle_inference_request(msg)
+
+                if isinstance(msg, proto.ShutdownRequest):
+                    await self._client.send(proto.Exiting(reason=msg.reason))
+                    break
+        finally:
+            await asyncio.gather(*(batcher.aclose() for batcher in self._batchers.values()))
 
     async def _handle_inference_request(self, msg: proto.InferenceRequest) -> None:
         loop = asyncio.get_running_loop()
@@ -92,12 +107,105 @@ class _InferenceProc:
             logger.warning("unknown inference method", extra={"method": msg.method})
 
         try:
+            start_time = time.perf_counter()
             data = await loop.run_in_executor(
                 self._executor, self._runners[msg.method].run, msg.data
             )
+            metrics.inference_batch_completed(
+                method=msg.method, batch_size=1, time_elapsed=time.perf_counter() - start_time
+            )
             await self._client.send(proto.InferenceResponse(request_id=msg.request_id, data=data))
         except Exception as e:
             logger.exception("error running inference")
             await self._client.send(
                 proto.InferenceResponse(request_id=msg.request_id, error=str(e))
             )
+
+
+class _InferenceBatcher:
+    """Groups concurrent requests for the same runner into a single `run_batch` call.
+
+    A batch is dispatched as soon as MAX_BATCH_SIZE requests are pending or BATCH_WINDOW
+    has elapsed since the first request of the batch was received.
+    """
+
+    def __init__(
+        self, runner: _InferenceRunner, *, executor: ThreadPoolExecutor, client: _ProcClient
+    ) -> None:
+        self._runner = runner
+        self._method = runner.__class__.INFERENCE_METHOD
+        self._executor = executor
+        self._client = client
+        self._req_ch = aio.Chan[proto.InferenceRequest]()
+        self._main_atask = asyncio.create_task(self._main_task())
+
+    def push(self, req: proto.InferenceRequest) -> None:
+        self._req_ch.send_nowait(req)
+
+    async def aclose(self) -> None:
+        self._req_ch.close()
+        await aio.cancel_and_wait(self._main_atask)
+
+    async def _collect_batch(self, first: proto.InferenceRequest) -> list[proto.InferenceRequest]:
+        loop = asyncio.get_running_loop()
+        max_size = self._runner.MAX_BATCH_SIZE
+        deadline = loop.time() + self._runner.BATCH_WINDOW
+
+        batch = [first]
+        while len(batch) < max_size:
+            # always take the requests that queued up while the previous batch was running
+            if not self._req_ch.empty():
+                batch.append(self._req_ch.recv_nowait())
+                continue
+
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                break
+
+            try:
+                batch.append(await asyncio.wait_for(self._req_ch.recv(), timeout=remaining))
+            except (asyncio.TimeoutError, aio.ChanClosed):
+                break
+
+        return batch
+
+    @log_exceptions(logger=logger)
+    async def _main_task(self) -> None:
+        async for first in self._req_ch:
+            await self._run_batch(await self._collect_batch(first))
+
+    async def _run_batch(self, batch: list[proto.InferenceRequest]) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            start_time = time.perf_counter()
+            results = await loop.run_in_executor(
+                self._executor, self._runner.run_batch, [req.data for req in batch]
+            )
+            metrics.inference_batch_completed(
+                method=self._method,
+                batch_size=len(batch),
+                time_elapsed=time.perf_counter() - start_time,
+            )
+            if len(results) != len(batch):
+                raise RuntimeError(
+                    f"run_batch returned {len(results)} results for {len(batch)} requests"
+                )
+        except Exception as e:
+            if len(batch) > 1:
+                # the requests may come from different jobs, only fail the invalid ones
+                logger.warning(
+                    "error running batched inference, running the requests one by one",
+                    extra={"method": self._method, "error": str(e)},
+                )
+                for req in batch:
+                    await self._run_batch([req])
+                return
+
+            logger.exception("error running batched inference", extra={"method": self._method})
+            await self._client.send(
+                proto.InferenceResponse(request_id=batch[0].request_id, error=str(e))
+            )
+            return
+
+        for req, data in zip(batch, results):
+            await self._client.send(proto.InferenceResponse(request_id=req.request_id, data=data))
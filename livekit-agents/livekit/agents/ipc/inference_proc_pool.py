@@ -0,0 +1,221 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from multiprocessing.context import BaseContext
+from typing import Any
+
+import psutil
+
+from ..inference_runner import _RunnersDict
+from ..log import logger
+from ..telemetry import metrics
+from ..utils import aio, log_exceptions
+from ..utils.aio import duplex_unix
+from .inference_proc_executor import InferenceProcExecutor, InferenceProcExited
+from .proc_sampler import ProcSampler
+
+RESTART_BACKOFF = 1.0
+MAX_RESTART_BACKOFF = 30.0
+
+
+class InferenceProcPool:
+    """Spreads inference requests over several inference processes.
+
+    Each request is routed to the ready process with the fewest requests in flight.
+    Processes that exit are restarted in the background, the requests that were in
+    flight on them are retried on the remaining processes.
+    """
+
+    def __init__(
+        self,
+        *,
+        runners: _RunnersDict,
+        num_processes: int,
+        cpu_affinity: bool,
+        initialize_timeout: float,
+        close_timeout: float,
+        memory_warn_mb: float,
+        memory_limit_mb: float,
+        ping_interval: float,
+        ping_timeout: float,
+        high_ping_threshold: float,
+        mp_ctx: BaseContext,
+        loop: asyncio.AbstractEventLoop,
+        http_proxy: str | None,
+        shm_size: int = 0,
+        proc_sampler: ProcSampler | None = None,
+    ) -> None:
+        if num_processes < 1:
+            raise ValueError("num_processes must be at least 1")
+
+        self._runners = runners
+        self._num_processes = num_processes
+        self._cpu_affinity = cpu_affinity and num_processes > 1
+        self._exec_kwargs: dict[str, Any] = {
+            "initialize_timeout": initialize_timeout,
+            "close_timeout": close_timeout,
+            "memory_warn_mb": memory_warn_mb,
+            "memory_limit_mb": memory_limit_mb,
+            "ping_interval": ping_interval,
+            "ping_timeout": ping_timeout,
+            "high_ping_threshold": high_ping_threshold,
+            "mp_ctx": mp_ctx,
+            "loop": loop,
+            "http_proxy": http_proxy,
+            "shm_size": shm_size,
+            "proc_sampler": proc_sampler,
+        }
+
+        self._executors: list[InferenceProcExecutor | None] = [None] * num_processes
+        self._ready: list[bool] = [False] * num_processes
+        self._monitor_tasks: list[asyncio.Task[None]] = []
+        self._started = False
+        self._closing = False
+
+    @property
+    def num_processes(self) -> int:
+        return self._num_processes
+
+    def queue_depths(self) -> list[int]:
+        """number of in-flight requests for each inference process"""
+        return [
+            ex.num_inflight if ex is not None and ready else 0
+            for ex, ready in zip(self._executors, self._ready)
+        ]
+
+    def is_alive(self) -> bool:
+        return any(
+            ex is not None and ready and ex.is_alive()
+            for ex, ready in zip(self._executors, self._ready)
+        )
+
+    async def start(self) -> None:
+        if self._started:
+            raise RuntimeError("pool already started")
+
+        self._started = True
+        for index in range(self._num_processes):
+            self._executors[index] = await self._spawn(index)
+
+    async def initialize(self) -> None:
+        """initialize every process, raises if none of them could be initialized"""
+        results = await asyncio.gather(
+            *(self._initialize(index) for index in range(self._num_processes)),
+            return_exceptions=True,
+        )
+
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(results):
+            raise errors[0]
+
+        self._monitor_tasks = [
+            asyncio.create_task(self._monitor_task(index)) for index in range(self._num_processes)
+        ]
+
+    async def aclose(self) -> None:
+        if not self._started:
+            return
+
+        self._closing = True
+        await aio.cancel_and_wait(*self._monitor_tasks)
+        await asyncio.gather(*(ex.aclose() for ex in self._executors if ex is not None))
+
+    async def do_inference(self, method: str, data: bytes) -> bytes | None:
+        tried: set[int] = set()
+        while True:
+            index = self._select(exclude=tried)
+            if index is None:
+                raise RuntimeError("no inference process available")
+
+            executor = self._executors[index]
+            assert executor is not None
+
+            self._update_queue_depth(index, executor.num_inflight + 1)
+            try:
+                return await executor.do_inference(method, data)
+            except (InferenceProcExited, duplex_unix.DuplexClosed):
+                # the process crashed while handling the request, retry it on another one
+                logger.warning(
+                    "inference process exited with requests in flight, retrying",
+                    extra={"method": method, "index": index},
+                )
+                tried.add(index)
+            finally:
+                self._update_queue_depth(index, executor.num_inflight)
+
+    def _select(self, *, exclude: set[int]) -> int | None:
+        best: int | None = None
+        best_inflight = 0
+        for index, (executor, ready) in enumerate(zip(self._executors, self._ready)):
+            if executor is None or not ready or index in exclude:
+                continue
+
+            if best is None or executor.num_inflight < best_inflight:
+                best, best_inflight = index, executor.num_inflight
+
+        return best
+
+    def _update_queue_depth(self, index: int, depth: int) -> None:
+        metrics._update_inference_queue_depth(index=index, depth=depth)
+
+    async def _spawn(self, index: int) -> InferenceProcExecutor:
+        executor = InferenceProcExecutor(runners=self._runners, **self._exec_kwargs)
+        await executor.start()
+
+        if self._cpu_affinity and executor.pid is not None:
+            self._pin_process(index, executor.pid)
+
+        return executor
+
+    async def _initialize(self, index: int) -> None:
+        executor = self._executors[index]
+        assert executor is not None
+
+        await executor.initialize()
+        self._ready[index] = True
+
+    def _pin_process(self, index: int, pid: int) -> None:
+        try:
+            proc = psutil.Process(pid)
+            cpus = proc.cpu_affinity()
+            if not cpus or len(cpus) < self._num_processes:
+                return
+
+            # give each process a disjoint slice of the available cpus
+            per_proc = len(cpus) // self._num_processes
+            proc.cpu_affinity(cpus[index * per_proc : (index + 1) * per_proc])
+        except (AttributeError, psutil.Error):
+            # cpu_affinity isn't supported on macOS
+            logger.debug("failed to set inference process cpu affinity", exc_info=True)
+
+    @log_exceptions(logger=logger)
+    async def _monitor_task(self, index: int) -> None:
+        num_failures = 0
+        while not self._closing:
+            executor = self._executors[index]
+            if executor is not None and self._ready[index]:
+                await executor.join()
+
+            self._ready[index] = False
+            self._update_queue_depth(index, 0)
+            if self._closing:
+                break
+
+            logger.warning(
+                "inference process not running, restarting",
+                extra={"index": index, "exitcode": executor.exitcode if executor else None},
+            )
+            await asyncio.sleep(min(RESTART_BACKOFF * 2**num_failures, MAX_RESTART_BACKOFF))
+
+            with contextlib.suppress(Exception):
+                if executor is not None:
+                    await executor.aclose()
+
+            try:
+                self._executors[index] = await self._spawn(index)
+                await self._initialize(index)
+                num_failures = 0
+            except Exception:
+                logger.exception("failed to restart inference process", extra={"index": index})
+                num_failures += 1
@@ -3,6 +3,7 @@ from __future__ import annotations
 import asyncio
 import multiprocessing as mp
 import socket
+import time
 from collections.abc import Awaitable
 from multiprocessing.context import BaseContext
 from typing import Any, Callable
@@ -15,6 +16,7 @@ from . import channel, proto
 from .inference_executor import InferenceExecutor
 from .job_executor import JobStatus
 from .job_proc_lazy_main import ProcStartArgs, proc_main
+from .proc_sampler import ProcSampler
 from .supervised_proc import SupervisedProc
 
 
@@ -36,6 +38,9 @@ class ProcJobExecutor(SupervisedProc):
         http_proxy: str | None,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        on_job_completed: Callable[[ProcJobExecutor], None] | None = None,
+        on_job_started: Callable[[str], None] | None = None,
+        proc_sampler: ProcSampler | None = None,
     ) -> None:
         super().__init__(
             initialize_timeout=initialize_timeout,
@@ -48,6 +53,7 @@ class ProcJobExecutor(SupervisedProc):
             mp_ctx=mp_ctx,
             loop=loop,
             http_proxy=http_proxy,
+            proc_sampler=proc_sampler,
         )
 
         self._user_args: Any | None = None
@@ -59,6 +65,12 @@ class ProcJobExecutor(SupervisedProc):
         self._inference_executor = inference_executor
         self._inference_tasks: list[asyncio.Task[None]] = []
         self._id = shortuuid("PCEXEC_")
+        # when set, the process stays alive after a job ended cleanly so it can be reused
+        self._on_job_completed = on_job_completed
+        # called with the id of the job once its entrypoint is entered
+        self._on_job_started = on_job_started
+        self._jobs_completed = 0
+        self._started_at: float | None = None
 
     @property
     def id(self) -> str:
@@ -83,6 +95,28 @@ class ProcJobExecutor(SupervisedProc):
     def running_job(self) -> RunningJobInfo | None:
         return self._running_job
 
+    @property
+    def jobs_completed(self) -> int:
+        """number of jobs that ended cleanly on this process (only counted when reused)"""
+        return self._jobs_completed
+
+    @property
+    def age(self) -> float:
+        """seconds since the process was started"""
+        if self._started_at is None:
+            return 0.0
+
+        return time.monotonic() - self._started_at
+
+    async def _start(self) -> None:
+        self._started_at = time.monotonic()
+        await super()._start()
+
+    def _initialize_request(self) -> proto.InitializeRequest:
+        init_req = super()._initialize_request()
+        init_req.reuse_process = self._on_job_completed is not None
+        return init_req
+
     def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process:
         proc_args = ProcStartArgs(
             initialize_process_fnc=self._initialize_process_fnc,
@@ -103,6 +137,11 @@ class ProcJobExecutor(SupervisedProc):
             async for msg in ipc_ch:
                 if isinstance(msg, proto.InferenceRequest):
                     self._inference_tasks.append(asyncio.create_task(self._do_inference_task(msg)))
+                elif isinstance(msg, proto.JobCompleted):
+                    self._job_completed()
+                elif isinstance(msg, proto.JobStarted):
+                    if self._on_job_started is not None:
+                        self._on_job_started(msg.job_id)
         finally:
             await aio.cancel_and_wait(*self._inference_tasks)
 
@@ -115,6 +154,19 @@ class ProcJobExecutor(SupervisedProc):
                 metrics.job_ended()
                 self._job_status = JobStatus.SUCCESS if self.exitcode == 0 else JobStatus.FAILED
 
+    def _job_completed(self) -> None:
+        if self._running_job is None:
+            logger.warning("job completed without a running job", extra=self.logging_extra())
+            return
+
+        metrics.job_ended()
+        self._job_status = JobStatus.SUCCESS
+        self._jobs_completed += 1
+        if self._on_job_completed is not None:
+            self._on_job_completed(self)
+
+        self._running_job = None
+
     async def _do_inference_task(self, inf_req: proto.InferenceRequest) -> None:
         if self._inference_executor is None:
             logger.warning("inference request received but no inference executor")
@@ -154,6 +206,9 @@ class ProcJobExecutor(SupervisedProc):
         start_req.running_job = info
         await channel.asend_message(self._pch, start_req)
 
+    def _metrics_job_id(self) -> str:
+        return self._running_job.job.id if self._running_job else ""
+
     def logging_extra(self) -> dict[str, Any]:
         extra = super().logging_extra()
 
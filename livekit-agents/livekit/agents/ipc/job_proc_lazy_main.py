@@ -12,7 +12,9 @@ if current_process().name == "job_proc":
 import asyncio
 import contextlib
 import socket
+import threading
 from collections.abc import Awaitable
+from concurrent.futures.thread import _threads_queues
 from dataclasses import dataclass
 from typing import Any, Callable, cast
 
@@ -32,6 +34,8 @@ from .proto import (
     InferenceRequest,
     InferenceResponse,
     InitializeRequest,
+    JobCompleted,
+    JobStarted,
     ShutdownRequest,
     StartJobRequest,
 )
@@ -45,6 +49,7 @@ class ProcStartArgs:
     mp_cch: socket.socket
     log_cch: socket.socket
     user_arguments: Any | None = None
+    shared: bool = False  # host several jobs (JobExecutorType.SHARED_PROCESS)
 
 
 def proc_main(args: ProcStartArgs) -> None:
@@ -60,13 +65,22 @@ def proc_main(args: ProcStartArgs) -> None:
     log_handler = LogQueueHandler(log_cch)
     root_logger.addHandler(log_handler)
 
-    job_proc = _JobProc(
-        args.initialize_process_fnc,
-        args.job_entrypoint_fnc,
-        args.session_end_fnc,
-        JobExecutorType.PROCESS,
-        args.user_arguments,
-    )
+    job_proc: _JobProc | _SharedJobProc
+    if args.shared:
+        job_proc = _SharedJobProc(
+            args.initialize_process_fnc,
+            args.job_entrypoint_fnc,
+            args.session_end_fnc,
+            args.user_arguments,
+        )
+    else:
+        job_proc = _JobProc(
+            args.initialize_process_fnc,
+            args.job_entrypoint_fnc,
+            args.session_end_fnc,
+            JobExecutorType.PROCESS,
+            args.user_arguments,
+        )
 
     client = _ProcClient(args.mp_cch, args.log_cch, job_proc.initialize, job_proc.entrypoint)
     try:
@@ -166,6 +180,14 @@ class _JobProc:
         self._job_entrypoint_fnc = job_entrypoint_fnc
         self._session_end_fnc = session_end_fnc
         self._job_task: asyncio.Task[None] | None = None
+        self._job_entry_task: asyncio.Task[None] | None = None
+        self._reuse_process = False
+        # set at the end of a job when nothing it started is left running
+        self._job_clean = False
+        self._job_completed_task: asyncio.Task[None] | None = None
+        # the tasks and threads of the process when the job started, the job must not leave others
+        self._proc_tasks: set[asyncio.Task[Any]] = set()
+        self._proc_threads: set[threading.Thread] = set()
 
         # used to warn users if both connect and shutdown are not called inside the job_entry
         self._ctx_connect_called = False
@@ -183,6 +205,7 @@ class _JobProc:
             user_arguments=self._user_arguments,
             http_proxy=init_req.http_proxy or None,
         )
+        self._reuse_process = init_req.reuse_process
         self._initialize_process_fnc(self._job_proc)
 
     @log_exceptions(logger=logger)
@@ -218,6 +241,14 @@ class _JobProc:
         await aio.cancel_and_wait(read_task)
 
     def _start_job(self, msg: StartJobRequest) -> None:
+        # the process may have run other jobs before this one
+        self._shutdown_fut = asyncio.Future()
+        self._ctx_connect_called = False
+        self._ctx_shutdown_called = False
+        self._job_clean = False
+        self._proc_tasks = asyncio.all_tasks()
+        self._proc_threads = set(threading.enumerate())
+
         if msg.running_job.fake_job:
             from .mock_room import create_mock_room
 
@@ -252,11 +283,28 @@ class _JobProc:
             inference_executor=self._inf_client,
         )
 
-        def _exit_proc_cb(_: asyncio.Task[None]) -> None:
-            self._exit_proc_flag.set()
-
         self._job_task = asyncio.create_task(self._run_job_task(), name="job_task")
-        self._job_task.add_done_callback(_exit_proc_cb)
+        self._job_task.add_done_callback(self._on_job_done)
+
+    def _on_job_done(self, task: asyncio.Task[None]) -> None:
+        if (
+            self._reuse_process
+            and self._job_clean
+            and not task.cancelled()
+            and task.exception() is None
+        ):
+            # wait for the next job, the main process decides whether it reuses us
+            self._job_task = None
+            self._job_completed_task = asyncio.create_task(self._client.send(JobCompleted()))
+            return
+
+        self._exit_proc_flag.set()
+
+    def _on_entrypoint_error(self) -> None:
+        pass
+
+    def _exiting_message(self, reason: str) -> Exiting:
+        return Exiting(reason=reason)
 
     @log_exceptions(logger=logger)
     async def _run_job_task(self) -> None:
@@ -272,11 +320,13 @@ class _JobProc:
             current_span.set_attribute(trace_types.ATTR_JOB_ID, job.id)
             current_span.set_attribute(trace_types.ATTR_AGENT_NAME, job.agent_name)
             current_span.set_attribute(trace_types.ATTR_ROOM_NAME, job.room.name)
+            await self._client.send(JobStarted(job_id=job.id))
             await self._job_entrypoint_fnc(job_ctx)
 
         job_entry_task = asyncio.create_task(
             _traceable_entrypoint(self._job_ctx), name="job_user_entrypoint"
         )
+        self._job_entry_task = job_entry_task
 
         async def _warn_not_connected_task() -> None:
             if self._job_ctx.is_fake_job():
@@ -298,6 +348,7 @@ class _JobProc:
                     "unhandled exception while running the job task",
                     exc_info=t.exception(),
                 )
+                self._on_entrypoint_error()
             elif not self._ctx_connect_called and not self._ctx_shutdown_called:
                 if self._job_ctx.is_fake_job():
                     return
@@ -327,7 +378,7 @@ class _JobProc:
             "shutting down job task",
             extra={"reason": shutdown_info.reason, "user_initiated": shutdown_info.user_initiated},
         )
-        await self._client.send(Exiting(reason=shutdown_info.reason))
+        await self._client.send(self._exiting_message(shutdown_info.reason))
         await self._room.disconnect()
 
         try:
@@ -347,6 +398,178 @@ class _JobProc:
         await http_context._close_http_ctx()
         _JobContextVar.reset(job_ctx_token)
 
+        self._job_clean = (
+            job_entry_task.done()
+            and not job_entry_task.cancelled()
+            and job_entry_task.exception() is None
+            and self._reuse_process
+            and not self._has_leftovers()
+        )
+
+    def _has_leftovers(self) -> bool:
+        """whether the job left tasks or threads running, they would leak into the next job"""
+        tasks = [
+            task
+            for task in asyncio.all_tasks()
+            if task not in self._proc_tasks and task is not asyncio.current_task()
+        ]
+        threads = [
+            t
+            for t in threading.enumerate()
+            if t not in self._proc_threads and not t.daemon and t not in _threads_queues
+        ]
+        if not tasks and not threads:
+            return False
+
+        logger.warning(
+            "the job left tasks or threads running, the process won't be reused",
+            extra={
+                "tasks": [task.get_name() for task in tasks],
+                "threads": [t.name for t in threads],
+            },
+        )
+        return True
+
+
+class _HostedJob(_JobProc):
+    """a job running alongside others on the event loop of a _SharedJobProc"""
+
+    def __init__(self, host: _SharedJobProc) -> None:
+        super().__init__(
+            host._initialize_process_fnc,
+            host._job_entrypoint_fnc,
+            host._session_end_fnc,
+            JobExecutorType.SHARED_PROCESS,
+            host._user_arguments,
+        )
+        self._host = host
+        self._client = host._client
+        self._inf_client = host._inf_client
+        self._job_proc = host._job_proc
+        self._error = ""
+        self._shutdown_requested = False
+
+    @property
+    def job_id(self) -> str:
+        return self._job_ctx.job.id
+
+    def shutdown(self, reason: str, *, cancel: bool = True) -> None:
+        """request the job to shut down, a second request cancels it"""
+        if self._shutdown_requested:
+            if cancel:
+                logger.warning(
+                    "job didn't shut down in time, cancelling it", extra={"job_id": self.job_id}
+                )
+                self._error = "job cancelled"
+                for task in (self._job_entry_task, self._job_task):
+                    if task is not None:
+                        task.cancel()
+            return
+
+        self._shutdown_requested = True
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._shutdown_fut.set_result(_ShutdownInfo(reason=reason, user_initiated=False))
+
+    def _on_entrypoint_error(self) -> None:
+        # free the slot, the other jobs of the process keep running
+        self._error = "entrypoint failed"
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._shutdown_fut.set_result(
+                _ShutdownInfo(reason="entrypoint failed", user_initiated=False)
+            )
+
+    def _on_job_done(self, task: asyncio.Task[None]) -> None:
+        error = self._error
+        if not error and (task.cancelled() or task.exception() is not None):
+            error = "job task failed"
+
+        self._host._on_job_done(self, error)
+
+    def _exiting_message(self, reason: str) -> Exiting:
+        return Exiting(reason=reason, job_id=self.job_id)
+
+
+class _SharedJobProc:
+    """Runs several jobs on the event loop of a single process.
+
+    The jobs share the JobProcess, so the models loaded by initialize_process_fnc in its userdata
+    are loaded once. A job that fails is shut down (or cancelled if it doesn't complete) without
+    affecting the others, the main process is told about it with a JobCompleted message.
+    """
+
+    def __init__(
+        self,
+        initialize_process_fnc: Callable[[JobProcess], Any],
+        job_entrypoint_fnc: Callable[[JobContext], Any],
+        session_end_fnc: Callable[[JobContext], Awaitable[None]] | None,
+        user_arguments: Any | None = None,
+    ) -> None:
+        self._initialize_process_fnc = initialize_process_fnc
+        self._job_entrypoint_fnc = job_entrypoint_fnc
+        self._session_end_fnc = session_end_fnc
+        self._user_arguments = user_arguments
+        self._jobs: dict[str, _HostedJob] = {}
+        self._send_tasks: set[asyncio.Task[None]] = set()
+        self._closing = False
+
+    def initialize(self, init_req: InitializeRequest, client: _ProcClient) -> None:
+        self._client = client
+        self._inf_client = _InfClient(client)
+        self._job_proc = JobProcess(
+            executor_type=JobExecutorType.SHARED_PROCESS,
+            user_arguments=self._user_arguments,
+            http_proxy=init_req.http_proxy or None,
+        )
+        self._initialize_process_fnc(self._job_proc)
+
+    @log_exceptions(logger=logger)
+    async def entrypoint(self, cch: aio.ChanReceiver[Message]) -> None:
+        self._exit_proc_flag = asyncio.Event()
+
+        @log_exceptions(logger=logger)
+        async def _read_ipc_task() -> None:
+            async for msg in cch:
+                if isinstance(msg, StartJobRequest):
+                    if self._closing:
+                        logger.warning("trying to start a new job while the process is closing")
+                        continue
+
+                    job = _HostedJob(self)
+                    job._start_job(msg)
+                    self._jobs[job.job_id] = job
+
+                if isinstance(msg, ShutdownRequest):
+                    if msg.job_id:
+                        if hosted := self._jobs.get(msg.job_id):
+                            hosted.shutdown(msg.reason)
+                        continue
+
+                    self._closing = True
+                    if not self._jobs:
+                        self._exit_proc_flag.set()
+                        break  # exit immediately
+
+                    for job in list(self._jobs.values()):
+                        job.shutdown(msg.reason, cancel=False)
+
+                if isinstance(msg, InferenceResponse):
+                    self._inf_client._on_inference_response(msg)
+
+        read_task = asyncio.create_task(_read_ipc_task(), name="job_ipc_read")
+
+        await self._exit_proc_flag.wait()
+        await asyncio.gather(*self._send_tasks, return_exceptions=True)
+        await aio.cancel_and_wait(read_task)
+
+    def _on_job_done(self, job: _HostedJob, error: str) -> None:
+        self._jobs.pop(job.job_id, None)
+        task = asyncio.create_task(self._client.send(JobCompleted(job_id=job.job_id, error=error)))
+        self._send_tasks.add(task)
+        task.add_done_callback(self._send_tasks.discard)
+
+        if self._closing and not self._jobs:
+            self._exit_proc_flag.set()
+
 
 @dataclass
 class ThreadStartArgs:
@@ -0,0 +1,314 @@
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import multiprocessing as mp
+import socket
+from collections.abc import Awaitable
+from multiprocessing.context import BaseContext
+from typing import Any, Callable
+
+from ..job import JobContext, JobProcess, RunningJobInfo
+from ..log import logger
+from ..telemetry import metrics
+from ..utils import aio, log_exceptions, shortuuid
+from ..utils.aio import duplex_unix
+from . import channel, proto
+from .inference_executor import InferenceExecutor
+from .job_executor import JobStatus
+from .job_proc_lazy_main import ProcStartArgs, proc_main
+from .proc_sampler import ProcSampler
+from .supervised_proc import SupervisedProc
+
+
+class SharedJobProcess(SupervisedProc):
+    """A job process hosting up to max_jobs jobs on its event loop.
+
+    Each job launched on the process is exposed as a SharedProcJobExecutor. A job can be closed
+    (and cancelled if it doesn't complete in time) without affecting the other jobs, they all
+    end with the process if it crashes.
+    """
+
+    def __init__(
+        self,
+        *,
+        initialize_process_fnc: Callable[[JobProcess], Any],
+        job_entrypoint_fnc: Callable[[JobContext], Awaitable[None]],
+        session_end_fnc: Callable[[JobContext], Awaitable[None]] | None,
+        inference_executor: InferenceExecutor | None,
+        max_jobs: int,
+        initialize_timeout: float,
+        close_timeout: float,
+        memory_warn_mb: float,
+        memory_limit_mb: float,
+        ping_interval: float,
+        ping_timeout: float,
+        high_ping_threshold: float,
+        http_proxy: str | None,
+        mp_ctx: BaseContext,
+        loop: asyncio.AbstractEventLoop,
+        on_job_ended: Callable[[SharedProcJobExecutor], None] | None = None,
+        on_job_started: Callable[[str], None] | None = None,
+        proc_sampler: ProcSampler | None = None,
+    ) -> None:
+        super().__init__(
+            initialize_timeout=initialize_timeout,
+            close_timeout=close_timeout,
+            memory_warn_mb=memory_warn_mb,
+            memory_limit_mb=memory_limit_mb,
+            ping_interval=ping_interval,
+            ping_timeout=ping_timeout,
+            high_ping_threshold=high_ping_threshold,
+            mp_ctx=mp_ctx,
+            loop=loop,
+            http_proxy=http_proxy,
+            proc_sampler=proc_sampler,
+        )
+
+        if max_jobs < 1:
+            raise ValueError("max_jobs must be at least 1")
+
+        self._user_args: Any | None = None
+        self._initialize_process_fnc = initialize_process_fnc
+        self._job_entrypoint_fnc = job_entrypoint_fnc
+        self._session_end_fnc = session_end_fnc
+        self._inference_executor = inference_executor
+        self._inference_tasks: list[asyncio.Task[None]] = []
+        self._max_jobs = max_jobs
+        self._jobs: dict[str, SharedProcJobExecutor] = {}
+        self._jobs_launched = 0
+        self._on_job_ended = on_job_ended
+        # called with the id of a job once its entrypoint is entered
+        self._on_job_started = on_job_started
+        self._id = shortuuid("SPPROC_")
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def user_arguments(self) -> Any | None:
+        return self._user_args
+
+    @user_arguments.setter
+    def user_arguments(self, value: Any | None) -> None:
+        self._user_args = value
+
+    @property
+    def running_job(self) -> RunningJobInfo | None:
+        # the jobs are exposed by their SharedProcJobExecutor
+        return None
+
+    @property
+    def max_jobs(self) -> int:
+        return self._max_jobs
+
+    @property
+    def num_jobs(self) -> int:
+        return len(self._jobs)
+
+    @property
+    def jobs_launched(self) -> int:
+        return self._jobs_launched
+
+    @property
+    def ready(self) -> bool:
+        """initialized, and neither closing nor exited"""
+        return (
+            self._initialize_fut.done()
+            and self._initialize_fut.exception() is None
+            and not self._closing
+            and self._exitcode is None
+        )
+
+    def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process:
+        proc_args = ProcStartArgs(
+            initialize_process_fnc=self._initialize_process_fnc,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            session_end_fnc=self._session_end_fnc,
+            log_cch=log_cch,
+            mp_cch=cch,
+            user_arguments=self._user_args,
+            shared=True,
+        )
+
+        return self._mp_ctx.Process(  # type: ignore
+            target=proc_main, args=(proc_args,), name="job_proc"
+        )
+
+    @log_exceptions(logger=logger)
+    async def _main_task(self, ipc_ch: aio.ChanReceiver[channel.Message]) -> None:
+        try:
+            async for msg in ipc_ch:
+                if isinstance(msg, proto.InferenceRequest):
+                    self._inference_tasks.append(asyncio.create_task(self._do_inference_task(msg)))
+                elif isinstance(msg, proto.JobCompleted):
+                    executor = self._jobs.get(msg.job_id)
+                    if executor is None:
+                        logger.warning(
+                            "unknown job completed",
+                            extra={"job_id": msg.job_id, **self.logging_extra()},
+                        )
+                        continue
+
+                    if msg.error:
+                        logger.error(
+                            "job failed",
+                            extra={"error": msg.error, **executor.logging_extra()},
+                        )
+
+                    self._job_ended(executor, JobStatus.FAILED if msg.error else JobStatus.SUCCESS)
+                elif isinstance(msg, proto.JobStarted):
+                    if self._on_job_started is not None:
+                        self._on_job_started(msg.job_id)
+        finally:
+            await aio.cancel_and_wait(*self._inference_tasks)
+
+    @log_exceptions(logger=logger)
+    async def _supervise_task(self) -> None:
+        try:
+            await super()._supervise_task()
+        finally:
+            # the jobs still running went down with the process
+            for executor in list(self._jobs.values()):
+                self._job_ended(executor, JobStatus.FAILED)
+
+    async def _do_inference_task(self, inf_req: proto.InferenceRequest) -> None:
+        if self._inference_executor is None:
+            logger.warning("inference request received but no inference executor")
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(
+                    request_id=inf_req.request_id, error="no inference executor"
+                ),
+            )
+            return
+
+        try:
+            inf_res = await self._inference_executor.do_inference(inf_req.method, inf_req.data)
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(request_id=inf_req.request_id, data=inf_res),
+            )
+        except Exception as e:
+            await channel.asend_message(
+                self._pch,
+                proto.InferenceResponse(request_id=inf_req.request_id, error=str(e)),
+            )
+
+    async def launch_job(self, info: RunningJobInfo) -> SharedProcJobExecutor:
+        """start a job on the process, the slot is taken before the first await"""
+        if not self.ready:
+            raise RuntimeError("process not ready")
+
+        if len(self._jobs) >= self._max_jobs:
+            raise RuntimeError("process already hosts max_jobs jobs")
+
+        executor = SharedProcJobExecutor(self, info)
+        self._jobs[info.job.id] = executor
+        self._jobs_launched += 1
+        metrics.job_started()
+
+        start_req = proto.StartJobRequest()
+        start_req.running_job = info
+        await channel.asend_message(self._pch, start_req)
+        return executor
+
+    async def _close_job(self, executor: SharedProcJobExecutor) -> None:
+        # the second request cancels the job inside the process
+        for attempt in range(2):
+            with contextlib.suppress(duplex_unix.DuplexClosed):
+                await channel.asend_message(
+                    self._pch, proto.ShutdownRequest(job_id=executor.running_job.job.id)
+                )
+
+            try:
+                await asyncio.wait_for(executor.join(), timeout=self._opts.close_timeout)
+                return
+            except asyncio.TimeoutError:
+                if attempt == 0:
+                    logger.error(
+                        "job did not exit in time, cancelling it", extra=executor.logging_extra()
+                    )
+
+        logger.error("job did not exit after being cancelled", extra=executor.logging_extra())
+
+    def _job_ended(self, executor: SharedProcJobExecutor, status: JobStatus) -> None:
+        self._jobs.pop(executor.running_job.job.id, None)
+        metrics.job_ended()
+        executor._set_ended(status)
+        if self._on_job_ended is not None:
+            self._on_job_ended(executor)
+
+    def logging_extra(self) -> dict[str, Any]:
+        extra = super().logging_extra()
+        extra["num_jobs"] = len(self._jobs)
+        return extra
+
+
+class SharedProcJobExecutor:
+    """JobExecutor of a job running on a SharedJobProcess"""
+
+    def __init__(self, proc: SharedJobProcess, info: RunningJobInfo) -> None:
+        self._proc = proc
+        self._running_job = info
+        self._job_status = JobStatus.RUNNING
+        self._done_fut = asyncio.Future[None]()
+        self._id = shortuuid("SPEXEC_")
+
+    @property
+    def id(self) -> str:
+        return self._id
+
+    @property
+    def process(self) -> SharedJobProcess:
+        return self._proc
+
+    @property
+    def started(self) -> bool:
+        return True
+
+    @property
+    def user_arguments(self) -> Any | None:
+        return self._proc.user_arguments
+
+    @user_arguments.setter
+    def user_arguments(self, value: Any | None) -> None:
+        raise RuntimeError("the user arguments are set on the SharedJobProcess")
+
+    @property
+    def running_job(self) -> RunningJobInfo:
+        return self._running_job
+
+    @property
+    def status(self) -> JobStatus:
+        return self._job_status
+
+    async def start(self) -> None:
+        pass  # started by SharedJobProcess.launch_job
+
+    async def join(self) -> None:
+        await asyncio.shield(self._done_fut)
+
+    async def initialize(self) -> None:
+        pass
+
+    async def aclose(self) -> None:
+        if self._done_fut.done():
+            return
+
+        await self._proc._close_job(self)
+
+    async def launch_job(self, info: RunningJobInfo) -> None:
+        raise RuntimeError("jobs are launched with SharedJobProcess.launch_job")
+
+    def _set_ended(self, status: JobStatus) -> None:
+        self._job_status = status
+        with contextlib.suppress(asyncio.InvalidStateError):
+            self._done_fut.set_result(None)
+
+    def logging_extra(self) -> dict[str, Any]:
+        extra = self._proc.logging_extra()
+        extra["job_id"] = self._running_job.job.id
+        extra["room_id"] = self._running_job.job.room.sid
+        return extra
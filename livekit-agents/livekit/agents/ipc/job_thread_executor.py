@@ -44,6 +44,7 @@ class ThreadJobExecutor:
         high_ping_threshold: float,
         http_proxy: str | None,
         loop: asyncio.AbstractEventLoop,
+        on_job_started: Callable[[str], None] | None = None,
     ) -> None:
         self._loop = loop
         self._opts = _ProcOpts(
@@ -68,6 +69,8 @@ class ThreadJobExecutor:
 
         self._inference_executor = inference_executor
         self._inference_tasks: list[asyncio.Task[None]] = []
+        # called with the id of the job once its entrypoint is entered
+        self._on_job_started = on_job_started
         self._id = utils.shortuuid("THEXEC_")
 
     @property
@@ -284,6 +287,9 @@ class ThreadJobExecutor:
             if isinstance(msg, proto.InferenceRequest):
                 self._inference_tasks.append(asyncio.create_task(self._do_inference_task(msg)))
 
+            if isinstance(msg, proto.JobStarted) and self._on_job_started is not None:
+                self._on_job_started(msg.job_id)
+
     @utils.log_exceptions(logger=logger)
     async def _ping_task(self) -> None:
         ping_interval = utils.aio.interval(self._opts.ping_interval)
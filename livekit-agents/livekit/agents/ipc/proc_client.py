@@ -31,6 +31,7 @@ class _ProcClient:
         self._initialize_fnc = initialize_fnc
         self._main_task_fnc = main_task_fnc
         self._initialized = False
+        self._shm_rings: tuple[aio.duplex_shm._ShmRing, aio.duplex_shm._ShmRing] | None = None
 
     def initialize(self) -> None:
         try:
@@ -43,6 +44,12 @@ class _ProcClient:
 
             self._init_req = first_req
             try:
+                if first_req.shm_send_name and first_req.shm_recv_name:
+                    self._shm_rings = (
+                        aio.duplex_shm._ShmRing.attach(first_req.shm_send_name),
+                        aio.duplex_shm._ShmRing.attach(first_req.shm_recv_name),
+                    )
+
                 self._initialize_fnc(self._init_req, self)
                 send_message(cch, InitializeResponse())
             except Exception as e:
@@ -83,6 +90,11 @@ class _ProcClient:
 
     async def _monitor_task(self) -> None:
         self._acch = await aio.duplex_unix._AsyncDuplex.open(self._mp_cch)
+        if self._shm_rings is not None:
+            self._acch = aio.duplex_shm._AsyncShmDuplex(
+                self._acch, send_ring=self._shm_rings[0], recv_ring=self._shm_rings[1]
+            )
+
         try:
             exit_flag = asyncio.Event()
             ping_timeout = aio.sleep(self._init_req.ping_timeout + 10)
@@ -143,3 +155,6 @@ class _ProcClient:
 
         finally:
             await self._acch.aclose()
+            if self._shm_rings is not None:
+                for ring in self._shm_rings:
+                    ring.close()
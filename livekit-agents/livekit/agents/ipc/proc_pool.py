@@ -2,17 +2,25 @@ from __future__ import annotations
 
 import asyncio
 import math
-from collections.abc import Awaitable
+import time
+from collections.abc import Awaitable, Coroutine
 from multiprocessing.context import BaseContext
 from typing import Any, Callable, Literal
 
 from .. import utils
 from ..job import JobContext, JobExecutorType, JobProcess, RunningJobInfo
 from ..log import logger
+from ..telemetry import metrics
 from ..utils import aio
-from ..utils.hw.cpu import get_cpu_monitor
-from . import inference_executor, job_proc_executor, job_thread_executor
-from .job_executor import JobExecutor
+from ..utils.hw import MemoryMonitor, get_cpu_monitor
+from . import (
+    inference_executor,
+    job_proc_executor,
+    job_shared_proc_executor,
+    job_thread_executor,
+)
+from .job_executor import JobExecutor, JobStatus
+from .proc_sampler import ProcSampler
 
 EventTypes = Literal[
     "process_created",
@@ -20,10 +28,60 @@ EventTypes = Literal[
     "process_ready",
     "process_closed",
     "process_job_launched",
+    "process_job_completed",
 ]
 
 MAX_CONCURRENT_INITIALIZATIONS = min(math.ceil(get_cpu_monitor().cpu_count()), 4)
 
+ARRIVAL_RATE_HALF_LIFE = 15.0  # seconds
+# fraction of the memory limit (of the cgroup when set) the predictive scaler leaves free
+MEMORY_RESERVE = 0.1
+
+
+class _IdleProcessPredictor:
+    """Estimates the number of warm processes needed to absorb the jobs arriving while a new
+    process is started and initialized."""
+
+    def __init__(self, *, half_life: float = ARRIVAL_RATE_HALF_LIFE) -> None:
+        self._half_life = half_life
+        self._arrival_rate = 0.0
+        self._num_arrivals = 0
+        self._last_update = time.monotonic()
+        self._init_time: float | None = None
+
+    @property
+    def arrival_rate(self) -> float:
+        """EWMA of the job arrivals per second"""
+        return self._arrival_rate
+
+    @property
+    def init_time(self) -> float:
+        """EWMA of the time from the process start until it is ready to take a job"""
+        return self._init_time or 0.0
+
+    def job_arrived(self) -> None:
+        self._num_arrivals += 1
+
+    def proc_initialized(self, time_elapsed: float) -> None:
+        if self._init_time is None:
+            self._init_time = time_elapsed
+        else:
+            self._init_time += 0.3 * (time_elapsed - self._init_time)
+
+    def update(self) -> None:
+        now = time.monotonic()
+        dt = now - self._last_update
+        if dt <= 0.0:
+            return
+
+        alpha = 1.0 - 0.5 ** (dt / self._half_life)
+        self._arrival_rate += alpha * (self._num_arrivals / dt - self._arrival_rate)
+        self._num_arrivals = 0
+        self._last_update = now
+
+    def predicted_idle(self) -> int:
+        return math.ceil(self._arrival_rate * self.init_time)
+
 
 class ProcPool(utils.EventEmitter[EventTypes]):
     def __init__(
@@ -42,6 +100,11 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         memory_limit_mb: float,
         http_proxy: str | None,
         loop: asyncio.AbstractEventLoop,
+        max_jobs_per_process: int = 1,
+        max_process_age: float = 3600.0,
+        max_jobs_per_shared_process: int = 8,
+        max_idle_processes: int = 0,
+        proc_sampler: ProcSampler | None = None,
     ) -> None:
         super().__init__()
         self._job_executor_type = job_executor_type
@@ -57,19 +120,42 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         self._memory_warn_mb = memory_warn_mb
         self._default_num_idle_processes = num_idle_processes
         self._http_proxy = http_proxy
-        self._target_idle_processes = num_idle_processes
+        self._target_idle_processes = max(num_idle_processes, max_idle_processes)
+        self._max_jobs_per_process = max_jobs_per_process
+        self._max_process_age = max_process_age
+        self._max_jobs_per_shared_process = max_jobs_per_shared_process
+        self._max_idle_processes = max_idle_processes
+        self._predictor = _IdleProcessPredictor()
+        # the processes of the pool are sampled together
+        self._owns_proc_sampler = proc_sampler is None
+        self._proc_sampler = proc_sampler or ProcSampler(loop=loop)
+        self._num_idle = num_idle_processes
+        # memory of a warm process (of a job slot with SHARED_PROCESS), 0 when unknown
+        self._proc_memory_mb = 0.0
+        self._memory_monitor = MemoryMonitor()
+        # launch time of the jobs whose entrypoint isn't entered yet, and whether their process
+        # ran other jobs before (bounded, a job can fail before its entrypoint)
+        self._launch_times: utils.BoundedDict[str, tuple[float, bool]] = utils.BoundedDict(
+            maxsize=256
+        )
 
         self._init_sem = asyncio.Semaphore(MAX_CONCURRENT_INITIALIZATIONS)
         self._warmed_proc_queue = asyncio.Queue[JobExecutor]()
         self._executors: list[JobExecutor] = []
         self._spawn_tasks: set[asyncio.Task[None]] = set()
         self._monitor_tasks: set[asyncio.Task[None]] = set()
+        self._close_tasks: set[asyncio.Task[None]] = set()
         self._started = False
         self._closed = False
 
         self._idle_ready = asyncio.Event()
         self._jobs_waiting_for_process = 0
 
+        # JobExecutorType.SHARED_PROCESS, the idle processes are the ready shared processes
+        # with free job slots
+        self._shared_procs: list[job_shared_proc_executor.SharedJobProcess] = []
+        self._shared_proc_available = asyncio.Event()
+
     @property
     def processes(self) -> list[JobExecutor]:
         return self._executors
@@ -97,24 +183,66 @@ class ProcPool(utils.EventEmitter[EventTypes]):
 
         self._closed = True
         await aio.cancel_and_wait(self._main_atask)
+        if self._owns_proc_sampler:
+            await self._proc_sampler.aclose()
 
     async def launch_job(self, info: RunningJobInfo) -> None:
+        self._predictor.job_arrived()
+        if self._job_executor_type == JobExecutorType.SHARED_PROCESS:
+            await self._launch_shared_job(info)
+            return
+
+        start_time = time.perf_counter()
         self._jobs_waiting_for_process += 1
         if (
             self._warmed_proc_queue.empty()
             and len(self._spawn_tasks) < self._jobs_waiting_for_process
         ):
             # spawn a new process if there are no idle processes
-            task = asyncio.create_task(self._proc_spawn_task())
-            self._spawn_tasks.add(task)
-            task.add_done_callback(self._spawn_tasks.discard)
+            self._spawn(self._proc_spawn_task())
 
         proc = await self._warmed_proc_queue.get()
         self._jobs_waiting_for_process -= 1
 
+        recycled = isinstance(proc, job_proc_executor.ProcJobExecutor) and proc.jobs_completed > 0
+        self._launch_times[info.job.id] = (start_time, recycled)
         await proc.launch_job(info)
         self.emit("process_job_launched", proc)
 
+    async def _launch_shared_job(self, info: RunningJobInfo) -> None:
+        start_time = time.perf_counter()
+        self._jobs_waiting_for_process += 1
+        try:
+            while (proc := self._select_shared_proc()) is None:
+                pending_slots = len(self._spawn_tasks) * self._max_jobs_per_shared_process
+                if pending_slots < self._jobs_waiting_for_process:
+                    self._spawn(self._shared_proc_spawn_task())
+
+                self._shared_proc_available.clear()
+                await self._shared_proc_available.wait()
+        finally:
+            self._jobs_waiting_for_process -= 1
+
+        self._launch_times[info.job.id] = (start_time, proc.jobs_launched > 0)
+        executor = await proc.launch_job(info)
+        if executor.status == JobStatus.RUNNING:
+            self._executors.append(executor)
+
+        self.emit("process_job_launched", executor)
+
+    def _select_shared_proc(self) -> job_shared_proc_executor.SharedJobProcess | None:
+        # pack the jobs on the busiest processes so the emptier ones can be closed
+        candidates = [p for p in self._shared_procs if p.ready and p.num_jobs < p.max_jobs]
+        return max(candidates, key=lambda p: p.num_jobs, default=None)
+
+    def _shared_free_slots(self) -> int:
+        free_slots = sum(p.max_jobs - p.num_jobs for p in self._shared_procs if p.ready)
+        return free_slots + len(self._spawn_tasks) * self._max_jobs_per_shared_process
+
+    def stop_reusing_processes(self) -> None:
+        """the processes running a job exit once it ends instead of waiting for another one"""
+        self._max_jobs_per_process = 1
+
     def set_target_idle_processes(self, num_idle_processes: int) -> None:
         self._target_idle_processes = num_idle_processes
 
@@ -122,6 +250,55 @@ class ProcPool(utils.EventEmitter[EventTypes]):
     def target_idle_processes(self) -> int:
         return self._target_idle_processes
 
+    def _update_num_idle(self, num_idle_now: int) -> int:
+        """Compute the number of idle processes (free job slots with SHARED_PROCESS) to keep
+        warm, num_idle_now being the ones already warm or starting.
+
+        Above num_idle_processes, up to max_idle_processes are kept to cover the jobs expected
+        during one process initialization, as long as the memory can hold them. The target set
+        from the worker load bounds the result.
+        """
+        self._predictor.update()
+        predicted = self._predictor.predicted_idle()
+
+        num_idle = self._default_num_idle_processes
+        if self._max_idle_processes > num_idle and predicted > num_idle:
+            num_idle = min(predicted, self._max_idle_processes, num_idle_now + self._headroom())
+            num_idle = max(num_idle, self._default_num_idle_processes)
+
+        self._num_idle = min(self._target_idle_processes, num_idle)
+        metrics._update_idle_scaler(
+            arrival_rate=self._predictor.arrival_rate,
+            init_time=self._predictor.init_time,
+            predicted=predicted,
+            target=self._num_idle,
+        )
+        return self._num_idle
+
+    def _headroom(self) -> int:
+        """number of additional warm processes the available memory can hold"""
+        if self._proc_memory_mb <= 0.0:
+            return self._max_idle_processes
+
+        used, limit = self._memory_monitor.usage()
+        available_mb = (limit - used - limit * MEMORY_RESERVE) / (1024 * 1024)
+        return max(int(available_mb // self._proc_memory_mb), 0)
+
+    def _sample_proc_memory(self, pid: int | None, num_slots: int = 1) -> None:
+        if pid is None:
+            return
+
+        if (stats := self._proc_sampler.stats(pid)) is None:
+            return
+
+        memory_mb = stats.rss / (1024 * 1024) / num_slots
+        self._proc_memory_mb = max(self._proc_memory_mb, memory_mb)
+
+    def _spawn(self, coro: Coroutine[Any, Any, None]) -> None:
+        task = asyncio.create_task(coro)
+        self._spawn_tasks.add(task)
+        task.add_done_callback(self._spawn_tasks.discard)
+
     @utils.log_exceptions(logger=logger)
     async def _proc_spawn_task(self) -> None:
         proc: JobExecutor
@@ -137,6 +314,7 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 high_ping_threshold=0.5,
                 http_proxy=self._http_proxy,
                 loop=self._loop,
+                on_job_started=self._on_job_started,
             )
         elif self._job_executor_type == JobExecutorType.PROCESS:
             proc = job_proc_executor.ProcJobExecutor(
@@ -154,6 +332,11 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 memory_warn_mb=self._memory_warn_mb,
                 memory_limit_mb=self._memory_limit_mb,
                 http_proxy=self._http_proxy,
+                on_job_completed=(
+                    self._on_job_completed if self._max_jobs_per_process > 1 else None
+                ),
+                on_job_started=self._on_job_started,
+                proc_sampler=self._proc_sampler,
             )
         else:
             raise ValueError(f"unsupported job executor: {self._job_executor_type}")
@@ -165,6 +348,7 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 return
 
             self.emit("process_created", proc)
+            start_time = time.perf_counter()
             await proc.start()
             self.emit("process_started", proc)
             try:
@@ -172,6 +356,10 @@ class ProcPool(utils.EventEmitter[EventTypes]):
                 # process where initialization times out will never fire "process_ready"
                 # neither be used to launch jobs
 
+                self._predictor.proc_initialized(time.perf_counter() - start_time)
+                if isinstance(proc, job_proc_executor.ProcJobExecutor):
+                    self._sample_proc_memory(proc.pid)
+
                 self.emit("process_ready", proc)
                 self._warmed_proc_queue.put_nowait(proc)
                 if self._warmed_proc_queue.qsize() >= self._default_num_idle_processes:
@@ -183,6 +371,130 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         self._monitor_tasks.add(monitor_task)
         monitor_task.add_done_callback(self._monitor_tasks.discard)
 
+    @utils.log_exceptions(logger=logger)
+    async def _shared_proc_spawn_task(self) -> None:
+        max_jobs = self._max_jobs_per_shared_process
+        proc = job_shared_proc_executor.SharedJobProcess(
+            initialize_process_fnc=self._initialize_process_fnc,
+            job_entrypoint_fnc=self._job_entrypoint_fnc,
+            session_end_fnc=self._session_end_fnc,
+            inference_executor=self._inf_executor,
+            max_jobs=max_jobs,
+            initialize_timeout=self._initialize_timeout,
+            close_timeout=self._close_timeout,
+            # the memory thresholds are per job
+            memory_warn_mb=self._memory_warn_mb * max_jobs,
+            memory_limit_mb=self._memory_limit_mb * max_jobs,
+            ping_interval=2.5,
+            ping_timeout=60,
+            high_ping_threshold=0.5,
+            http_proxy=self._http_proxy,
+            mp_ctx=self._mp_ctx,
+            loop=self._loop,
+            on_job_ended=self._on_shared_job_ended,
+            on_job_started=self._on_job_started,
+            proc_sampler=self._proc_sampler,
+        )
+
+        async with self._init_sem:
+            if self._closed:
+                return
+
+            self.emit("process_created", proc)
+            start_time = time.perf_counter()
+            await proc.start()
+            self.emit("process_started", proc)
+            try:
+                await proc.initialize()
+                self._predictor.proc_initialized(time.perf_counter() - start_time)
+                self._sample_proc_memory(proc.pid, max_jobs)
+                self.emit("process_ready", proc)
+                self._shared_procs.append(proc)
+                free_slots = sum(p.max_jobs - p.num_jobs for p in self._shared_procs if p.ready)
+                if free_slots >= self._default_num_idle_processes:
+                    self._idle_ready.set()
+            except Exception:
+                logger.exception("error initializing process", extra=proc.logging_extra())
+            finally:
+                # wake up the jobs waiting for a process, they spawn another one on failure
+                self._shared_proc_available.set()
+
+        monitor_task = asyncio.create_task(self._monitor_shared_proc_task(proc))
+        self._monitor_tasks.add(monitor_task)
+        monitor_task.add_done_callback(self._monitor_tasks.discard)
+
+    def _on_shared_job_ended(
+        self, executor: job_shared_proc_executor.SharedProcJobExecutor
+    ) -> None:
+        if executor in self._executors:
+            self._executors.remove(executor)
+
+        self.emit("process_job_completed", executor)
+        self._shared_proc_available.set()
+
+    def _scale_shared_procs(self) -> None:
+        free_slots = self._shared_free_slots()
+        num_idle = self._update_num_idle(free_slots)
+        while free_slots < num_idle:
+            self._spawn(self._shared_proc_spawn_task())
+            free_slots += self._max_jobs_per_shared_process
+
+        # close the empty processes when the other ones have enough free slots
+        for proc in list(self._shared_procs):
+            if proc.ready and proc.num_jobs == 0 and free_slots - proc.max_jobs >= num_idle:
+                self._shared_procs.remove(proc)
+                free_slots -= proc.max_jobs
+                task = asyncio.create_task(proc.aclose())
+                self._close_tasks.add(task)
+                task.add_done_callback(self._close_tasks.discard)
+
+    def _on_job_started(self, job_id: str) -> None:
+        if (launch := self._launch_times.pop(job_id, None)) is None:
+            return
+
+        start_time, recycled = launch
+        metrics.job_launched(time_elapsed=time.perf_counter() - start_time, recycled=recycled)
+
+    def _on_job_completed(self, proc: job_proc_executor.ProcJobExecutor) -> None:
+        self.emit("process_job_completed", proc)
+
+        if self._can_recycle(proc):
+            logger.debug(
+                "reusing process for the next job",
+                extra={"jobs_completed": proc.jobs_completed, **proc.logging_extra()},
+            )
+            self._warmed_proc_queue.put_nowait(proc)
+            return
+
+        task = asyncio.create_task(proc.aclose())
+        self._close_tasks.add(task)
+        task.add_done_callback(self._close_tasks.discard)
+
+    def _can_recycle(self, proc: job_proc_executor.ProcJobExecutor) -> bool:
+        if self._closed or proc.jobs_completed >= self._max_jobs_per_process:
+            return False
+
+        if proc.age >= self._max_process_age:
+            return False
+
+        # keep up to twice the idle target so the recycled processes take the next jobs
+        # instead of newly spawned ones
+        if (
+            self._warmed_proc_queue.qsize() >= 2 * self._num_idle
+            and self._jobs_waiting_for_process == 0
+        ):
+            return False
+
+        if self._memory_warn_mb > 0 and proc.pid is not None:
+            if (stats := self._proc_sampler.stats(proc.pid)) is None:
+                return False
+
+            # the memory a job leaves behind would add up over the next ones
+            if stats.rss / (1024 * 1024) > self._memory_warn_mb:
+                return False
+
+        return True
+
     @utils.log_exceptions(logger=logger)
     async def _monitor_process_task(self, proc: JobExecutor) -> None:
         try:
@@ -191,23 +503,36 @@ class ProcPool(utils.EventEmitter[EventTypes]):
         finally:
             self._executors.remove(proc)
 
+    @utils.log_exceptions(logger=logger)
+    async def _monitor_shared_proc_task(
+        self, proc: job_shared_proc_executor.SharedJobProcess
+    ) -> None:
+        try:
+            await proc.join()
+            self.emit("process_closed", proc)
+        finally:
+            if proc in self._shared_procs:
+                self._shared_procs.remove(proc)
+
     @utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
         try:
             while not self._closed:
+                if self._job_executor_type == JobExecutorType.SHARED_PROCESS:
+                    self._scale_shared_procs()
+                    await asyncio.sleep(0.1)
+                    continue
+
                 current_pending = self._warmed_proc_queue.qsize() + len(self._spawn_tasks)
-                to_spawn = (
-                    min(self._target_idle_processes, self._default_num_idle_processes)
-                    - current_pending
-                )
+                to_spawn = self._update_num_idle(current_pending) - current_pending
 
                 for _ in range(to_spawn):
-                    task = asyncio.create_task(self._proc_spawn_task())
-                    self._spawn_tasks.add(task)
-                    task.add_done_callback(self._spawn_tasks.discard)
+                    self._spawn(self._proc_spawn_task())
 
                 await asyncio.sleep(0.1)
         except asyncio.CancelledError:
             await asyncio.gather(*[proc.aclose() for proc in self._executors])
+            await asyncio.gather(*[proc.aclose() for proc in self._shared_procs])
             await asyncio.gather(*self._spawn_tasks)
+            await asyncio.gather(*self._close_tasks)
             await asyncio.gather(*self._monitor_tasks)
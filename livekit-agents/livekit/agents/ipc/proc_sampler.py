@@ -0,0 +1,187 @@
+"""Resource usage of the supervised processes, sampled in a single pass.
+
+A worker has one ProcSampler shared by its job and inference processes. Every interval it reads
+the memory, the CPU time and the open file descriptors of all the registered processes at once
+(from /proc on Linux, with psutil elsewhere) in a thread, then calls the callbacks of the
+processes on the event loop. The PSS is more costly to read (the kernel walks the page tables),
+so it's only read every pss_interval.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+import psutil
+
+from ..log import logger
+from ..utils import log_exceptions
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+_CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+@dataclass
+class ProcStats:
+    pid: int
+    rss: int
+    """resident memory in bytes"""
+    pss: int | None
+    """proportional set size in bytes (the shared pages are split between the processes mapping
+    them), None when it wasn't read in this pass or isn't available"""
+    cpu_time: float
+    """user + system CPU time in seconds since the process started"""
+    num_fds: int
+    """open file descriptors (handles on Windows)"""
+
+
+class ProcSampler:
+    def __init__(
+        self,
+        *,
+        interval: float = 5.0,
+        pss_interval: float = 30.0,
+        loop: asyncio.AbstractEventLoop,
+    ) -> None:
+        """
+        Args:
+            interval: seconds between two samples of the registered processes
+            pss_interval: seconds between two reads of the PSS, 0 to never read it
+        """
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+
+        self._interval = interval
+        self._pss_interval = pss_interval
+        self._loop = loop
+        self._callbacks: dict[int, Callable[[ProcStats], None]] = {}
+        self._stats: dict[int, ProcStats] = {}
+        self._last_pss = 0.0
+        self._sample_atask: asyncio.Task[None] | None = None
+
+    @property
+    def num_processes(self) -> int:
+        return len(self._callbacks)
+
+    def register(self, pid: int, callback: Callable[[ProcStats], None]) -> None:
+        """Sample the process from the next pass, the callback receives each of its samples"""
+        self._callbacks[pid] = callback
+        if self._sample_atask is None:
+            self._sample_atask = self._loop.create_task(self._sample_task())
+
+    def unregister(self, pid: int) -> None:
+        self._callbacks.pop(pid, None)
+        self._stats.pop(pid, None)
+
+    def stats(self, pid: int) -> ProcStats | None:
+        """Latest sample of a registered process, or a new one for the other processes"""
+        if (stats := self._stats.get(pid)) is not None:
+            return stats
+
+        return _sample(pid, pss=False)
+
+    async def aclose(self) -> None:
+        self._callbacks.clear()
+        if self._sample_atask is not None:
+            self._sample_atask.cancel()
+            await asyncio.gather(self._sample_atask, return_exceptions=True)
+            self._sample_atask = None
+
+    @log_exceptions(logger=logger)
+    async def _sample_task(self) -> None:
+        try:
+            while self._callbacks:
+                pids = list(self._callbacks)
+                read_pss = self._pss_interval > 0 and (
+                    time.monotonic() - self._last_pss >= self._pss_interval
+                )
+                if read_pss:
+                    self._last_pss = time.monotonic()
+
+                samples = await self._loop.run_in_executor(None, _sample_all, pids, read_pss)
+                for stats in samples:
+                    if (callback := self._callbacks.get(stats.pid)) is None:
+                        continue  # unregistered during the pass
+
+                    if stats.pss is None and (previous := self._stats.get(stats.pid)):
+                        stats.pss = previous.pss
+
+                    self._stats[stats.pid] = stats
+                    try:
+                        callback(stats)
+                    except Exception:
+                        logger.exception(
+                            "error in process stats callback", extra={"pid": stats.pid}
+                        )
+
+                await asyncio.sleep(self._interval)
+        finally:
+            # restarted by the next register()
+            self._sample_atask = None
+
+
+def _sample_all(pids: list[int], pss: bool) -> list[ProcStats]:
+    # the processes that exited are skipped
+    return [stats for pid in pids if (stats := _sample(pid, pss=pss)) is not None]
+
+
+def _sample(pid: int, *, pss: bool) -> ProcStats | None:
+    if sys.platform.startswith("linux"):
+        return _read_proc(pid, pss=pss)
+
+    try:
+        proc = psutil.Process(pid)
+        with proc.oneshot():
+            cpu_times = proc.cpu_times()
+            return ProcStats(
+                pid=pid,
+                rss=int(proc.memory_info().rss),
+                pss=None,
+                cpu_time=float(cpu_times.user + cpu_times.system),
+                num_fds=int(proc.num_handles() if sys.platform == "win32" else proc.num_fds()),
+            )
+    except psutil.Error:
+        return None
+
+
+def _read_proc(pid: int, *, pss: bool) -> ProcStats | None:
+    # unbuffered binary reads, the files are generated on each read
+    try:
+        with open(f"/proc/{pid}/statm", "rb", buffering=0) as f:
+            rss = int(f.read().split()[1]) * _PAGE_SIZE
+
+        with open(f"/proc/{pid}/stat", "rb", buffering=0) as f:
+            stat = f.read()
+
+        # the name between parentheses can contain spaces, utime and stime are the fields
+        # 14 and 15 of the line
+        fields = stat[stat.rfind(b")") + 2 :].split()
+        cpu_time = (int(fields[11]) + int(fields[12])) / _CLK_TCK
+        num_fds = len(os.listdir(f"/proc/{pid}/fd"))
+    except (OSError, ValueError, IndexError):
+        return None
+
+    return ProcStats(
+        pid=pid,
+        rss=rss,
+        pss=_read_pss(pid) if pss else None,
+        cpu_time=cpu_time,
+        num_fds=num_fds,
+    )
+
+
+def _read_pss(pid: int) -> int | None:
+    # smaps_rollup exists since Linux 4.14
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith("Pss:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        pass
+
+    return None
@@ -22,6 +22,12 @@ class InitializeRequest:
     # if ping is higher than this, process is considered unresponsive
     high_ping_threshold: float = 0
     http_proxy: str = ""  # empty = None
+    # shared memory rings used after the initialization (empty = disabled)
+    shm_send_name: str = ""  # subprocess -> main process
+    shm_recv_name: str = ""  # main process -> subprocess
+    # when set, the subprocess sends a JobCompleted message after a job ended cleanly instead
+    # of exiting, and can be given another job
+    reuse_process: bool = False
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_bool(b, self.asyncio_debug)
@@ -29,6 +35,9 @@ class InitializeRequest:
         channel.write_float(b, self.ping_timeout)
         channel.write_float(b, self.high_ping_threshold)
         channel.write_string(b, self.http_proxy)
+        channel.write_string(b, self.shm_send_name)
+        channel.write_string(b, self.shm_recv_name)
+        channel.write_bool(b, self.reuse_process)
 
     def read(self, b: io.BytesIO) -> None:
         self.asyncio_debug = channel.read_bool(b)
@@ -36,6 +45,9 @@ class InitializeRequest:
         self.ping_timeout = channel.read_float(b)
         self.high_ping_threshold = channel.read_float(b)
         self.http_proxy = channel.read_string(b)
+        self.shm_send_name = channel.read_string(b)
+        self.shm_recv_name = channel.read_string(b)
+        self.reuse_process = channel.read_bool(b)
 
 
 @dataclass
@@ -122,16 +134,22 @@ class StartJobRequest:
 @dataclass
 class ShutdownRequest:
     """sent by the main process to the subprocess to indicate that it should shut down
-    gracefully. the subprocess will follow with a ExitInfo message"""
+    gracefully. the subprocess will follow with a ExitInfo message
+
+    on a process hosting several jobs, job_id only shuts down that job. a job that doesn't
+    complete after a second request is cancelled."""
 
     MSG_ID: ClassVar[int] = 5
     reason: str = ""
+    job_id: str = ""  # empty = the whole process
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.reason)
+        channel.write_string(b, self.job_id)
 
     def read(self, b: io.BytesIO) -> None:
         self.reason = channel.read_string(b)
+        self.job_id = channel.read_string(b)
 
 
 @dataclass
@@ -140,12 +158,15 @@ class Exiting:
 
     MSG_ID: ClassVar[int] = 6
     reason: str = ""
+    job_id: str = ""  # set when only this job is exiting (process hosting several jobs)
 
     def write(self, b: io.BytesIO) -> None:
         channel.write_string(b, self.reason)
+        channel.write_string(b, self.job_id)
 
     def read(self, b: io.BytesIO) -> None:
         self.reason = channel.read_string(b)
+        self.job_id = channel.read_string(b)
 
 
 @dataclass
@@ -192,6 +213,41 @@ class InferenceResponse:
         self.error = channel.read_string(b)
 
 
+@dataclass
+class JobCompleted:
+    """sent by the subprocess to the main process when a job ended cleanly and the process is
+    ready to take another one (only when reuse_process is set).
+
+    a process hosting several jobs sends it for every job that ended, with the error if it
+    failed."""
+
+    MSG_ID: ClassVar[int] = 9
+    job_id: str = ""
+    error: str = ""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.job_id)
+        channel.write_string(b, self.error)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.job_id = channel.read_string(b)
+        self.error = channel.read_string(b)
+
+
+@dataclass
+class JobStarted:
+    """sent by the subprocess to the main process when the entrypoint of a job is entered"""
+
+    MSG_ID: ClassVar[int] = 10
+    job_id: str = ""
+
+    def write(self, b: io.BytesIO) -> None:
+        channel.write_string(b, self.job_id)
+
+    def read(self, b: io.BytesIO) -> None:
+        self.job_id = channel.read_string(b)
+
+
 IPC_MESSAGES = {
     InitializeRequest.MSG_ID: InitializeRequest,
     InitializeResponse.MSG_ID: InitializeResponse,
@@ -202,4 +258,6 @@ IPC_MESSAGES = {
     Exiting.MSG_ID: Exiting,
     InferenceRequest.MSG_ID: InferenceRequest,
     InferenceResponse.MSG_ID: InferenceResponse,
+    JobCompleted.MSG_ID: JobCompleted,
+    JobStarted.MSG_ID: JobStarted,
 }
@@ -0,0 +1,68 @@
+"""Read-only files shared by the job processes.
+
+The assets are declared by name in the main process before the job processes are started, and
+mapped read-only with mmap. The pages live in the page cache once, whatever the number of job
+processes mapping them. With the forkserver, _forkserver_preload maps the files (and reads them
+ahead) before the first job process is forked, which inherits the mappings.
+"""
+
+from __future__ import annotations
+
+import json
+import mmap
+import os
+
+from ..log import logger
+
+_ASSETS_ENV = "LIVEKIT_SHARED_ASSETS"
+
+_mapped: dict[str, mmap.mmap] = {}
+
+
+def declare_shared_assets(assets: dict[str, str]) -> None:
+    """Declare the assets (name -> file path), must be called before the processes start"""
+    for name, path in assets.items():
+        if not os.path.isfile(path):
+            raise ValueError(f"shared asset {name!r} is not a file: {path}")
+
+    declared = _declared()
+    declared.update({name: os.path.abspath(path) for name, path in assets.items()})
+    # inherited by the forkserver and the spawned processes
+    os.environ[_ASSETS_ENV] = json.dumps(declared)
+
+
+def get_shared_asset(name: str) -> memoryview:
+    """Returns a read-only view of the asset, mapping it on first use in this process"""
+    if (mapped := _mapped.get(name)) is None:
+        declared = _declared()
+        if name not in declared:
+            raise KeyError(f"unknown shared asset: {name!r}")
+
+        mapped = _mapped[name] = _map(declared[name])
+
+    return memoryview(mapped)
+
+
+def _declared() -> dict[str, str]:
+    return json.loads(os.environ.get(_ASSETS_ENV, "{}"))  # type: ignore[no-any-return]
+
+
+def _map(path: str) -> mmap.mmap:
+    with open(path, "rb") as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if hasattr(mmap, "MADV_WILLNEED"):
+        mapped.madvise(mmap.MADV_WILLNEED)
+
+    return mapped
+
+
+def _preload() -> None:
+    for name, path in _declared().items():
+        if name in _mapped:
+            continue
+
+        try:
+            _mapped[name] = _map(path)
+        except (OSError, ValueError):
+            logger.exception("failed to map shared asset", extra={"asset": name, "path": path})
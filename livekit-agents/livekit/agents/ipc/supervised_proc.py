@@ -15,14 +15,13 @@ from dataclasses import dataclass
 from multiprocessing.context import BaseContext
 from typing import Any
 
-import psutil
-
 from ..log import logger
 from ..telemetry import metrics
 from ..utils import aio, log_exceptions, time_ms
-from ..utils.aio import duplex_unix
+from ..utils.aio import duplex_shm, duplex_unix
 from . import channel, proto
 from .log_queue import LogQueueListener
+from .proc_sampler import ProcSampler, ProcStats
 
 
 @contextlib.contextmanager
@@ -56,6 +55,7 @@ class _ProcOpts:
     ping_timeout: float
     high_ping_threshold: float
     http_proxy: str | None
+    shm_size: int
 
 
 class SupervisedProc(ABC):
@@ -72,9 +72,12 @@ class SupervisedProc(ABC):
         http_proxy: str | None,
         mp_ctx: BaseContext,
         loop: asyncio.AbstractEventLoop,
+        shm_size: int = 0,
+        proc_sampler: ProcSampler | None = None,
     ) -> None:
         self._loop = loop
         self._mp_ctx = mp_ctx
+        self._proc_sampler = proc_sampler
         self._opts = _ProcOpts(
             initialize_timeout=initialize_timeout,
             close_timeout=close_timeout,
@@ -84,6 +87,7 @@ class SupervisedProc(ABC):
             ping_timeout=ping_timeout,
             high_ping_threshold=high_ping_threshold,
             http_proxy=http_proxy,
+            shm_size=shm_size,
         )
 
         self._exitcode: int | None = None
@@ -94,6 +98,9 @@ class SupervisedProc(ABC):
         self._kill_sent = False
         self._initialize_fut = asyncio.Future[None]()
         self._lock = asyncio.Lock()
+        self._shm_rings: list[duplex_shm._ShmRing] = []
+        # job_id label of the process metrics, None until the first sample
+        self._stats_job_id: str | None = None
 
     @abstractmethod
     def _create_process(self, cch: socket.socket, log_cch: socket.socket) -> mp.Process: ...
@@ -180,16 +187,11 @@ class SupervisedProc(ABC):
     async def initialize(self) -> None:
         """initialize the process, this is sending a InitializeRequest message and waiting for a
         InitializeResponse with a timeout"""
-        await channel.asend_message(
-            self._pch,
-            proto.InitializeRequest(
-                asyncio_debug=self._loop.get_debug(),
-                ping_interval=self._opts.ping_interval,
-                ping_timeout=self._opts.ping_timeout,
-                high_ping_threshold=self._opts.high_ping_threshold,
-                http_proxy=self._opts.http_proxy or "",
-            ),
-        )
+        send_ring, recv_ring = self._create_shm_rings()
+        init_req = self._initialize_request()
+        init_req.shm_send_name = recv_ring.name if recv_ring else ""
+        init_req.shm_recv_name = send_ring.name if send_ring else ""
+        await channel.asend_message(self._pch, init_req)
 
         # wait for the process to become ready
         try:
@@ -206,6 +208,11 @@ class SupervisedProc(ABC):
             if init_res.error:
                 raise RuntimeError(f"process initialization failed: {init_res.error}")
             else:
+                if send_ring and recv_ring:
+                    # from now on, both sides use the shared memory framing
+                    self._pch = duplex_shm._AsyncShmDuplex(
+                        self._pch, send_ring=send_ring, recv_ring=recv_ring
+                    )
                 self._initialize_fut.set_result(None)
 
             elapsed_time = time.perf_counter() - start_time
@@ -225,6 +232,42 @@ class SupervisedProc(ABC):
             self._initialize_fut.set_exception(e)
             raise
 
+    def _initialize_request(self) -> proto.InitializeRequest:
+        return proto.InitializeRequest(
+            asyncio_debug=self._loop.get_debug(),
+            ping_interval=self._opts.ping_interval,
+            ping_timeout=self._opts.ping_timeout,
+            high_ping_threshold=self._opts.high_ping_threshold,
+            http_proxy=self._opts.http_proxy or "",
+        )
+
+    def _create_shm_rings(
+        self,
+    ) -> tuple[duplex_shm._ShmRing | None, duplex_shm._ShmRing | None]:
+        if self._opts.shm_size <= 0:
+            return None, None
+
+        try:
+            self._shm_rings.append(duplex_shm._ShmRing.create(self._opts.shm_size))
+            self._shm_rings.append(duplex_shm._ShmRing.create(self._opts.shm_size))
+        except OSError:
+            logger.warning(
+                "failed to create shared memory, falling back to the socket transport",
+                extra=self.logging_extra(),
+                exc_info=True,
+            )
+            self._close_shm_rings()
+            return None, None
+
+        return self._shm_rings[0], self._shm_rings[1]
+
+    def _close_shm_rings(self) -> None:
+        for ring in self._shm_rings:
+            with contextlib.suppress(Exception):
+                ring.close()
+
+        self._shm_rings.clear()
+
     async def aclose(self) -> None:
         """attempt to gracefully close the supervised process"""
         if not self.started:
@@ -297,21 +340,29 @@ class SupervisedProc(ABC):
         ping_task = asyncio.create_task(self._ping_pong_task(pong_timeout))
         read_ipc_task.add_done_callback(lambda _: ipc_ch.close())
 
-        memory_monitor_task: asyncio.Task[None] | None = None
-        if self._opts.memory_limit_mb > 0 or self._opts.memory_warn_mb > 0:
-            memory_monitor_task = asyncio.create_task(self._memory_monitor_task())
+        # not supervised by a worker, sample the process on its own
+        proc_sampler = self._proc_sampler or ProcSampler(loop=self._loop)
+        if self._pid:
+            proc_sampler.register(self._pid, self._on_proc_stats)
 
         await self._join_fut
         self._exitcode = self._proc.exitcode
         self._proc.close()
         await aio.cancel_and_wait(ping_task, read_ipc_task, main_task)
 
-        if memory_monitor_task is not None:
-            await aio.cancel_and_wait(memory_monitor_task)
+        if self._pid:
+            proc_sampler.unregister(self._pid)
+            if self._stats_job_id is not None:
+                metrics._remove_proc_stats(pid=self._pid, job_id=self._stats_job_id)
+
+        if proc_sampler is not self._proc_sampler:
+            await proc_sampler.aclose()
 
         with contextlib.suppress(duplex_unix.DuplexClosed):
             await self._pch.aclose()
 
+        self._close_shm_rings()
+
         if self._exitcode != 0 and not self._kill_sent:
             logger.error(
                 f"process exited with non-zero exit code {self.exitcode}",
@@ -340,10 +391,16 @@ class SupervisedProc(ABC):
                     pong_timeout.reset()
 
             if isinstance(msg, proto.Exiting):
-                logger.info(
-                    "process exiting",
-                    extra={"reason": msg.reason, **self.logging_extra()},
-                )
+                if msg.job_id:
+                    logger.info(
+                        "job exiting",
+                        extra={"reason": msg.reason, "job_id": msg.job_id, **self.logging_extra()},
+                    )
+                else:
+                    logger.info(
+                        "process exiting",
+                        extra={"reason": msg.reason, **self.logging_extra()},
+                    )
 
             ipc_ch.send_nowait(msg)
 
@@ -373,62 +430,49 @@ class SupervisedProc(ABC):
         finally:
             await aio.cancel_and_wait(*tasks)
 
-    @log_exceptions(logger=logger)
-    async def _memory_monitor_task(self) -> None:
-        """Monitor memory usage and kill the process if it exceeds the limit."""
-        while not self._closing and not self._kill_sent:
-            try:
-                if not self._pid:
-                    await asyncio.sleep(5)
-                    continue
-
-                # get process memory info
-                process = psutil.Process(self._pid)
-                memory_info = process.memory_info()
-                memory_mb = memory_info.rss / (1024 * 1024)  # Convert to MB
-
-                if self._opts.memory_limit_mb > 0 and memory_mb > self._opts.memory_limit_mb:
-                    logger.error(
-                        "process exceeded memory limit, killing process",
-                        extra={
-                            "memory_usage_mb": memory_mb,
-                            "memory_limit_mb": self._opts.memory_limit_mb,
-                            **self.logging_extra(),
-                        },
-                    )
-                    self._send_kill_signal()
-                elif self._opts.memory_warn_mb > 0 and memory_mb > self._opts.memory_warn_mb:
-                    logger.warning(
-                        "process memory usage is high",
-                        extra={
-                            "memory_usage_mb": memory_mb,
-                            "memory_warn_mb": self._opts.memory_warn_mb,
-                            "memory_limit_mb": self._opts.memory_limit_mb,
-                            **self.logging_extra(),
-                        },
-                    )
-
-            except (psutil.NoSuchProcess, psutil.AccessDenied) as e:
-                if self._closing or self._kill_sent:
-                    return
-
-                logger.warning(
-                    "Failed to get memory info for process",
-                    extra=self.logging_extra(),
-                    exc_info=e,
-                )
-                # don't bother rechecking if we cannot get process info
-                return
-            except Exception:
-                if self._closing or self._kill_sent:
-                    return
+    def _metrics_job_id(self) -> str:
+        """job_id label of the process metrics"""
+        return ""
+
+    def _on_proc_stats(self, stats: ProcStats) -> None:
+        job_id = self._metrics_job_id()
+        if self._stats_job_id is not None and job_id != self._stats_job_id:
+            metrics._remove_proc_stats(pid=stats.pid, job_id=self._stats_job_id)
+
+        self._stats_job_id = job_id
+        metrics._update_proc_stats(
+            pid=stats.pid,
+            job_id=job_id,
+            rss=stats.rss,
+            pss=stats.pss,
+            cpu_time=stats.cpu_time,
+            num_fds=stats.num_fds,
+        )
 
-                logger.exception(
-                    "Error in memory monitoring task",
-                    extra=self.logging_extra(),
-                )
+        if self._closing or self._kill_sent:
+            return
 
-            await asyncio.sleep(5)  # check every 5 seconds
+        memory_mb = stats.rss / (1024 * 1024)
+        if self._opts.memory_limit_mb > 0 and memory_mb > self._opts.memory_limit_mb:
+            logger.error(
+                "process exceeded memory limit, killing process",
+                extra={
+                    "memory_usage_mb": memory_mb,
+                    "memory_limit_mb": self._opts.memory_limit_mb,
+                    **self.logging_extra(),
+                },
+            )
+            self._send_kill_signal()
+        elif self._opts.memory_warn_mb > 0 and memory_mb > self._opts.memory_warn_mb:
+            logger.warning(
+                "process memory usage is high",
+                extra={
+                    "memory_usage_mb": memory_mb,
+                    "memory_warn_mb": self._opts.memory_warn_mb,
+                    "memory_limit_mb": self._opts.memory_limit_mb,
+                    **self.logging_extra(),
+                },
+            )
 
     def logging_extra(self) -> dict[str, Any]:
         extra: dict[str, Any] = {
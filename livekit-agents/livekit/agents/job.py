@@ -22,6 +22,7 @@ import inspect
 import json
 import logging
 import multiprocessing as mp
+import re
 import tempfile
 from collections.abc import Coroutine
 from dataclasses import dataclass
@@ -70,6 +71,8 @@ get_current_job_context = get_job_context
 class JobExecutorType(Enum):
     PROCESS = "process"
     THREAD = "thread"
+    # several jobs run on the event loop of the same process, and share its prewarmed data
+    SHARED_PROCESS = "shared_process"
 
 
 class AutoSubscribe(str, Enum):
@@ -629,6 +632,16 @@ class JobProcess:
     def http_proxy(self) -> str | None:
         return self._http_proxy
 
+    def shared_asset(self, name: str) -> memoryview:
+        """Read-only view of a file declared in the ``shared_assets`` of the server.
+
+        The file is mapped once and its pages are shared by all the job processes, e.g.
+        ``np.frombuffer(proc.shared_asset("weights"), dtype=np.float32)`` doesn't copy it.
+        """
+        from .ipc.shared_assets import get_shared_asset
+
+        return get_shared_asset(name)
+
 
 class JobRequest:
     def __init__(
@@ -689,6 +702,62 @@ class JobRequest:
         await self._on_accept(accept_arguments)
 
 
+_ACCEPT_POLICY_FIELD = re.compile(r"\{(job_id|room_name|agent_name|dispatch_id)\}")
+
+
+@dataclass
+class AcceptPolicy:
+    """Accept or reject the job requests without running a request_fnc.
+
+    The policy is evaluated synchronously by the worker when the availability request is
+    received, the answer is sent without scheduling a coroutine. The accept arguments are
+    templates where ``{job_id}``, ``{room_name}``, ``{agent_name}`` and ``{dispatch_id}`` are
+    replaced, the other braces are kept as is (e.g. JSON metadata).
+
+    Example:
+        ```python
+        server.rtc_session(
+            entrypoint,
+            on_request=AcceptPolicy(
+                identity="agent-{room_name}",
+                predicate=lambda req: req.room.name.startswith("support-"),
+            ),
+        )
+        ```
+    """
+
+    identity: str = "agent-{job_id}"
+    name: str = ""
+    metadata: str = ""
+    attributes: dict[str, str] | None = None
+    predicate: Callable[[JobRequest], bool] | None = None
+    """The jobs for which the predicate returns False are rejected, all are accepted when None"""
+
+    def evaluate(self, req: JobRequest) -> JobAcceptArguments | None:
+        """Returns the accept arguments, or None when the job must be rejected"""
+        if self.predicate is not None and not self.predicate(req):
+            return None
+
+        fields = {
+            "job_id": req.id,
+            "room_name": req.room.name,
+            "agent_name": req.agent_name,
+            "dispatch_id": req.job.dispatch_id,
+        }
+
+        def _format(template: str) -> str:
+            return _ACCEPT_POLICY_FIELD.sub(lambda m: fields[m.group(1)], template)
+
+        return JobAcceptArguments(
+            name=_format(self.name),
+            identity=_format(self.identity),
+            metadata=_format(self.metadata),
+            attributes=(
+                {k: _format(v) for k, v in self.attributes.items()} if self.attributes else None
+            ),
+        )
+
+
 @dataclass
 class _JobShutdownInfo:
     user_initiated: bool
@@ -7,7 +7,7 @@ from typing import Any
 
 from livekit.agents import llm
 
-from .utils import group_tool_calls
+from .utils import _ConvertedItems, group_tool_calls
 
 
 @dataclass
@@ -45,30 +45,8 @@ def to_chat_ctx(
             content = []
             current_role = role
 
-        if msg.type == "message":
-            for c in msg.content:
-                if c and isinstance(c, str):
-                    content.append({"text": c, "type": "text"})
-                elif isinstance(c, llm.ImageContent):
-                    content.append(_to_image_content(c))
-        elif msg.type == "function_call":
-            content.append(
-                {
-                    "id": msg.call_id,
-                    "type": "tool_use",
-                    "name": msg.name,
-                    "input": json.loads(msg.arguments or "{}"),
-                }
-            )
-        elif msg.type == "function_call_output":
-            content.append(
-                {
-                    "tool_use_id": msg.call_id,
-                    "type": "tool_result",
-                    "content": msg.output,
-                    "is_error": msg.is_error,
-                }
-            )
+        # the caching markers are added to the blocks
+        content.extend(dict(block) for block in _converted.get(msg))
 
     if current_role is not None and content:
         messages.append({"role": current_role, "content": content})
@@ -86,6 +64,35 @@ def to_chat_ctx(
     return messages, AnthropicFormatData(system_messages=system_messages)
 
 
+def _to_content(msg: llm.ChatItem) -> list[dict[str, Any]]:
+    content: list[dict[str, Any]] = []
+    if msg.type == "message":
+        for c in msg.content:
+            if c and isinstance(c, str):
+                content.append({"text": c, "type": "text"})
+            elif isinstance(c, llm.ImageContent):
+                content.append(_to_image_content(c))
+    elif msg.type == "function_call":
+        content.append(
+            {
+                "id": msg.call_id,
+                "type": "tool_use",
+                "name": msg.name,
+                "input": json.loads(msg.arguments or "{}"),
+            }
+        )
+    elif msg.type == "function_call_output":
+        content.append(
+            {
+                "tool_use_id": msg.call_id,
+                "type": "tool_result",
+                "content": msg.output,
+                "is_error": msg.is_error,
+            }
+        )
+    return content
+
+
 def _to_image_content(image: llm.ImageContent) -> dict[str, Any]:
     cache_key = "serialized_image"
     if cache_key not in image._cache:
@@ -108,3 +115,6 @@ def _to_image_content(image: llm.ImageContent) -> dict[str, Any]:
             "media_type": img.mime_type,
         },
     }
+
+
+_converted = _ConvertedItems(_to_content)
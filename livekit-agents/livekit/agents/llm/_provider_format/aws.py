@@ -6,7 +6,7 @@ from dataclasses import dataclass
 
 from livekit.agents import llm
 
-from .utils import group_tool_calls
+from .utils import _ConvertedItems, group_tool_calls
 
 
 @dataclass
@@ -41,36 +41,7 @@ def to_chat_ctx(
             current_content = []
             current_role = role
 
-        if msg.type == "message":
-            for content in msg.content:
-                if content and isinstance(content, str):
-                    current_content.append({"text": content})
-                elif isinstance(content, llm.ImageContent):
-                    current_content.append(_build_image(content))
-        elif msg.type == "function_call":
-            current_content.append(
-                {
-                    "toolUse": {
-                        "toolUseId": msg.call_id,
-                        "name": msg.name,
-                        "input": json.loads(msg.arguments or "{}"),
-                    }
-                }
-            )
-        elif msg.type == "function_call_output":
-            current_content.append(
-                {
-                    "toolResult": {
-                        "toolUseId": msg.call_id,
-                        "content": [
-                            {"json": msg.output}
-                            if isinstance(msg.output, dict)
-                            else {"text": msg.output}
-                        ],
-                        "status": "success",
-                    }
-                }
-            )
+        current_content.extend(dict(block) for block in _converted.get(msg))
 
     # Finalize the last message if there’s any content left
     if current_role is not None and current_content:
@@ -83,6 +54,41 @@ def to_chat_ctx(
     return messages, BedrockFormatData(system_messages=system_messages)
 
 
+def _to_content(msg: llm.ChatItem) -> list[dict]:
+    content: list[dict] = []
+    if msg.type == "message":
+        for c in msg.content:
+            if c and isinstance(c, str):
+                content.append({"text": c})
+            elif isinstance(c, llm.ImageContent):
+                content.append(_build_image(c))
+    elif msg.type == "function_call":
+        content.append(
+            {
+                "toolUse": {
+                    "toolUseId": msg.call_id,
+                    "name": msg.name,
+                    "input": json.loads(msg.arguments or "{}"),
+                }
+            }
+        )
+    elif msg.type == "function_call_output":
+        content.append(
+            {
+                "toolResult": {
+                    "toolUseId": msg.call_id,
+                    "content": [
+                        {"json": msg.output}
+                        if isinstance(msg.output, dict)
+                        else {"text": msg.output}
+                    ],
+                    "status": "success",
+                }
+            }
+        )
+    return content
+
+
 def _build_image(image: llm.ImageContent) -> dict:
     cache_key = "serialized_image"
     if cache_key not in image._cache:
@@ -98,3 +104,6 @@ def _build_image(image: llm.ImageContent) -> dict:
             "source": {"bytes": img.data_bytes},
         }
     }
+
+
+_converted = _ConvertedItems(_to_content)
@@ -8,7 +8,7 @@ from typing import Any
 from livekit.agents import llm
 from livekit.agents.log import logger
 
-from .utils import group_tool_calls
+from .utils import _ConvertedItems, group_tool_calls
 
 
 @dataclass
@@ -44,35 +44,7 @@ def to_chat_ctx(
             parts = []
             current_role = role
 
-        if msg.type == "message":
-            for content in msg.content:
-                if content and isinstance(content, str):
-                    parts.append({"text": content})
-                elif content and isinstance(content, dict):
-                    parts.append({"text": json.dumps(content)})
-                elif isinstance(content, llm.ImageContent):
-                    parts.append(_to_image_part(content))
-        elif msg.type == "function_call":
-            parts.append(
-                {
-                    "function_call": {
-                        "id": msg.call_id,
-                        "name": msg.name,
-                        "args": json.loads(msg.arguments or "{}"),
-                    }
-                }
-            )
-        elif msg.type == "function_call_output":
-            response = {"output": msg.output} if not msg.is_error else {"error": msg.output}
-            parts.append(
-                {
-                    "function_response": {
-                        "id": msg.call_id,
-                        "name": msg.name,
-                        "response": response,
-                    }
-                }
-            )
+        parts.extend(dict(part) for part in _converted.get(msg))
 
     if current_role is not None and parts:
         turns.append({"role": current_role, "parts": parts})
@@ -90,6 +62,40 @@ def to_chat_ctx(
     return turns, GoogleFormatData(system_messages=system_messages)
 
 
+def _to_parts(msg: llm.ChatItem) -> list[dict[str, Any]]:
+    parts: list[dict[str, Any]] = []
+    if msg.type == "message":
+        for content in msg.content:
+            if content and isinstance(content, str):
+                parts.append({"text": content})
+            elif content and isinstance(content, dict):
+                parts.append({"text": json.dumps(content)})
+            elif isinstance(content, llm.ImageContent):
+                parts.append(_to_image_part(content))
+    elif msg.type == "function_call":
+        parts.append(
+            {
+                "function_call": {
+                    "id": msg.call_id,
+                    "name": msg.name,
+                    "args": json.loads(msg.arguments or "{}"),
+                }
+            }
+        )
+    elif msg.type == "function_call_output":
+        response = {"output": msg.output} if not msg.is_error else {"error": msg.output}
+        parts.append(
+            {
+                "function_response": {
+                    "id": msg.call_id,
+                    "name": msg.name,
+                    "response": response,
+                }
+            }
+        )
+    return parts
+
+
 def _to_image_part(image: llm.ImageContent) -> dict[str, Any]:
     cache_key = "serialized_image"
     if cache_key not in image._cache:
@@ -105,3 +111,6 @@ def _to_image_part(image: llm.ImageContent) -> dict[str, Any]:
         return {"file_data": {"file_uri": img.external_url, "mime_type": mime_type}}
 
     return {"inline_data": {"data": img.data_bytes, "mime_type": img.mime_type}}
+
+
+_converted = _ConvertedItems(_to_parts)
@@ -5,7 +5,7 @@ from typing import Any, Literal
 
 from livekit.agents import llm
 
-from .utils import group_tool_calls
+from .utils import _ConvertedItems, group_tool_calls
 
 
 def to_chat_ctx(
@@ -18,26 +18,39 @@ def to_chat_ctx(
             continue
 
         # one message can contain zero or more tool calls
-        msg = _to_chat_item(group.message) if group.message else {"role": "assistant"}
-        tool_calls = [
-            {
-                "id": tool_call.call_id,
-                "type": "function",
-                "function": {"name": tool_call.name, "arguments": tool_call.arguments},
-            }
-            for tool_call in group.tool_calls
-        ]
-        if tool_calls:
-            msg["tool_calls"] = tool_calls
+        msg: dict[str, Any] = (
+            _copy(_converted.get(group.message)) if group.message else {"role": "assistant"}
+        )
+        if group.tool_calls:
+            msg["tool_calls"] = [
+                dict(_converted_tool_calls.get(tool_call)) for tool_call in group.tool_calls
+            ]
         messages.append(msg)
 
         # append tool outputs following the tool calls
         for tool_output in group.tool_outputs:
-            messages.append(_to_chat_item(tool_output))
+            messages.append(_copy(_converted.get(tool_output)))
 
     return messages, None
 
 
+def _copy(msg: dict[str, Any]) -> dict[str, Any]:
+    """copy of a converted message the caller can modify"""
+    msg = dict(msg)
+    if isinstance(content := msg.get("content"), list):
+        msg["content"] = [dict(c) for c in content]
+    return msg
+
+
+def _to_tool_call(tool_call: llm.ChatItem) -> dict[str, Any]:
+    assert tool_call.type == "function_call"
+    return {
+        "id": tool_call.call_id,
+        "type": "function",
+        "function": {"name": tool_call.name, "arguments": tool_call.arguments},
+    }
+
+
 def _to_chat_item(msg: llm.ChatItem) -> dict[str, Any]:
     if msg.type == "message":
         list_content: list[dict[str, Any]] = []
@@ -104,3 +117,7 @@ def _to_image_content(image: llm.ImageContent) -> dict[str, Any]:
             "detail": img.inference_detail,
         },
     }
+
+
+_converted = _ConvertedItems(_to_chat_item)
+_converted_tool_calls = _ConvertedItems(_to_tool_call)
@@ -1,11 +1,59 @@
 from __future__ import annotations
 
+import weakref
 from collections import OrderedDict
 from dataclasses import dataclass, field
+from typing import Any, Callable, Generic, TypeVar
 
 from livekit.agents import llm
 from livekit.agents.log import logger
 
+_T = TypeVar("_T")
+
+
+class _ConvertedItems(Generic[_T]):
+    """Chat items converted to a provider format, reused while the items are unchanged.
+
+    The histories are append-mostly and the items are shared by the copies of a chat context,
+    so most of the items of a request were already converted for the previous one. An entry
+    is dropped with its item, and an item whose fields were edited is converted again.
+
+    The converted values are shared between the requests, the callers copy the dicts they
+    return so the providers can modify them (e.g. to add cache markers).
+    """
+
+    def __init__(self, convert: Callable[[llm.ChatItem], _T]) -> None:
+        self._convert = convert
+        # id(item) -> (weakref to the item, version of the item, converted value)
+        self._entries: dict[int, tuple[weakref.ref[Any], tuple[Any, ...], _T]] = {}
+
+    def get(self, item: llm.ChatItem) -> _T:
+        key = id(item)
+        version = _item_version(item)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0]() is item and entry[1] == version:
+            return entry[2]
+
+        value = self._convert(item)
+        ref = weakref.ref(item, lambda _: self._entries.pop(key, None))
+        self._entries[key] = (ref, version, value)
+        return value
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+def _item_version(item: llm.ChatItem) -> tuple[Any, ...]:
+    """the fields the conversions depend on, the contents are compared by identity first"""
+    if item.type == "message":
+        return (item.role, *item.content)
+    elif item.type == "function_call":
+        return (item.call_id, item.name, item.arguments)
+    elif item.type == "function_call_output":
+        return (item.call_id, item.name, item.output, item.is_error)
+
+    return (item.id,)
+
 
 def group_tool_calls(chat_ctx: llm.ChatContext) -> list[_ChatItemGroup]:
     """Group chat items (messages, function calls, and function outputs)
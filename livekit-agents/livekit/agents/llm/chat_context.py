@@ -14,9 +14,12 @@
 
 from __future__ import annotations
 
+import bisect
+import operator
 import time
-from collections.abc import Sequence
-from typing import TYPE_CHECKING, Annotated, Any, Literal, Union, overload
+import weakref
+from collections.abc import Callable, Iterable, Sequence
+from typing import TYPE_CHECKING, Annotated, Any, Literal, SupportsIndex, Union, overload
 
 from pydantic import BaseModel, Field, PrivateAttr, TypeAdapter
 from typing_extensions import TypeAlias, TypedDict
@@ -208,9 +211,202 @@ ChatItem = Annotated[
 ]
 
 
+class _ItemList(list[ChatItem]):
+    """List of chat items keeping an id -> index map and the creation times of the items.
+
+    Both are rebuilt lazily, appends keep them up to date while the other mutations only
+    invalidate them.
+
+    The list can be shared by chat contexts created with ChatContext.copy(), they get a copy
+    of the items before the list is modified.
+    """
+
+    def __init__(self, items: Iterable[ChatItem] = ()) -> None:
+        super().__init__(items)
+        self._index: dict[str, int] | None = None
+        self._created_at: list[float] | None = None
+        self._sorted = True
+        self._shared_with: weakref.WeakSet[ChatContext] | None = None
+
+    def __reduce__(self) -> tuple[Any, ...]:
+        return (self.__class__, (list(self),))
+
+    def clone(self, cls: type[_ItemList] | None = None) -> _ItemList:
+        """copy the items, and the index built for them"""
+        items = (cls or _ItemList)(self)
+        items._index = self._index.copy() if self._index is not None else None
+        items._created_at = self._created_at.copy() if self._created_at is not None else None
+        items._sorted = self._sorted
+        return items
+
+    def share_with(self, chat_ctx: ChatContext) -> None:
+        if self._shared_with is None:
+            self._shared_with = weakref.WeakSet()
+        self._shared_with.add(chat_ctx)
+
+    def unshare_with(self, chat_ctx: ChatContext) -> None:
+        if self._shared_with is not None:
+            self._shared_with.discard(chat_ctx)
+
+    def _before_mutation(self) -> None:
+        if not self._shared_with:
+            return
+
+        # the contexts sharing this list keep the current items
+        items = self.clone()
+        for chat_ctx in self._shared_with:
+            chat_ctx._item_list = items
+            items.share_with(chat_ctx)
+        self._shared_with = None
+
+    def index_by_id(self, item_id: str) -> int | None:
+        if self._index is None:
+            self._index = self._build_index()
+
+        idx = self._index.get(item_id)
+        if idx is not None and (idx >= len(self) or self[idx].id != item_id):
+            # the id of an item was changed in place
+            self._index = self._build_index()
+            idx = self._index.get(item_id)
+
+        return idx
+
+    def is_sorted(self) -> bool:
+        """whether the items are sorted by created_at"""
+        if self._created_at is None:
+            self._build_created_at()
+
+        return self._sorted
+
+    def insertion_index(self, created_at: float) -> int:
+        if not self.is_sorted():
+            for i in reversed(range(len(self))):
+                if self[i].created_at <= created_at:
+                    return i + 1
+
+            return 0
+
+        assert self._created_at is not None
+        idx = bisect.bisect_right(self._created_at, created_at)
+        if (idx > 0 and self[idx - 1].created_at > created_at) or (
+            idx < len(self) and self[idx].created_at <= created_at
+        ):
+            # the created_at of an item was changed in place
+            self._build_created_at()
+            return self.insertion_index(created_at)
+
+        return idx
+
+    def _build_index(self) -> dict[str, int]:
+        index: dict[str, int] = {}
+        for i, item in enumerate(self):
+            index.setdefault(item.id, i)
+        return index
+
+    def _build_created_at(self) -> None:
+        self._created_at = [item.created_at for item in self]
+        self._sorted = all(a <= b for a, b in zip(self._created_at, self._created_at[1:]))
+
+    def _invalidate(self) -> None:
+        self._index = None
+        self._created_at = None
+
+    def _appended(self, items: list[ChatItem]) -> None:
+        start = len(self) - len(items)
+        for i, item in enumerate(items, start):
+            if self._index is not None:
+                self._index.setdefault(item.id, i)
+
+            if self._created_at is not None:
+                if self._created_at and self._created_at[-1] > item.created_at:
+                    self._sorted = False
+                self._created_at.append(item.created_at)
+
+    def append(self, item: ChatItem) -> None:
+        self._before_mutation()
+        super().append(item)
+        self._appended([item])
+
+    def extend(self, items: Iterable[ChatItem]) -> None:
+        self._before_mutation()
+        items = list(items)
+        super().extend(items)
+        self._appended(items)
+
+    def __iadd__(self, items: Iterable[ChatItem]) -> _ItemList:  # type: ignore[override,misc]
+        self.extend(items)
+        return self
+
+    def insert(self, index: SupportsIndex, item: ChatItem) -> None:
+        self._before_mutation()
+        size = len(self)
+        super().insert(index, item)
+        self._index = None
+
+        if self._created_at is not None:
+            # same clamping as list.insert
+            pos = operator.index(index)
+            pos = min(max(pos + size if pos < 0 else pos, 0), size)
+            self._created_at.insert(pos, item.created_at)
+            if (pos > 0 and self._created_at[pos - 1] > item.created_at) or (
+                pos < size and self._created_at[pos + 1] < item.created_at
+            ):
+                self._sorted = False
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        self._before_mutation()
+        super().__setitem__(key, value)
+        self._invalidate()
+
+    def __delitem__(self, key: Any) -> None:
+        self._before_mutation()
+        super().__delitem__(key)
+        self._invalidate()
+
+    def __imul__(self, n: SupportsIndex) -> _ItemList:
+        self._before_mutation()
+        super().__imul__(n)
+        self._invalidate()
+        return self
+
+    def pop(self, index: SupportsIndex = -1) -> ChatItem:
+        self._before_mutation()
+        item = super().pop(index)
+        self._invalidate()
+        return item
+
+    def remove(self, item: ChatItem) -> None:
+        self._before_mutation()
+        super().remove(item)
+        self._invalidate()
+
+    def clear(self) -> None:
+        self._before_mutation()
+        super().clear()
+        self._invalidate()
+
+    def sort(self, *args: Any, **kwargs: Any) -> None:
+        self._before_mutation()
+        super().sort(*args, **kwargs)
+        self._invalidate()
+
+    def reverse(self) -> None:
+        self._before_mutation()
+        super().reverse()
+        self._invalidate()
+
+
 class ChatContext:
+    _list_type: type[_ItemList] = _ItemList
+
     def __init__(self, items: NotGivenOr[list[ChatItem]] = NOT_GIVEN):
-        self._items: list[ChatItem] = items if is_given(items) else []
+        self._item_list: _ItemList = self._list_type()
+        # the item list is shared with other contexts, it's copied before being modified
+        self._shared = False
+        # lazily applied by copy() when filtering the items
+        self._item_filter: Callable[[ChatItem], bool] | None = None
+        if is_given(items):
+            self.items = items
 
     @classmethod
     def empty(cls) -> ChatContext:
@@ -218,11 +414,39 @@ class ChatContext:
 
     @property
     def items(self) -> list[ChatItem]:
-        return self._items
+        items = self._items
+        if self._shared:
+            # the caller may modify the list
+            self._unshare()
+            self._item_list = items.clone(self._list_type)
+        return self._item_list
 
     @items.setter
     def items(self, items: list[ChatItem]) -> None:
-        self._items = items
+        self._unshare()
+        self._item_filter = None
+        self._item_list = items if isinstance(items, _ItemList) else self._list_type(items)
+
+    @property
+    def _items(self) -> _ItemList:
+        """the items, without copying the shared list (must not be modified)"""
+        if self._item_filter is not None:
+            item_filter, source = self._item_filter, self._item_list
+            self._unshare()
+            self._item_filter = None
+            self._item_list = self._list_type(filter(item_filter, source))
+        return self._item_list
+
+    def _share(self, items: _ItemList) -> None:
+        self._unshare()
+        self._item_list = items
+        self._shared = True
+        items.share_with(self)
+
+    def _unshare(self) -> None:
+        if self._shared:
+            self._item_list.unshare_with(self)
+            self._shared = False
 
     def add_message(
         self,
@@ -254,24 +478,34 @@ class ChatContext:
 
         if is_given(created_at):
             idx = self.find_insertion_index(created_at=created_at)
-            self._items.insert(idx, message)
+            self.items.insert(idx, message)
         else:
-            self._items.append(message)
+            self.items.append(message)
         return message
 
     def insert(self, item: ChatItem | Sequence[ChatItem]) -> None:
         """Insert an item or list of items into the chat context by creation time."""
         items = list(item) if isinstance(item, Sequence) else [item]
+        self._insert_items(items)
+
+    def _insert_items(self, items: list[ChatItem]) -> None:
+        if len(items) > 1 and not self.readonly and self._items.is_sorted():
+            # sort is stable and keeps the existing items first, which gives the same order as
+            # inserting the items one by one. the existing items are a single run for timsort
+            self.items.extend(items)
+            self.items.sort(key=lambda item: item.created_at)
+            return
 
-        for _item in items:
-            idx = self.find_insertion_index(created_at=_item.created_at)
-            self._items.insert(idx, _item)
+        for item in items:
+            idx = self.find_insertion_index(created_at=item.created_at)
+            self.items.insert(idx, item)
 
     def get_by_id(self, item_id: str) -> ChatItem | None:
-        return next((item for item in self.items if item.id == item_id), None)
+        idx = self._items.index_by_id(item_id)
+        return self._items[idx] if idx is not None else None
 
     def index_by_id(self, item_id: str) -> int | None:
-        return next((i for i, item in enumerate(self.items) if item.id == item_id), None)
+        return self._items.index_by_id(item_id)
 
     def copy(
         self,
@@ -281,7 +515,17 @@ class ChatContext:
         exclude_empty_message: bool = False,
         tools: NotGivenOr[Sequence[FunctionTool | RawFunctionTool | str | Any]] = NOT_GIVEN,
     ) -> ChatContext:
-        items = []
+        """Copy the chat context.
+
+        The copy shares the items with this context until one of them is modified, the
+        filtered copies are only built when their items are first accessed.
+        """
+        chat_ctx = ChatContext()
+        chat_ctx._share(self._items)
+        if not (exclude_function_call or exclude_instructions or exclude_empty_message) and (
+            not is_given(tools)
+        ):
+            return chat_ctx
 
         from .tool_context import (
             get_function_info,
@@ -301,33 +545,21 @@ class ChatContext:
                     valid_tools.add(get_raw_function_info(tool).name)
                 # TODO(theomonnom): other tools
 
-        for item in self.items:
-            if exclude_function_call and item.type in [
-                "function_call",
-                "function_call_output",
-            ]:
-                continue
-
-            if (
-                exclude_instructions
-                and item.type == "message"
-                and item.role in ["system", "developer"]
-            ):
-                continue
+        filter_tools = is_given(tools)
 
-            if exclude_empty_message and item.type == "message" and not item.content:
-                continue
+        def _keep(item: ChatItem) -> bool:
+            if item.type == "message":
+                if exclude_instructions and item.role in ["system", "developer"]:
+                    return False
+                return not exclude_empty_message or bool(item.content)
 
-            if (
-                is_given(tools)
-                and (item.type == "function_call" or item.type == "function_call_output")
-                and item.name not in valid_tools
-            ):
-                continue
+            if item.type == "function_call" or item.type == "function_call_output":
+                return not exclude_function_call and (not filter_tools or item.name in valid_tools)
 
-            items.append(item)
+            return True
 
-        return ChatContext(items)
+        chat_ctx._item_filter = _keep
+        return chat_ctx
 
     def truncate(self, *, max_items: int) -> ChatContext:
         """Truncate the chat context to the last N items in place.
@@ -355,7 +587,7 @@ class ChatContext:
         if instructions:
             new_items.insert(0, instructions)
 
-        self._items[:] = new_items
+        self.items[:] = new_items
         return self
 
     def merge(
@@ -367,8 +599,9 @@ class ChatContext:
     ) -> ChatContext:
         """Add messages from `other_chat_ctx` into this one, avoiding duplicates, and keep items sorted by created_at."""
         existing_ids = {item.id for item in self._items}
+        new_items: list[ChatItem] = []
 
-        for item in other_chat_ctx.items:
+        for item in other_chat_ctx._items:
             if exclude_function_call and item.type in [
                 "function_call",
                 "function_call_output",
@@ -383,10 +616,10 @@ class ChatContext:
                 continue
 
             if item.id not in existing_ids:
-                idx = self.find_insertion_index(created_at=item.created_at)
-                self._items.insert(idx, item)
+                new_items.append(item)
                 existing_ids.add(item.id)
 
+        self._insert_items(new_items)
         return self
 
     def to_dict(
@@ -398,7 +631,7 @@ class ChatContext:
         exclude_function_call: bool = False,
     ) -> dict[str, Any]:
         items: list[ChatItem] = []
-        for item in self.items:
+        for item in self._items:
             if exclude_function_call and item.type in [
                 "function_call",
                 "function_call_output",
@@ -492,14 +725,10 @@ class ChatContext:
         """
         Returns the index to insert an item by creation time.
 
-        Iterates in reverse, assuming items are sorted by `created_at`.
-        Finds the position after the last item with `created_at <=` the given timestamp.
+        Finds the position after the last item with `created_at <=` the given timestamp,
+        using a binary search when the items are sorted by `created_at`.
         """
-        for i in reversed(range(len(self._items))):
-            if self._items[i].created_at <= created_at:
-                return i + 1
-
-        return 0
+        return self._items.insertion_index(created_at)
 
     async def summarize(
         self,
@@ -508,7 +737,7 @@ class ChatContext:
         keep_last_turns: int = 2,
     ) -> ChatContext:
         to_summarize: list[ChatMessage] = []
-        for item in self.items:
+        for item in self._items:
             if item.type != "message":
                 continue
             if item.role not in ("user", "assistant"):
@@ -561,7 +790,7 @@ class ChatContext:
         tail_start_ts = tail[0].created_at if tail else float("inf")
 
         preserved: list[ChatItem] = []
-        for it in self.items:
+        for it in self._items:
             if (
                 it.type in ("function_call", "function_call_output")
                 and it.created_at < tail_start_ts
@@ -573,7 +802,7 @@ class ChatContext:
 
             preserved.append(it)
 
-        self._items = preserved
+        self.items = preserved
 
         created_at_hint = (tail[0].created_at - 1e-6) if tail else (head[-1].created_at + 1e-6)
         self.add_message(
@@ -584,7 +813,7 @@ class ChatContext:
         )
 
         for msg in tail:
-            self._items.append(msg)
+            self.items.append(msg)
 
         return self
 
@@ -613,10 +842,10 @@ class ChatContext:
         if self is other:
             return True
 
-        if len(self.items) != len(other.items):
+        if len(self._items) != len(other._items):
             return False
 
-        for a, b in zip(self.items, other.items):
+        for a, b in zip(self._items, other._items):
             if a.id != b.id or a.type != b.type:
                 return False
 
@@ -648,7 +877,7 @@ class _ReadOnlyChatContext(ChatContext):
         "please use .copy() and agent.update_chat_ctx() to modify the chat context"
     )
 
-    class _ImmutableList(list[ChatItem]):
+    class _ImmutableList(_ItemList):
         def _raise_error(self, *args: Any, **kwargs: Any) -> None:
             logger.error(_ReadOnlyChatContext.error_msg)
             raise RuntimeError(_ReadOnlyChatContext.error_msg)
@@ -660,8 +889,14 @@ class _ReadOnlyChatContext(ChatContext):
         def copy(self) -> list[ChatItem]:
             return list(self)
 
+    _list_type = _ImmutableList
+
     def __init__(self, items: list[ChatItem]):
-        self._items = self._ImmutableList(items)
+        super().__init__()
+        if isinstance(items, _ItemList):
+            self._share(items)
+        else:
+            self._item_list = self._ImmutableList(items)
 
     @property
     def readonly(self) -> bool:
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import asyncio
 import dataclasses
+import functools
 import time
-from collections.abc import AsyncIterable
-from dataclasses import dataclass
+from collections.abc import AsyncGenerator, AsyncIterable
+from dataclasses import dataclass, field
 from typing import Any, ClassVar, Literal
 
+from .. import utils
 from .._exceptions import APIConnectionError, APIError
 from ..log import logger
+from ..telemetry import metrics as telemetry_metrics
 from ..types import DEFAULT_API_CONNECT_OPTIONS, NOT_GIVEN, APIConnectOptions, NotGivenOr
+from ..utils.aio.hedge import HedgeWinner, first_to_stream
 from .chat_context import ChatContext
 from .llm import LLM, ChatChunk, LLMStream
 from .tool_context import FunctionTool, RawFunctionTool, ToolChoice
@@ -18,11 +22,18 @@ DEFAULT_FALLBACK_API_CONNECT_OPTIONS = APIConnectOptions(
     max_retry=0, timeout=DEFAULT_API_CONNECT_OPTIONS.timeout
 )
 
+# the hedge delay of an LLM is its initial one until it has this many TTFT samples
+_TTFT_WINDOW = 100
+_MIN_TTFT_SAMPLES = 10
+
 
 @dataclass
 class _LLMStatus:
     available: bool
     recovering_task: asyncio.Task[None] | None
+    ttft: utils.MovingPercentile = field(
+        default_factory=lambda: utils.MovingPercentile(_TTFT_WINDOW)
+    )
 
 
 @dataclass
@@ -43,6 +54,9 @@ class FallbackAdapter(
         max_retry_per_llm: int = 0,
         retry_interval: float = 0.5,
         retry_on_chunk_sent: bool = False,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_delay: float = 1.0,
     ) -> None:
         """FallbackAdapter is an LLM that can fallback to a different LLM if the current LLM fails.
 
@@ -54,6 +68,13 @@ class FallbackAdapter(
             retry_interval (float, optional): Interval between retries. Defaults to 0.5.
             retry_on_chunk_sent (bool, optional): Whether to retry when a LLM failed after chunks
                 are sent. Defaults to False.
+            hedge (bool, optional): Whether to also send the request to the next LLM when the
+                current one hasn't streamed its first chunk after its hedge delay. The first LLM
+                to stream is used and the other request is cancelled. Defaults to False.
+            hedge_percentile (float, optional): Percentile of the recent times to first token of
+                an LLM used as its hedge delay. Defaults to 0.95.
+            hedge_delay (float, optional): Hedge delay of an LLM until enough of its times to
+                first token are known. Defaults to 1.0.
 
         Raises:
             ValueError: If no LLM instances are provided.
@@ -61,6 +82,9 @@ class FallbackAdapter(
         if len(llm) < 1:
             raise ValueError("at least one LLM instance must be provided.")
 
+        if not 0 < hedge_percentile <= 1:
+            raise ValueError("hedge_percentile must be between 0 and 1")
+
         super().__init__()
 
         self._llm_instances = llm
@@ -68,6 +92,9 @@ class FallbackAdapter(
         self._max_retry_per_llm = max_retry_per_llm
         self._retry_interval = retry_interval
         self._retry_on_chunk_sent = retry_on_chunk_sent
+        self._hedge = hedge
+        self._hedge_percentile = hedge_percentile
+        self._hedge_delay = hedge_delay
 
         self._status = [
             _LLMStatus(available=True, recovering_task=None) for _ in self._llm_instances
@@ -108,6 +135,17 @@ class FallbackAdapter(
         for llm_instance in self._llm_instances:
             llm_instance.off("metrics_collected", self._on_metrics_collected)
 
+    def _record_ttft(self, llm: LLM, ttft: float) -> None:
+        self._status[self._llm_instances.index(llm)].ttft.add_sample(ttft)
+        telemetry_metrics.fallback_first_chunk(kind="llm", provider=llm.label, ttft=ttft)
+
+    def _get_hedge_delay(self, llm: LLM) -> float:
+        ttft = self._status[self._llm_instances.index(llm)].ttft
+        if ttft.size() < _MIN_TTFT_SAMPLES:
+            return self._hedge_delay
+
+        return ttft.get_percentile(self._hedge_percentile)
+
     def _on_metrics_collected(self, *args: Any, **kwargs: Any) -> None:
         self.emit("metrics_collected", *args, **kwargs)
 
@@ -133,6 +171,8 @@ class FallbackLLMStream(LLMStream):
         self._extra_kwargs = extra_kwargs
 
         self._current_stream: LLMStream | None = None
+        # the streams opened for the attempts, by id of their LLM
+        self._attempt_streams: dict[int, LLMStream] = {}
 
     @property
     def chat_ctx(self) -> ChatContext:
@@ -148,7 +188,7 @@ class FallbackLLMStream(LLMStream):
 
     async def _try_generate(
         self, *, llm: LLM, check_recovery: bool = False
-    ) -> AsyncIterable[ChatChunk]:
+    ) -> AsyncGenerator[ChatChunk, None]:
         """
         Try to generate with the given LLM.
 
@@ -173,6 +213,8 @@ class FallbackLLMStream(LLMStream):
                 ),
             ) as stream:
                 should_set_current = not check_recovery
+                if not check_recovery:
+                    self._attempt_streams[id(llm)] = stream
                 async for chunk in stream:
                     if should_set_current:
                         should_set_current = False
@@ -236,6 +278,17 @@ class FallbackLLMStream(LLMStream):
 
             llm_status.recovering_task = asyncio.create_task(_recover_llm_task(llm))
 
+    def _mark_unavailable(self, llm: LLM) -> None:
+        llm_status = self._fallback_adapter._status[
+            self._fallback_adapter._llm_instances.index(llm)
+        ]
+        if llm_status.available:
+            llm_status.available = False
+            self._fallback_adapter.emit(
+                "llm_availability_changed",
+                AvailabilityChangedEvent(llm=llm, available=False),
+            )
+
     async def _run(self) -> None:
         start_time = time.time()
 
@@ -243,13 +296,25 @@ class FallbackLLMStream(LLMStream):
         if all_failed:
             logger.error("all LLMs are unavailable, retrying..")
 
+        if self._fallback_adapter._hedge:
+            await self._run_hedged(all_failed=all_failed)
+            return
+
         for i, llm in enumerate(self._fallback_adapter._llm_instances):
             llm_status = self._fallback_adapter._status[i]
             if llm_status.available or all_failed:
                 text_sent: str = ""
                 tool_calls_sent: list[str] = []
+                started_at = time.perf_counter()
+                first_chunk = True
                 try:
                     async for result in self._try_generate(llm=llm, check_recovery=False):
+                        if first_chunk:
+                            first_chunk = False
+                            self._fallback_adapter._record_ttft(
+                                llm, time.perf_counter() - started_at
+                            )
+
                         if result.delta:
                             if result.delta.content:
                                 text_sent += result.delta.content
@@ -260,27 +325,11 @@ class FallbackLLMStream(LLMStream):
 
                     return
                 except Exception:  # exceptions already logged inside _try_synthesize
-                    if llm_status.available:
-                        llm_status.available = False
-                        self._fallback_adapter.emit(
-                            "llm_availability_changed",
-                            AvailabilityChangedEvent(llm=llm, available=False),
-                        )
-
-                    if text_sent or tool_calls_sent:
-                        extra = {"text_sent": text_sent, "tool_calls_sent": tool_calls_sent}
-                        if not self._fallback_adapter._retry_on_chunk_sent:
-                            logger.error(
-                                f"{llm.label} failed after sending chunk, skip retrying. "
-                                "Set `retry_on_chunk_sent` to `True` to enable retrying after chunks are sent.",
-                                extra=extra,
-                            )
-                            raise
-
-                        logger.warning(
-                            f"{llm.label} failed after sending chunk, retrying..",
-                            extra=extra,
-                        )
+                    self._mark_unavailable(llm)
+                    if (text_sent or tool_calls_sent) and not self._retry_after_chunks(
+                        llm, text_sent, tool_calls_sent
+                    ):
+                        raise
 
             self._try_recovery(llm)
 
@@ -288,5 +337,85 @@ class FallbackLLMStream(LLMStream):
             f"all LLMs failed ({[llm.label for llm in self._fallback_adapter._llm_instances]}) after {time.time() - start_time} seconds"  # noqa: E501
         )
 
+    async def _run_hedged(self, *, all_failed: bool) -> None:
+        start_time = time.time()
+        candidates: list[LLM] = []
+        for llm, llm_status in zip(
+            self._fallback_adapter._llm_instances, self._fallback_adapter._status
+        ):
+            if llm_status.available or all_failed:
+                candidates.append(llm)
+            else:
+                self._try_recovery(llm)
+
+        while candidates:
+            winner = await self._first_to_stream(candidates)
+            if winner is None:
+                break
+
+            llm = candidates[winner.index]
+            candidates = candidates[winner.index + 1 :]
+            self._fallback_adapter._record_ttft(llm, winner.elapsed)
+            if winner.hedged:
+                telemetry_metrics.fallback_hedged(kind="llm", hedge_won=winner.is_hedge)
+            if stream := self._attempt_streams.get(id(llm)):
+                self._current_stream = stream
+
+            text_sent: str = ""
+            tool_calls_sent: list[str] = []
+            try:
+                async for result in winner.stream:
+                    if result.delta:
+                        if result.delta.content:
+                            text_sent += result.delta.content
+                        for tool_call in result.delta.tool_calls:
+                            tool_calls_sent.append(tool_call.name)
+
+                    self._event_ch.send_nowait(result)
+
+                return
+            except Exception:  # exceptions already logged inside _try_generate
+                self._mark_unavailable(llm)
+                if (text_sent or tool_calls_sent) and not self._retry_after_chunks(
+                    llm, text_sent, tool_calls_sent
+                ):
+                    raise
+
+                self._try_recovery(llm)
+
+        raise APIConnectionError(
+            f"all LLMs failed ({[llm.label for llm in self._fallback_adapter._llm_instances]}) after {time.time() - start_time} seconds"  # noqa: E501
+        )
+
+    async def _first_to_stream(self, llms: list[LLM]) -> HedgeWinner[ChatChunk] | None:
+        def _on_error(index: int, _: BaseException) -> None:
+            self._mark_unavailable(llms[index])
+            self._try_recovery(llms[index])
+
+        async def _hedge_after(index: int) -> None:
+            await asyncio.sleep(self._fallback_adapter._get_hedge_delay(llms[index]))
+
+        return await first_to_stream(
+            [functools.partial(self._try_generate, llm=llm) for llm in llms],
+            hedge_after=_hedge_after,
+            on_error=_on_error,
+        )
+
+    def _retry_after_chunks(self, llm: LLM, text_sent: str, tool_calls_sent: list[str]) -> bool:
+        extra = {"text_sent": text_sent, "tool_calls_sent": tool_calls_sent}
+        if not self._fallback_adapter._retry_on_chunk_sent:
+            logger.error(
+                f"{llm.label} failed after sending chunk, skip retrying. "
+                "Set `retry_on_chunk_sent` to `True` to enable retrying after chunks are sent.",
+                extra=extra,
+            )
+            return False
+
+        logger.warning(
+            f"{llm.label} failed after sending chunk, retrying..",
+            extra=extra,
+        )
+        return True
+
     async def _metrics_monitor_task(self, event_aiter: AsyncIterable[ChatChunk]) -> None:
         return
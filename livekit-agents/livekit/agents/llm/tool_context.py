@@ -15,7 +15,8 @@
 from __future__ import annotations
 
 import inspect
-from collections.abc import Awaitable
+import weakref
+from collections.abc import Awaitable, Hashable
 from dataclasses import dataclass
 from enum import Flag, auto
 from typing import (
@@ -81,6 +82,8 @@ class _FunctionToolInfo:
     name: str
     description: str | None
     flags: ToolFlag
+    max_concurrency: int | None = None
+    timeout: float | None = None
 
 
 @runtime_checkable
@@ -93,6 +96,9 @@ class FunctionTool(Protocol):
 class ToolFlag(Flag):
     NONE = 0
     IGNORE_ON_ENTER = auto()
+    # the output only depends on the arguments, it is reused for the calls with the same
+    # arguments in the session
+    IDEMPOTENT = auto()
 
 
 class RawFunctionDescription(TypedDict):
@@ -117,6 +123,8 @@ class _RawFunctionToolInfo:
     name: str
     raw_schema: dict[str, Any]
     flags: ToolFlag
+    max_concurrency: int | None = None
+    timeout: float | None = None
 
 
 @runtime_checkable
@@ -136,6 +144,8 @@ def function_tool(
     *,
     raw_schema: RawFunctionDescription | dict[str, Any],
     flags: ToolFlag = ToolFlag.NONE,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
 ) -> RawFunctionTool: ...
 
 
@@ -145,6 +155,8 @@ def function_tool(
     *,
     raw_schema: RawFunctionDescription | dict[str, Any],
     flags: ToolFlag = ToolFlag.NONE,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
 ) -> Callable[[Raw_F], RawFunctionTool]: ...
 
 
@@ -155,6 +167,8 @@ def function_tool(
     name: str | None = None,
     description: str | None = None,
     flags: ToolFlag = ToolFlag.NONE,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
 ) -> FunctionTool: ...
 
 
@@ -165,6 +179,8 @@ def function_tool(
     name: str | None = None,
     description: str | None = None,
     flags: ToolFlag = ToolFlag.NONE,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
 ) -> Callable[[F], FunctionTool]: ...
 
 
@@ -175,12 +191,20 @@ def function_tool(
     description: str | None = None,
     raw_schema: RawFunctionDescription | dict[str, Any] | None = None,
     flags: ToolFlag = ToolFlag.NONE,
+    max_concurrency: int | None = None,
+    timeout: float | None = None,
 ) -> (
     FunctionTool
     | RawFunctionTool
     | Callable[[F], FunctionTool]
     | Callable[[Raw_F], RawFunctionTool]
 ):
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1")
+
+    if timeout is not None and timeout <= 0:
+        raise ValueError("timeout must be positive")
+
     def deco_raw(func: Raw_F) -> RawFunctionTool:
         assert raw_schema is not None
 
@@ -191,7 +215,13 @@ def function_tool(
             # support empty parameters
             raise ValueError("raw function description must contain a parameters key")
 
-        info = _RawFunctionToolInfo(raw_schema={**raw_schema}, name=raw_schema["name"], flags=flags)
+        info = _RawFunctionToolInfo(
+            raw_schema={**raw_schema},
+            name=raw_schema["name"],
+            flags=flags,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
+        )
         setattr(func, "__livekit_raw_tool_info", info)
         return cast(RawFunctionTool, func)
 
@@ -203,6 +233,8 @@ def function_tool(
             name=name or func.__name__,
             description=description or docstring.description,
             flags=flags,
+            max_concurrency=max_concurrency,
+            timeout=timeout,
         )
         setattr(func, "__livekit_tool_info", info)
         return cast(FunctionTool, func)
@@ -229,6 +261,37 @@ def get_raw_function_info(f: RawFunctionTool) -> _RawFunctionToolInfo:
     return cast(_RawFunctionToolInfo, getattr(f, "__livekit_raw_tool_info"))
 
 
+_T = TypeVar("_T")
+
+# tool function -> key -> (version of the tool, schema)
+_schema_cache: weakref.WeakKeyDictionary[Any, dict[Hashable, tuple[Hashable, Any]]] = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def cached_tool_schema(tool: FunctionTool, key: Hashable, build: Callable[[], _T]) -> _T:
+    """Return the schema of a tool built by ``build``, building it once per tool and key.
+
+    The key identifies the format of the schema, e.g. ("openai", strict). The methods of the
+    instances of a class share the schemas of their function. A schema is rebuilt when the name,
+    the description or the flags of the tool change. The returned schema is shared, it must not
+    be mutated.
+    """
+    info = get_function_info(tool)
+    version = (info.name, info.description, info.flags, inspect.ismethod(tool))
+    try:
+        schemas = _schema_cache.setdefault(getattr(tool, "__func__", tool), {})
+    except TypeError:
+        return build()  # not weak referenceable
+
+    if (cached := schemas.get(key)) is not None and cached[0] == version:
+        return cast(_T, cached[1])
+
+    schema = build()
+    schemas[key] = (version, schema)
+    return schema
+
+
 def find_function_tools(cls_or_obj: Any) -> list[FunctionTool | RawFunctionTool]:
     methods: list[FunctionTool | RawFunctionTool] = []
     for _, member in inspect.getmembers(cls_or_obj):
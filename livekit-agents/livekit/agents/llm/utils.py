@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import bisect
 import inspect
 import sys
 import types
@@ -28,10 +29,11 @@ from livekit import rtc
 from ..log import logger
 from ..utils import images
 from . import _strict
-from .chat_context import ChatContext, ImageContent
+from .chat_context import ChatContext, ChatItem, ImageContent
 from .tool_context import (
     FunctionTool,
     RawFunctionTool,
+    cached_tool_schema,
     get_function_info,
     is_function_tool,
     is_raw_function_tool,
@@ -46,34 +48,73 @@ THINK_TAG_END = "</think>"
 
 def _compute_lcs(old_ids: list[str], new_ids: list[str]) -> list[str]:
     """
-    Standard dynamic-programming LCS to get the common subsequence
-    of IDs (in order) that appear in both old_ids and new_ids.
+    Longest common subsequence of IDs (in order) that appear in both old_ids and new_ids.
+
+    IDs are unique within a context, so the LCS is the longest increasing subsequence of the
+    old positions of the items of new_ids. The common prefix and suffix are matched first,
+    which is the whole list when items are only appended. O(n log n) in the worst case.
     """
     n, m = len(old_ids), len(new_ids)
-    dp = [[0] * (m + 1) for _ in range(n + 1)]
-
-    # Fill DP table
-    for i in range(1, n + 1):
-        for j in range(1, m + 1):
-            if old_ids[i - 1] == new_ids[j - 1]:
-                dp[i][j] = dp[i - 1][j - 1] + 1
-            else:
-                dp[i][j] = max(dp[i - 1][j], dp[i][j - 1])
-
-    # Backtrack to find the actual LCS sequence
-    lcs_ids = []
-    i, j = n, m
-    while i > 0 and j > 0:
-        if old_ids[i - 1] == new_ids[j - 1]:
-            lcs_ids.append(old_ids[i - 1])
-            i -= 1
-            j -= 1
-        elif dp[i - 1][j] > dp[i][j - 1]:
-            i -= 1
+    start = 0
+    while start < n and start < m and old_ids[start] == new_ids[start]:
+        start += 1
+
+    end = 0
+    while end < n - start and end < m - start and old_ids[n - 1 - end] == new_ids[m - 1 - end]:
+        end += 1
+
+    old_pos = {item_id: i for i, item_id in enumerate(old_ids[start : n - end])}
+    positions: list[int] = []
+    middle: list[str] = []
+    for item_id in new_ids[start : m - end]:
+        if (pos := old_pos.pop(item_id, None)) is not None:
+            positions.append(pos)
+            middle.append(item_id)
+
+    # patience sorting, tails[k] is the index of the smallest tail of an increasing run of k+1
+    tails: list[int] = []
+    tail_pos: list[int] = []
+    prev: list[int] = [-1] * len(positions)
+    for i, pos in enumerate(positions):
+        k = bisect.bisect_left(tail_pos, pos)
+        if k > 0:
+            prev[i] = tails[k - 1]
+        if k == len(tails):
+            tails.append(i)
+            tail_pos.append(pos)
         else:
-            j -= 1
+            tails[k] = i
+            tail_pos[k] = pos
+
+    lis: list[str] = []
+    i = tails[-1] if tails else -1
+    while i >= 0:
+        lis.append(middle[i])
+        i = prev[i]
+
+    return new_ids[:start] + lis[::-1] + new_ids[m - end :]
+
+
+def _is_content_equal(old_item: ChatItem, new_item: ChatItem) -> bool:
+    """Compare the parts of two items that are synced to the providers"""
+    if old_item.type == "message" and new_item.type == "message":
+        return old_item.text_content == new_item.text_content
+    if old_item.type == "function_call" and new_item.type == "function_call":
+        return (
+            old_item.call_id == new_item.call_id
+            and old_item.name == new_item.name
+            and old_item.arguments == new_item.arguments
+        )
+    if old_item.type == "function_call_output" and new_item.type == "function_call_output":
+        # name and is_error aren't always available on the remote items
+        return old_item.call_id == new_item.call_id and old_item.output == new_item.output
+    if old_item.type == "agent_handoff" and new_item.type == "agent_handoff":
+        return (
+            old_item.old_agent_id == new_item.old_agent_id
+            and old_item.new_agent_id == new_item.new_agent_id
+        )
 
-    return list(reversed(lcs_ids))
+    return old_item.type == new_item.type
 
 
 @dataclass
@@ -88,9 +129,8 @@ class DiffOps:
 
 
 def compute_chat_ctx_diff(old_ctx: ChatContext, new_ctx: ChatContext) -> DiffOps:
-    """Computes the minimal list of create/remove operations to transform old_ctx into new_ctx."""
-    # TODO(theomonnom): Make ChatMessage hashable and also add update ops
-
+    """Computes the minimal list of create/remove/update operations to transform old_ctx into
+    new_ctx."""
     old_ids = [m.id for m in old_ctx.items]
     new_ids = [m.id for m in new_ctx.items]
 
@@ -107,11 +147,8 @@ def compute_chat_ctx_diff(old_ctx: ChatContext, new_ctx: ChatContext) -> DiffOps
             to_create.append((prev_id, new_msg.id))
         else:
             # check if the content is different
-            old_msg = old_ctx_by_id[new_msg.id]
-            if new_msg.type == "message" and old_msg.type == "message":
-                if new_msg.text_content != old_msg.text_content:
-                    to_update.append((prev_id, new_msg.id))
-                # TODO: check other content types
+            if not _is_content_equal(old_ctx_by_id[new_msg.id], new_msg):
+                to_update.append((prev_id, new_msg.id))
 
         prev_id = new_msg.id
 
@@ -200,9 +237,12 @@ def build_legacy_openai_schema(
 ) -> dict[str, Any]:
     """non-strict mode tool description
     see https://serde.rs/enum-representations.html for the internally tagged representation"""
-    model = function_arguments_to_pydantic_model(function_tool)
     info = get_function_info(function_tool)
-    schema = model.model_json_schema()
+    schema = cached_tool_schema(
+        function_tool,
+        "legacy_json_schema",
+        lambda: _function_model(function_tool).model_json_schema(),
+    )
 
     if internally_tagged:
         return {
@@ -226,9 +266,12 @@ def build_strict_openai_schema(
     function_tool: FunctionTool,
 ) -> dict[str, Any]:
     """strict mode tool description"""
-    model = function_arguments_to_pydantic_model(function_tool)
     info = get_function_info(function_tool)
-    schema = _strict.to_strict_json_schema(model)
+    schema = cached_tool_schema(
+        function_tool,
+        "strict_json_schema",
+        lambda: _strict.to_strict_json_schema(_function_model(function_tool)),
+    )
 
     return {
         "type": "function",
@@ -299,6 +342,14 @@ def to_openai_response_format(response_format: type | dict[str, Any]) -> dict[st
     }
 
 
+def _function_model(function_tool: FunctionTool) -> type[BaseModel]:
+    return cached_tool_schema(
+        function_tool,
+        "pydantic_model",
+        lambda: function_arguments_to_pydantic_model(function_tool),
+    )
+
+
 def function_arguments_to_pydantic_model(func: Callable[..., Any]) -> type[BaseModel]:
     """Create a Pydantic model from a function's signature. (excluding context types)"""
 
@@ -361,7 +412,7 @@ def prepare_function_arguments(
     args_dict = from_json(json_arguments)
 
     if is_function_tool(fnc):
-        model_type = function_arguments_to_pydantic_model(fnc)
+        model_type = _function_model(fnc)
 
         # Function arguments with default values are treated as optional
         # when converted to strict LLM function descriptions. (e.g., we convert default
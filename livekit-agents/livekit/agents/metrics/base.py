@@ -64,6 +64,8 @@ class VADMetrics(BaseModel):
     idle_time: float
     inference_duration_total: float
     inference_count: int
+    backlog_duration_max: float = 0.0
+    """Longest duration of audio waiting for inference during this period, in seconds."""
     metadata: Metadata | None = None
 
 
@@ -1,7 +1,8 @@
-import os
+from __future__ import annotations
+
+import contextlib
 
 import prometheus_client
-import psutil
 
 from .. import utils
 
@@ -29,28 +30,262 @@ CHILD_PROC_GAUGE = prometheus_client.Gauge(
     multiprocess_mode="max",
 )
 
+JOB_START_LATENCY = prometheus_client.Histogram(
+    "lk_agents_job_start_latency_seconds",
+    "Time from the job assignment until the entrypoint of the job is entered on a process",
+    ["nodename", "recycled"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10],
+)
+
+INFERENCE_LATENCY = prometheus_client.Histogram(
+    "lk_agents_inference_latency_seconds",
+    "Round-trip time of inference requests, from the worker to the inference process",
+    ["nodename", "method"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5],
+)
+
+INFERENCE_REQUESTS = prometheus_client.Counter(
+    "lk_agents_inference_requests",
+    "Number of inference requests completed by the inference process",
+    ["nodename", "method", "status"],
+)
+
+INFERENCE_BATCH_SIZE = prometheus_client.Histogram(
+    "lk_agents_inference_batch_size",
+    "Number of requests executed in a single inference runner call",
+    ["nodename", "method"],
+    buckets=[1, 2, 4, 8, 16, 32, 64],
+)
+
+INFERENCE_BATCH_TIME = prometheus_client.Histogram(
+    "lk_agents_inference_batch_duration_seconds",
+    "Time taken by an inference runner to execute a batch",
+    ["nodename", "method"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+)
+
+INFERENCE_QUEUE_DEPTH = prometheus_client.Gauge(
+    "lk_agents_inference_queue_depth",
+    "In-flight requests for each inference process of the pool",
+    ["nodename", "process"],
+    multiprocess_mode="livesum",
+)
+
+EOU_CACHE_REQUESTS = prometheus_client.Counter(
+    "lk_agents_eou_cache_requests",
+    "End of turn predictions served from the per-session cache (hit) or the model (miss)",
+    ["nodename", "result"],
+)
+
+AUDIO_DECODER_QUEUE_WAIT = prometheus_client.Histogram(
+    "lk_agents_audio_decoder_queue_wait_seconds",
+    "Time an audio stream waited for a thread of the decoder pool to start decoding it",
+    ["nodename", "format"],
+    buckets=[0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5],
+)
+
+AUDIO_DECODER_OVERFLOW = prometheus_client.Counter(
+    "lk_agents_audio_decoder_overflow",
+    "Audio streams decoded on an extra thread because all the threads kept by the decoder pool "
+    "were busy",
+    ["nodename"],
+)
+
+AUDIO_DECODER_RTF = prometheus_client.Histogram(
+    "lk_agents_audio_decoder_realtime_factor",
+    "Time spent decoding an audio stream divided by its duration, excluding input waits",
+    ["nodename", "format"],
+    buckets=[0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1],
+)
+
+AVAILABILITY_ANSWER_LATENCY = prometheus_client.Histogram(
+    "lk_agents_availability_answer_latency_seconds",
+    "Time from the availability request until the answer is queued",
+    ["nodename", "path"],
+    buckets=[0.00001, 0.0001, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1],
+)
+
+ASSIGNMENT_LATENCY = prometheus_client.Histogram(
+    "lk_agents_assignment_latency_seconds",
+    "Time from an accepted availability answer until the job assignment",
+    ["nodename"],
+    buckets=[0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+
+JOB_ARRIVAL_RATE = prometheus_client.Gauge(
+    "lk_agents_job_arrival_rate",
+    "Job arrivals per second (EWMA) seen by the process pool",
+    ["nodename"],
+)
+
+PROC_READY_TIME_ESTIMATE = prometheus_client.Gauge(
+    "lk_agents_proc_ready_time_estimate_seconds",
+    "Estimated time from starting a process until it can take a job (EWMA)",
+    ["nodename"],
+)
+
+IDLE_PROC_PREDICTED = prometheus_client.Gauge(
+    "lk_agents_idle_process_predicted",
+    "Idle processes needed to absorb the arrivals during one process startup",
+    ["nodename"],
+)
+
+IDLE_PROC_TARGET = prometheus_client.Gauge(
+    "lk_agents_idle_process_target",
+    "Idle processes kept warm, after the memory and load bounds",
+    ["nodename"],
+)
+
 CPU_LOAD_GAUGE = prometheus_client.Gauge(
     "lk_agents_worker_load",
     "Worker load percentage",
     ["nodename"],
 )
 
+LOAD_COMPONENT_GAUGE = prometheus_client.Gauge(
+    "lk_agents_worker_load_component",
+    "Components of the default worker load, the load is the highest of them",
+    ["nodename", "component"],
+)
+
+PROC_MEMORY_RSS = prometheus_client.Gauge(
+    "lk_agents_proc_memory_rss_bytes",
+    "Resident memory of the job and inference processes",
+    ["nodename", "pid", "job_id"],
+)
+
+PROC_MEMORY_PSS = prometheus_client.Gauge(
+    "lk_agents_proc_memory_pss_bytes",
+    "Proportional set size of the job and inference processes, the shared pages are split "
+    "between the processes mapping them",
+    ["nodename", "pid", "job_id"],
+)
+
+PROC_CPU_TIME = prometheus_client.Gauge(
+    "lk_agents_proc_cpu_seconds",
+    "CPU time used by the job and inference processes since they started",
+    ["nodename", "pid", "job_id"],
+)
+
+PROC_OPEN_FDS = prometheus_client.Gauge(
+    "lk_agents_proc_open_fds",
+    "Open file descriptors of the job and inference processes",
+    ["nodename", "pid", "job_id"],
+)
+
+_PROC_STATS_GAUGES = [PROC_MEMORY_RSS, PROC_MEMORY_PSS, PROC_CPU_TIME, PROC_OPEN_FDS]
+
+FALLBACK_TTFT = prometheus_client.Histogram(
+    "lk_agents_fallback_ttft_seconds",
+    "Time to the first chunk (LLM) or the first audio (TTS) of the providers of the fallback "
+    "adapters, the hedge delays are percentiles of it",
+    ["nodename", "kind", "provider"],
+    buckets=[0.05, 0.1, 0.25, 0.5, 0.75, 1, 1.5, 2.5, 5],
+)
+
+FALLBACK_HEDGES = prometheus_client.Counter(
+    "lk_agents_fallback_hedges",
+    "Requests of the fallback adapters sent to a second provider in parallel of a slow one, by "
+    "the request used (hedge or primary)",
+    ["nodename", "kind", "winner"],
+)
+
+PREEMPTIVE_GENERATIONS = prometheus_client.Counter(
+    "lk_agents_preemptive_generations",
+    "Preemptive generations by outcome: used for the reply (hit), discarded at the end of the "
+    "turn (miss) or cancelled before it",
+    ["nodename", "result"],
+)
+
+PREEMPTIVE_DEDUPLICATED = prometheus_client.Counter(
+    "lk_agents_preemptive_generations_deduplicated",
+    "Transcripts with the same words as the running preemptive generation, not restarted",
+    ["nodename"],
+)
+
+PREEMPTIVE_LEAD_TIME = prometheus_client.Histogram(
+    "lk_agents_preemptive_generation_lead_time_seconds",
+    "Time from the start of a used preemptive generation until the end of the user turn",
+    ["nodename"],
+    buckets=[0.05, 0.1, 0.25, 0.5, 1, 2, 5],
+)
+
+PREEMPTIVE_WASTED_TOKENS = prometheus_client.Counter(
+    "lk_agents_preemptive_wasted_tokens",
+    "LLM tokens used by the discarded preemptive generations",
+    ["nodename", "type"],
+)
+
+TOOL_QUEUE_WAIT = prometheus_client.Histogram(
+    "lk_agents_tool_queue_wait_seconds",
+    "Time the function tool calls waited for the concurrency limits of their tool or session",
+    ["nodename", "tool"],
+    buckets=[0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5],
+)
+
+TOOL_EXECUTION_TIME = prometheus_client.Histogram(
+    "lk_agents_tool_execution_duration_seconds",
+    "Execution time of the function tool calls by status (ok, error or timeout)",
+    ["nodename", "tool", "status"],
+    buckets=[0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30],
+)
+
+TOOL_CACHE_REQUESTS = prometheus_client.Counter(
+    "lk_agents_tool_cache_requests",
+    "Calls of the idempotent function tools served from the session cache (hit) or executed (miss)",
+    ["nodename", "tool", "result"],
+)
+
 
 # Note: set_function() is not supported in multiprocess mode.# We need to update this metric explicitly.
-def _update_child_proc_count() -> None:
+def _update_child_proc_count(count: int) -> None:
     """Update child process count metric. Must be called periodically in the main process."""
-    try:
-        count = len(psutil.Process(os.getpid()).children(recursive=True))
-        CHILD_PROC_GAUGE.labels(nodename=utils.nodename()).set(count)
-    except Exception:
-        # Process might not exist anymore or access denied
-        pass
+    CHILD_PROC_GAUGE.labels(nodename=utils.nodename()).set(count)
+
+
+def _update_proc_stats(
+    *, pid: int, job_id: str, rss: int, pss: int | None, cpu_time: float, num_fds: int
+) -> None:
+    """job_id is empty for the inference processes, the idle ones and the ones hosting
+    several jobs"""
+    labels = {"nodename": utils.nodename(), "pid": str(pid), "job_id": job_id}
+    PROC_MEMORY_RSS.labels(**labels).set(rss)
+    if pss is not None:
+        PROC_MEMORY_PSS.labels(**labels).set(pss)
+    PROC_CPU_TIME.labels(**labels).set(cpu_time)
+    PROC_OPEN_FDS.labels(**labels).set(num_fds)
+
+
+def _remove_proc_stats(*, pid: int, job_id: str) -> None:
+    for gauge in _PROC_STATS_GAUGES:
+        with contextlib.suppress(KeyError):
+            gauge.remove(utils.nodename(), str(pid), job_id)
 
 
 def _update_worker_load(worker_load: float) -> None:
     CPU_LOAD_GAUGE.labels(nodename=utils.nodename()).set(worker_load)
 
 
+def _update_load_components(components: dict[str, float]) -> None:
+    nodename = utils.nodename()
+    for component, value in components.items():
+        LOAD_COMPONENT_GAUGE.labels(nodename=nodename, component=component).set(value)
+
+
+def _update_idle_scaler(
+    *, arrival_rate: float, init_time: float, predicted: int, target: int
+) -> None:
+    nodename = utils.nodename()
+    JOB_ARRIVAL_RATE.labels(nodename=nodename).set(arrival_rate)
+    PROC_READY_TIME_ESTIMATE.labels(nodename=nodename).set(init_time)
+    IDLE_PROC_PREDICTED.labels(nodename=nodename).set(predicted)
+    IDLE_PROC_TARGET.labels(nodename=nodename).set(target)
+
+
+def _update_inference_queue_depth(*, index: int, depth: int) -> None:
+    INFERENCE_QUEUE_DEPTH.labels(nodename=utils.nodename(), process=str(index)).set(depth)
+
+
 def job_started() -> None:
     RUNNING_JOB_GAUGE.labels(nodename=utils.nodename()).inc()
 
@@ -59,5 +294,96 @@ def job_ended() -> None:
     RUNNING_JOB_GAUGE.labels(nodename=utils.nodename()).dec()
 
 
+def availability_answered(*, time_elapsed: float, policy: bool) -> None:
+    AVAILABILITY_ANSWER_LATENCY.labels(
+        nodename=utils.nodename(), path="policy" if policy else "request_fnc"
+    ).observe(time_elapsed)
+
+
+def job_assigned(*, time_elapsed: float) -> None:
+    ASSIGNMENT_LATENCY.labels(nodename=utils.nodename()).observe(time_elapsed)
+
+
+def job_launched(*, time_elapsed: float, recycled: bool) -> None:
+    JOB_START_LATENCY.labels(
+        nodename=utils.nodename(), recycled="true" if recycled else "false"
+    ).observe(time_elapsed)
+
+
 def proc_initialized(*, time_elapsed: float) -> None:
     PROC_INITIALIZE_TIME.labels(nodename=utils.nodename()).observe(time_elapsed)
+
+
+def inference_completed(*, method: str, time_elapsed: float, error: bool = False) -> None:
+    nodename = utils.nodename()
+    INFERENCE_LATENCY.labels(nodename=nodename, method=method).observe(time_elapsed)
+    INFERENCE_REQUESTS.labels(
+        nodename=nodename, method=method, status="error" if error else "ok"
+    ).inc()
+
+
+def inference_batch_completed(*, method: str, batch_size: int, time_elapsed: float) -> None:
+    nodename = utils.nodename()
+    INFERENCE_BATCH_SIZE.labels(nodename=nodename, method=method).observe(batch_size)
+    INFERENCE_BATCH_TIME.labels(nodename=nodename, method=method).observe(time_elapsed)
+
+
+def eou_cache_lookup(*, hit: bool) -> None:
+    EOU_CACHE_REQUESTS.labels(nodename=utils.nodename(), result="hit" if hit else "miss").inc()
+
+
+def fallback_first_chunk(*, kind: str, provider: str, ttft: float) -> None:
+    FALLBACK_TTFT.labels(nodename=utils.nodename(), kind=kind, provider=provider).observe(ttft)
+
+
+def fallback_hedged(*, kind: str, hedge_won: bool) -> None:
+    FALLBACK_HEDGES.labels(
+        nodename=utils.nodename(), kind=kind, winner="hedge" if hedge_won else "primary"
+    ).inc()
+
+
+def preemptive_generation_done(*, result: str, lead_time: float | None = None) -> None:
+    """result is "hit", "miss" or "cancelled", lead_time is only given for the hits"""
+    nodename = utils.nodename()
+    PREEMPTIVE_GENERATIONS.labels(nodename=nodename, result=result).inc()
+    if lead_time is not None:
+        PREEMPTIVE_LEAD_TIME.labels(nodename=nodename).observe(lead_time)
+
+
+def preemptive_generation_deduplicated() -> None:
+    PREEMPTIVE_DEDUPLICATED.labels(nodename=utils.nodename()).inc()
+
+
+def preemptive_tokens_wasted(*, prompt_tokens: int, completion_tokens: int) -> None:
+    nodename = utils.nodename()
+    PREEMPTIVE_WASTED_TOKENS.labels(nodename=nodename, type="prompt").inc(prompt_tokens)
+    PREEMPTIVE_WASTED_TOKENS.labels(nodename=nodename, type="completion").inc(completion_tokens)
+
+
+def tool_started(*, tool: str, queue_wait: float) -> None:
+    TOOL_QUEUE_WAIT.labels(nodename=utils.nodename(), tool=tool).observe(queue_wait)
+
+
+def tool_completed(*, tool: str, status: str, time_elapsed: float) -> None:
+    """status is "ok", "timeout" or "error" (the other exceptions)"""
+    TOOL_EXECUTION_TIME.labels(nodename=utils.nodename(), tool=tool, status=status).observe(
+        time_elapsed
+    )
+
+
+def tool_cache_lookup(*, tool: str, hit: bool) -> None:
+    TOOL_CACHE_REQUESTS.labels(
+        nodename=utils.nodename(), tool=tool, result="hit" if hit else "miss"
+    ).inc()
+
+
+def audio_decoder_started(*, format: str, queue_wait: float) -> None:
+    AUDIO_DECODER_QUEUE_WAIT.labels(nodename=utils.nodename(), format=format).observe(queue_wait)
+
+
+def audio_decoder_overflow() -> None:
+    AUDIO_DECODER_OVERFLOW.labels(nodename=utils.nodename()).inc()
+
+
+def audio_decoder_completed(*, format: str, realtime_factor: float) -> None:
+    AUDIO_DECODER_RTF.labels(nodename=utils.nodename(), format=format).observe(realtime_factor)
@@ -31,6 +31,9 @@ ATTR_FUNCTION_TOOL_NAME = "lk.function_tool.name"
 ATTR_FUNCTION_TOOL_ARGS = "lk.function_tool.arguments"
 ATTR_FUNCTION_TOOL_IS_ERROR = "lk.function_tool.is_error"
 ATTR_FUNCTION_TOOL_OUTPUT = "lk.function_tool.output"
+ATTR_FUNCTION_TOOL_QUEUE_WAIT = "lk.function_tool.queue_wait"
+ATTR_FUNCTION_TOOL_EXECUTION_TIME = "lk.function_tool.execution_time"
+ATTR_FUNCTION_TOOL_CACHED = "lk.function_tool.cached"
 
 # tts node
 ATTR_TTS_INPUT_TEXT = "lk.input_text"
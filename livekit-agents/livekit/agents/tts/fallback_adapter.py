@@ -2,18 +2,21 @@ from __future__ import annotations
 
 import asyncio
 import dataclasses
+import functools
 import time
 from collections.abc import AsyncGenerator, AsyncIterable
-from dataclasses import dataclass
-from typing import Any, ClassVar, Literal, Union
+from dataclasses import dataclass, field
+from typing import Any, Callable, ClassVar, Literal, Union
 
 from livekit import rtc
 
 from .. import utils
 from .._exceptions import APIConnectionError
 from ..log import logger
+from ..telemetry import metrics as telemetry_metrics
 from ..types import DEFAULT_API_CONNECT_OPTIONS, USERDATA_TIMED_TRANSCRIPT, APIConnectOptions
 from ..utils import aio
+from ..utils.aio.hedge import HedgeWinner, first_to_stream
 from .stream_adapter import StreamAdapter
 from .tts import (
     TTS,
@@ -29,12 +32,19 @@ DEFAULT_FALLBACK_API_CONNECT_OPTIONS = APIConnectOptions(
     max_retry=0, timeout=DEFAULT_API_CONNECT_OPTIONS.timeout
 )
 
+# the hedge delay of a TTS is its initial one until it has this many TTFB samples
+_TTFB_WINDOW = 100
+_MIN_TTFB_SAMPLES = 10
+
 
 @dataclass
 class _TTSStatus:
     available: bool
     recovering_task: asyncio.Task[None] | None
     resampler: rtc.AudioResampler | None
+    ttfb: utils.MovingPercentile = field(
+        default_factory=lambda: utils.MovingPercentile(_TTFB_WINDOW)
+    )
 
 
 @dataclass
@@ -56,6 +66,9 @@ class FallbackAdapter(
         *,
         max_retry_per_tts: int = 2,
         sample_rate: int | None = None,
+        hedge: bool = False,
+        hedge_percentile: float = 0.95,
+        hedge_delay: float = 1.0,
     ) -> None:
         """
         Initialize a FallbackAdapter that manages multiple TTS instances.
@@ -64,6 +77,9 @@ class FallbackAdapter(
             tts (list[TTS]): A list of TTS instances to use for fallback.
             max_retry_per_tts (int, optional): Maximum number of retries per TTS instance. Defaults to 2.
             sample_rate (int | None, optional): Desired sample rate for the synthesized audio. If None, uses the maximum sample rate among the TTS instances.
+            hedge (bool, optional): Whether to also send the request to the next TTS when the current one hasn't synthesized its first audio after its hedge delay. The first TTS to synthesize audio is used and the other request is cancelled. Defaults to False.
+            hedge_percentile (float, optional): Percentile of the recent times to first audio of a TTS used as its hedge delay. Defaults to 0.95.
+            hedge_delay (float, optional): Hedge delay of a TTS until enough of its times to first audio are known. Defaults to 1.0.
 
         Raises:
             ValueError: If less than one TTS instance is provided.
@@ -76,6 +92,9 @@ class FallbackAdapter(
         if len({t.num_channels for t in tts}) != 1:
             raise ValueError("all TTS must have the same number of channels")
 
+        if not 0 < hedge_percentile <= 1:
+            raise ValueError("hedge_percentile must be between 0 and 1")
+
         if sample_rate is None:
             sample_rate = max(t.sample_rate for t in tts)
 
@@ -92,6 +111,9 @@ class FallbackAdapter(
 
         self._tts_instances = tts
         self._max_retry_per_tts = max_retry_per_tts
+        self._hedge = hedge
+        self._hedge_percentile = hedge_percentile
+        self._hedge_delay = hedge_delay
 
         self._status: list[_TTSStatus] = []
         for t in tts:
@@ -131,6 +153,25 @@ class FallbackAdapter(
     def _on_metrics_collected(self, *args: Any, **kwargs: Any) -> None:
         self.emit("metrics_collected", *args, **kwargs)
 
+    def _record_ttfb(self, tts: TTS, ttfb: float) -> None:
+        self._status[self._tts_instances.index(tts)].ttfb.add_sample(ttfb)
+        telemetry_metrics.fallback_first_chunk(kind="tts", provider=tts.label, ttft=ttfb)
+
+    def _get_hedge_delay(self, tts: TTS) -> float:
+        ttfb = self._status[self._tts_instances.index(tts)].ttfb
+        if ttfb.size() < _MIN_TTFB_SAMPLES:
+            return self._hedge_delay
+
+        return ttfb.get_percentile(self._hedge_percentile)
+
+    def _mark_unavailable(self, tts: TTS) -> None:
+        tts_status = self._status[self._tts_instances.index(tts)]
+        if tts_status.available:
+            tts_status.available = False
+            self.emit(
+                "tts_availability_changed", AvailabilityChangedEvent(tts=tts, available=False)
+            )
+
     async def aclose(self) -> None:
         for tts_status in self._status:
             if tts_status.recovering_task is not None:
@@ -219,34 +260,23 @@ class FallbackChunkedStream(ChunkedStream):
             mime_type="audio/pcm",
         )
 
+        if self._tts._hedge:
+            await self._run_hedged(output_emitter, all_failed=all_failed)
+            return
+
         for i, tts in enumerate(self._tts._tts_instances):
             tts_status = self._tts._status[i]
             if tts_status.available or all_failed:
                 try:
-                    resampler = tts_status.resampler
-                    async for synthesized_audio in self._try_synthesize(tts=tts, recovering=False):
-                        if texts := synthesized_audio.frame.userdata.get(USERDATA_TIMED_TRANSCRIPT):
-                            output_emitter.push_timed_transcript(texts)
-
-                        if resampler is not None:
-                            for rf in resampler.push(synthesized_audio.frame):
-                                output_emitter.push(rf.data.tobytes())
-                        else:
-                            output_emitter.push(synthesized_audio.frame.data.tobytes())
-
-                    if resampler is not None:
-                        for rf in resampler.flush():
-                            output_emitter.push(rf.data.tobytes())
-
+                    await self._push_audio(
+                        output_emitter,
+                        tts,
+                        self._try_synthesize(tts=tts, recovering=False),
+                        started_at=time.perf_counter(),
+                    )
                     return
                 except Exception:  # exceptions already logged inside _try_synthesize
-                    if tts_status.available:
-                        tts_status.available = False
-                        self._tts.emit(
-                            "tts_availability_changed",
-                            AvailabilityChangedEvent(tts=tts, available=False),
-                        )
-
+                    self._tts._mark_unavailable(tts)
                     if output_emitter.pushed_duration() > 0.0:
                         logger.warning(
                             f"{tts.label} already synthesized of audio, ignoring fallback"
@@ -259,6 +289,90 @@ class FallbackChunkedStream(ChunkedStream):
             f"all TTSs failed ({[tts.label for tts in self._tts._tts_instances]}) after {time.time() - start_time} seconds"  # noqa: E501
         )
 
+    async def _run_hedged(self, output_emitter: AudioEmitter, *, all_failed: bool) -> None:
+        assert isinstance(self._tts, FallbackAdapter)
+
+        start_time = time.time()
+        candidates: list[TTS] = []
+        for tts, tts_status in zip(self._tts._tts_instances, self._tts._status):
+            if tts_status.available or all_failed:
+                candidates.append(tts)
+            else:
+                self._try_recovery(tts)
+
+        while candidates:
+            winner = await self._first_to_stream(candidates)
+            if winner is None:
+                break
+
+            tts = candidates[winner.index]
+            candidates = candidates[winner.index + 1 :]
+            self._tts._record_ttfb(tts, winner.elapsed)
+            if winner.hedged:
+                telemetry_metrics.fallback_hedged(kind="tts", hedge_won=winner.is_hedge)
+
+            try:
+                await self._push_audio(output_emitter, tts, winner.stream)
+                return
+            except Exception:  # exceptions already logged inside _try_synthesize
+                self._tts._mark_unavailable(tts)
+                if output_emitter.pushed_duration() > 0.0:
+                    logger.warning(f"{tts.label} already synthesized of audio, ignoring fallback")
+                    return
+
+                self._try_recovery(tts)
+
+        raise APIConnectionError(
+            f"all TTSs failed ({[tts.label for tts in self._tts._tts_instances]}) after {time.time() - start_time} seconds"  # noqa: E501
+        )
+
+    async def _first_to_stream(self, ttss: list[TTS]) -> HedgeWinner[SynthesizedAudio] | None:
+        assert isinstance(self._tts, FallbackAdapter)
+        fallback_adapter = self._tts
+
+        def _on_error(index: int, _: BaseException) -> None:
+            fallback_adapter._mark_unavailable(ttss[index])
+            self._try_recovery(ttss[index])
+
+        async def _hedge_after(index: int) -> None:
+            await asyncio.sleep(fallback_adapter._get_hedge_delay(ttss[index]))
+
+        return await first_to_stream(
+            [functools.partial(self._try_synthesize, tts=tts, recovering=False) for tts in ttss],
+            hedge_after=_hedge_after,
+            on_error=_on_error,
+        )
+
+    async def _push_audio(
+        self,
+        output_emitter: AudioEmitter,
+        tts: TTS,
+        audio: AsyncIterable[SynthesizedAudio],
+        *,
+        started_at: float | None = None,
+    ) -> None:
+        """started_at is the start of the attempt, to record its time to first audio"""
+        assert isinstance(self._tts, FallbackAdapter)
+
+        resampler = self._tts._status[self._tts._tts_instances.index(tts)].resampler
+        async for synthesized_audio in audio:
+            if started_at is not None:
+                self._tts._record_ttfb(tts, time.perf_counter() - started_at)
+                started_at = None
+
+            if texts := synthesized_audio.frame.userdata.get(USERDATA_TIMED_TRANSCRIPT):
+                output_emitter.push_timed_transcript(texts)
+
+            if resampler is not None:
+                for rf in resampler.push(synthesized_audio.frame):
+                    output_emitter.push(rf.data.tobytes())
+            else:
+                output_emitter.push(synthesized_audio.frame.data.tobytes())
+
+        if resampler is not None:
+            for rf in resampler.flush():
+                output_emitter.push(rf.data.tobytes())
+
 
 class FallbackSynthesizeStream(SynthesizeStream):
     _tts_request_span_name: ClassVar[str] = "tts_fallback_adapter"
@@ -267,6 +381,7 @@ class FallbackSynthesizeStream(SynthesizeStream):
         super().__init__(tts=tts, conn_options=conn_options)
         self._fallback_adapter = tts
         self._pushed_tokens: list[str] = []
+        self._first_text_at = 0.0
 
     async def _metrics_monitor_task(self, event_aiter: AsyncIterable[SynthesizedAudio]) -> None:
         pass  # do nothing
@@ -332,7 +447,9 @@ class FallbackSynthesizeStream(SynthesizeStream):
         if all_failed:
             logger.error("all TTSs are unavailable, retrying..")
 
-        new_input_ch: aio.Chan[str | SynthesizeStream._FlushSentinel] | None = None
+        # input of the running attempts, by id of their TTS
+        input_chs: dict[int, aio.Chan[str | SynthesizeStream._FlushSentinel]] = {}
+        first_text = asyncio.Event()
         output_emitter.initialize(
             request_id=utils.shortuuid(),
             sample_rate=self._fallback_adapter.sample_rate,
@@ -343,76 +460,101 @@ class FallbackSynthesizeStream(SynthesizeStream):
         output_emitter.start_segment(segment_id=utils.shortuuid())
 
         async def _forward_input_task() -> None:
-            nonlocal new_input_ch
-
             async for data in self._input_ch:
-                if new_input_ch:
-                    new_input_ch.send_nowait(data)
+                for ch in input_chs.values():
+                    ch.send_nowait(data)
 
                 if isinstance(data, str) and data:
                     self._pushed_tokens.append(data)
+                    if not first_text.is_set():
+                        self._first_text_at = time.perf_counter()
+                        first_text.set()
 
-            if new_input_ch:
-                new_input_ch.close()
+            for ch in input_chs.values():
+                ch.close()
 
         input_task = asyncio.create_task(_forward_input_task())
 
+        def _start_attempt(tts: TTS) -> AsyncGenerator[SynthesizedAudio, None]:
+            input_ch = aio.Chan[Union[str, SynthesizeStream._FlushSentinel]]()
+            for text in self._pushed_tokens:
+                input_ch.send_nowait(text)
+
+            if input_task.done():
+                input_ch.close()
+
+            input_chs[id(tts)] = input_ch
+            return self._try_synthesize(
+                tts=tts,
+                input_ch=input_ch,
+                conn_options=dataclasses.replace(
+                    self._conn_options,
+                    max_retry=self._fallback_adapter._max_retry_per_tts,
+                    timeout=self._conn_options.timeout,
+                    retry_interval=self._conn_options.retry_interval,
+                ),
+                recovering=False,
+            )
+
         try:
-            for i, tts in enumerate(self._fallback_adapter._tts_instances):
-                tts_status = self._fallback_adapter._status[i]
-                if tts_status.available or all_failed:
-                    try:
-                        new_input_ch = aio.Chan[Union[str, SynthesizeStream._FlushSentinel]]()
-
-                        for text in self._pushed_tokens:
-                            new_input_ch.send_nowait(text)
-
-                        if input_task.done():
-                            new_input_ch.close()
-
-                        resampler = tts_status.resampler
-                        async for synthesized_audio in self._try_synthesize(
-                            tts=tts,
-                            input_ch=new_input_ch,
-                            conn_options=dataclasses.replace(
-                                self._conn_options,
-                                max_retry=self._fallback_adapter._max_retry_per_tts,
-                                timeout=self._conn_options.timeout,
-                                retry_interval=self._conn_options.retry_interval,
-                            ),
-                            recovering=False,
-                        ):
-                            if texts := synthesized_audio.frame.userdata.get(
-                                USERDATA_TIMED_TRANSCRIPT
-                            ):
-                                output_emitter.push_timed_transcript(texts)
-
-                            if resampler is not None:
-                                for resampled_frame in resampler.push(synthesized_audio.frame):
-                                    output_emitter.push(resampled_frame.data.tobytes())
-
-                                if synthesized_audio.is_final:
-                                    for resampled_frame in resampler.flush():
-                                        output_emitter.push(resampled_frame.data.tobytes())
-                            else:
-                                output_emitter.push(synthesized_audio.frame.data.tobytes())
+            if self._fallback_adapter._hedge:
+                candidates: list[TTS] = []
+                for tts, tts_status in zip(
+                    self._fallback_adapter._tts_instances, self._fallback_adapter._status
+                ):
+                    if tts_status.available or all_failed:
+                        candidates.append(tts)
+                    else:
+                        self._try_recovery(tts)
+
+                while candidates:
+                    winner = await self._first_to_stream(candidates, _start_attempt, first_text)
+                    if winner is None:
+                        break
+
+                    tts = candidates[winner.index]
+                    candidates = candidates[winner.index + 1 :]
+                    for key in [key for key in input_chs if key != id(tts)]:
+                        input_chs.pop(key).close()
+
+                    self._record_ttfb(tts, time.perf_counter() - winner.elapsed)
+                    if winner.hedged:
+                        telemetry_metrics.fallback_hedged(kind="tts", hedge_won=winner.is_hedge)
 
+                    try:
+                        await self._push_audio(output_emitter, tts, winner.stream)
                         return
-                    except Exception:
-                        if tts_status.available:
-                            tts_status.available = False
-                            self._tts.emit(
-                                "tts_availability_changed",
-                                AvailabilityChangedEvent(tts=tts, available=False),
-                            )
-
+                    except Exception:  # exceptions already logged inside _try_synthesize
+                        self._fallback_adapter._mark_unavailable(tts)
                         if output_emitter.pushed_duration() > 0.0:
                             logger.warning(
                                 f"{tts.label} already synthesized of audio, ignoring the current segment for the tts fallback"  # noqa: E501
                             )
                             return
 
-                self._try_recovery(tts)
+                        self._try_recovery(tts)
+            else:
+                for i, tts in enumerate(self._fallback_adapter._tts_instances):
+                    tts_status = self._fallback_adapter._status[i]
+                    if tts_status.available or all_failed:
+                        try:
+                            input_chs.clear()
+                            await self._push_audio(
+                                output_emitter,
+                                tts,
+                                _start_attempt(tts),
+                                started_at=time.perf_counter(),
+                            )
+                            return
+                        except Exception:
+                            self._fallback_adapter._mark_unavailable(tts)
+                            if output_emitter.pushed_duration() > 0.0:
+                                logger.warning(
+                                    f"{tts.label} already synthesized of audio, ignoring the current segment for the tts fallback"  # noqa: E501
+                                )
+                                return
+
+                    self._try_recovery(tts)
 
             raise APIConnectionError(
                 f"all TTSs failed ({[tts.label for tts in self._fallback_adapter._tts_instances]}) after {time.time() - start_time} seconds"  # noqa: E501
@@ -420,6 +562,62 @@ class FallbackSynthesizeStream(SynthesizeStream):
         finally:
             await utils.aio.cancel_and_wait(input_task)
 
+    async def _first_to_stream(
+        self,
+        ttss: list[TTS],
+        start_attempt: Callable[[TTS], AsyncGenerator[SynthesizedAudio, None]],
+        first_text: asyncio.Event,
+    ) -> HedgeWinner[SynthesizedAudio] | None:
+        def _on_error(index: int, _: BaseException) -> None:
+            self._fallback_adapter._mark_unavailable(ttss[index])
+            self._try_recovery(ttss[index])
+
+        async def _hedge_after(index: int) -> None:
+            # the time to first audio starts with the text
+            await first_text.wait()
+            await asyncio.sleep(self._fallback_adapter._get_hedge_delay(ttss[index]))
+
+        return await first_to_stream(
+            [functools.partial(start_attempt, tts) for tts in ttss],
+            hedge_after=_hedge_after,
+            on_error=_on_error,
+        )
+
+    async def _push_audio(
+        self,
+        output_emitter: AudioEmitter,
+        tts: TTS,
+        audio: AsyncIterable[SynthesizedAudio],
+        *,
+        started_at: float | None = None,
+    ) -> None:
+        """started_at is the start of the attempt, to record its time to first audio"""
+        resampler = self._fallback_adapter._status[
+            self._fallback_adapter._tts_instances.index(tts)
+        ].resampler
+        async for synthesized_audio in audio:
+            if started_at is not None:
+                self._record_ttfb(tts, started_at)
+                started_at = None
+
+            if texts := synthesized_audio.frame.userdata.get(USERDATA_TIMED_TRANSCRIPT):
+                output_emitter.push_timed_transcript(texts)
+
+            if resampler is not None:
+                for resampled_frame in resampler.push(synthesized_audio.frame):
+                    output_emitter.push(resampled_frame.data.tobytes())
+
+                if synthesized_audio.is_final:
+                    for resampled_frame in resampler.flush():
+                        output_emitter.push(resampled_frame.data.tobytes())
+            else:
+                output_emitter.push(synthesized_audio.frame.data.tobytes())
+
+    def _record_ttfb(self, tts: TTS, started_at: float) -> None:
+        # the audio can't come before the text
+        ttfb = time.perf_counter() - max(started_at, self._first_text_at)
+        self._fallback_adapter._record_ttfb(tts, ttfb)
+
     def _try_recovery(self, tts: TTS) -> None:
         assert isinstance(self._tts, FallbackAdapter)
 
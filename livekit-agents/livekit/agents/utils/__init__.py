@@ -8,6 +8,7 @@ from .exp_filter import ExpFilter
 from .log import log_exceptions
 from .misc import is_given, nodename, shortuuid, time_ms
 from .moving_average import MovingAverage
+from .moving_percentile import MovingPercentile
 from .participant import wait_for_participant, wait_for_track_publication
 
 EventEmitter = rtc.EventEmitter
@@ -23,6 +24,7 @@ __all__ = [
     "http_server",
     "ExpFilter",
     "MovingAverage",
+    "MovingPercentile",
     "BoundedDict",
     "EventEmitter",
     "log_exceptions",
@@ -1,4 +1,4 @@
-from . import debug, duplex_unix, itertools
+from . import debug, duplex_shm, duplex_unix, hedge, itertools
 from .channel import Chan, ChanClosed, ChanReceiver, ChanSender
 from .interval import Interval, interval
 from .sleep import Sleep, SleepFinished, sleep
@@ -20,8 +20,10 @@ __all__ = [
     "WaitGroup",
     "debug",
     "cancel_and_wait",
+    "duplex_shm",
     "duplex_unix",
     "itertools",
+    "hedge",
     "gracefully_cancel",
 ]
 
@@ -0,0 +1,131 @@
+from __future__ import annotations
+
+import struct
+import sys
+from multiprocessing import shared_memory
+
+from .duplex_unix import DuplexClosed, _AsyncDuplex
+
+# payloads smaller than this are cheaper to send inline over the socket
+SHM_MIN_PAYLOAD = 16 * 1024
+
+_HEADER_SIZE = 64  # read position (u64), padded to a cache line
+_TAG_INLINE = 0
+_TAG_SHM = 1
+_SHM_DESC = struct.Struct("!QI")  # absolute position, length
+
+
+class _ShmRing:
+    """Single-producer/single-consumer ring buffer living in shared memory.
+
+    The producer keeps the write position locally, and the consumer publishes its read
+    position in the header so the producer knows which regions can be reused. Payloads are
+    always written contiguously, the producer skips the tail of the buffer when a payload
+    doesn't fit before the end.
+    """
+
+    def __init__(self, shm: shared_memory.SharedMemory, *, owner: bool) -> None:
+        self._shm = shm
+        self._owner = owner
+        assert shm.buf is not None
+        self._buf: memoryview = shm.buf
+        self._capacity = shm.size - _HEADER_SIZE
+        self._write_pos = 0
+
+    @staticmethod
+    def create(size: int) -> _ShmRing:
+        shm = shared_memory.SharedMemory(create=True, size=size + _HEADER_SIZE)
+        ring = _ShmRing(shm, owner=True)
+        struct.pack_into("!Q", ring._buf, 0, 0)
+        return ring
+
+    @staticmethod
+    def attach(name: str) -> _ShmRing:
+        # the segment is owned (and unlinked) by the process that created it. before 3.13 the
+        # child registers it again on the resource tracker it shares with its parent (no-op)
+        if sys.version_info >= (3, 13):
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        else:
+            shm = shared_memory.SharedMemory(name=name)
+
+        return _ShmRing(shm, owner=False)
+
+    @property
+    def name(self) -> str:
+        return self._shm.name
+
+    def _read_pos(self) -> int:
+        return int(struct.unpack_from("!Q", self._buf, 0)[0])
+
+    def try_write(self, data: bytes) -> int | None:
+        """copy data into the ring, returns its position or None if there isn't enough space"""
+        size = len(data)
+        if size > self._capacity:
+            return None
+
+        pos = self._write_pos
+        offset = pos % self._capacity
+        if offset + size > self._capacity:
+            pos += self._capacity - offset  # skip the tail, wrap to the start
+            offset = 0
+
+        if pos + size - self._read_pos() > self._capacity:
+            return None
+
+        self._buf[_HEADER_SIZE + offset : _HEADER_SIZE + offset + size] = data
+        self._write_pos = pos + size
+        return pos
+
+    def read(self, pos: int, size: int) -> bytes:
+        """copy a payload out of the ring and release its region to the producer"""
+        offset = _HEADER_SIZE + pos % self._capacity
+        data = bytes(self._buf[offset : offset + size])
+        struct.pack_into("!Q", self._buf, 0, pos + size)
+        return data
+
+    def close(self) -> None:
+        self._shm.close()
+        if self._owner:
+            self._shm.unlink()
+
+
+class _AsyncShmDuplex(_AsyncDuplex):
+    """_AsyncDuplex where large payloads are written to shared memory, only their position
+    and length cross the socket.
+
+    The rings aren't closed with the duplex, they're owned by the caller."""
+
+    def __init__(self, dplx: _AsyncDuplex, *, send_ring: _ShmRing, recv_ring: _ShmRing) -> None:
+        super().__init__(dplx._sock, dplx._reader, dplx._writer, dplx._loop)
+        self._send_ring = send_ring
+        self._recv_ring = recv_ring
+
+    async def recv_bytes(self) -> bytes:
+        frame = await super().recv_bytes()
+        if not frame:
+            raise DuplexClosed("invalid frame")
+
+        if frame[0] == _TAG_SHM:
+            pos, size = _SHM_DESC.unpack_from(frame, 1)
+            return self._recv_ring.read(pos, size)
+
+        return frame[1:]
+
+    async def send_bytes(self, data: bytes) -> None:
+        pos = None
+        if len(data) >= SHM_MIN_PAYLOAD:
+            pos = self._send_ring.try_write(data)
+
+        try:
+            if pos is not None:
+                desc = bytes([_TAG_SHM]) + _SHM_DESC.pack(pos, len(data))
+                self._writer.write(struct.pack("!I", len(desc)))
+                self._writer.write(desc)
+            else:
+                # the ring is full (or the payload is small), fallback to the socket
+                self._writer.write(struct.pack("!IB", len(data) + 1, _TAG_INLINE))
+                self._writer.write(data)
+
+            await self._writer.drain()
+        except OSError as e:
+            raise DuplexClosed() from e
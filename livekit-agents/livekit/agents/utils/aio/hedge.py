@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, AsyncIterator, Awaitable, Sequence
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, TypeVar
+
+from .utils import cancel_and_wait
+
+T = TypeVar("T")
+
+
+@dataclass
+class HedgeWinner(Generic[T]):
+    index: int
+    """index of the attempt that streamed first"""
+    elapsed: float
+    """seconds from the start of the attempt until its first item"""
+    stream: AsyncIterator[T]
+    """the items of the attempt, starting with the first one"""
+    hedged: bool
+    """whether an attempt was started in parallel of a slow one during the race"""
+    is_hedge: bool
+    """whether this attempt was started in parallel of a slow one"""
+
+
+async def first_to_stream(
+    attempts: Sequence[Callable[[], AsyncGenerator[T, None]]],
+    *,
+    hedge_after: Callable[[int], Awaitable[None]] | None = None,
+    on_error: Callable[[int, BaseException], None] | None = None,
+    max_parallel: int = 2,
+) -> HedgeWinner[T] | None:
+    """Start the attempts in order until one of them streams its first item.
+
+    The next attempt is started when all the running ones failed, or in parallel when
+    hedge_after(index) of the last started attempt completes before its first item (up to
+    max_parallel running attempts). The first attempt to stream wins, the other running ones are
+    cancelled. An attempt ending without any item also wins.
+
+    Returns:
+        The winning attempt, or None if all of them failed.
+    """
+    running: dict[asyncio.Task[T], tuple[int, AsyncGenerator[T, None], float]] = {}
+    hedge_task: asyncio.Task[None] | None = None
+    hedge_index: int | None = None
+    next_index = 0
+
+    async def _next(gen: AsyncGenerator[T, None]) -> T:
+        return await gen.__anext__()
+
+    async def _hedge_after(index: int) -> None:
+        assert hedge_after is not None
+        await hedge_after(index)
+
+    def _start() -> None:
+        nonlocal next_index, hedge_task
+        index, next_index = next_index, next_index + 1
+        gen = attempts[index]()
+        running[asyncio.create_task(_next(gen))] = (index, gen, time.perf_counter())
+
+        if hedge_task is not None:
+            hedge_task.cancel()
+            hedge_task = None
+        if hedge_after is not None and next_index < len(attempts):
+            hedge_task = asyncio.create_task(_hedge_after(index))
+
+    try:
+        while True:
+            if not running:
+                if next_index >= len(attempts):
+                    return None
+
+                _start()
+
+            waiting: set[asyncio.Future[Any]] = set(running)
+            if hedge_task is not None:
+                waiting.add(hedge_task)
+
+            done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+
+            winner: HedgeWinner[T] | None = None
+            for task in sorted((t for t in running if t in done), key=lambda t: running[t][0]):
+                index, gen, started_at = running.pop(task)
+                exc = asyncio.CancelledError() if task.cancelled() else task.exception()
+                if exc is not None and not isinstance(exc, StopAsyncIteration):
+                    if on_error is not None:
+                        on_error(index, exc)
+                    await gen.aclose()
+                    continue
+
+                if winner is not None:
+                    # streamed at the same time as an attempt started before it
+                    await gen.aclose()
+                    continue
+
+                winner = HedgeWinner(
+                    index=index,
+                    elapsed=time.perf_counter() - started_at,
+                    stream=_resume(gen, task.result() if exc is None else None, exc is None),
+                    hedged=hedge_index is not None,
+                    is_hedge=index == hedge_index,
+                )
+
+            if winner is not None:
+                return winner
+
+            if hedge_task is not None and hedge_task in done:
+                hedge_task = None
+                if len(running) < max_parallel and next_index < len(attempts):
+                    hedge_index = next_index
+                    _start()
+    finally:
+        if hedge_task is not None:
+            await cancel_and_wait(hedge_task)
+
+        for task, (_, gen, _) in running.items():
+            await cancel_and_wait(task)
+            if not task.cancelled():
+                task.exception()  # retrieved, the attempt lost anyway
+            await gen.aclose()
+
+
+async def _resume(
+    gen: AsyncGenerator[T, None], first: T | None, has_first: bool
+) -> AsyncIterator[T]:
+    try:
+        if has_first:
+            yield first  # type: ignore[misc]
+
+        async for item in gen:
+            yield item
+    finally:
+        await gen.aclose()
@@ -93,7 +93,8 @@ class AudioByteStream:
         The method appends the incoming data to the internal buffer.
         While the buffer contains enough data to form complete frames,
         it extracts the data for each frame, creates an `AudioFrame` object,
-        and appends it to the list of frames to return.
+        and appends it to the list of frames to return. The data is copied
+        once per frame, so pushing large chunks is linear in their size.
 
         This allows you to feed in variable-sized chunks of audio data
         (e.g., from a stream or file) and receive back a list of
@@ -102,9 +103,11 @@ class AudioByteStream:
         self._buf.extend(data)
 
         frames = []
-        while len(self._buf) >= self._bytes_per_frame:
-            frame_data = self._buf[: self._bytes_per_frame]
-            self._buf = self._buf[self._bytes_per_frame :]
+        offset = 0
+        while len(self._buf) - offset >= self._bytes_per_frame:
+            # copy each frame once, the buffer is compacted after the loop
+            frame_data = self._buf[offset : offset + self._bytes_per_frame]
+            offset += self._bytes_per_frame
 
             frames.append(
                 rtc.AudioFrame(
@@ -115,6 +118,7 @@ class AudioByteStream:
                 )
             )
 
+        del self._buf[:offset]
         return frames
 
     write = push  # Alias for the push method.
@@ -138,7 +142,7 @@ class AudioByteStream:
         if len(self._buf) == 0:
             return []
 
-        if len(self._buf) % (2 * self._num_channels) != 0:
+        if len(self._buf) % self._bytes_per_sample != 0:
             logger.warning("AudioByteStream: incomplete frame during flush, dropping")
             return []
 
@@ -147,7 +151,7 @@ class AudioByteStream:
                 data=self._buf.copy(),
                 sample_rate=self._sample_rate,
                 num_channels=self._num_channels,
-                samples_per_channel=len(self._buf) // 2,
+                samples_per_channel=len(self._buf) // self._bytes_per_sample,
             )
         ]
         self._buf.clear()
@@ -12,9 +12,9 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .decoder import AudioStreamDecoder, StreamBuffer
+from .decoder import AudioStreamDecoder, StreamBuffer, set_decoder_workers
 
-__all__ = ["AudioStreamDecoder", "StreamBuffer"]
+__all__ = ["AudioStreamDecoder", "StreamBuffer", "set_decoder_workers"]
 
 # Cleanup docs of unexported modules
 _module = dir()
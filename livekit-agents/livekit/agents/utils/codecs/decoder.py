@@ -15,12 +15,15 @@
 from __future__ import annotations
 
 import asyncio
-import io
+import functools
+import queue
 import struct
 import threading
+import time
+from collections import deque
 from collections.abc import AsyncIterator
-from concurrent.futures import ThreadPoolExecutor
-from typing import cast
+from concurrent.futures import Future
+from typing import Callable, cast
 
 import av
 import av.container
@@ -28,9 +31,92 @@ import av.container
 from livekit import rtc
 
 from ...log import logger
+from ...telemetry import metrics
 from .. import aio
 from ..audio import AudioByteStream
 
+# number of decoder threads kept in this process for the next streams
+DEFAULT_DECODER_WORKERS = 32
+
+
+class _DecoderPool:
+    """Threads running the decode loops of the AudioStreamDecoders of this process.
+
+    A decode loop holds its thread until its stream ends (PyAV reads the input synchronously and
+    the container can't be paused), so a decoder never waits for a busy thread: when all of them
+    are busy, a new thread is started. Up to max_workers threads are kept for the next decoders,
+    the extra ones exit when their stream ends.
+    """
+
+    def __init__(self, max_workers: int) -> None:
+        self._max_workers = max_workers
+        self._lock = threading.Lock()
+        self._work: queue.SimpleQueue[tuple[Future[None], Callable[[], None]]] = queue.SimpleQueue()
+        self._idle = 0  # threads waiting for work
+        self._busy = 0  # decode loops submitted and not done
+        self._num_threads = 0
+
+    def set_max_workers(self, max_workers: int) -> None:
+        with self._lock:
+            self._max_workers = max_workers
+
+    def submit(self, fnc: Callable[[], None]) -> Future[None]:
+        fut: Future[None] = Future()
+        with self._lock:
+            self._busy += 1
+            overflow = self._busy > self._max_workers
+            self._work.put((fut, fnc))
+            if self._idle > 0:
+                self._idle -= 1  # the item is taken by one of the idle threads
+            else:
+                self._num_threads += 1
+                threading.Thread(
+                    target=self._worker,
+                    name=f"AudioDecoder_{self._num_threads}",
+                    daemon=True,
+                ).start()
+
+        if overflow:
+            logger.warning(
+                "all the audio decoder threads are busy, starting an extra one",
+                extra={"active_decoders": self._busy, "max_workers": self._max_workers},
+            )
+            metrics.audio_decoder_overflow()
+
+        return fut
+
+    def _worker(self) -> None:
+        while True:
+            fut, fnc = self._work.get()
+            if fut.set_running_or_notify_cancel():
+                try:
+                    fnc()
+                    fut.set_result(None)
+                except BaseException as e:
+                    fut.set_exception(e)
+
+            with self._lock:
+                self._busy -= 1
+                if self._idle >= self._max_workers:
+                    return
+
+                self._idle += 1
+
+
+_decoder_pool = _DecoderPool(DEFAULT_DECODER_WORKERS)
+
+
+def set_decoder_workers(max_workers: int) -> None:
+    """Set the number of decoder threads kept by this process for the next AudioStreamDecoders.
+
+    Each decoder holds a thread until its stream ends. When all of them are busy, a new decoder
+    gets an extra thread, which exits at the end of its stream. A warning is logged in that case.
+    """
+    if max_workers < 1:
+        raise ValueError("max_workers must be at least 1")
+
+    _decoder_pool.set_max_workers(max_workers)
+
 
 def _mime_to_av_format(mime: str | None) -> str | None:
     """Return the libav *container* short‑name for a given MIME‑type.
@@ -66,45 +152,106 @@ class StreamBuffer:
     """
     A thread-safe buffer that behaves like an IO stream.
     Allows writing from one thread and reading from another.
+
+    The written chunks are kept in a deque and read at an offset, so reads only copy the
+    returned bytes. When ``max_size`` is set, writes block while that many bytes are buffered.
     """
 
-    def __init__(self) -> None:
-        self._buffer = io.BytesIO()
+    def __init__(self, max_size: int | None = None) -> None:
+        self._chunks: deque[bytes] = deque()
+        self._offset = 0  # read position in the first chunk
+        self._size = 0
+        self._max_size = max_size
         self._lock = threading.Lock()
         self._data_available = threading.Condition(self._lock)
+        self._space_available = threading.Condition(self._lock)
         self._eof = False
+        self._read_closed = False
+        self._closed = False
+        self._read_wait_time = 0.0
 
-    def write(self, data: bytes) -> None:
-        """Write data to the buffer from a writer thread."""
-        with self._data_available:
-            self._buffer.seek(0, io.SEEK_END)
-            self._buffer.write(data)
+    @property
+    def size(self) -> int:
+        """Number of buffered bytes."""
+        return self._size
+
+    def full(self) -> bool:
+        return self._max_size is not None and self._size >= self._max_size
+
+    def write(self, data: bytes, *, block: bool = True) -> None:
+        """Write data to the buffer from a writer thread.
+
+        If the buffer is bounded and full, waits for the reader unless ``block`` is False.
+        """
+        if self._closed:
+            raise ValueError("I/O operation on closed buffer")
+
+        if not data:
+            return
+
+        chunk = data if type(data) is bytes else bytes(data)
+        with self._lock:
+            while block and self.full() and not (self._closed or self._read_closed):
+                self._space_available.wait()
+
+            if self._closed:
+                raise ValueError("I/O operation on closed buffer")
+
+            if self._read_closed:
+                return
+
+            self._chunks.append(chunk)
+            self._size += len(chunk)
             self._data_available.notify_all()
 
     def read(self, size: int = -1) -> bytes:
         """Read data from the buffer in a reader thread."""
 
-        if self._buffer.closed:
+        if self._closed:
             return b""
 
         with self._data_available:
             while True:
-                if self._buffer.closed:
+                if self._closed or self._read_closed:
                     return b""
-                # always read from beginning
-                self._buffer.seek(0)
-                data = self._buffer.read(size)
-
-                if data:
-                    # shrink the buffer to remove already-read data
-                    remaining = self._buffer.read()
-                    self._buffer = io.BytesIO(remaining)
+
+                if self._size > 0:
+                    data = self._read_chunks(size)
+                    self._space_available.notify_all()
                     return data
 
                 if self._eof:
                     return b""
 
+                wait_start = time.perf_counter()
                 self._data_available.wait()
+                self._read_wait_time += time.perf_counter() - wait_start
+
+    def _read_chunks(self, size: int) -> bytes:
+        if size < 0 or size > self._size:
+            size = self._size
+
+        first = self._chunks[0]
+        if self._offset == 0 and len(first) == size:
+            self._chunks.popleft()
+            self._size -= size
+            return first
+
+        parts: list[memoryview] = []
+        remaining = size
+        while remaining > 0:
+            chunk = self._chunks[0]
+            end = min(len(chunk), self._offset + remaining)
+            parts.append(memoryview(chunk)[self._offset : end])
+            remaining -= end - self._offset
+            if end == len(chunk):
+                self._chunks.popleft()
+                self._offset = 0
+            else:
+                self._offset = end
+
+        self._size -= size
+        return b"".join(parts)
 
     def end_input(self) -> None:
         """Signal that no more data will be written."""
@@ -112,8 +259,21 @@ class StreamBuffer:
             self._eof = True
             self._data_available.notify_all()
 
+    def close_read(self) -> None:
+        """Signal that no more data will be read, the buffered and future writes are dropped."""
+        with self._lock:
+            self._read_closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._space_available.notify_all()
+
     def close(self) -> None:
-        self._buffer.close()
+        with self._lock:
+            self._closed = True
+            self._chunks.clear()
+            self._size = 0
+            self._data_available.notify_all()
+            self._space_available.notify_all()
 
 
 class AudioStreamDecoder:
@@ -129,6 +289,7 @@ class AudioStreamDecoder:
         sample_rate: int | None = 48000,
         num_channels: int | None = 1,
         format: str | None = None,
+        max_buffer_size: int | None = None,
     ):
         self._sample_rate = sample_rate
 
@@ -142,17 +303,48 @@ class AudioStreamDecoder:
         self._output_ch = aio.Chan[rtc.AudioFrame]()
         self._closed = False
         self._started = False
-        self._input_buf = StreamBuffer()
+        self._input_buf = StreamBuffer(max_size=max_buffer_size)
         self._loop = asyncio.get_event_loop()
-
-        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="AudioDecoder")
+        self._decode_fut: Future[None] | None = None
+        self._decoded_duration = 0.0
 
     def push(self, chunk: bytes) -> None:
-        self._input_buf.write(chunk)
+        self._input_buf.write(chunk, block=False)
+        self._start()
+
+    async def apush(self, chunk: bytes) -> None:
+        """Push a chunk, waiting for the decoder to catch up if max_buffer_size is reached."""
+        if self._input_buf.full():
+            await self._loop.run_in_executor(None, self._input_buf.write, chunk)
+        else:
+            self._input_buf.write(chunk, block=False)
+        self._start()
+
+    def _start(self) -> None:
         if not self._started:
             self._started = True
             target = self._decode_wav_loop if self._av_format == "wav" else self._decode_loop
-            self._loop.run_in_executor(self._executor, target)
+            self._decode_fut = _decoder_pool.submit(
+                functools.partial(self._run_decode, target, time.perf_counter())
+            )
+
+    def _run_decode(self, decode_fnc: Callable[[], None], queued_at: float) -> None:
+        started_at = time.perf_counter()
+        format = self._av_format or "unknown"
+        metrics.audio_decoder_started(format=format, queue_wait=started_at - queued_at)
+
+        decode_fnc()
+
+        # the time spent waiting for input isn't decoding time
+        decode_time = time.perf_counter() - started_at - self._input_buf._read_wait_time
+        if self._decoded_duration > 0:
+            metrics.audio_decoder_completed(
+                format=format, realtime_factor=decode_time / self._decoded_duration
+            )
+
+    def _send_frame(self, frame: rtc.AudioFrame) -> None:
+        self._decoded_duration += frame.duration
+        self._loop.call_soon_threadsafe(self._output_ch.send_nowait, frame)
 
     def end_input(self) -> None:
         self._input_buf.end_input()
@@ -207,19 +399,20 @@ class AudioStreamDecoder:
 
                 for f in frames:
                     nchannels = len(f.layout.channels)
-                    self._loop.call_soon_threadsafe(
-                        self._output_ch.send_nowait,
+                    self._send_frame(
                         rtc.AudioFrame(
                             data=f.to_ndarray().tobytes(),
                             num_channels=nchannels,
                             sample_rate=int(f.sample_rate),
                             samples_per_channel=int(f.samples / nchannels),
-                        ),
+                        )
                     )
 
         except Exception:
             logger.exception("error decoding audio")
         finally:
+            # release the writers waiting on a full buffer
+            self._input_buf.close_read()
             self._loop.call_soon_threadsafe(self._output_ch.close)
             if container:
                 container.close()
@@ -292,14 +485,11 @@ class AudioStreamDecoder:
 
             def resample_and_push(frame: rtc.AudioFrame) -> None:
                 if not resampler:
-                    self._loop.call_soon_threadsafe(self._output_ch.send_nowait, frame)
+                    self._send_frame(frame)
                     return
 
                 for resampled_frame in resampler.push(frame):
-                    self._loop.call_soon_threadsafe(
-                        self._output_ch.send_nowait,
-                        resampled_frame,
-                    )
+                    self._send_frame(resampled_frame)
 
             while True:
                 chunk = self._input_buf.read(1024)
@@ -314,6 +504,7 @@ class AudioStreamDecoder:
         except Exception:
             logger.exception("error decoding wav")
         finally:
+            self._input_buf.close_read()
             self._loop.call_soon_threadsafe(self._output_ch.close)
 
     def __aiter__(self) -> AsyncIterator[rtc.AudioFrame]:
@@ -333,7 +524,9 @@ class AudioStreamDecoder:
         if not self._started:
             return
 
+        if self._decode_fut is not None and self._decode_fut.cancel():
+            # still waiting for a decoder thread, the decode loop will never run
+            self._output_ch.close()
+
         async for _ in self._output_ch:
             pass
-
-        self._executor.shutdown(wait=False, cancel_futures=True)
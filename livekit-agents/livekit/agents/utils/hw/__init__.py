@@ -1,10 +1,14 @@
 from .cpu import CGroupV2CPUMonitor, CPUMonitor, DefaultCPUMonitor, get_cpu_monitor
+from .load import LoadMonitor, LoadSample, MemoryMonitor
 
 __all__ = [
     "get_cpu_monitor",
     "CPUMonitor",
     "CGroupV2CPUMonitor",
     "DefaultCPUMonitor",
+    "LoadMonitor",
+    "LoadSample",
+    "MemoryMonitor",
 ]
 
 # Cleanup docs of unexported modules
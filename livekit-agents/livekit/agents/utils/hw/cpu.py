@@ -21,6 +21,14 @@ class CPUMonitor(ABC):
         """CPU usage percentage between 0 and 1"""
         pass
 
+    @abstractmethod
+    def cpu_usage_seconds(self) -> float:
+        """Cumulative CPU time used, in seconds.
+
+        Unlike cpu_percent, it doesn't block: the usage over an interval is the difference
+        between two calls divided by the elapsed time and cpu_count()."""
+        pass
+
 
 def _cpu_count_from_env() -> Optional[float]:
     try:
@@ -38,6 +46,12 @@ class DefaultCPUMonitor(CPUMonitor):
     def cpu_percent(self, interval: float = 0.5) -> float:
         return psutil.cpu_percent(interval) / 100.0
 
+    def cpu_usage_seconds(self) -> float:
+        times = psutil.cpu_times()
+        # guest time is already counted in user time on Linux
+        not_busy = ("idle", "iowait", "guest", "guest_nice")
+        return float(sum(getattr(times, f) for f in times._fields if f not in not_busy))
+
 
 class CGroupV2CPUMonitor(CPUMonitor):
     def cpu_count(self) -> float:
@@ -67,6 +81,9 @@ class CGroupV2CPUMonitor(CPUMonitor):
 
         return min(cpu_usage_percent, 1)
 
+    def cpu_usage_seconds(self) -> float:
+        return self._read_cpu_usage() / 1_000_000
+
     def _read_cpu_max(self) -> tuple[str, int]:
         try:
             with open("/sys/fs/cgroup/cpu.max") as f:
@@ -111,6 +128,9 @@ class CGroupV1CPUMonitor(CPUMonitor):
         percent = usage_seconds / (interval * num_cpus)
         return max(min(percent, 1.0), 0.0)
 
+    def cpu_usage_seconds(self) -> float:
+        return self._read_cpuacct_usage() / 1_000_000_000
+
     def _read_cfs_quota_and_period(self) -> tuple[Optional[int], Optional[int]]:
         quota_path_candidates = [
             "/sys/fs/cgroup/cpu/cpu.cfs_quota_us",
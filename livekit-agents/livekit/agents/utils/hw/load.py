@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass
+
+import psutil
+
+from .cpu import CPUMonitor, _is_cgroup_v1, _is_cgroup_v2, get_cpu_monitor
+
+
+@dataclass
+class LoadSample:
+    cpu: float
+    """CPU usage between 0 and 1 since the previous sample"""
+    memory: float
+    """memory usage between 0 and 1, of the cgroup limit when set. In a cgroup, the usage is the
+    working set (the inactive page cache is reclaimable, e.g. the files of the models read)"""
+    cpu_pressure: float
+    """share of the time some tasks were stalled waiting for CPU (PSI some avg10), 0 to 1"""
+    memory_pressure: float
+    """share of the time some tasks were stalled waiting for memory (PSI some avg10), 0 to 1"""
+
+
+class LoadMonitor:
+    """Samples the system load without blocking.
+
+    Reads the cgroup v2 (or v1) counters when the process runs in a container, and falls back to
+    the system wide values otherwise. The pressure stall information is 0 when the kernel doesn't
+    expose it. sample() only reads a few small files, so it can be called from the event loop.
+    """
+
+    def __init__(self, cpu_monitor: CPUMonitor | None = None) -> None:
+        self._cpu_monitor = cpu_monitor or get_cpu_monitor()
+        self._cpu_count = self._cpu_monitor.cpu_count()
+
+        self._memory_monitor = MemoryMonitor()
+        if _is_cgroup_v2():
+            self._cpu_pressure_file = "/sys/fs/cgroup/cpu.pressure"
+            self._memory_pressure_file = "/sys/fs/cgroup/memory.pressure"
+        else:
+            # v1 has no per-cgroup pressure, use the system wide one
+            self._cpu_pressure_file = "/proc/pressure/cpu"
+            self._memory_pressure_file = "/proc/pressure/memory"
+
+        self._last_usage = self._cpu_monitor.cpu_usage_seconds()
+        self._last_time = time.monotonic()
+
+    def sample(self) -> LoadSample:
+        return LoadSample(
+            cpu=self._sample_cpu(),
+            memory=self._sample_memory(),
+            cpu_pressure=_read_pressure(self._cpu_pressure_file),
+            memory_pressure=_read_pressure(self._memory_pressure_file),
+        )
+
+    def _sample_cpu(self) -> float:
+        usage, now = self._cpu_monitor.cpu_usage_seconds(), time.monotonic()
+        usage_diff, elapsed = usage - self._last_usage, now - self._last_time
+        self._last_usage, self._last_time = usage, now
+        if elapsed <= 0.0:
+            return 0.0
+
+        return max(min(usage_diff / (elapsed * self._cpu_count), 1.0), 0.0)
+
+    def _sample_memory(self) -> float:
+        used, limit = self._memory_monitor.usage()
+        return min(used / limit, 1.0)
+
+
+class MemoryMonitor:
+    """Reads the memory usage of the cgroup, or of the system when the process doesn't run in a
+    container (psutil reports the whole host inside of one)."""
+
+    def __init__(self) -> None:
+        # usage, limit and stat files of the cgroup, and the inactive page cache key of the stat
+        self._memory_files: tuple[str, str, str] | None = None
+        self._inactive_file_key = "inactive_file"
+        if _is_cgroup_v2():
+            self._memory_files = (
+                "/sys/fs/cgroup/memory.current",
+                "/sys/fs/cgroup/memory.max",
+                "/sys/fs/cgroup/memory.stat",
+            )
+        elif _is_cgroup_v1():
+            self._memory_files = (
+                "/sys/fs/cgroup/memory/memory.usage_in_bytes",
+                "/sys/fs/cgroup/memory/memory.limit_in_bytes",
+                "/sys/fs/cgroup/memory/memory.stat",
+            )
+            self._inactive_file_key = "total_inactive_file"
+
+    def usage(self) -> tuple[int, int]:
+        """Return the memory used and its limit in bytes, the limit of the cgroup when set.
+
+        In a cgroup, the usage is the working set (the inactive page cache is reclaimable, e.g.
+        the files of the models read).
+        """
+        mem = psutil.virtual_memory()
+        total = int(mem.total)
+        if self._memory_files is None:
+            return total - int(mem.available), total
+
+        current_file, limit_file, stat_file = self._memory_files
+        try:
+            with open(current_file) as f:
+                current = int(f.read().strip())
+        except (OSError, ValueError):
+            return total - int(mem.available), total
+
+        # the working set, like the kubelet
+        current = max(current - _read_stat(stat_file, self._inactive_file_key), 0)
+
+        limit = total
+        try:
+            with open(limit_file) as f:
+                # "max" on v2, a very large number on v1 when there is no limit
+                value = f.read().strip()
+                if value != "max":
+                    limit = min(int(value), total)
+        except (OSError, ValueError):
+            pass
+
+        return current, limit
+
+
+def _read_stat(path: str, key: str) -> int:
+    # one "key value" per line, 0 when the file or the key is missing
+    try:
+        with open(path) as f:
+            for line in f:
+                name, _, value = line.partition(" ")
+                if name == key:
+                    return int(value)
+    except (OSError, ValueError):
+        pass
+
+    return 0
+
+
+def _read_pressure(path: str) -> float:
+    # some avg10=0.00 avg60=0.00 avg300=0.00 total=0
+    try:
+        with open(path) as f:
+            line = f.readline()
+    except OSError:
+        return 0.0
+
+    for field in line.split()[1:]:
+        if field.startswith("avg10="):
+            try:
+                return float(field[6:]) / 100.0
+            except ValueError:
+                return 0.0
+
+    return 0.0
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import math
+
+
+class MovingPercentile:
+    def __init__(self, window_size: int) -> None:
+        self._hist: list[float] = [0] * window_size
+        self._count: int = 0
+
+    def add_sample(self, sample: float) -> None:
+        self._hist[self._count % len(self._hist)] = sample
+        self._count += 1
+
+    def get_percentile(self, percentile: float) -> float:
+        """percentile between 0 and 1 of the samples in the window (nearest rank)"""
+        if self._count == 0:
+            return 0
+        samples = sorted(self._hist[: self.size()])
+        rank = max(math.ceil(percentile * len(samples)), 1)
+        return samples[min(rank, len(samples)) - 1]
+
+    def reset(self) -> None:
+        self._count = 0
+
+    def size(self) -> int:
+        return min(self._count, len(self._hist))
@@ -67,6 +67,10 @@ class VADEvent:
     raw_accumulated_speech: float = 0.0
     """Threshold used to detect speech."""
 
+    backlog_duration: float = 0.0
+    """Duration of the audio waiting for inference after this one, in seconds (only for
+    `INFERENCE_DONE` events)."""
+
 
 @dataclass
 class VADCapabilities:
@@ -121,11 +125,13 @@ class VADStream(ABC):
 
         inference_duration_total = 0.0
         inference_count = 0
+        backlog_duration_max = 0.0
 
         async for ev in event_aiter:
             if ev.type == VADEventType.INFERENCE_DONE:
                 inference_duration_total += ev.inference_duration
                 inference_count += 1
+                backlog_duration_max = max(backlog_duration_max, ev.backlog_duration)
 
                 if inference_count >= 1 / self._vad.capabilities.update_interval:
                     vad_metrics = VADMetrics(
@@ -133,6 +139,7 @@ class VADStream(ABC):
                         idle_time=time.perf_counter() - self._last_activity_time,
                         inference_duration_total=inference_duration_total,
                         inference_count=inference_count,
+                        backlog_duration_max=backlog_duration_max,
                         label=self._vad._label,
                         metadata=Metadata(
                             model_name=self._vad.model, model_provider=self._vad.provider
@@ -142,6 +149,7 @@ class VADStream(ABC):
 
                     inference_duration_total = 0.0
                     inference_count = 0
+                    backlog_duration_max = 0.0
             elif ev.type in [VADEventType.START_OF_SPEECH, VADEventType.END_OF_SPEECH]:
                 self._last_activity_time = time.perf_counter()
 
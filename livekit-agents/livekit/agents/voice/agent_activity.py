@@ -35,7 +35,12 @@ from ..metrics import (
     TTSMetrics,
     VADMetrics,
 )
-from ..telemetry import trace_types, tracer, utils as trace_utils
+from ..telemetry import (
+    metrics as telemetry_metrics,
+    trace_types,
+    tracer,
+    utils as trace_utils,
+)
 from ..tokenize.basic import split_words
 from ..types import NOT_GIVEN, FlushSentinel, NotGivenOr
 from ..utils.misc import is_given
@@ -98,10 +103,20 @@ class _PreemptiveGeneration:
     speech_handle: SpeechHandle
     user_message: llm.ChatMessage
     info: _PreemptiveGenerationInfo
+    transcript_key: str
     chat_ctx: llm.ChatContext
-    tools: list[llm.FunctionTool | llm.RawFunctionTool]
+    """snapshot of the agent chat context, the generation works on its own copy"""
+    tools: list[llm.FunctionTool | llm.RawFunctionTool | mcp.MCPTool]
     tool_choice: llm.ToolChoice | None
     created_at: float
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+
+
+def _transcript_key(transcript: str) -> str:
+    """the words of a transcript, without the case and the punctuation the STTs often change
+    between the preflight and the final transcripts"""
+    return " ".join(word for word, _, _ in split_words(transcript, split_character=True)).lower()
 
 
 # NOTE: AgentActivity isn't exposed to the public API
@@ -135,6 +150,8 @@ class AgentActivity(RecognitionHooks):
         self._speech_tasks: list[asyncio.Task[Any]] = []
 
         self._preemptive_generation: _PreemptiveGeneration | None = None
+        # speech ids of the discarded preemptive generations, their LLM metrics can come after
+        self._discarded_preemptive_ids: utils.BoundedDict[str, None] = utils.BoundedDict(maxsize=8)
 
         self._turn_detection_mode = (
             self.turn_detection if isinstance(self.turn_detection, str) else None
@@ -906,9 +923,20 @@ class AgentActivity(RecognitionHooks):
 
     def _cancel_preemptive_generation(self) -> None:
         if self._preemptive_generation is not None:
-            self._preemptive_generation.speech_handle._cancel()
+            self._discard_preemptive_generation(self._preemptive_generation, result="cancelled")
             self._preemptive_generation = None
 
+    def _discard_preemptive_generation(
+        self, preemptive: _PreemptiveGeneration, *, result: str
+    ) -> None:
+        preemptive.speech_handle._cancel()
+        self._discarded_preemptive_ids[preemptive.speech_handle.id] = None
+        telemetry_metrics.preemptive_generation_done(result=result)
+        telemetry_metrics.preemptive_tokens_wasted(
+            prompt_tokens=preemptive.prompt_tokens,
+            completion_tokens=preemptive.completion_tokens,
+        )
+
     def _interrupt_background_speeches(self, force: bool = False) -> list[SpeechHandle]:
         interrupted_speeches: list[SpeechHandle] = []
         for speech in self._background_speeches:
@@ -1065,6 +1093,8 @@ class AgentActivity(RecognitionHooks):
             isinstance(ev, LLMMetrics) or isinstance(ev, TTSMetrics)
         ):
             ev.speech_id = speech_handle.id
+        if isinstance(ev, LLMMetrics) and ev.speech_id is not None:
+            self._on_preemptive_llm_metrics(ev)
         if (
             isinstance(ev, RealtimeModelMetrics)
             and self._realtime_spans is not None
@@ -1073,6 +1103,19 @@ class AgentActivity(RecognitionHooks):
             trace_utils.record_realtime_metrics(realtime_span, ev)
         self._session.emit("metrics_collected", MetricsCollectedEvent(metrics=ev))
 
+    def _on_preemptive_llm_metrics(self, ev: LLMMetrics) -> None:
+        if (preemptive := self._preemptive_generation) and (
+            preemptive.speech_handle.id == ev.speech_id
+        ):
+            # wasted if the generation is discarded later
+            preemptive.prompt_tokens += ev.prompt_tokens
+            preemptive.completion_tokens += ev.completion_tokens
+        elif ev.speech_id in self._discarded_preemptive_ids:
+            # the request of a discarded generation completed (or was cancelled) after it
+            telemetry_metrics.preemptive_tokens_wasted(
+                prompt_tokens=ev.prompt_tokens, completion_tokens=ev.completion_tokens
+            )
+
     def _on_error(
         self, error: llm.LLMError | stt.STTError | tts.TTSError | llm.RealtimeModelError
     ) -> None:
@@ -1281,7 +1324,23 @@ class AgentActivity(RecognitionHooks):
         ):
             return
 
-        self._cancel_preemptive_generation()
+        transcript_key = _transcript_key(info.new_transcript)
+        tools = self.tools
+        if preemptive := self._preemptive_generation:
+            if (
+                preemptive.transcript_key == transcript_key
+                and not preemptive.speech_handle.done()
+                and preemptive.tools == tools
+                and preemptive.tool_choice == self._tool_choice
+                and preemptive.chat_ctx.is_equivalent(self._agent._chat_ctx)
+            ):
+                # same words as the running generation (e.g. the final transcript after the
+                # preflight one), keep it and its LLM request. The user message gets the final
+                # transcript at the end of the turn
+                telemetry_metrics.preemptive_generation_deduplicated()
+                return
+
+            self._cancel_preemptive_generation()
 
         user_message = llm.ChatMessage(
             role="user",
@@ -1289,6 +1348,7 @@ class AgentActivity(RecognitionHooks):
             transcript_confidence=info.transcript_confidence,
         )
 
+        # the snapshot is only read, _pipeline_reply_task copies it before adding the message
         chat_ctx = self._agent.chat_ctx.copy()
         speech_handle = self._generate_reply(
             # we need to send in the original user_message because metrics are injected later on
@@ -1301,8 +1361,9 @@ class AgentActivity(RecognitionHooks):
             speech_handle=speech_handle,
             user_message=user_message,
             info=info,
-            chat_ctx=chat_ctx.copy(),
-            tools=self.tools.copy(),
+            transcript_key=transcript_key,
+            chat_ctx=chat_ctx,
+            tools=tools,
             tool_choice=self._tool_choice,
             created_at=time.time(),
         )
@@ -1467,7 +1528,7 @@ class AgentActivity(RecognitionHooks):
             # make sure the on_user_turn_completed didn't change some request parameters
             # otherwise invalidate the preemptive generation
             if (
-                preemptive.info.new_transcript == user_message.text_content
+                preemptive.transcript_key == _transcript_key(user_message.text_content or "")
                 and preemptive.chat_ctx.is_equivalent(temp_mutable_chat_ctx)
                 and preemptive.tools == self.tools
                 and preemptive.tool_choice == self._tool_choice
@@ -1475,18 +1536,22 @@ class AgentActivity(RecognitionHooks):
                 speech_handle = preemptive.speech_handle
 
                 # preemptive generation is using another ChatMessage created outside of the on_end_of_turn callback,
-                # inject the metrics here.
+                # inject the metrics and the final transcript here.
+                preemptive.user_message.content = list(user_message.content)
+                preemptive.user_message.transcript_confidence = user_message.transcript_confidence
                 preemptive.user_message.metrics = metrics_report
                 self._schedule_speech(speech_handle, priority=SpeechHandle.SPEECH_PRIORITY_NORMAL)
+
+                lead_time = time.time() - preemptive.created_at
+                telemetry_metrics.preemptive_generation_done(result="hit", lead_time=lead_time)
                 logger.debug(
-                    "using preemptive generation",
-                    extra={"preemptive_lead_time": time.time() - preemptive.created_at},
+                    "using preemptive generation", extra={"preemptive_lead_time": lead_time}
                 )
             else:
                 logger.warning(
                     "preemptive generation enabled but chat context or tools have changed after `on_user_turn_completed`",  # noqa: E501
                 )
-                preemptive.speech_handle._cancel()
+                self._discard_preemptive_generation(preemptive, result="miss")
 
             self._preemptive_generation = None
 
@@ -55,6 +55,7 @@ from .ivr import IVRActivity
 from .recorder_io import RecorderIO
 from .run_result import RunResult
 from .speech_handle import SpeechHandle
+from .tool_scheduler import ToolScheduler
 
 if TYPE_CHECKING:
     from ..inference import LLMModels, STTModels, TTSModels
@@ -80,6 +81,7 @@ class AgentSessionOptions:
     min_endpointing_delay: float
     max_endpointing_delay: float
     max_tool_steps: int
+    max_tool_concurrency: int | None
     user_away_timeout: float | None
     false_interruption_timeout: float | None
     resume_false_interruption: bool
@@ -165,6 +167,7 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
         min_endpointing_delay: float = 0.5,
         max_endpointing_delay: float = 3.0,
         max_tool_steps: int = 3,
+        max_tool_concurrency: int | None = None,
         video_sampler: NotGivenOr[_VideoSampler | None] = NOT_GIVEN,
         user_away_timeout: float | None = 15.0,
         false_interruption_timeout: float | None = 2.0,
@@ -229,6 +232,10 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
                 will wait before terminating the turn. Default ``3.0`` s.
             max_tool_steps (int): Maximum consecutive tool calls per LLM turn.
                 Default ``3``.
+            max_tool_concurrency (int, optional): Maximum number of tool calls
+                executed at once in the session, the other calls wait for a slot. A
+                tool awaiting another tool call of the session (e.g. through an
+                AgentTask) needs a limit of at least 2. Default ``None`` (no limit).
             video_sampler (_VideoSampler, optional): Uses
                 :class:`VoiceActivityVideoSampler` when *NOT_GIVEN*; that sampler
                 captures video at ~1 fps while the user is speaking and ~0.3 fps
@@ -289,6 +296,7 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
             min_endpointing_delay=min_endpointing_delay,
             max_endpointing_delay=max_endpointing_delay,
             max_tool_steps=max_tool_steps,
+            max_tool_concurrency=max_tool_concurrency,
             user_away_timeout=user_away_timeout,
             false_interruption_timeout=false_interruption_timeout,
             resume_false_interruption=resume_false_interruption,
@@ -323,6 +331,7 @@ class AgentSession(rtc.EventEmitter[EventTypes], Generic[Userdata_T]):
         self._tts = tts or None
         self._mcp_servers = mcp_servers or None
         self._tools = tools if is_given(tools) else []
+        self._tool_scheduler = ToolScheduler(max_concurrency=max_tool_concurrency)
 
         # unrecoverable error counts, reset after agent speaking
         self._llm_error_counts = 0
@@ -579,7 +579,10 @@ async def _execute_tools_task(
 
                 @tracer.start_as_current_span("function_tool")
                 async def _traceable_fnc_tool(
-                    function_callable: Callable, fnc_call: llm.FunctionCall
+                    function_tool: llm.FunctionTool | llm.RawFunctionTool,
+                    function_callable: Callable,
+                    fnc_call: llm.FunctionCall,
+                    mocked: bool,
                 ) -> None:
                     current_span = trace.get_current_span()
                     current_span.set_attribute(trace_types.ATTR_FUNCTION_TOOL_NAME, fnc_call.name)
@@ -588,7 +591,9 @@ async def _execute_tools_task(
                     )
 
                     try:
-                        val = await function_callable()
+                        val = await session._tool_scheduler.run(
+                            function_tool, fnc_call, function_callable, cache=not mocked
+                        )
                         output = make_tool_output(fnc_call=fnc_call, output=val, exception=None)
                     except BaseException as e:
                         if not isinstance(e, StopResponse):
@@ -610,7 +615,11 @@ async def _execute_tools_task(
                     # TODO(theomonnom): Add the agent handoff inside the current_span
                     _tool_completed(output)
 
-                task = asyncio.create_task(_traceable_fnc_tool(function_callable, fnc_call))
+                task = asyncio.create_task(
+                    _traceable_fnc_tool(
+                        function_tool, function_callable, fnc_call, mocked=mock is not None
+                    )
+                )
                 _set_activity_task_info(
                     task, speech_handle=speech_handle, function_call=fnc_call, inline_task=True
                 )
@@ -0,0 +1,198 @@
+"""Execution limits of the function tool calls of a session.
+
+The tool calls still start as soon as they are streamed by the LLM, the scheduler makes each
+call wait for a slot of its tool (max_concurrency of function_tool, 1 to run the calls of a tool
+one at a time, e.g. for DB writes) and then for a slot of the session (max_tool_concurrency of
+the AgentSession). The timeout of a tool only applies to its execution, a call running for longer
+is cancelled and the LLM receives an error. The outputs of the tools with the IDEMPOTENT flag are
+reused for the calls with the same arguments, including the ones still running (when the call
+running the tool is cancelled, one of the calls waiting for its output runs it instead).
+
+The tool runs in the task of its call: the inline AgentTasks rely on the task info set on it.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import sys
+import time
+from collections.abc import Awaitable, Hashable
+from typing import Any, Callable, Union
+
+from opentelemetry import trace
+
+from .. import llm, utils
+from ..llm.tool_context import (
+    StopResponse,
+    ToolError,
+    ToolFlag,
+    _FunctionToolInfo,
+    _RawFunctionToolInfo,
+    get_function_info,
+    get_raw_function_info,
+    is_function_tool,
+    is_raw_function_tool,
+)
+from ..telemetry import metrics as telemetry_metrics, trace_types
+
+_ToolInfo = Union[_FunctionToolInfo, _RawFunctionToolInfo]
+
+
+class ToolScheduler:
+    def __init__(self, *, max_concurrency: int | None = None, cache_size: int = 128) -> None:
+        """
+        Args:
+            max_concurrency: maximum number of tool calls running at once, None for no limit
+            cache_size: maximum number of outputs of the idempotent tools kept
+        """
+        if max_concurrency is not None and max_concurrency < 1:
+            raise ValueError("max_concurrency must be at least 1")
+
+        self._max_concurrency = max_concurrency
+        # created on the event loop of the calls
+        self._session_sem: asyncio.Semaphore | None = None
+        self._tool_sems: dict[Any, asyncio.Semaphore] = {}
+        self._outputs: utils.BoundedDict[Hashable, asyncio.Future[Any]] = utils.BoundedDict(
+            maxsize=cache_size
+        )
+
+    async def run(
+        self,
+        tool: llm.FunctionTool | llm.RawFunctionTool,
+        fnc_call: llm.FunctionCall,
+        fnc: Callable[[], Awaitable[Any]],
+        *,
+        cache: bool = True,
+    ) -> Any:
+        """Execute fnc, the call of the tool, within its limits.
+
+        Args:
+            cache: whether the output can be reused if the tool is idempotent, False when fnc
+                isn't the tool itself (e.g. a mock)
+        """
+        info: _ToolInfo
+        if is_raw_function_tool(tool):
+            info = get_raw_function_info(tool)
+        elif is_function_tool(tool):
+            info = get_function_info(tool)
+        else:
+            raise ValueError(f"unknown tool type: {type(tool)}")
+
+        if not cache or not info.flags & ToolFlag.IDEMPOTENT:
+            return await self._execute(tool, info, fnc)
+
+        key = (tool, _normalize_arguments(fnc_call.arguments))
+        while (fut := self._outputs.get(key)) is not None:
+            try:
+                output = await asyncio.shield(fut)
+            except asyncio.CancelledError:
+                if not fut.cancelled():
+                    raise  # this call was cancelled
+
+                # the call running the tool was cancelled, this call runs it instead
+                continue
+
+            telemetry_metrics.tool_cache_lookup(tool=info.name, hit=True)
+            trace.get_current_span().set_attribute(trace_types.ATTR_FUNCTION_TOOL_CACHED, True)
+            return output
+
+        telemetry_metrics.tool_cache_lookup(tool=info.name, hit=False)
+        fut = asyncio.get_running_loop().create_future()
+        self._outputs[key] = fut
+        try:
+            output = await self._execute(tool, info, fnc)
+        except BaseException as e:
+            # the failed calls are retried by the next ones
+            if self._outputs.get(key) is fut:
+                del self._outputs[key]
+
+            if isinstance(e, asyncio.CancelledError):
+                fut.cancel()
+            else:
+                fut.set_exception(e)
+                fut.exception()  # the calls waiting for it may have been cancelled
+            raise
+
+        fut.set_result(output)
+        return output
+
+    async def _execute(
+        self,
+        tool: llm.FunctionTool | llm.RawFunctionTool,
+        info: _ToolInfo,
+        fnc: Callable[[], Awaitable[Any]],
+    ) -> Any:
+        span = trace.get_current_span()
+        queued_at = time.perf_counter()
+        async with contextlib.AsyncExitStack() as stack:
+            # the tool slot first, a call waiting for a serial tool doesn't hold a session slot
+            if info.max_concurrency is not None:
+                await stack.enter_async_context(self._tool_sem(tool, info.max_concurrency))
+
+            if self._max_concurrency is not None:
+                if self._session_sem is None:
+                    self._session_sem = asyncio.Semaphore(self._max_concurrency)
+                await stack.enter_async_context(self._session_sem)
+
+            started_at = time.perf_counter()
+            span.set_attribute(trace_types.ATTR_FUNCTION_TOOL_QUEUE_WAIT, started_at - queued_at)
+            telemetry_metrics.tool_started(tool=info.name, queue_wait=started_at - queued_at)
+
+            task = asyncio.current_task()
+            timed_out = False
+            timer: asyncio.TimerHandle | None = None
+            if info.timeout is not None and task is not None:
+
+                def _on_timeout() -> None:
+                    nonlocal timed_out
+                    timed_out = True
+                    task.cancel()
+
+                timer = asyncio.get_running_loop().call_later(info.timeout, _on_timeout)
+
+            status = "error"
+            try:
+                output = await fnc()
+                status = "ok"
+                return output
+            except StopResponse:
+                status = "ok"
+                raise
+            except asyncio.CancelledError:
+                if not timed_out:
+                    raise
+
+                if sys.version_info >= (3, 11):
+                    task.uncancel()  # type: ignore[union-attr]
+
+                status = "timeout"
+                raise ToolError(
+                    f"the function `{info.name}` timed out after {info.timeout} seconds"
+                ) from None
+            finally:
+                if timer is not None:
+                    timer.cancel()
+
+                elapsed = time.perf_counter() - started_at
+                span.set_attribute(trace_types.ATTR_FUNCTION_TOOL_EXECUTION_TIME, elapsed)
+                telemetry_metrics.tool_completed(
+                    tool=info.name, status=status, time_elapsed=elapsed
+                )
+
+    def _tool_sem(
+        self, tool: llm.FunctionTool | llm.RawFunctionTool, max_concurrency: int
+    ) -> asyncio.Semaphore:
+        # the methods of the agents of the same class share their limit
+        key = getattr(tool, "__func__", tool)
+        if (sem := self._tool_sems.get(key)) is None:
+            sem = self._tool_sems[key] = asyncio.Semaphore(max_concurrency)
+        return sem
+
+
+def _normalize_arguments(arguments: str) -> str:
+    try:
+        return json.dumps(json.loads(arguments or "{}"), sort_keys=True)
+    except ValueError:
+        return arguments
@@ -23,7 +23,7 @@ import math
 import multiprocessing as mp
 import os
 import sys
-import threading
+import time
 from collections.abc import Awaitable
 from dataclasses import dataclass, field
 from enum import Enum
@@ -42,6 +42,7 @@ from . import ipc, telemetry, utils
 from ._exceptions import AssignmentTimeoutError
 from .inference_runner import _InferenceRunner
 from .job import (
+    AcceptPolicy,
     JobAcceptArguments,
     JobContext,
     JobExecutorType,
@@ -53,13 +54,15 @@ from .log import DEV_LEVEL, logger
 from .plugin import Plugin
 from .types import NOT_GIVEN, NotGivenOr
 from .utils import http_server, is_given
-from .utils.hw import get_cpu_monitor
+from .utils.hw import LoadMonitor, get_cpu_monitor
 from .version import __version__
 
 ASSIGNMENT_TIMEOUT = 7.5
 UPDATE_STATUS_INTERVAL = 2.5
 UPDATE_LOAD_INTERVAL = 0.5
 HEARTBEAT_INTERVAL = 30
+# large inference payloads are exchanged through shared memory instead of the socket
+INFERENCE_SHM_SIZE = 4 * 1024 * 1024
 
 
 def _default_setup_fnc(proc: JobProcess) -> Any:
@@ -70,6 +73,10 @@ async def _default_request_fnc(ctx: JobRequest) -> None:
     await ctx.accept()
 
 
+async def _answered_by_policy(*args: Any) -> None:
+    raise RuntimeError("the job request is answered by the AcceptPolicy")
+
+
 class ServerType(Enum):
     ROOM = agent.JobType.JT_ROOM
     PUBLISHER = agent.JobType.JT_PUBLISHER
@@ -79,33 +86,72 @@ WorkerType = ServerType
 
 
 class _DefaultLoadCalc:
+    """Composite load score, the highest of the SCORED_COMPONENTS.
+
+    - cpu: cgroup (or system) CPU usage, averaged over 2.5s
+    - jobs: the CPU usage plus the expected usage of the jobs started in the last
+      JOB_WARMUP_TIME seconds, which haven't reached their steady state yet
+    - inference: requests in flight per inference process, INFERENCE_QUEUE_SATURATION being 1.0
+    - memory: cgroup (or system) memory usage
+    - cpu_pressure, memory_pressure: share of the time tasks were stalled (PSI)
+
+    All of them are exported as metrics, the memory and the pressures aren't scored: a worker
+    can run close to its memory limit, and without a cgroup they include the other tenants of
+    the host. A load_fnc can be used to take them into account.
+
+    Sampled without blocking each time the worker updates its load (UPDATE_LOAD_INTERVAL).
+    """
+
     _instance = None
 
+    JOB_WARMUP_TIME = 10.0
+    INFERENCE_QUEUE_SATURATION = 16
+    SCORED_COMPONENTS = ("cpu", "jobs", "inference")
+
     def __init__(self) -> None:
-        self._m_avg = utils.MovingAverage(5)  # avg over 2.5
-        self._cpu_monitor = get_cpu_monitor()
-        self._thread = threading.Thread(
-            target=self._calc_load, daemon=True, name="worker_cpu_load_monitor"
+        self._monitor = LoadMonitor()
+        self._cpu_avg = utils.MovingAverage(5)  # avg over 2.5s
+        self._job_cpu = 0.0  # estimated cpu usage of a job once warmed up
+        self._job_first_seen: dict[str, float] = {}
+
+    def _update(self, worker: AgentServer) -> float:
+        sample = self._monitor.sample()
+        self._cpu_avg.add_sample(sample.cpu)
+        cpu = self._cpu_avg.get_avg()
+
+        now = time.monotonic()
+        active_ids = {job.job.id for job in worker.active_jobs}
+        self._job_first_seen = {
+            job_id: self._job_first_seen.get(job_id, now) for job_id in active_ids
+        }
+        num_warming = sum(
+            1 for t in self._job_first_seen.values() if now - t < self.JOB_WARMUP_TIME
         )
-        self._lock = threading.Lock()
-        self._thread.start()
-
-    def _calc_load(self) -> None:
-        while True:
-            cpu_p = self._cpu_monitor.cpu_percent(interval=0.5)
-            with self._lock:
-                self._m_avg.add_sample(cpu_p)
-
-    def _get_avg(self) -> float:
-        with self._lock:
-            return self._m_avg.get_avg()
+        if len(active_ids) > num_warming:
+            self._job_cpu += 0.2 * (cpu / len(active_ids) - self._job_cpu)
+
+        inference = 0.0
+        if (inf_executor := worker._inference_executor) is not None:
+            depths = inf_executor.queue_depths()
+            inference = sum(depths) / (len(depths) * self.INFERENCE_QUEUE_SATURATION)
+
+        components = {
+            "cpu": cpu,
+            "memory": sample.memory,
+            "cpu_pressure": sample.cpu_pressure,
+            "memory_pressure": sample.memory_pressure,
+            "jobs": cpu + num_warming * self._job_cpu,
+            "inference": inference,
+        }
+        telemetry.metrics._update_load_components(components)
+        return min(max(components[name] for name in self.SCORED_COMPONENTS), 1.0)
 
     @classmethod
     def get_load(cls, worker: AgentServer) -> float:
         if cls._instance is None:
             cls._instance = _DefaultLoadCalc()
 
-        return cls._instance._m_avg.get_avg()
+        return cls._instance._update(worker)
 
 
 @dataclass
@@ -149,9 +195,10 @@ _default_permissions = WorkerPermissions()
 class ServerOptions:
     entrypoint_fnc: Callable[[JobContext], Awaitable[None]]
     """Entrypoint function that will be called when a job is assigned to this worker."""
-    request_fnc: Callable[[JobRequest], Awaitable[None]] = _default_request_fnc
+    request_fnc: Callable[[JobRequest], Awaitable[None]] | AcceptPolicy = _default_request_fnc
     """Inspect the request and decide if the current worker should handle it.
 
+    An ``AcceptPolicy`` answers the requests synchronously, without running a coroutine.
     When left empty, all jobs are accepted."""
     prewarm_fnc: Callable[[JobProcess], Any] = _default_setup_fnc
     """A function to perform any necessary initialization before the job starts."""
@@ -171,13 +218,40 @@ class ServerOptions:
     """Maximum memory usage for a job in MB, the job process will be killed if it exceeds this limit.
     Defaults to 0 (disabled).
     """  # noqa: E501
+    proc_sample_interval: float = 5.0
+    """Seconds between two samples of the memory, CPU time and open files of the job and inference
+    processes, used for the memory thresholds and the per-process metrics."""
+    pss_sample_interval: float = 30.0
+    """Seconds between two samples of the PSS of the processes, more costly to read. 0 disables
+    it."""
 
     drain_timeout: int = 1800
     """Number of seconds to wait for current jobs to finish upon receiving TERM or INT signal."""
+    max_jobs_per_process: int = 1
+    """Number of jobs a process can run one after the other.
+
+    When greater than 1, a process whose job ended cleanly (and that stayed under
+    ``job_memory_warn_mb``) is kept warm for the next job instead of exiting, which saves the
+    ``prewarm_fnc`` and import cost. Only used with ``JobExecutorType.PROCESS``."""
+    max_process_age: float = 3600.0
+    """Number of seconds after which a process is no longer reused for another job."""
+    max_jobs_per_shared_process: int = 8
+    """Number of jobs a process hosts at the same time with ``JobExecutorType.SHARED_PROCESS``.
+
+    The jobs share the ``prewarm_fnc`` userdata, a failing job is cancelled without affecting the
+    other ones. ``num_idle_processes`` is then the number of free job slots to keep warm, and
+    the memory thresholds apply per job slot."""
     num_idle_processes: int | ServerEnvOption[int] = ServerEnvOption(
         dev_default=0, prod_default=min(math.ceil(get_cpu_monitor().cpu_count()), 4)
     )
     """Number of idle processes to keep warm."""
+    max_idle_processes: int = 0
+    """Upper bound of the idle processes kept warm by the predictive scaler.
+
+    When greater than ``num_idle_processes``, the pool tracks the job arrival rate and the time
+    a process takes to be ready, and keeps enough warm processes to absorb the jobs arriving
+    during one process startup, as long as the memory and the ``load_threshold`` allow it.
+    Defaults to 0 (disabled)."""
     shutdown_process_timeout: float = 10.0
     """Maximum amount of time to wait for a job to shut down gracefully"""
     initialize_process_timeout: float = 10.0
@@ -222,8 +296,23 @@ class ServerOptions:
 
     By default it uses "spawn" on all platforms, but "forkserver" on Linux.
     """
+    preload_modules: list[str] = field(default_factory=list)
+    """Modules imported in the forkserver before the job processes are forked from it, e.g. heavy
+    dependencies such as ``transformers`` or ``onnxruntime``. The registered plugins are always
+    preloaded. Only used with the "forkserver" multiprocessing context."""
+    preload_entrypoint_module: bool = False
+    """Also preload the modules defining the entrypoint and the prewarm function (with their
+    imports), so their top-level code runs once in the forkserver instead of in each process."""
+    shared_assets: dict[str, str] = field(default_factory=dict)
+    """Read-only files (name -> path), e.g. model weights or tokenizer files, mapped once and
+    shared by the job processes. Read them with ``JobProcess.shared_asset(name)``."""
     prometheus_port: NotGivenOr[int] = NOT_GIVEN
     """When enabled, will expose prometheus metrics on :{prometheus_port}/metrics"""
+    num_inference_processes: int = 1
+    """Number of inference processes (e.g. used by the turn detector) shared by all the jobs.
+
+    Requests are routed to the least busy process. On hosts with many cores, increase this when
+    the inference process becomes the bottleneck."""
     prometheus_multiproc_dir: str | None = None
     """Directory for prometheus multiprocess mode to enable metrics collection from child job processes.
     When set, the PROMETHEUS_MULTIPROC_DIR environment variable will be configured automatically.
@@ -263,8 +352,14 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         load_threshold: float | ServerEnvOption[float] = _default_load_threshold,
         job_memory_warn_mb: float = 500,
         job_memory_limit_mb: float = 0,
+        proc_sample_interval: float = 5.0,
+        pss_sample_interval: float = 30.0,
         drain_timeout: int = 1800,
+        max_jobs_per_process: int = 1,
+        max_process_age: float = 3600.0,
+        max_jobs_per_shared_process: int = 8,
         num_idle_processes: int | ServerEnvOption[int] = _default_num_idle_processes,
+        max_idle_processes: int = 0,
         shutdown_process_timeout: float = 10.0,
         initialize_process_timeout: float = 10.0,
         permissions: WorkerPermissions = _default_permissions,
@@ -281,6 +376,10 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         setup_fnc: Callable[[JobProcess], Any] | None = None,
         load_fnc: Callable[[AgentServer], float] | Callable[[], float] | None = None,
         prometheus_port: int | None = None,
+        num_inference_processes: int = 1,
+        preload_modules: list[str] | None = None,
+        preload_entrypoint_module: bool = False,
+        shared_assets: dict[str, str] | None = None,
     ) -> None:
         super().__init__()
         self._ws_url = ws_url or os.environ.get("LIVEKIT_URL") or ""
@@ -294,15 +393,25 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         self._load_threshold = load_threshold
         self._job_memory_warn_mb = job_memory_warn_mb
         self._job_memory_limit_mb = job_memory_limit_mb
+        self._proc_sample_interval = proc_sample_interval
+        self._pss_sample_interval = pss_sample_interval
         self._drain_timeout = drain_timeout
+        self._max_jobs_per_process = max_jobs_per_process
+        self._max_process_age = max_process_age
+        self._max_jobs_per_shared_process = max_jobs_per_shared_process
         self._num_idle_processes = num_idle_processes
+        self._max_idle_processes = max_idle_processes
         self._shutdown_process_timeout = shutdown_process_timeout
         self._initialize_process_timeout = initialize_process_timeout
         self._permissions = permissions
         self._max_retry = max_retry
         self._prometheus_port = prometheus_port
+        self._num_inference_processes = num_inference_processes
         self._mp_ctx_str = multiprocessing_context
         self._mp_ctx = mp.get_context(multiprocessing_context)
+        self._preload_modules = preload_modules or []
+        self._preload_entrypoint_module = preload_entrypoint_module
+        self._shared_assets = shared_assets or {}
 
         if not is_given(http_proxy):
             http_proxy = os.environ.get("HTTPS_PROXY") or os.environ.get("HTTP_PROXY")
@@ -314,7 +423,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
 
         # currently only one rtc_session
         self._entrypoint_fnc: Callable[[JobContext], Awaitable[None]] | None = None
-        self._request_fnc: Callable[[JobRequest], Awaitable[None]] | None = None
+        self._request_fnc: Callable[[JobRequest], Awaitable[None]] | AcceptPolicy | None = None
         self._session_end_fnc: Callable[[JobContext], Awaitable[None]] | None = None
 
         # worker cb
@@ -368,8 +477,14 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             load_threshold=options.load_threshold,
             job_memory_limit_mb=options.job_memory_limit_mb,
             job_memory_warn_mb=options.job_memory_warn_mb,
+            proc_sample_interval=options.proc_sample_interval,
+            pss_sample_interval=options.pss_sample_interval,
             drain_timeout=options.drain_timeout,
+            max_jobs_per_process=options.max_jobs_per_process,
+            max_process_age=options.max_process_age,
+            max_jobs_per_shared_process=options.max_jobs_per_shared_process,
             num_idle_processes=options.num_idle_processes,
+            max_idle_processes=options.max_idle_processes,
             shutdown_process_timeout=options.shutdown_process_timeout,
             initialize_process_timeout=options.initialize_process_timeout,
             permissions=options.permissions,
@@ -383,6 +498,10 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             prometheus_port=options.prometheus_port if is_given(options.prometheus_port) else None,
             setup_fnc=options.prewarm_fnc,
             load_fnc=options.load_fnc,
+            num_inference_processes=options.num_inference_processes,
+            preload_modules=options.preload_modules,
+            preload_entrypoint_module=options.preload_entrypoint_module,
+            shared_assets=options.shared_assets,
         )
         server.rtc_session(
             options.entrypoint_fnc,
@@ -399,7 +518,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         *,
         agent_name: str = "",
         type: ServerType = ServerType.ROOM,
-        on_request: Callable[[JobRequest], Any] | None = None,
+        on_request: Callable[[JobRequest], Any] | AcceptPolicy | None = None,
         on_session_end: Callable[[JobContext], Any] | None = None,
     ) -> Callable[[JobContext], Awaitable[None]]: ...
 
@@ -409,7 +528,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         *,
         agent_name: str = "",
         type: ServerType = ServerType.ROOM,
-        on_request: Callable[[JobRequest], Any] | None = None,
+        on_request: Callable[[JobRequest], Any] | AcceptPolicy | None = None,
         on_session_end: Callable[[JobContext], Any] | None = None,
     ) -> Callable[
         [Callable[[JobContext], Awaitable[None]]], Callable[[JobContext], Awaitable[None]]
@@ -421,7 +540,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         *,
         agent_name: str = "",
         type: ServerType = ServerType.ROOM,
-        on_request: Callable[[JobRequest], Any] | None = None,
+        on_request: Callable[[JobRequest], Any] | AcceptPolicy | None = None,
         on_session_end: Callable[[JobContext], Any] | None = None,
     ) -> (
         Callable[[JobContext], Awaitable[None]]
@@ -527,12 +646,19 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             self._close_future: asyncio.Future[None] | None = None
             self._msg_chan = utils.aio.Chan[agent.WorkerMessage](128, loop=self._loop)
 
-            self._inference_executor: ipc.inference_proc_executor.InferenceProcExecutor | None = (
-                None
+            # one pass over all the job and inference processes
+            self._proc_sampler = ipc.proc_sampler.ProcSampler(
+                interval=self._proc_sample_interval,
+                pss_interval=self._pss_sample_interval,
+                loop=self._loop,
             )
+
+            self._inference_executor: ipc.inference_proc_pool.InferenceProcPool | None = None
             if len(_InferenceRunner.registered_runners) > 0:
-                self._inference_executor = ipc.inference_proc_executor.InferenceProcExecutor(
+                self._inference_executor = ipc.inference_proc_pool.InferenceProcPool(
                     runners=_InferenceRunner.registered_runners,
+                    num_processes=self._num_inference_processes,
+                    cpu_affinity=True,
                     initialize_timeout=5 * 60,
                     close_timeout=5,
                     memory_warn_mb=2000,
@@ -543,6 +669,8 @@ class AgentServer(utils.EventEmitter[EventTypes]):
                     mp_ctx=self._mp_ctx,
                     loop=self._loop,
                     http_proxy=self._http_proxy or None,
+                    shm_size=INFERENCE_SHM_SIZE,
+                    proc_sampler=self._proc_sampler,
                 )
 
             self._proc_pool = ipc.proc_pool.ProcPool(
@@ -559,6 +687,11 @@ class AgentServer(utils.EventEmitter[EventTypes]):
                 memory_warn_mb=self._job_memory_warn_mb,
                 memory_limit_mb=self._job_memory_limit_mb,
                 http_proxy=self._http_proxy or None,
+                max_jobs_per_process=self._max_jobs_per_process,
+                max_process_age=self._max_process_age,
+                max_jobs_per_shared_process=self._max_jobs_per_shared_process,
+                max_idle_processes=self._max_idle_processes,
+                proc_sampler=self._proc_sampler,
             )
 
             self._previous_status = agent.WorkerStatus.WS_AVAILABLE
@@ -617,10 +750,14 @@ class AgentServer(utils.EventEmitter[EventTypes]):
                 extra={"version": __version__, "rtc-version": rtc.__version__},
             )
 
+            if self._shared_assets:
+                # before any process is started, they inherit the declaration
+                ipc.shared_assets.declare_shared_assets(self._shared_assets)
+
             if self._mp_ctx_str == "forkserver":
                 plugin_packages = [p.package for p in Plugin.registered_plugins] + ["av"]
                 logger.info("preloading plugins", extra={"packages": plugin_packages})
-                self._mp_ctx.set_forkserver_preload(plugin_packages)
+                self._mp_ctx.set_forkserver_preload(plugin_packages + self._forkserver_preload())
 
             if self._inference_executor is not None:
                 logger.info("starting inference executor")
@@ -630,7 +767,12 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             self._closed = False
 
             def _update_job_status(proc: ipc.job_executor.JobExecutor) -> None:
-                t = self._loop.create_task(self._update_job_status(proc))
+                # the status is read now, a reused process clears its job right after
+                msg = self._job_status_msg(proc)
+                if msg is None:
+                    return
+
+                t = self._loop.create_task(self._queue_msg(msg))
                 self._tasks.add(t)
                 t.add_done_callback(self._tasks.discard)
 
@@ -642,6 +784,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             self._proc_pool.on("process_started", _update_job_status)
             self._proc_pool.on("process_closed", _update_job_status)
             self._proc_pool.on("process_job_launched", _update_job_status)
+            self._proc_pool.on("process_job_completed", _update_job_status)
             await self._proc_pool.start()
 
             self._http_session = aiohttp.ClientSession(proxy=self._http_proxy or None)
@@ -667,16 +810,23 @@ class AgentServer(utils.EventEmitter[EventTypes]):
 
                         return self._load_fnc(self)  # type: ignore
 
-                    self._worker_load = await asyncio.get_event_loop().run_in_executor(
-                        None, load_fnc
-                    )
+                    if self._load_fnc == _DefaultLoadCalc.get_load:
+                        # non-blocking, sampled on the event loop
+                        self._worker_load = _DefaultLoadCalc.get_load(self)
+                    else:
+                        self._worker_load = await asyncio.get_event_loop().run_in_executor(
+                            None, load_fnc
+                        )
 
                     telemetry.metrics._update_worker_load(self._worker_load)
+                    telemetry.metrics._update_child_proc_count(self._proc_sampler.num_processes)
 
                     load_threshold = ServerEnvOption.getvalue(self._load_threshold, devmode)
                     default_num_idle_processes = ServerEnvOption.getvalue(
                         self._num_idle_processes, devmode
                     )
+                    # the predictive scaler can keep up to max_idle_processes
+                    max_idle_processes = max(default_num_idle_processes, self._max_idle_processes)
 
                     if not math.isinf(load_threshold):
                         active_jobs = len(self.active_jobs)
@@ -685,11 +835,11 @@ class AgentServer(utils.EventEmitter[EventTypes]):
                             if job_load > 0.0:
                                 available_load = max(load_threshold - self._worker_load, 0.0)
                                 available_job = min(
-                                    math.ceil(available_load / job_load), default_num_idle_processes
+                                    math.ceil(available_load / job_load), max_idle_processes
                                 )
                                 self._proc_pool.set_target_idle_processes(available_job)
                         else:
-                            self._proc_pool.set_target_idle_processes(default_num_idle_processes)
+                            self._proc_pool.set_target_idle_processes(max_idle_processes)
 
             tasks = []
             self._load_task = asyncio.create_task(_load_task(), name="load_task")
@@ -776,6 +926,8 @@ class AgentServer(utils.EventEmitter[EventTypes]):
 
             logger.info("draining worker", extra={"id": self.id, "timeout": timeout})
             self._draining = True
+            # the processes running a job must exit once it ends
+            self._proc_pool.stop_reusing_processes()
             await self._update_worker_status()
 
             async def _join_jobs() -> None:
@@ -876,6 +1028,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             if self._inference_executor is not None:
                 await self._inference_executor.aclose()
 
+            await self._proc_sampler.aclose()
             await self._http_session.close()
             await self._http_server.aclose()
 
@@ -1097,12 +1250,140 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         )
         self.emit("worker_registered", reg.worker_id, reg.server_info)
 
+    def _forkserver_preload(self) -> list[str]:
+        modules = list(self._preload_modules)
+        if self._preload_entrypoint_module:
+            for fnc in (self._entrypoint_fnc, self._setup_fnc, self._session_end_fnc):
+                module = getattr(fnc, "__module__", None)
+                if module and module != __name__ and module not in modules:
+                    modules.append(module)
+
+        if self._shared_assets:
+            modules.append("livekit.agents.ipc._forkserver_preload")
+
+        if modules:
+            logger.info("preloading modules in the forkserver", extra={"modules": modules})
+
+        return modules
+
     def _handle_availability(self, msg: agent.AvailabilityRequest) -> None:
-        task = self._loop.create_task(self._answer_availability(msg))
+        received_at = time.perf_counter()
+        self._log_job_request(msg)
+
+        if isinstance(self._request_fnc, AcceptPolicy):
+            self._answer_with_policy(msg, self._request_fnc, received_at)
+            return
+
+        task = self._loop.create_task(self._answer_availability(msg, received_at))
         self._tasks.add(task)
         task.add_done_callback(self._tasks.discard)
 
-    async def _answer_availability(self, msg: agent.AvailabilityRequest) -> None:
+    def _log_job_request(self, msg: agent.AvailabilityRequest) -> None:
+        logger.info(
+            "received job request",
+            extra={
+                "job_id": msg.job.id,
+                "dispatch_id": msg.job.dispatch_id,
+                "room": msg.job.room.name,
+                "room_id": msg.job.room.sid,
+                "agent_name": self._agent_name,
+                "resuming": msg.resuming,
+                "enable_recording": msg.job.enable_recording,
+            },
+        )
+
+    def _answer_with_policy(
+        self, msg: agent.AvailabilityRequest, policy: AcceptPolicy, received_at: float
+    ) -> None:
+        """Answer the availability request synchronously, the job is launched from the
+        assignment callback"""
+        job_req = JobRequest(
+            job=msg.job, on_reject=_answered_by_policy, on_accept=_answered_by_policy
+        )
+        try:
+            args = policy.evaluate(job_req)
+        except Exception:
+            logger.exception(
+                "accept policy failed, rejecting the job",
+                extra={"job_request": job_req, "agent_name": self._agent_name},
+            )
+            args = None
+
+        self._queue_msg_nowait(self._availability_msg(msg.job.id, args))
+        answered_at = time.perf_counter()
+        telemetry.metrics.availability_answered(time_elapsed=answered_at - received_at, policy=True)
+        if args is None:
+            return
+
+        wait_assignment = asyncio.Future[agent.JobAssignment]()
+        self._pending_assignments[job_req.id] = wait_assignment
+
+        def _on_timeout() -> None:
+            if self._pending_assignments.get(job_req.id) is wait_assignment:
+                del self._pending_assignments[job_req.id]
+
+            logger.warning(
+                f"assignment for job {job_req.id} timed out",
+                extra={"job_request": job_req, "agent_name": self._agent_name},
+            )
+            wait_assignment.cancel()
+
+        timeout_handle = self._loop.call_later(ASSIGNMENT_TIMEOUT, _on_timeout)
+
+        def _on_assigned(fut: asyncio.Future[agent.JobAssignment]) -> None:
+            timeout_handle.cancel()
+            if fut.cancelled():
+                return
+
+            telemetry.metrics.job_assigned(time_elapsed=time.perf_counter() - answered_at)
+            job_assign = fut.result()
+            running_info = RunningJobInfo(
+                accept_arguments=args,
+                job=msg.job,
+                url=job_assign.url or self._ws_url,
+                token=job_assign.token,
+                worker_id=self._id,
+                fake_job=False,
+            )
+            task = self._loop.create_task(self._launch_job_task(running_info))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+        wait_assignment.add_done_callback(_on_assigned)
+
+    @utils.log_exceptions(logger=logger)
+    async def _launch_job_task(self, running_info: RunningJobInfo) -> None:
+        await self._proc_pool.launch_job(running_info)
+
+    def _availability_msg(
+        self, job_id: str, args: JobAcceptArguments | None
+    ) -> agent.WorkerMessage:
+        availability_resp = agent.WorkerMessage()
+        availability_resp.availability.job_id = job_id
+        availability_resp.availability.available = args is not None
+        if args is not None:
+            availability_resp.availability.participant_identity = args.identity
+            availability_resp.availability.participant_name = args.name
+            availability_resp.availability.participant_metadata = args.metadata
+            if args.attributes:
+                availability_resp.availability.participant_attributes.update(args.attributes)
+
+        return availability_resp
+
+    def _queue_msg_nowait(self, msg: agent.WorkerMessage) -> None:
+        try:
+            self._msg_chan.send_nowait(msg)
+        except utils.aio.channel.ChanFull:
+            # the connection is lagging behind, wait for room in the channel
+            task = self._loop.create_task(self._queue_msg(msg))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        except utils.aio.ChanClosed:
+            pass  # the worker is closing
+
+    async def _answer_availability(
+        self, msg: agent.AvailabilityRequest, received_at: float
+    ) -> None:
         """Ask the user if they want to accept this job and forward the answer to the server.
         If we get the job assigned, we start a new process."""
 
@@ -1112,24 +1393,20 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             nonlocal answered
             answered = True
 
-            availability_resp = agent.WorkerMessage()
-            availability_resp.availability.job_id = msg.job.id
-            availability_resp.availability.available = False
-            await self._queue_msg(availability_resp)
+            await self._queue_msg(self._availability_msg(msg.job.id, None))
+            telemetry.metrics.availability_answered(
+                time_elapsed=time.perf_counter() - received_at, policy=False
+            )
 
         async def _on_accept(args: JobAcceptArguments) -> None:
             nonlocal answered
             answered = True
 
-            availability_resp = agent.WorkerMessage()
-            availability_resp.availability.job_id = msg.job.id
-            availability_resp.availability.available = True
-            availability_resp.availability.participant_identity = args.identity
-            availability_resp.availability.participant_name = args.name
-            availability_resp.availability.participant_metadata = args.metadata
-            if args.attributes:
-                availability_resp.availability.participant_attributes.update(args.attributes)
-            await self._queue_msg(availability_resp)
+            await self._queue_msg(self._availability_msg(msg.job.id, args))
+            answered_at = time.perf_counter()
+            telemetry.metrics.availability_answered(
+                time_elapsed=answered_at - received_at, policy=False
+            )
 
             wait_assignment = asyncio.Future[agent.JobAssignment]()
             self._pending_assignments[job_req.id] = wait_assignment
@@ -1144,6 +1421,7 @@ class AgentServer(utils.EventEmitter[EventTypes]):
                 )
                 raise AssignmentTimeoutError() from None
 
+            telemetry.metrics.job_assigned(time_elapsed=time.perf_counter() - answered_at)
             job_assign = wait_assignment.result()
             running_info = RunningJobInfo(
                 accept_arguments=args,
@@ -1158,22 +1436,9 @@ class AgentServer(utils.EventEmitter[EventTypes]):
 
         job_req = JobRequest(job=msg.job, on_reject=_on_reject, on_accept=_on_accept)
 
-        logger.info(
-            "received job request",
-            extra={
-                "job_id": msg.job.id,
-                "dispatch_id": msg.job.dispatch_id,
-                "room": msg.job.room.name,
-                "room_id": msg.job.room.sid,
-                "agent_name": self._agent_name,
-                "resuming": msg.resuming,
-                "enable_recording": msg.job.enable_recording,
-            },
-        )
-
         @utils.log_exceptions(logger=logger)
         async def _job_request_task() -> None:
-            assert self._request_fnc is not None
+            assert self._request_fnc is not None and not isinstance(self._request_fnc, AcceptPolicy)
             try:
                 await self._request_fnc(job_req)
             except Exception:
@@ -1254,10 +1519,10 @@ class AgentServer(utils.EventEmitter[EventTypes]):
         with contextlib.suppress(utils.aio.ChanClosed):
             await self._queue_msg(msg)
 
-    async def _update_job_status(self, proc: ipc.job_executor.JobExecutor) -> None:
+    def _job_status_msg(self, proc: ipc.job_executor.JobExecutor) -> agent.WorkerMessage | None:
         job_info = proc.running_job
         if job_info is None:
-            return
+            return None
 
         status: agent.JobStatus = agent.JobStatus.JS_RUNNING
         if proc.status == ipc.job_executor.JobStatus.FAILED:
@@ -1268,5 +1533,4 @@ class AgentServer(utils.EventEmitter[EventTypes]):
             status = agent.JobStatus.JS_RUNNING
 
         update = agent.UpdateJobStatus(job_id=job_info.job.id, status=status, error="")
-        msg = agent.WorkerMessage(update_job=update)
-        await self._queue_msg(msg)
+        return agent.WorkerMessage(update_job=update)
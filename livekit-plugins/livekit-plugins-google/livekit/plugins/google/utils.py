@@ -12,6 +12,7 @@ from livekit.agents.llm import utils as llm_utils
 from livekit.agents.llm.tool_context import (
     FunctionTool,
     RawFunctionTool,
+    cached_tool_schema,
     get_raw_function_info,
     is_function_tool,
     is_raw_function_tool,
@@ -129,12 +130,15 @@ def _build_gemini_fnc(
     function_tool: FunctionTool, *, tool_behavior: NotGivenOr[types.Behavior] = NOT_GIVEN
 ) -> types.FunctionDeclaration:
     fnc = llm.utils.build_legacy_openai_schema(function_tool, internally_tagged=True)
-    json_schema = _GeminiJsonSchema(fnc["parameters"]).simplify()
+
+    def _build_parameters() -> types.Schema | None:
+        json_schema = _GeminiJsonSchema(fnc["parameters"]).simplify()
+        return types.Schema.model_validate(json_schema) if json_schema else None
 
     kwargs = {
         "name": fnc["name"],
         "description": fnc["description"],
-        "parameters": types.Schema.model_validate(json_schema) if json_schema else None,
+        "parameters": cached_tool_schema(function_tool, "gemini_schema", _build_parameters),
     }
     if is_given(tool_behavior):
         kwargs["behavior"] = tool_behavior
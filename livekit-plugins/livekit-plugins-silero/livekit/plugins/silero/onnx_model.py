@@ -3,8 +3,12 @@
 from __future__ import annotations
 
 import atexit
+import concurrent.futures
 import importlib.resources
+import queue
+import threading
 from contextlib import ExitStack, nullcontext
+from dataclasses import dataclass
 from pathlib import Path
 
 import numpy as np
@@ -15,6 +19,8 @@ atexit.register(_resource_files.close)
 
 
 SUPPORTED_SAMPLE_RATES = [8000, 16000]
+# maximum number of streams stacked in a single batched session call
+MAX_BATCH_SIZE = 256
 
 
 def new_inference_session(
@@ -93,6 +99,154 @@ class OnnxModel:
             "state": self._rnn_state,
             "sr": self._sample_rate_nd,
         }
-        out, self._state = self._sess.run(None, ort_inputs)
+        out, self._rnn_state = self._sess.run(None, ort_inputs)
         self._context = self._input_buffer[:, -self._context_size :]  # type: ignore
         return out.item()  # type: ignore
+
+
+@dataclass
+class _BatchRequest:
+    model: OnnxModel
+    windows: np.ndarray
+    fut: concurrent.futures.Future[list[float]]
+
+
+class BatchedInference:
+    """Runs the windows of many OnnxModel in a single batched session call.
+
+    Requests are submitted from any thread (e.g. the event loops of jobs running in threads),
+    the worker thread stacks the windows of every pending request as batch rows, carrying each
+    model's context and RNN state, then scatters the probabilities back to the requests.
+    Requests with several windows are run one window per step since the state carries over.
+    """
+
+    def __init__(
+        self,
+        *,
+        onnx_session: onnxruntime.InferenceSession,
+        sample_rate: int,
+        max_batch_size: int = MAX_BATCH_SIZE,
+    ) -> None:
+        if sample_rate not in SUPPORTED_SAMPLE_RATES:
+            raise ValueError("Silero VAD only supports 8KHz and 16KHz sample rates")
+
+        self._sess = onnx_session
+        self._sample_rate = sample_rate
+        self._sample_rate_nd = np.array(sample_rate, dtype=np.int64)
+        self._max_batch_size = max_batch_size
+        self._queue: queue.SimpleQueue[_BatchRequest | None] = queue.SimpleQueue()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, daemon=True, name="silero_batched_inference"
+        )
+        self._thread.start()
+
+    @property
+    def session(self) -> onnxruntime.InferenceSession:
+        return self._sess
+
+    @property
+    def sample_rate(self) -> int:
+        return self._sample_rate
+
+    def submit(
+        self, model: OnnxModel, windows: np.ndarray
+    ) -> concurrent.futures.Future[list[float]]:
+        """queue the windows (num_windows, window_size) of a model, they must not be modified
+        until the returned future is done"""
+        if self._closed:
+            raise RuntimeError("BatchedInference is closed")
+
+        if model.sample_rate != self._sample_rate:
+            raise ValueError("the model sample rate doesn't match the batched inference")
+
+        fut: concurrent.futures.Future[list[float]] = concurrent.futures.Future()
+        self._queue.put(_BatchRequest(model=model, windows=windows, fut=fut))
+        return fut
+
+    def close(self) -> None:
+        if self._closed:
+            return
+
+        self._closed = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def _run(self) -> None:
+        while True:
+            req = self._queue.get()
+            if req is None:
+                break
+
+            # everything queued while the previous batch was running goes in the next one
+            reqs = [req]
+            closing = False
+            while len(reqs) < self._max_batch_size:
+                try:
+                    req = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+
+                if req is None:
+                    closing = True
+                    break
+
+                reqs.append(req)
+
+            try:
+                probs = self._run_batch(reqs)
+            except Exception as e:
+                for req in reqs:
+                    req.fut.set_exception(e)
+            else:
+                for req, p in zip(reqs, probs):
+                    req.fut.set_result(p)
+
+            if closing:
+                break
+
+    def _run_batch(self, reqs: list[_BatchRequest]) -> list[list[float]]:
+        models = [req.model for req in reqs]
+        context_size = models[0].context_size
+        window_size = models[0].window_size_samples
+        probs: list[list[float]] = [[] for _ in reqs]
+
+        for step in range(max(len(req.windows) for req in reqs)):
+            rows = [i for i, req in enumerate(reqs) if len(req.windows) > step]
+            input_buffer = np.empty((len(rows), context_size + window_size), dtype=np.float32)
+            for row, i in enumerate(rows):
+                input_buffer[row, :context_size] = models[i]._context
+                input_buffer[row, context_size:] = reqs[i].windows[step]
+
+            ort_inputs = {
+                "input": input_buffer,
+                "state": np.concatenate([models[i]._rnn_state for i in rows], axis=1),
+                "sr": self._sample_rate_nd,
+            }
+            out, state = self._sess.run(None, ort_inputs)
+            for row, i in enumerate(rows):
+                # same bookkeeping as OnnxModel.__call__
+                models[i]._context = input_buffer[row : row + 1, -context_size:]
+                models[i]._rnn_state = state[:, row : row + 1]
+                probs[i].append(float(out[row, 0]))
+
+        return probs
+
+
+_batched_inferences: dict[tuple[str, bool, int], BatchedInference] = {}
+_batched_inferences_lock = threading.Lock()
+
+
+def shared_batched_inference(
+    *, force_cpu: bool, sample_rate: int, onnx_file_path: Path | str | None = None
+) -> BatchedInference:
+    """returns the BatchedInference of this process for the given model and sample rate"""
+    key = (str(onnx_file_path or ""), force_cpu, sample_rate)
+    with _batched_inferences_lock:
+        batched = _batched_inferences.get(key)
+        if batched is None:
+            session = new_inference_session(force_cpu, onnx_file_path=onnx_file_path)
+            batched = BatchedInference(onnx_session=session, sample_rate=sample_rate)
+            _batched_inferences[key] = batched
+
+        return batched
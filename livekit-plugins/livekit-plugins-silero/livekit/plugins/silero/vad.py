@@ -36,6 +36,8 @@ from . import onnx_model
 from .log import logger
 
 SLOW_INFERENCE_THRESHOLD = 0.2  # late by 200ms
+# number of pending windows that can be processed in a single executor call
+MAX_BATCH_WINDOWS = 16
 
 
 @dataclass
@@ -67,6 +69,7 @@ class VAD(agents.vad.VAD):
         sample_rate: Literal[8000, 16000] = 16000,
         force_cpu: bool = True,
         onnx_file_path: NotGivenOr[Path | str] = NOT_GIVEN,
+        batch_inference: bool = False,
         # deprecated
         padding_duration: NotGivenOr[float] = NOT_GIVEN,
     ) -> VAD:
@@ -105,6 +108,7 @@ class VAD(agents.vad.VAD):
             sample_rate (Literal[8000, 16000]): Sample rate for the inference (only 8KHz and 16KHz are supported).
             onnx_file_path (Path | str | None): Path to the ONNX model file. If not provided, the default model will be loaded. This can be helpful if you want to use a previous version of the silero model.
             force_cpu (bool): Force the use of CPU for inference.
+            batch_inference (bool): Run the inference of every stream in a single batched ONNX call, shared by all the VAD instances of the process loaded with the same model. Useful when many jobs run in the same process (e.g. `JobExecutorType.THREAD`).
             padding_duration (float | None): **Deprecated**. Use `prefix_padding_duration` instead.
 
         Returns:
@@ -122,7 +126,17 @@ class VAD(agents.vad.VAD):
             )
             prefix_padding_duration = padding_duration
 
-        session = onnx_model.new_inference_session(force_cpu, onnx_file_path=onnx_file_path or None)
+        batched_inference: onnx_model.BatchedInference | None = None
+        if batch_inference:
+            batched_inference = onnx_model.shared_batched_inference(
+                force_cpu=force_cpu, sample_rate=sample_rate, onnx_file_path=onnx_file_path or None
+            )
+            session = batched_inference.session
+        else:
+            session = onnx_model.new_inference_session(
+                force_cpu, onnx_file_path=onnx_file_path or None
+            )
+
         opts = _VADOptions(
             min_speech_duration=min_speech_duration,
             min_silence_duration=min_silence_duration,
@@ -131,17 +145,19 @@ class VAD(agents.vad.VAD):
             activation_threshold=activation_threshold,
             sample_rate=sample_rate,
         )
-        return cls(session=session, opts=opts)
+        return cls(session=session, opts=opts, batched_inference=batched_inference)
 
     def __init__(
         self,
         *,
         session: onnxruntime.InferenceSession,
         opts: _VADOptions,
+        batched_inference: onnx_model.BatchedInference | None = None,
     ) -> None:
         super().__init__(capabilities=agents.vad.VADCapabilities(update_interval=0.032))
         self._onnx_session = session
         self._opts = opts
+        self._batched_inference = batched_inference
         self._streams = weakref.WeakSet[VADStream]()
 
     @property
@@ -215,6 +231,7 @@ class VADStream(agents.vad.VADStream):
     def __init__(self, vad: VAD, opts: _VADOptions, model: onnx_model.OnnxModel) -> None:
         super().__init__(vad)
         self._opts, self._model = opts, model
+        self._batched_inference = vad._batched_inference
         self._loop = asyncio.get_event_loop()
         self._exp_filter = utils.ExpFilter(alpha=0.35)
 
@@ -272,9 +289,20 @@ class VADStream(agents.vad.VADStream):
             if self._opts.max_buffered_speech > old_max_buffered_speech:
                 self._speech_buffer_max_reached = False
 
+    def _run_inference(self, windows: np.ndarray) -> list[float]:
+        return [self._model(window) for window in windows]
+
+    async def _infer(self, windows: np.ndarray) -> list[float]:
+        if self._batched_inference is not None:
+            return await asyncio.wrap_future(self._batched_inference.submit(self._model, windows))
+
+        return await self._loop.run_in_executor(None, self._run_inference, windows)
+
     @agents.utils.log_exceptions(logger=logger)
     async def _main_task(self) -> None:
-        inference_f32_data = np.empty(self._model.window_size_samples, dtype=np.float32)
+        window_size = self._model.window_size_samples
+        window_duration = window_size / self._opts.sample_rate
+        inference_f32_data = np.empty((MAX_BATCH_WINDOWS, window_size), dtype=np.float32)
         speech_buffer_index: int = 0
 
         # "pub_" means public, these values are exposed to the users through events
@@ -287,8 +315,9 @@ class VADStream(agents.vad.VADStream):
         speech_threshold_duration = 0.0
         silence_threshold_duration = 0.0
 
-        input_frames: list[rtc.AudioFrame] = []
-        inference_frames: list[rtc.AudioFrame] = []
+        # samples waiting for inference, at the input and at the model sample rate
+        input_samples = _SampleBuffer(window_size * MAX_BATCH_WINDOWS)
+        inference_samples = _SampleBuffer(window_size * MAX_BATCH_WINDOWS)
         resampler: rtc.AudioResampler | None = None
 
         # used to avoid drift when the sample_rate ratio is not an integer
@@ -296,239 +325,253 @@ class VADStream(agents.vad.VADStream):
 
         extra_inference_time = 0.0
 
-        async for input_frame in self._input_ch:
-            if not isinstance(input_frame, rtc.AudioFrame):
-                continue  # ignore flush sentinel for now
+        def _reset_write_cursor() -> None:
+            nonlocal speech_buffer_index
+            assert self._speech_buffer is not None
 
-            if not self._input_sample_rate:
-                self._input_sample_rate = input_frame.sample_rate
+            if speech_buffer_index <= self._prefix_padding_samples:
+                return
 
-                # alloc the buffers now that we know the input sample rate
-                self._prefix_padding_samples = int(
-                    self._opts.prefix_padding_duration * self._input_sample_rate
-                )
+            padding_data = self._speech_buffer[
+                speech_buffer_index - self._prefix_padding_samples : speech_buffer_index
+            ]
 
-                self._speech_buffer = np.empty(
-                    int(self._opts.max_buffered_speech * self._input_sample_rate)
-                    + self._prefix_padding_samples,
-                    dtype=np.int16,
-                )
+            self._speech_buffer_max_reached = False
+            self._speech_buffer[: self._prefix_padding_samples] = padding_data
+            speech_buffer_index = self._prefix_padding_samples
+
+        def _copy_speech_buffer() -> rtc.AudioFrame:
+            # copy the data from speech_buffer
+            assert self._speech_buffer is not None
+            speech_data = self._speech_buffer[:speech_buffer_index].tobytes()
+
+            return rtc.AudioFrame(
+                sample_rate=self._input_sample_rate,
+                num_channels=1,
+                samples_per_channel=speech_buffer_index,
+                data=speech_data,
+            )
 
-                if self._input_sample_rate != self._opts.sample_rate:
-                    # resampling needed: the input sample rate isn't the same as the model's
-                    # sample rate used for inference
-                    resampler = rtc.AudioResampler(
-                        input_rate=self._input_sample_rate,
-                        output_rate=self._opts.sample_rate,
-                        quality=rtc.AudioResamplerQuality.QUICK,  # VAD doesn't need high quality
+        async for input_frame in self._input_ch:
+            # when the inference falls behind, the queued frames are processed together
+            input_frames = [input_frame]
+            while not self._input_ch.empty():
+                input_frames.append(self._input_ch.recv_nowait())
+
+            for input_frame in input_frames:
+                if not isinstance(input_frame, rtc.AudioFrame):
+                    continue  # ignore flush sentinel for now
+
+                if not self._input_sample_rate:
+                    self._input_sample_rate = input_frame.sample_rate
+
+                    # alloc the buffers now that we know the input sample rate
+                    self._prefix_padding_samples = int(
+                        self._opts.prefix_padding_duration * self._input_sample_rate
                     )
 
-            elif self._input_sample_rate != input_frame.sample_rate:
-                logger.error("a frame with another sample rate was already pushed")
-                continue
+                    self._speech_buffer = np.empty(
+                        int(self._opts.max_buffered_speech * self._input_sample_rate)
+                        + self._prefix_padding_samples,
+                        dtype=np.int16,
+                    )
 
-            assert self._speech_buffer is not None
+                    if self._input_sample_rate != self._opts.sample_rate:
+                        # resampling needed: the input sample rate isn't the same as the model's
+                        # sample rate used for inference
+                        resampler = rtc.AudioResampler(
+                            input_rate=self._input_sample_rate,
+                            output_rate=self._opts.sample_rate,
+                            quality=rtc.AudioResamplerQuality.QUICK,  # VAD doesn't need high quality
+                        )
 
-            input_frames.append(input_frame)
-            if resampler is not None:
-                # the resampler may have a bit of latency, but it is OK to ignore since it should be
-                # negligible
-                inference_frames.extend(resampler.push(input_frame))
-            else:
-                inference_frames.append(input_frame)
+                elif self._input_sample_rate != input_frame.sample_rate:
+                    logger.error("a frame with another sample rate was already pushed")
+                    continue
 
-            while True:
-                start_time = time.perf_counter()
+                input_samples.push(np.frombuffer(input_frame.data, dtype=np.int16))
+                if resampler is not None:
+                    # the resampler may have a bit of latency, but it is OK to ignore since it
+                    # should be negligible
+                    for resampled_frame in resampler.push(input_frame):
+                        inference_samples.push(np.frombuffer(resampled_frame.data, dtype=np.int16))
+                else:
+                    inference_samples.push(np.frombuffer(input_frame.data, dtype=np.int16))
 
-                available_inference_samples = sum(
-                    [frame.samples_per_channel for frame in inference_frames]
-                )
-                if available_inference_samples < self._model.window_size_samples:
-                    break  # not enough samples to run inference
+            while len(inference_samples) >= window_size:
+                assert self._speech_buffer is not None
 
-                input_frame = utils.combine_frames(input_frames)
-                inference_frame = utils.combine_frames(inference_frames)
+                start_time = time.perf_counter()
 
-                # convert data to f32
+                # run the pending windows (up to MAX_BATCH_WINDOWS) in a single inference call
+                batch_size = min(len(inference_samples) // window_size, MAX_BATCH_WINDOWS)
+                inference_data = inference_samples.peek(batch_size * window_size)
                 np.divide(
-                    inference_frame.data[: self._model.window_size_samples],
+                    inference_data.reshape(batch_size, window_size),
                     np.iinfo(np.int16).max,
-                    out=inference_f32_data,
+                    out=inference_f32_data[:batch_size],
                     dtype=np.float32,
                 )
+                inference_samples.consume(batch_size * window_size)
 
-                # run the inference
-                p = await self._loop.run_in_executor(None, self._model, inference_f32_data)
-                p = self._exp_filter.apply(exp=1.0, sample=p)
-
-                window_duration = self._model.window_size_samples / self._opts.sample_rate
-
-                pub_current_sample += self._model.window_size_samples
-                pub_timestamp += window_duration
+                probs = await self._infer(inference_f32_data[:batch_size])
 
-                resampling_ratio = self._input_sample_rate / self._model.sample_rate
-                to_copy = (
-                    self._model.window_size_samples * resampling_ratio + input_copy_remaining_fract
-                )
-                to_copy_int = int(to_copy)
-                input_copy_remaining_fract = to_copy - to_copy_int
-
-                # copy the inference window to the speech buffer
-                available_space = len(self._speech_buffer) - speech_buffer_index
-                to_copy_buffer = min(to_copy_int, available_space)
-                if to_copy_buffer > 0:
-                    self._speech_buffer[
-                        speech_buffer_index : speech_buffer_index + to_copy_buffer
-                    ] = input_frame.data[:to_copy_buffer]
-                    speech_buffer_index += to_copy_buffer
-                elif not self._speech_buffer_max_reached:
-                    # reached self._opts.max_buffered_speech (padding is included)
-                    self._speech_buffer_max_reached = True
-                    logger.warning(
-                        "max_buffered_speech reached, ignoring further data for the current speech input"  # noqa: E501
-                    )
-
-                inference_duration = time.perf_counter() - start_time
+                batch_duration = time.perf_counter() - start_time
+                inference_duration = batch_duration / batch_size
                 extra_inference_time = max(
                     0.0,
-                    extra_inference_time + inference_duration - window_duration,
+                    extra_inference_time + batch_duration - batch_size * window_duration,
                 )
-                if inference_duration > SLOW_INFERENCE_THRESHOLD:
+                if batch_duration > SLOW_INFERENCE_THRESHOLD:
                     logger.warning(
                         "inference is slower than realtime",
                         extra={"delay": extra_inference_time},
                     )
 
-                def _reset_write_cursor() -> None:
-                    nonlocal speech_buffer_index
-                    assert self._speech_buffer is not None
-
-                    if speech_buffer_index <= self._prefix_padding_samples:
-                        return
-
-                    padding_data = self._speech_buffer[
-                        speech_buffer_index - self._prefix_padding_samples : speech_buffer_index
-                    ]
-
-                    self._speech_buffer_max_reached = False
-                    self._speech_buffer[: self._prefix_padding_samples] = padding_data
-                    speech_buffer_index = self._prefix_padding_samples
-
-                def _copy_speech_buffer() -> rtc.AudioFrame:
-                    # copy the data from speech_buffer
-                    assert self._speech_buffer is not None
-                    speech_data = self._speech_buffer[:speech_buffer_index].tobytes()  # noqa: B023
+                for i, p in enumerate(probs):
+                    p = self._exp_filter.apply(exp=1.0, sample=p)
+
+                    pub_current_sample += window_size
+                    pub_timestamp += window_duration
+
+                    resampling_ratio = self._input_sample_rate / self._model.sample_rate
+                    to_copy = window_size * resampling_ratio + input_copy_remaining_fract
+                    to_copy_int = int(to_copy)
+                    input_copy_remaining_fract = to_copy - to_copy_int
+
+                    input_window = input_samples.peek(to_copy_int)
+
+                    # copy the inference window to the speech buffer
+                    available_space = len(self._speech_buffer) - speech_buffer_index
+                    to_copy_buffer = min(len(input_window), available_space)
+                    if to_copy_buffer > 0:
+                        self._speech_buffer[
+                            speech_buffer_index : speech_buffer_index + to_copy_buffer
+                        ] = input_window[:to_copy_buffer]
+                        speech_buffer_index += to_copy_buffer
+                    elif not self._speech_buffer_max_reached:
+                        # reached self._opts.max_buffered_speech (padding is included)
+                        self._speech_buffer_max_reached = True
+                        logger.warning(
+                            "max_buffered_speech reached, ignoring further data for the current speech input"  # noqa: E501
+                        )
 
-                    return rtc.AudioFrame(
-                        sample_rate=self._input_sample_rate,
-                        num_channels=1,
-                        samples_per_channel=speech_buffer_index,  # noqa: B023
-                        data=speech_data,
+                    if pub_speaking:
+                        pub_speech_duration += window_duration
+                    else:
+                        pub_silence_duration += window_duration
+
+                    backlog_samples = len(inference_samples) + (batch_size - i - 1) * window_size
+                    self._event_ch.send_nowait(
+                        agents.vad.VADEvent(
+                            type=agents.vad.VADEventType.INFERENCE_DONE,
+                            samples_index=pub_current_sample,
+                            timestamp=pub_timestamp,
+                            silence_duration=pub_silence_duration,
+                            speech_duration=pub_speech_duration,
+                            probability=p,
+                            inference_duration=inference_duration,
+                            frames=[
+                                rtc.AudioFrame(
+                                    data=input_window.tobytes(),
+                                    sample_rate=self._input_sample_rate,
+                                    num_channels=1,
+                                    samples_per_channel=len(input_window),
+                                )
+                            ],
+                            speaking=pub_speaking,
+                            raw_accumulated_silence=silence_threshold_duration,
+                            raw_accumulated_speech=speech_threshold_duration,
+                            backlog_duration=backlog_samples / self._opts.sample_rate,
+                        )
                     )
+                    input_samples.consume(len(input_window))
+
+                    if p >= self._opts.activation_threshold:
+                        speech_threshold_duration += window_duration
+                        silence_threshold_duration = 0.0
+
+                        if not pub_speaking:
+                            if speech_threshold_duration >= self._opts.min_speech_duration:
+                                pub_speaking = True
+                                pub_silence_duration = 0.0
+                                pub_speech_duration = speech_threshold_duration
+
+                                self._event_ch.send_nowait(
+                                    agents.vad.VADEvent(
+                                        type=agents.vad.VADEventType.START_OF_SPEECH,
+                                        samples_index=pub_current_sample,
+                                        timestamp=pub_timestamp,
+                                        silence_duration=pub_silence_duration,
+                                        speech_duration=pub_speech_duration,
+                                        frames=[_copy_speech_buffer()],
+                                        speaking=True,
+                                    )
+                                )
 
-                if pub_speaking:
-                    pub_speech_duration += window_duration
-                else:
-                    pub_silence_duration += window_duration
-
-                self._event_ch.send_nowait(
-                    agents.vad.VADEvent(
-                        type=agents.vad.VADEventType.INFERENCE_DONE,
-                        samples_index=pub_current_sample,
-                        timestamp=pub_timestamp,
-                        silence_duration=pub_silence_duration,
-                        speech_duration=pub_speech_duration,
-                        probability=p,
-                        inference_duration=inference_duration,
-                        frames=[
-                            rtc.AudioFrame(
-                                data=input_frame.data[:to_copy_int].tobytes(),
-                                sample_rate=self._input_sample_rate,
-                                num_channels=1,
-                                samples_per_channel=to_copy_int,
-                            )
-                        ],
-                        speaking=pub_speaking,
-                        raw_accumulated_silence=silence_threshold_duration,
-                        raw_accumulated_speech=speech_threshold_duration,
-                    )
-                )
+                    else:
+                        silence_threshold_duration += window_duration
+                        speech_threshold_duration = 0.0
 
-                if p >= self._opts.activation_threshold:
-                    speech_threshold_duration += window_duration
-                    silence_threshold_duration = 0.0
+                        if not pub_speaking:
+                            _reset_write_cursor()
 
-                    if not pub_speaking:
-                        if speech_threshold_duration >= self._opts.min_speech_duration:
-                            pub_speaking = True
-                            pub_silence_duration = 0.0
-                            pub_speech_duration = speech_threshold_duration
+                        if (
+                            pub_speaking
+                            and silence_threshold_duration >= self._opts.min_silence_duration
+                        ):
+                            pub_speaking = False
+                            pub_silence_duration = silence_threshold_duration
 
                             self._event_ch.send_nowait(
                                 agents.vad.VADEvent(
-                                    type=agents.vad.VADEventType.START_OF_SPEECH,
+                                    type=agents.vad.VADEventType.END_OF_SPEECH,
                                     samples_index=pub_current_sample,
                                     timestamp=pub_timestamp,
                                     silence_duration=pub_silence_duration,
                                     speech_duration=pub_speech_duration,
                                     frames=[_copy_speech_buffer()],
-                                    speaking=True,
+                                    speaking=False,
                                 )
                             )
 
-                else:
-                    silence_threshold_duration += window_duration
-                    speech_threshold_duration = 0.0
-
-                    if not pub_speaking:
-                        _reset_write_cursor()
-
-                    if (
-                        pub_speaking
-                        and silence_threshold_duration >= self._opts.min_silence_duration
-                    ):
-                        pub_speaking = False
-                        pub_silence_duration = silence_threshold_duration
-
-                        self._event_ch.send_nowait(
-                            agents.vad.VADEvent(
-                                type=agents.vad.VADEventType.END_OF_SPEECH,
-                                samples_index=pub_current_sample,
-                                timestamp=pub_timestamp,
-                                silence_duration=pub_silence_duration,
-                                speech_duration=pub_speech_duration,
-                                frames=[_copy_speech_buffer()],
-                                speaking=False,
-                            )
-                        )
+                            pub_speech_duration = 0.0
 
-                        pub_speech_duration = 0.0
+                            _reset_write_cursor()
 
-                        _reset_write_cursor()
 
-                # remove the frames that were used for inference from the input and inference frames
-                input_frames = []
-                inference_frames = []
+class _SampleBuffer:
+    """int16 samples read at an offset, the unread samples are moved back to the start of the
+    array when there is no room left at the end. Reads return views, nothing is allocated once
+    the buffer reached its working size."""
 
-                # add the remaining data
-                if len(input_frame.data) - to_copy_int > 0:
-                    data = input_frame.data[to_copy_int:].tobytes()
-                    input_frames.append(
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._input_sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    )
+    def __init__(self, capacity: int) -> None:
+        self._buf = np.empty(capacity, dtype=np.int16)
+        self._start = 0
+        self._end = 0
 
-                if len(inference_frame.data) - self._model.window_size_samples > 0:
-                    data = inference_frame.data[self._model.window_size_samples :].tobytes()
-                    inference_frames.append(
-                        rtc.AudioFrame(
-                            data=data,
-                            sample_rate=self._opts.sample_rate,
-                            num_channels=1,
-                            samples_per_channel=len(data) // 2,
-                        )
-                    )
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    def push(self, data: np.ndarray) -> None:
+        size = len(data)
+        if self._end + size > len(self._buf):
+            pending = len(self)
+            if pending + size > len(self._buf):
+                buf = np.empty(max(2 * len(self._buf), pending + size), dtype=np.int16)
+                buf[:pending] = self._buf[self._start : self._end]
+                self._buf = buf
+            else:
+                self._buf[:pending] = self._buf[self._start : self._end]
+            self._start, self._end = 0, pending
+
+        self._buf[self._end : self._end + size] = data
+        self._end += size
+
+    def peek(self, size: int) -> np.ndarray:
+        return self._buf[self._start : self._start + size]
+
+    def consume(self, size: int) -> None:
+        self._start = min(self._start + size, self._end)
+        if self._start == self._end:
+            self._start = self._end = 0
@@ -8,14 +8,16 @@ import re
 import time
 import unicodedata
 from abc import ABC, abstractmethod
-from typing import Any
+from typing import Any, Callable
 
+import numpy as np
 from huggingface_hub import errors
 
-from livekit.agents import Plugin, llm
+from livekit.agents import Plugin, llm, utils
 from livekit.agents.inference_runner import _InferenceRunner
 from livekit.agents.ipc.inference_executor import InferenceExecutor
 from livekit.agents.job import get_job_context
+from livekit.agents.telemetry import metrics
 from livekit.agents.utils import hw
 
 from .log import logger
@@ -24,6 +26,12 @@ from .version import __version__
 
 MAX_HISTORY_TOKENS = 128
 MAX_HISTORY_TURNS = 6
+EOU_CACHE_SIZE = 32
+# the inference runner is shared by all the jobs, keep the prefixes of many conversations
+PREFIX_CACHE_SIZE = 512
+TURN_START_TOKEN = "<|im_start|>"
+
+_CacheKey = tuple[tuple[str, str], ...]
 
 
 def _download_from_hf_hub(repo_id: str, filename: str, **kwargs: Any) -> str:
@@ -44,7 +52,45 @@ def _download_from_hf_hub(repo_id: str, filename: str, **kwargs: Any) -> str:
     return local_path
 
 
+def _normalize_text(text: str) -> str:
+    if not text:
+        return ""
+
+    text = unicodedata.normalize("NFKC", text.lower())
+    text = "".join(
+        ch for ch in text if not (unicodedata.category(ch).startswith("P") and ch not in ["'", "-"])
+    )
+    text = re.sub(r"\s+", " ", text).strip()
+    return text
+
+
+def _combine_turns(
+    chat_ctx: list[dict[str, Any]], normalize: Callable[[str], str]
+) -> list[dict[str, Any]]:
+    new_chat_ctx: list[dict[str, Any]] = []
+    last_msg: dict[str, Any] | None = None
+    for msg in chat_ctx:
+        if not msg["content"]:
+            continue
+
+        content = normalize(msg["content"])
+
+        # need to combine adjacent turns together to match training data
+        if last_msg and last_msg["role"] == msg["role"]:
+            last_msg["content"] += f" {content}"
+        else:
+            msg["content"] = content
+            new_chat_ctx.append(msg)
+            last_msg = msg
+
+    return new_chat_ctx
+
+
 class _EUORunnerBase(_InferenceRunner):
+    # EOU predictions from concurrent jobs are padded into a single session.run
+    MAX_BATCH_SIZE = 16
+    BATCH_WINDOW = 0.003
+
     @classmethod
     @abstractmethod
     def model_type(cls) -> EOUModelType: ...
@@ -54,35 +100,10 @@ class _EUORunnerBase(_InferenceRunner):
         return MODEL_REVISIONS[cls.model_type()]
 
     def _normalize_text(self, text: str) -> str:
-        if not text:
-            return ""
-
-        text = unicodedata.normalize("NFKC", text.lower())
-        text = "".join(
-            ch
-            for ch in text
-            if not (unicodedata.category(ch).startswith("P") and ch not in ["'", "-"])
-        )
-        text = re.sub(r"\s+", " ", text).strip()
-        return text
+        return _normalize_text(text)
 
     def _format_chat_ctx(self, chat_ctx: list[dict[str, Any]]) -> str:
-        new_chat_ctx = []
-        last_msg: dict[str, Any] | None = None
-        for msg in chat_ctx:
-            if not msg["content"]:
-                continue
-
-            content = self._normalize_text(msg["content"])
-
-            # need to combine adjacent turns together to match training data
-            if last_msg and last_msg["role"] == msg["role"]:
-                last_msg["content"] += f" {content}"
-            else:
-                msg["content"] = content
-                new_chat_ctx.append(msg)
-                last_msg = msg
-
+        new_chat_ctx = _combine_turns(chat_ctx, self._normalize_text)
         convo_text = self._tokenizer.apply_chat_template(
             new_chat_ctx, add_generation_prompt=False, add_special_tokens=False, tokenize=False
         )
@@ -136,6 +157,9 @@ class _EUORunnerBase(_InferenceRunner):
                 local_files_only=True,
                 truncation_side="left",
             )
+            self._prefix_cache = utils.BoundedDict[str, list[int]](maxsize=PREFIX_CACHE_SIZE)
+            self._incremental_tokenization = self._check_incremental_tokenization()
+            self._batching_supported = self._check_batching()
 
         except (errors.LocalEntryNotFoundError, OSError):
             logger.error(
@@ -149,32 +173,102 @@ class _EUORunnerBase(_InferenceRunner):
             ) from None
 
     def run(self, data: bytes) -> bytes | None:
-        data_json = json.loads(data)
-        chat_ctx = data_json.get("chat_ctx", None)
-
-        if not chat_ctx:
-            raise ValueError("chat_ctx is required on the inference input data")
+        return self.run_batch([data])[0]
 
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
         start_time = time.perf_counter()
-        text = self._format_chat_ctx(chat_ctx)
-        inputs = self._tokenizer(
-            text,
-            add_special_tokens=False,
-            return_tensors="np",
-            max_length=MAX_HISTORY_TOKENS,
-            truncation=True,
-        )
+        texts: list[str] = []
+        for d in data:
+            chat_ctx = json.loads(d).get("chat_ctx", None)
+            if not chat_ctx:
+                raise ValueError("chat_ctx is required on the inference input data")
+
+            texts.append(self._format_chat_ctx(chat_ctx))
+
+        input_ids = [self._tokenize(text) for text in texts]
+
         # run inference
-        outputs = self._session.run(None, {"input_ids": inputs["input_ids"].astype("int64")})
-        eou_probability = outputs[0].flatten()[-1]
+        probabilities = self._predict_eou(input_ids)
         end_time = time.perf_counter()
 
-        result: dict[str, Any] = {
-            "eou_probability": float(eou_probability),
-            "duration": round(end_time - start_time, 3),
-            "input": text,
-        }
-        return json.dumps(result).encode()
+        results: list[bytes | None] = []
+        for text, eou_probability in zip(texts, probabilities):
+            result: dict[str, Any] = {
+                "eou_probability": eou_probability,
+                "duration": round(end_time - start_time, 3),
+                "input": text,
+            }
+            results.append(json.dumps(result).encode())
+
+        return results
+
+    def _encode(self, text: str) -> list[int]:
+        return self._tokenizer(text, add_special_tokens=False)["input_ids"]  # type: ignore
+
+    def _tokenize(self, text: str) -> list[int]:
+        """Tokenize the formatted chat context, keeping the last MAX_HISTORY_TOKENS tokens.
+
+        During a turn only the last user message changes, so the history before it is
+        tokenized once and cached. Special tokens are matched before the BPE model runs, so
+        splitting right before the last turn start token yields the same ids as tokenizing
+        the whole text.
+        """
+        ix = text.rfind(TURN_START_TOKEN)
+        if not self._incremental_tokenization or ix <= 0:
+            return self._encode(text)[-MAX_HISTORY_TOKENS:]
+
+        prefix, tail = text[:ix], text[ix:]
+        prefix_ids = self._prefix_cache.get(prefix)
+        if prefix_ids is None:
+            prefix_ids = self._encode(prefix)[-MAX_HISTORY_TOKENS:]
+            self._prefix_cache[prefix] = prefix_ids
+        else:
+            self._prefix_cache.move_to_end(prefix)
+
+        return (prefix_ids + self._encode(tail))[-MAX_HISTORY_TOKENS:]
+
+    def _check_incremental_tokenization(self) -> bool:
+        text = self._format_chat_ctx(
+            [
+                {"role": "assistant", "content": "Hi there, how can I help you today?"},
+                {"role": "user", "content": "I'd like to book a flight,"},
+                {"role": "assistant", "content": "Sure! Where to?"},
+                {"role": "user", "content": "to paris tomorrow"},
+            ]
+        )
+        ix = text.rfind(TURN_START_TOKEN)
+        if ix <= 0 or self._encode(text[:ix]) + self._encode(text[ix:]) != self._encode(text):
+            logger.warning("tokenizer doesn't support incremental tokenization, disabling it")
+            return False
+
+        return True
+
+    def _check_batching(self) -> bool:
+        # older model exports may not support a dynamic batch dimension
+        ids = self._encode(self._format_chat_ctx([{"role": "user", "content": "hello"}]))
+        try:
+            self._session.run(None, {"input_ids": np.array([ids, ids], dtype=np.int64)})
+        except Exception:
+            logger.warning("EOU model doesn't support batched inference, disabling it")
+            return False
+
+        return True
+
+    def _predict_eou(self, input_ids: list[list[int]]) -> list[float]:
+        if len(input_ids) > 1 and not self._batching_supported:
+            return [p for ids in input_ids for p in self._predict_eou([ids])]
+
+        # the model is causal, so right padding doesn't change the output of the real tokens.
+        # the EOU probability is read at the last real token of each row
+        seq_len = max(len(ids) for ids in input_ids)
+        pad_id = self._tokenizer.pad_token_id or 0
+        batch = np.full((len(input_ids), seq_len), pad_id, dtype=np.int64)
+        for i, ids in enumerate(input_ids):
+            batch[i, : len(ids)] = ids
+
+        outputs = self._session.run(None, {"input_ids": batch})
+        probs = outputs[0].reshape(len(input_ids), seq_len, -1)
+        return [float(probs[i, len(ids) - 1, -1]) for i, ids in enumerate(input_ids)]
 
     @classmethod
     def _download_files(cls) -> None:
@@ -212,6 +306,11 @@ class EOUModelBase(ABC):
         self._unlikely_threshold = unlikely_threshold
         self._languages: dict[str, Any] = {}
 
+        # the same transcript is often evaluated several times per turn
+        self._eou_cache = utils.BoundedDict[_CacheKey, float](maxsize=EOU_CACHE_SIZE)
+        self._eou_cache_hits = 0
+        self._eou_cache_misses = 0
+
         if load_languages:
             config_fname = _download_from_hf_hub(
                 HG_MODEL,
@@ -258,6 +357,19 @@ class EOUModelBase(ABC):
     async def supports_language(self, language: str | None) -> bool:
         return await self.unlikely_threshold(language) is not None
 
+    @property
+    def cache_info(self) -> dict[str, int]:
+        """hit/miss counters of the end of turn prediction cache"""
+        return {
+            "hits": self._eou_cache_hits,
+            "misses": self._eou_cache_misses,
+            "size": len(self._eou_cache),
+        }
+
+    def _normalize_text(self, text: str) -> str:
+        """must match the normalization done by the inference runner"""
+        return _normalize_text(text)
+
     # our EOU model inference should be fast, 3 seconds is more than enough
     async def predict_end_of_turn(
         self,
@@ -283,6 +395,31 @@ class EOUModelBase(ABC):
                 )
 
         messages = messages[-MAX_HISTORY_TURNS:]
+
+        # key on the history as seen by the model, so transcripts only differing by
+        # whitespace or punctuation reuse the previous prediction
+        turns = _combine_turns([dict(msg) for msg in messages], self._normalize_text)
+        cache_key = tuple((turn["role"], turn["content"]) for turn in turns)
+        if (probability := self._eou_cache.get(cache_key)) is not None:
+            self._eou_cache.move_to_end(cache_key)
+            self._eou_cache_hits += 1
+            metrics.eou_cache_lookup(hit=True)
+            return probability
+
+        self._eou_cache_misses += 1
+        metrics.eou_cache_lookup(hit=False)
+
+        probability = await self._predict_end_of_turn(chat_ctx, messages, timeout=timeout)
+        self._eou_cache[cache_key] = probability
+        return probability
+
+    async def _predict_end_of_turn(
+        self,
+        chat_ctx: llm.ChatContext,
+        messages: list[dict[str, Any]],
+        *,
+        timeout: float | None,
+    ) -> float:
         json_data = json.dumps({"chat_ctx": messages}).encode()
 
         result = await asyncio.wait_for(
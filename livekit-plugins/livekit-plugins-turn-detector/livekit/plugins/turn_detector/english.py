@@ -31,6 +31,9 @@ class EnglishModel(EOUModelBase):
     def _inference_method(self) -> str:
         return _EUORunnerEn.INFERENCE_METHOD
 
+    def _normalize_text(self, text: str) -> str:
+        return text
+
 
 _InferenceRunner.register_runner(_EUORunnerEn)
 Plugin.register_plugin(EOUPlugin(_EUORunnerEn))
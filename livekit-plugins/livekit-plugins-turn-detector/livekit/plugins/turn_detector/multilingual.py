@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import os
 from time import perf_counter
+from typing import Any
 
 import aiohttp
 
@@ -59,22 +60,23 @@ class MultilingualModel(EOUModelBase):
 
         return threshold
 
-    async def predict_end_of_turn(
+    async def _predict_end_of_turn(
         self,
         chat_ctx: llm.ChatContext,
+        messages: list[dict[str, Any]],
         *,
-        timeout: float | None = 3,
+        timeout: float | None,
     ) -> float:
         url = _remote_inference_url()
         if not url:
-            return await super().predict_end_of_turn(chat_ctx, timeout=timeout)
+            return await super()._predict_end_of_turn(chat_ctx, messages, timeout=timeout)
 
-        messages = chat_ctx.copy(
+        remote_ctx = chat_ctx.copy(
             exclude_function_call=True, exclude_instructions=True, exclude_empty_message=True
         ).truncate(max_items=MAX_HISTORY_TURNS)
 
         ctx = get_job_context()
-        request = messages.to_dict(exclude_image=True, exclude_audio=True, exclude_timestamp=True)
+        request = remote_ctx.to_dict(exclude_image=True, exclude_audio=True, exclude_timestamp=True)
         request["jobId"] = ctx.job.id
         request["workerId"] = ctx.worker_id
         agent_id = os.getenv("LIVEKIT_AGENT_ID")
@@ -9,7 +9,6 @@ from livekit.agents.llm.tool_context import (
     is_function_tool,
     is_raw_function_tool,
 )
-from livekit.agents.llm.utils import function_arguments_to_pydantic_model
 
 
 def parse_tools(tools: list[llm.FunctionTool | llm.RawFunctionTool]) -> list[dict[str, Any]]:
@@ -24,10 +23,11 @@ def parse_tools(tools: list[llm.FunctionTool | llm.RawFunctionTool]) -> list[dic
             parameters = raw_fnc_info.raw_schema.get("parameters", {})
         elif is_function_tool(tool):
             fnc_info = get_function_info(tool)
-            model = function_arguments_to_pydantic_model(tool)
             name = fnc_info.name
             description = fnc_info.description
-            parameters = model.model_json_schema()
+            parameters = llm.utils.build_legacy_openai_schema(tool, internally_tagged=True)[
+                "parameters"
+            ]
 
         def _extract_type(prop: dict[str, Any]) -> str:
             """Best-effort guess of a parameter's primitive type."""
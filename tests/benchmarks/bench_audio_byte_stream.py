@@ -0,0 +1,64 @@
+"""Push large TTS-like chunks through AudioByteStream.
+
+"legacy" re-slices the remaining buffer for every frame, like AudioByteStream did before
+frames were read at an offset.
+
+Usage: python tests/benchmarks/bench_audio_byte_stream.py
+"""
+
+from __future__ import annotations
+
+import os
+import time
+
+from livekit import rtc
+from livekit.agents.utils.audio import AudioByteStream
+
+SAMPLE_RATE = 24000
+CHUNK_SECONDS = [1, 10, 60]
+FRAME_SIZES_MS = [10, 100]
+
+
+class _LegacyAudioByteStream(AudioByteStream):
+    def push(self, data: bytes | memoryview) -> list[rtc.AudioFrame]:
+        self._buf.extend(data)
+
+        frames = []
+        while len(self._buf) >= self._bytes_per_frame:
+            frame_data = self._buf[: self._bytes_per_frame]
+            self._buf = self._buf[self._bytes_per_frame :]
+            frames.append(
+                rtc.AudioFrame(
+                    data=frame_data,
+                    sample_rate=self._sample_rate,
+                    num_channels=self._num_channels,
+                    samples_per_channel=len(frame_data) // self._bytes_per_sample,
+                )
+            )
+
+        return frames
+
+
+def _bench(cls: type[AudioByteStream], chunk: bytes, frame_ms: int) -> float:
+    bstream = cls(SAMPLE_RATE, 1, samples_per_channel=SAMPLE_RATE * frame_ms // 1000)
+    start = time.perf_counter()
+    bstream.push(chunk)
+    bstream.flush()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'chunk':>6} {'frame':>6} {'legacy (ms)':>12} {'offset (ms)':>12} {'speedup':>8}")
+    for seconds in CHUNK_SECONDS:
+        chunk = os.urandom(SAMPLE_RATE * 2 * seconds)
+        for frame_ms in FRAME_SIZES_MS:
+            legacy = _bench(_LegacyAudioByteStream, chunk, frame_ms)
+            current = _bench(AudioByteStream, chunk, frame_ms)
+            print(
+                f"{seconds:>5}s {frame_ms:>4}ms {legacy * 1e3:>12.2f} {current * 1e3:>12.2f} "
+                f"{legacy / current:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
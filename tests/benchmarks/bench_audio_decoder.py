@@ -0,0 +1,112 @@
+"""Measure the AudioStreamDecoder throughput on a multi-minute compressed stream.
+
+The stream is pushed in small chunks as fast as possible, like a TTS provider streaming
+faster than realtime. "legacy" is the StreamBuffer that copied the remaining bytes into a new
+BytesIO on every read.
+
+Usage: python tests/benchmarks/bench_audio_decoder.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import time
+
+import av
+import numpy as np
+
+from livekit.agents.utils.codecs import AudioStreamDecoder, StreamBuffer
+
+DURATION = 180.0  # seconds of audio
+CHUNK_SIZE = 4096
+FORMATS = [("mp3", "libmp3lame", "audio/mpeg"), ("ogg", "libopus", "audio/opus")]
+
+
+class _LegacyStreamBuffer(StreamBuffer):
+    def __init__(self) -> None:
+        super().__init__()
+        self._buffer = io.BytesIO()
+
+    def write(self, data: bytes, *, block: bool = True) -> None:
+        with self._data_available:
+            self._buffer.seek(0, io.SEEK_END)
+            self._buffer.write(data)
+            self._data_available.notify_all()
+
+    def read(self, size: int = -1) -> bytes:
+        with self._data_available:
+            while True:
+                if self._buffer.closed:
+                    return b""
+                self._buffer.seek(0)
+                data = self._buffer.read(size)
+                if data:
+                    remaining = self._buffer.read()
+                    self._buffer = io.BytesIO(remaining)
+                    return data
+                if self._eof:
+                    return b""
+                self._data_available.wait()
+
+    def close(self) -> None:
+        self._buffer.close()
+
+
+def _encode(format: str, codec: str) -> bytes:
+    sample_rate = 48000
+    frame_size = 960
+    t = np.arange(frame_size) / sample_rate
+
+    buf = io.BytesIO()
+    with av.open(buf, "w", format=format) as container:
+        stream = container.add_stream(codec, rate=sample_rate)
+        stream.layout = "mono"
+        for i in range(int(DURATION * sample_rate / frame_size)):
+            freq = 220 + (i % 50) * 10
+            pcm = (np.sin(2 * np.pi * freq * (t + i * frame_size / sample_rate)) * 8000).astype(
+                np.int16
+            )
+            frame = av.AudioFrame.from_ndarray(pcm[None, :], format="s16", layout="mono")
+            frame.sample_rate = sample_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    return buf.getvalue()
+
+
+async def _decode(data: bytes, mime: str, legacy: bool) -> tuple[float, float]:
+    """returns the decoding time and the audio duration decoded"""
+    decoder = AudioStreamDecoder(sample_rate=24000, num_channels=1, format=mime)
+    if legacy:
+        decoder._input_buf = _LegacyStreamBuffer()
+
+    start = time.perf_counter()
+    for i in range(0, len(data), CHUNK_SIZE):
+        decoder.push(data[i : i + CHUNK_SIZE])
+    decoder.end_input()
+
+    duration = 0.0
+    async for frame in decoder:
+        duration += frame.duration
+    elapsed = time.perf_counter() - start
+    await decoder.aclose()
+    return elapsed, duration
+
+
+async def main() -> None:
+    print(f"{'format':>7} {'size (KB)':>10} {'buffer':>8} {'time (s)':>9} {'x realtime':>11}")
+    for format, codec, mime in FORMATS:
+        data = _encode(format, codec)
+        for legacy in (True, False):
+            elapsed, duration = await _decode(data, mime, legacy)
+            print(
+                f"{format:>7} {len(data) / 1024:>10.0f} {'legacy' if legacy else 'chunks':>8} "
+                f"{elapsed:>9.2f} {duration / elapsed:>11.0f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
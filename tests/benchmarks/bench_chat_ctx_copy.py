@@ -0,0 +1,100 @@
+"""Measure the allocations of the chat context snapshots taken on every turn.
+
+A turn takes a read-only view of the agent's chat context (Agent.chat_ctx), copies it, and
+makes a filtered copy without the instructions. "eager" copies the items like ChatContext
+did before the items were shared between copies, "cow+read" also reads the items of both
+copies.
+
+Usage: python tests/benchmarks/bench_chat_ctx_copy.py
+"""
+
+from __future__ import annotations
+
+import time
+import tracemalloc
+from typing import Callable
+
+from livekit.agents.llm import ChatContext, ChatItem
+from livekit.agents.llm.chat_context import _ReadOnlyChatContext
+
+HISTORY_SIZES = [10, 100, 1000, 5000]
+ITERATIONS = 200
+
+
+def _make_ctx(size: int) -> ChatContext:
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="system", content="You are a helpful assistant.")
+    for i in range(size - 1):
+        chat_ctx.add_message(role="user" if i % 2 else "assistant", content=f"message {i}")
+    return chat_ctx
+
+
+def _eager_copy(
+    items: list[ChatItem],
+    *,
+    exclude_function_call: bool = False,
+    exclude_instructions: bool = False,
+    exclude_empty_message: bool = False,
+) -> list[ChatItem]:
+    # ChatContext.copy before the items were shared
+    copied = []
+    for item in items:
+        if exclude_function_call and item.type in ["function_call", "function_call_output"]:
+            continue
+        if exclude_instructions and item.type == "message" and item.role in ["system", "developer"]:
+            continue
+        if exclude_empty_message and item.type == "message" and not item.content:
+            continue
+        copied.append(item)
+    return copied
+
+
+def _eager_turn(chat_ctx: ChatContext) -> list[list[ChatItem]]:
+    readonly = list(chat_ctx.items)
+    copy = _eager_copy(readonly)
+    filtered = _eager_copy(copy, exclude_instructions=True)
+    return [readonly, copy, filtered]
+
+
+def _cow_turn(chat_ctx: ChatContext) -> list[ChatContext]:
+    readonly = _ReadOnlyChatContext(chat_ctx.items)
+    copy = readonly.copy()
+    filtered = copy.copy(exclude_instructions=True)
+    return [readonly, copy, filtered]
+
+
+def _cow_read_turn(chat_ctx: ChatContext) -> list[list[ChatItem]]:
+    # reading .items materializes the filtered copy, and copies the shared items since the
+    # caller could modify them
+    return [ctx.items for ctx in _cow_turn(chat_ctx)[1:]]
+
+
+def _measure(turn: Callable[[ChatContext], object], chat_ctx: ChatContext) -> tuple[float, float]:
+    """returns the bytes allocated and the time per turn"""
+    tracemalloc.start()
+    snapshots = [turn(chat_ctx) for _ in range(ITERATIONS)]
+    allocated, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del snapshots
+
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        turn(chat_ctx)
+    return allocated / ITERATIONS, (time.perf_counter() - start) / ITERATIONS
+
+
+def main() -> None:
+    print(f"{'items':>6} {'mode':>9} {'KiB/turn':>10} {'us/turn':>10}")
+    for size in HISTORY_SIZES:
+        chat_ctx = _make_ctx(size)
+        for name, turn in (
+            ("eager", _eager_turn),
+            ("cow", _cow_turn),
+            ("cow+read", _cow_read_turn),
+        ):
+            allocated, elapsed = _measure(turn, chat_ctx)
+            print(f"{size:>6} {name:>9} {allocated / 1024:>10.1f} {elapsed * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+"""Compare compute_chat_ctx_diff against the previous dynamic-programming LCS.
+
+Usage: python tests/benchmarks/bench_chat_ctx_diff.py
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from typing import Callable
+
+from livekit.agents.llm import ChatContext, ChatMessage, FunctionCall, FunctionCallOutput, utils
+
+CONTEXT_SIZES = [10, 100, 500, 1000, 5000]
+DP_MAX_SIZE = 1000  # the quadratic table gets too slow (and large) above this
+DURATION = 0.5
+
+
+def _dp_lcs(old_ids: list[str], new_ids: list[str]) -> list[str]:
+    n, m = len(old_ids), len(new_ids)
+    dp = [[0] * (m + 1) for _ in range(n + 1)]
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            if old_ids[i - 1] == new_ids[j - 1]:
+                dp[i][j] = dp[i - 1][j - 1] + 1
+            else:
+                dp[i][j] = max(dp[i - 1][j], dp[i][j - 1])
+
+    lcs_ids = []
+    i, j = n, m
+    while i > 0 and j > 0:
+        if old_ids[i - 1] == new_ids[j - 1]:
+            lcs_ids.append(old_ids[i - 1])
+            i -= 1
+            j -= 1
+        elif dp[i - 1][j] > dp[i][j - 1]:
+            i -= 1
+        else:
+            j -= 1
+
+    return list(reversed(lcs_ids))
+
+
+def _make_ctx(size: int) -> ChatContext:
+    chat_ctx = ChatContext()
+    for i in range(size):
+        if i % 4 == 2:
+            chat_ctx.items.append(
+                FunctionCall(id=f"item_{i}", call_id=f"call_{i}", name="lookup", arguments="{}")
+            )
+        elif i % 4 == 3:
+            chat_ctx.items.append(
+                FunctionCallOutput(
+                    id=f"item_{i}", call_id=f"call_{i - 1}", output="ok", is_error=False
+                )
+            )
+        else:
+            role = "user" if i % 4 == 0 else "assistant"
+            chat_ctx.add_message(role=role, content=f"message {i}", id=f"item_{i}")
+    return chat_ctx
+
+
+def _scenarios(size: int) -> dict[str, tuple[ChatContext, ChatContext]]:
+    rng = random.Random(size)
+    old_ctx = _make_ctx(size)
+
+    appended = old_ctx.copy()
+    appended.add_message(role="user", content="new message")
+
+    # truncated history and a few random edits, like after a summarization
+    edited = old_ctx.copy()
+    del edited.items[: size // 10]
+    for _ in range(max(1, size // 50)):
+        edited.items.insert(
+            rng.randrange(len(edited.items) + 1), ChatMessage(role="user", content=["inserted"])
+        )
+    tail = edited.items[-5:]
+    rng.shuffle(tail)
+    edited.items[-5:] = tail
+
+    return {"append": (old_ctx, appended), "edit": (old_ctx, edited)}
+
+
+def _time(fn: Callable[..., object], *args: object) -> float:
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        fn(*args)
+        count += 1
+    return (time.perf_counter() - start) / count
+
+
+def main() -> None:
+    print(f"{'items':>6} {'scenario':>9} {'dp (ms)':>10} {'diff (ms)':>10} {'speedup':>8}")
+    for size in CONTEXT_SIZES:
+        for name, (old_ctx, new_ctx) in _scenarios(size).items():
+            old_ids = [item.id for item in old_ctx.items]
+            new_ids = [item.id for item in new_ctx.items]
+            new_time = _time(utils.compute_chat_ctx_diff, old_ctx, new_ctx)
+
+            if size <= DP_MAX_SIZE:
+                assert len(_dp_lcs(old_ids, new_ids)) == len(utils._compute_lcs(old_ids, new_ids))
+                dp_time = _time(_dp_lcs, old_ids, new_ids)
+                print(
+                    f"{size:>6} {name:>9} {dp_time * 1e3:>10.3f} {new_time * 1e3:>10.3f} "
+                    f"{dp_time / new_time:>7.1f}x"
+                )
+            else:
+                print(f"{size:>6} {name:>9} {'-':>10} {new_time * 1e3:>10.3f} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
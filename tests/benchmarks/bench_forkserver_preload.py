@@ -0,0 +1,129 @@
+"""Measure the cold start and the memory of job processes with the forkserver preloads.
+
+The prewarm function imports onnxruntime and reads a model-sized file, touching all its pages
+like a model being loaded:
+
+- "spawn" starts every process from scratch
+- "forkserver" preloads livekit.agents only, like the plugins preloaded by AgentServer
+- "preload" also preloads onnxruntime and the entrypoint module (preload_modules,
+  preload_entrypoint_module), and maps the file as a shared asset (shared_assets)
+
+PSS splits the pages shared by several processes between them, it's the memory a process
+actually costs. Each configuration runs in its own interpreter since the forkserver is global.
+
+Usage: python tests/benchmarks/bench_forkserver_preload.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import multiprocessing as mp
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import psutil
+
+from livekit.agents import JobContext, JobProcess, ipc
+
+NUM_PROCESSES = 4
+ASSET_SIZE_MB = 200
+CONFIGS = ["spawn", "forkserver", "preload"]
+
+
+def _prewarm(proc: JobProcess) -> None:
+    import numpy as np
+    import onnxruntime  # noqa: F401
+
+    if os.environ.get("BENCH_CONFIG") == "preload":
+        asset: memoryview | bytes = proc.shared_asset("model")
+    else:
+        with open(os.environ["BENCH_ASSET"], "rb") as f:
+            asset = f.read()
+
+    # touch every page
+    proc.userdata["checksum"] = int(np.frombuffer(asset, dtype=np.uint8)[::4096].sum())
+    proc.userdata["model"] = asset
+
+
+async def _entrypoint(job_ctx: JobContext) -> None:
+    pass
+
+
+async def _run(config: str) -> dict[str, float]:
+    if config == "spawn":
+        mp_ctx = mp.get_context("spawn")
+    else:
+        mp_ctx = mp.get_context("forkserver")
+        preload = ["livekit.agents"]
+        if config == "preload":
+            ipc.shared_assets.declare_shared_assets({"model": os.environ["BENCH_ASSET"]})
+            preload += ["onnxruntime", "__main__", "livekit.agents.ipc._forkserver_preload"]
+
+        mp_ctx.set_forkserver_preload(preload)
+        # start the forkserver outside of the measurements, like at the worker startup
+        mp_ctx.Process(target=time.sleep, args=(0,)).start()
+
+    procs = []
+    cold_starts = []
+    for _ in range(NUM_PROCESSES):
+        proc = ipc.job_proc_executor.ProcJobExecutor(
+            initialize_process_fnc=_prewarm,
+            job_entrypoint_fnc=_entrypoint,
+            session_end_fnc=None,
+            initialize_timeout=120.0,
+            close_timeout=10.0,
+            memory_warn_mb=0,
+            memory_limit_mb=0,
+            ping_interval=2.5,
+            ping_timeout=60.0,
+            high_ping_threshold=1.0,
+            inference_executor=None,
+            http_proxy=None,
+            mp_ctx=mp_ctx,
+            loop=asyncio.get_running_loop(),
+        )
+        start = time.perf_counter()
+        await proc.start()
+        await proc.initialize()
+        cold_starts.append(time.perf_counter() - start)
+        procs.append(proc)
+
+    rss = pss = 0.0
+    for proc in procs:
+        assert proc.pid is not None
+        mem = psutil.Process(proc.pid).memory_full_info()
+        rss += mem.rss / (1024 * 1024)
+        pss += mem.pss / (1024 * 1024)
+
+    await asyncio.gather(*(proc.aclose() for proc in procs))
+    return {
+        "cold_start": sum(cold_starts) / len(cold_starts),
+        "rss": rss / len(procs),
+        "pss": pss / len(procs),
+    }
+
+
+def main() -> None:
+    with tempfile.NamedTemporaryFile(suffix=".onnx") as asset:
+        asset.write(os.urandom(ASSET_SIZE_MB * 1024 * 1024))
+        asset.flush()
+
+        print(f"{'config':>11} {'cold start (s)':>15} {'RSS (MB)':>9} {'PSS (MB)':>9}")
+        for config in CONFIGS:
+            env = {**os.environ, "BENCH_CONFIG": config, "BENCH_ASSET": asset.name}
+            out = subprocess.run(
+                [sys.executable, __file__, config], env=env, capture_output=True, check=True
+            )
+            res = json.loads(out.stdout.decode().strip().splitlines()[-1])
+            print(f"{config:>11} {res['cold_start']:>15.2f} {res['rss']:>9.0f} {res['pss']:>9.0f}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        print(json.dumps(asyncio.run(_run(sys.argv[1]))))
+    else:
+        main()
@@ -0,0 +1,101 @@
+"""Compare the socket duplex and the shared memory transport used between processes.
+
+Usage: python tests/benchmarks/bench_ipc_transport.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import socket
+import time
+
+from livekit.agents.ipc import channel, proto
+from livekit.agents.utils.aio import duplex_shm, duplex_unix
+
+PAYLOAD_SIZES = [100, 1024, 10 * 1024, 100 * 1024, 1024 * 1024]
+DURATION = 2.0
+SHM_SIZE = 16 * 1024 * 1024
+
+
+async def _open(sock: socket.socket, send_name: str, recv_name: str) -> duplex_unix._AsyncDuplex:
+    dplx = await duplex_unix._AsyncDuplex.open(sock)
+    if not send_name:
+        return dplx
+
+    return duplex_shm._AsyncShmDuplex(
+        dplx,
+        send_ring=duplex_shm._ShmRing.attach(send_name),
+        recv_ring=duplex_shm._ShmRing.attach(recv_name),
+    )
+
+
+def _echo_main(sock: socket.socket, send_name: str, recv_name: str) -> None:
+    async def _run() -> None:
+        dplx = await _open(sock, send_name, recv_name)
+        while True:
+            try:
+                msg = await channel.arecv_message(dplx, proto.IPC_MESSAGES)
+            except duplex_unix.DuplexClosed:
+                break
+
+            assert isinstance(msg, proto.InferenceRequest)
+            await channel.asend_message(
+                dplx, proto.InferenceResponse(request_id=msg.request_id, data=b"")
+            )
+
+    asyncio.run(_run())
+
+
+async def _bench(payload_size: int, use_shm: bool) -> tuple[float, float]:
+    pch, cch = socket.socketpair()
+    rings: list[duplex_shm._ShmRing] = []
+    if use_shm:
+        rings = [duplex_shm._ShmRing.create(SHM_SIZE), duplex_shm._ShmRing.create(SHM_SIZE)]
+
+    proc = mp.get_context("spawn").Process(
+        target=_echo_main,
+        args=(cch, rings[1].name if rings else "", rings[0].name if rings else ""),
+    )
+    proc.start()
+    cch.close()
+
+    dplx = await duplex_unix._AsyncDuplex.open(pch)
+    if rings:
+        dplx = duplex_shm._AsyncShmDuplex(dplx, send_ring=rings[0], recv_ring=rings[1])
+
+    payload = b"x" * payload_size
+
+    # wait for the child process to be ready
+    await channel.asend_message(dplx, proto.InferenceRequest(method="bench", request_id="req"))
+    await channel.arecv_message(dplx, proto.IPC_MESSAGES)
+
+    count = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < DURATION:
+        await channel.asend_message(
+            dplx, proto.InferenceRequest(method="bench", request_id="req", data=payload)
+        )
+        await channel.arecv_message(dplx, proto.IPC_MESSAGES)
+        count += 1
+
+    elapsed = time.perf_counter() - start
+    await dplx.aclose()
+    proc.join()
+    for ring in rings:
+        ring.close()
+
+    return count / elapsed, count * payload_size / elapsed
+
+
+async def main() -> None:
+    print(f"{'payload':>10} {'transport':>10} {'msg/s':>12} {'MB/s':>10}")
+    for size in PAYLOAD_SIZES:
+        for use_shm in (False, True):
+            msgs, nbytes = await _bench(size, use_shm)
+            transport = "shm" if use_shm else "socket"
+            print(f"{size:>10} {transport:>10} {msgs:>12.0f} {nbytes / 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,105 @@
+"""Measure the memory used per job by the process executors.
+
+The prewarm function allocates a model-sized buffer in the JobProcess userdata, like a VAD or
+turn detector loaded by the prewarm_fnc. "process" runs every job in its own process, so each
+job pays for its own copy of the imports and the model, "shared_process" hosts up to
+JOBS_PER_PROCESS jobs on the event loop of one process.
+
+Usage: python tests/benchmarks/bench_job_memory.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import multiprocessing as mp
+import uuid
+
+import numpy as np
+import psutil
+
+from livekit.agents import JobContext, JobExecutorType, JobProcess, ipc, job
+from livekit.protocol import agent
+
+NUM_JOBS = [1, 8, 16]
+JOBS_PER_PROCESS = 8
+MODEL_SIZE_MB = 100
+
+
+def _prewarm(proc: JobProcess) -> None:
+    proc.userdata["model"] = np.ones(MODEL_SIZE_MB * 1024 * 1024 // 8, dtype=np.float64)
+
+
+async def _entrypoint(job_ctx: JobContext) -> None:
+    pass  # the job stays alive until the pool closes it
+
+
+def _fake_job() -> job.RunningJobInfo:
+    return job.RunningJobInfo(
+        job=agent.Job(id="fake_job_" + uuid.uuid4().hex, type=agent.JobType.JT_ROOM),
+        url="fake_url",
+        token="fake_token",
+        accept_arguments=job.JobAcceptArguments(name="", identity="", metadata=""),
+        worker_id="fake_id",
+        fake_job=True,
+    )
+
+
+def _memory_mb(pool: ipc.proc_pool.ProcPool) -> tuple[int, float]:
+    """returns the number of job processes and their memory (USS when available)"""
+    pids = set()
+    for executor in pool.processes:
+        if isinstance(executor, ipc.job_shared_proc_executor.SharedProcJobExecutor):
+            pids.add(executor.process.pid)
+        elif isinstance(executor, ipc.job_proc_executor.ProcJobExecutor):
+            pids.add(executor.pid)
+
+    total = 0
+    for pid in pids:
+        p = psutil.Process(pid)
+        try:
+            total += p.memory_full_info().uss
+        except (psutil.AccessDenied, AttributeError):
+            total += p.memory_info().rss
+
+    return len(pids), total / (1024 * 1024)
+
+
+async def _bench(executor_type: JobExecutorType, num_jobs: int) -> tuple[int, float]:
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_prewarm,
+        job_entrypoint_fnc=_entrypoint,
+        session_end_fnc=None,
+        num_idle_processes=0,
+        job_executor_type=executor_type,
+        initialize_timeout=60.0,
+        close_timeout=10.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp.get_context("spawn"),
+        loop=asyncio.get_running_loop(),
+        max_jobs_per_shared_process=JOBS_PER_PROCESS,
+    )
+    await pool.start()
+    await asyncio.gather(*(pool.launch_job(_fake_job()) for _ in range(num_jobs)))
+    await asyncio.sleep(2.0)  # let the jobs settle
+
+    num_procs, memory_mb = _memory_mb(pool)
+    await pool.aclose()
+    return num_procs, memory_mb
+
+
+async def main() -> None:
+    print(f"{'jobs':>5} {'executor':>15} {'processes':>10} {'total (MB)':>11} {'MB/job':>8}")
+    for num_jobs in NUM_JOBS:
+        for executor_type in (JobExecutorType.PROCESS, JobExecutorType.SHARED_PROCESS):
+            num_procs, memory_mb = await _bench(executor_type, num_jobs)
+            print(
+                f"{num_jobs:>5} {executor_type.value:>15} {num_procs:>10} "
+                f"{memory_mb:>11.0f} {memory_mb / num_jobs:>8.1f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,84 @@
+"""Compare the provider format conversion of the chat contexts with and without the converted
+items cache.
+
+Each request appends a user message to the history and converts a copy of the context, like an
+agent turn. "full" converts every item (the previous behavior), "incremental" reuses the items
+converted by the previous requests. One item out of 52 is a message with an image, one out of 4
+is a function call or its output. The median time of the requests is reported.
+
+Usage: python tests/benchmarks/bench_provider_format.py
+"""
+
+from __future__ import annotations
+
+import base64
+import os
+import statistics
+import time
+from unittest import mock
+
+from livekit.agents.llm import ChatContext, FunctionCall, FunctionCallOutput, ImageContent
+from livekit.agents.llm._provider_format import utils as format_utils
+
+CONTEXT_SIZES = [50, 500, 2000]
+FORMATS = ["openai", "anthropic", "google", "aws"]
+NUM_REQUESTS = 50
+
+# ~20KB jpeg-sized payload, only base64 encoded by the conversions
+_IMAGE = "data:image/jpeg;base64," + base64.b64encode(os.urandom(20_000)).decode()
+
+
+def _make_ctx(size: int) -> ChatContext:
+    chat_ctx = ChatContext()
+    for i in range(size):
+        if i % 52 == 0:
+            chat_ctx.add_message(role="user", content=[f"message {i}", ImageContent(image=_IMAGE)])
+        elif i % 4 == 2:
+            chat_ctx.items.append(
+                FunctionCall(
+                    call_id=f"call_{i}", name="lookup", arguments='{"query": "weather", "days": 3}'
+                )
+            )
+        elif i % 4 == 3:
+            chat_ctx.items.append(
+                FunctionCallOutput(
+                    call_id=f"call_{i - 1}", name="lookup", output="sunny", is_error=False
+                )
+            )
+        else:
+            role = "user" if i % 4 == 0 else "assistant"
+            chat_ctx.add_message(role=role, content=f"message {i} " * 10)
+    return chat_ctx
+
+
+def _time_requests(chat_ctx: ChatContext, format: str) -> float:
+    times = []
+    for i in range(NUM_REQUESTS):
+        chat_ctx.add_message(role="user", content=f"new message {i}")
+        start = time.perf_counter()
+        chat_ctx.copy().to_provider_format(format)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main() -> None:
+    print(f"{'format':>10} {'items':>6} {'full (ms)':>10} {'incremental (ms)':>17} {'speedup':>8}")
+    for format in FORMATS:
+        for size in CONTEXT_SIZES:
+            with mock.patch.object(
+                format_utils._ConvertedItems, "get", lambda self, item: self._convert(item)
+            ):
+                full = _time_requests(_make_ctx(size), format)
+
+            chat_ctx = _make_ctx(size)
+            chat_ctx.to_provider_format(format)  # the previous requests of the session
+            incremental = _time_requests(chat_ctx, format)
+
+            print(
+                f"{format:>10} {size:>6} {full * 1000:>10.2f} {incremental * 1000:>17.2f} "
+                f"{full / incremental:>7.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure the CPU cost per Silero VAD stream with many concurrent streams in one process.
+
+Every stream runs one 32ms window per inference call, like a VADStream keeping up with
+realtime audio. "per-stream" runs each window in its own ONNX call on the default executor,
+"batched" submits them to a shared BatchedInference which stacks the pending windows of every
+stream in a single call.
+
+Usage: python tests/benchmarks/bench_silero_vad_batch.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+
+import numpy as np
+
+from livekit.plugins.silero import onnx_model
+
+NUM_STREAMS = [1, 10, 50, 200]
+AUDIO_DURATION = 5.0  # seconds of audio processed by each stream
+SAMPLE_RATE = 16000
+WINDOW_SIZE = 512
+
+
+async def _run_stream(
+    model: onnx_model.OnnxModel,
+    windows: np.ndarray,
+    batched: onnx_model.BatchedInference | None,
+) -> None:
+    loop = asyncio.get_running_loop()
+    for i in range(len(windows)):
+        if batched is not None:
+            await asyncio.wrap_future(batched.submit(model, windows[i : i + 1]))
+        else:
+            await loop.run_in_executor(None, model, windows[i])
+
+
+async def _bench(num_streams: int, batch: bool) -> tuple[float, float]:
+    """returns the cpu time per stream per second of audio, and the wall time"""
+    session = onnx_model.new_inference_session(True)
+    batched = (
+        onnx_model.BatchedInference(onnx_session=session, sample_rate=SAMPLE_RATE)
+        if batch
+        else None
+    )
+
+    rng = np.random.default_rng(0)
+    num_windows = int(AUDIO_DURATION * SAMPLE_RATE / WINDOW_SIZE)
+    windows = (rng.standard_normal((num_windows, WINDOW_SIZE)) * 0.1).astype(np.float32)
+    models = [
+        onnx_model.OnnxModel(onnx_session=session, sample_rate=SAMPLE_RATE)
+        for _ in range(num_streams)
+    ]
+
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    await asyncio.gather(*(_run_stream(model, windows, batched) for model in models))
+    cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+
+    if batched is not None:
+        batched.close()
+
+    return cpu / num_streams / AUDIO_DURATION, wall
+
+
+async def main() -> None:
+    print(f"{'streams':>8} {'path':>11} {'cpu ms/stream/s':>16} {'wall (s)':>9}")
+    for num_streams in NUM_STREAMS:
+        for batch in (False, True):
+            cpu, wall = await _bench(num_streams, batch)
+            print(
+                f"{num_streams:>8} {'batched' if batch else 'per-stream':>11} "
+                f"{cpu * 1000:>16.2f} {wall:>9.2f}"
+            )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,126 @@
+"""Measure the time until an LLM request is sent, with and without the tool schema cache.
+
+The OpenAI LLM sends its requests to a local server answering with an empty stream, the time is
+measured from llm.chat() until the server receives the request. "cold" clears the schema cache
+before each request, like before the cache, "cached" is the steady state of an agent after its
+first turn. The second table is the time taken by the tool formatters of the other providers.
+
+Usage: python tests/benchmarks/bench_tool_schemas.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from typing import Any, Callable, Literal, Optional
+
+from aiohttp import web
+
+from livekit.agents import llm
+from livekit.agents.llm import tool_context
+from livekit.plugins import anthropic, aws, google, openai
+
+NUM_TOOLS = [1, 20, 100]
+NUM_REQUESTS = 20
+
+
+def _make_tool(i: int) -> llm.FunctionTool:
+    namespace: dict[str, Any] = {}
+    exec(
+        f"async def tool_{i}(city: str, days: int = 1, units: Literal['c', 'f'] = 'c', "
+        f"tags: Optional[list[str]] = None) -> str:\n"
+        f"    '''Look up the weather of a city, variant {i}\n\n"
+        f"    Args:\n"
+        f"        city: name of the city\n"
+        f"        days: number of days to forecast\n"
+        f"    '''\n"
+        f"    return city\n",
+        {"Literal": Literal, "Optional": Optional},
+        namespace,
+    )
+    return llm.function_tool(namespace[f"tool_{i}"])
+
+
+async def _time_to_send(
+    model: openai.LLM, tools: list[llm.FunctionTool], received: asyncio.Queue[float], cold: bool
+) -> float:
+    chat_ctx = llm.ChatContext()
+    chat_ctx.add_message(role="user", content="what's the weather in Paris?")
+
+    total = 0.0
+    for _ in range(NUM_REQUESTS):
+        if cold:
+            tool_context._schema_cache.clear()
+
+        start = time.perf_counter()
+        async with model.chat(chat_ctx=chat_ctx, tools=list(tools)) as stream:
+            async for _ in stream:
+                pass
+
+        total += await received.get() - start
+
+    return total / NUM_REQUESTS
+
+
+def _time_format(fnc: Callable[[list[Any]], Any], tools: list[Any], cold: bool) -> float:
+    total = 0.0
+    for _ in range(NUM_REQUESTS):
+        if cold:
+            tool_context._schema_cache.clear()
+
+        start = time.perf_counter()
+        fnc(tools)
+        total += time.perf_counter() - start
+
+    return total / NUM_REQUESTS
+
+
+async def main() -> None:
+    received = asyncio.Queue[float]()
+
+    async def _completions(request: web.Request) -> web.StreamResponse:
+        received.put_nowait(time.perf_counter())
+        await request.read()
+        resp = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await resp.prepare(request)
+        await resp.write(b"data: [DONE]\n\n")
+        return resp
+
+    app = web.Application()
+    app.router.add_post("/v1/chat/completions", _completions)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]  # type: ignore[union-attr]
+
+    model = openai.LLM(model="gpt-4o", base_url=f"http://127.0.0.1:{port}/v1", api_key="fake")
+    await _time_to_send(model, [_make_tool(0)], received, cold=False)  # warm up the connection
+
+    print("time to request send (openai, strict schemas)")
+    print(f"{'tools':>6} {'cold (ms)':>10} {'cached (ms)':>12}")
+    for num_tools in NUM_TOOLS:
+        tools = [_make_tool(i) for i in range(num_tools)]
+        cold = await _time_to_send(model, tools, received, cold=True)
+        cached = await _time_to_send(model, tools, received, cold=False)
+        print(f"{num_tools:>6} {cold * 1000:>10.2f} {cached * 1000:>12.2f}")
+
+    await model.aclose()
+    await runner.cleanup()
+
+    formatters: dict[str, Callable[[list[Any]], Any]] = {
+        "anthropic": lambda tools: anthropic.utils.to_fnc_ctx(tools, caching=None),
+        "google": google.utils.to_fnc_ctx,
+        "aws": aws.utils.to_fnc_ctx,
+    }
+    tools = [_make_tool(i) for i in range(NUM_TOOLS[-1])]
+    print(f"\ntool formatting, {NUM_TOOLS[-1]} tools")
+    print(f"{'provider':>10} {'cold (ms)':>10} {'cached (ms)':>12}")
+    for provider, fnc in formatters.items():
+        cold = _time_format(fnc, tools, cold=True)
+        cached = _time_format(fnc, tools, cold=False)
+        print(f"{provider:>10} {cold * 1000:>10.2f} {cached * 1000:>12.2f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,7 +1,10 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
+from unittest import mock
 
+import prometheus_client
 import pytest
 
 from livekit.agents import (
@@ -12,9 +15,12 @@ from livekit.agents import (
     UserInputTranscribedEvent,
     UserStateChangedEvent,
     function_tool,
+    utils,
 )
 from livekit.agents.llm import FunctionToolCall
 from livekit.agents.llm.chat_context import ChatContext, ChatMessage
+from livekit.agents.voice.agent_activity import AgentActivity
+from livekit.agents.voice.audio_recognition import _PreemptiveGenerationInfo
 from livekit.agents.voice.events import FunctionToolsExecutedEvent
 from livekit.agents.voice.io import PlaybackFinishedEvent
 
@@ -558,6 +564,59 @@ async def test_preemptive_generation(preemptive_generation: bool, expected_laten
     assert agent_state_events[3].new_state == "listening"
 
 
+async def test_preemptive_generation_deduplicated() -> None:
+    speed = 5.0
+    actions = FakeActions()
+    actions.add_user_speech(0.5, 2.0, "Hello, how are you?", stt_delay=0.2)
+    actions.add_llm("I'm doing great, thank you!", ttft=0.1, duration=0.3)
+    actions.add_tts(3.0, ttfb=0.3)
+
+    session = create_session(
+        actions, speed_factor=speed, extra_kwargs={"preemptive_generation": True}
+    )
+    agent = MyAgent()
+
+    conversation_events: list[ConversationItemAddedEvent] = []
+    session.on("conversation_item_added", conversation_events.append)
+
+    on_preemptive_generation = AgentActivity.on_preemptive_generation
+
+    def _retrigger(self: AgentActivity, info: _PreemptiveGenerationInfo) -> None:
+        on_preemptive_generation(self, info)
+        # the same words without the punctuation, like a preflight transcript
+        on_preemptive_generation(
+            self, dataclasses.replace(info, new_transcript="hello how are you")
+        )
+
+    def _sample(name: str, **labels: str) -> float:
+        return prometheus_client.REGISTRY.get_sample_value(name, labels) or 0.0
+
+    nodename = utils.nodename()
+    before = {
+        result: _sample("lk_agents_preemptive_generations_total", nodename=nodename, result=result)
+        for result in ("hit", "miss", "cancelled")
+    }
+    deduplicated = _sample("lk_agents_preemptive_generations_deduplicated_total", nodename=nodename)
+
+    with mock.patch.object(AgentActivity, "on_preemptive_generation", _retrigger):
+        await asyncio.wait_for(run_session(session, agent), timeout=SESSION_TIMEOUT)
+
+    assert (
+        _sample("lk_agents_preemptive_generations_deduplicated_total", nodename=nodename)
+        == deduplicated + 1
+    )
+    for result, expected in (("hit", 1), ("miss", 0), ("cancelled", 0)):
+        assert (
+            _sample("lk_agents_preemptive_generations_total", nodename=nodename, result=result)
+            == before[result] + expected
+        )
+
+    # the reply used the running generation, with the final transcript in the chat context
+    assert len(conversation_events) == 2
+    assert conversation_events[0].item.text_content == "Hello, how are you?"
+    assert conversation_events[1].item.text_content == "I'm doing great, thank you!"
+
+
 @pytest.mark.parametrize(
     "preemptive_generation, on_user_turn_completed_delay",
     [
@@ -0,0 +1,34 @@
+import random
+
+from livekit.agents.utils.audio import AudioByteStream
+
+
+def test_push_chunks():
+    rng = random.Random(0)
+    data = rng.randbytes(24000 * 2 * 3)  # 3s of 16-bit mono audio at 24kHz
+    bstream = AudioByteStream(sample_rate=24000, num_channels=1, samples_per_channel=240)
+
+    frames = []
+    offset = 0
+    while offset < len(data):
+        size = rng.choice([1, 3, 480, 1000, 48000, 100_000])
+        frames.extend(bstream.push(memoryview(data)[offset : offset + size]))
+        offset += size
+    frames.extend(bstream.flush())
+
+    assert all(frame.samples_per_channel == 240 for frame in frames)
+    assert b"".join(bytes(frame.data) for frame in frames) == data
+    assert bstream.flush() == []
+
+
+def test_flush_stereo():
+    bstream = AudioByteStream(sample_rate=16000, num_channels=2, samples_per_channel=160)
+    assert len(bstream.push(b"\x01\x00" * 500)) == 1  # 250 stereo samples
+
+    frames = bstream.flush()
+    assert len(frames) == 1
+    assert frames[0].num_channels == 2
+    assert frames[0].samples_per_channel == 90
+
+    bstream.push(b"\x01\x00\x02")
+    assert bstream.flush() == []  # incomplete sample
@@ -1,3 +1,5 @@
+import asyncio
+import io
 import os
 import threading
 import time
@@ -5,9 +7,12 @@ from concurrent.futures import ThreadPoolExecutor
 
 import aiohttp
 import pytest
+from prometheus_client import REGISTRY
 
+from livekit.agents import utils
 from livekit.agents.stt import SpeechEventType
-from livekit.agents.utils.codecs import AudioStreamDecoder, StreamBuffer
+from livekit.agents.utils.codecs import AudioStreamDecoder, StreamBuffer, set_decoder_workers
+from livekit.agents.utils.codecs.decoder import DEFAULT_DECODER_WORKERS
 from livekit.plugins import deepgram
 
 from .utils import wer
@@ -150,3 +155,147 @@ def test_stream_buffer_early_close():
 
     # Reading from closed buffer should return empty bytes
     assert buffer.read() == b""
+
+
+def test_stream_buffer_partial_reads():
+    buffer = StreamBuffer()
+    buffer.write(b"hello")
+    buffer.write(bytearray(b"world"))
+    buffer.write(b"!")
+
+    assert buffer.read(3) == b"hel"
+    assert buffer.read(4) == b"lowo"
+    assert buffer.size == 4
+    assert buffer.read() == b"rld!"
+    buffer.end_input()
+    assert buffer.read() == b""
+
+
+def test_stream_buffer_backpressure():
+    buffer = StreamBuffer(max_size=10)
+    buffer.write(b"0123456789")
+    assert buffer.full()
+
+    written = threading.Event()
+
+    def writer():
+        buffer.write(b"abc")
+        written.set()
+
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(writer)
+        assert not written.wait(0.1)  # the buffer is full
+
+        assert buffer.read(4) == b"0123"
+        future.result(timeout=1)
+
+    assert buffer.read() == b"456789abc"
+
+    # writers waiting on a full buffer are released when the reader is gone
+    buffer.write(b"0123456789")
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        future = executor.submit(buffer.write, b"dropped")
+        time.sleep(0.05)
+        buffer.close_read()
+        future.result(timeout=1)
+
+    assert buffer.size == 0
+
+
+def _encode_tone(seconds: float, *, format: str = "mp3", codec: str = "libmp3lame") -> bytes:
+    import av
+    import numpy as np
+
+    sample_rate = 44100
+    t = np.arange(int(sample_rate * seconds)) / sample_rate
+    pcm = (np.sin(2 * np.pi * 440 * t) * 10000).astype(np.int16)
+
+    buf = io.BytesIO()
+    with av.open(buf, "w", format=format) as container:
+        stream = container.add_stream(codec, rate=sample_rate)
+        stream.layout = "mono"
+        for i in range(0, len(pcm), 1152):
+            frame = av.AudioFrame.from_ndarray(pcm[None, i : i + 1152], format="s16", layout="mono")
+            frame.sample_rate = sample_rate
+            for packet in stream.encode(frame):
+                container.mux(packet)
+        for packet in stream.encode(None):
+            container.mux(packet)
+
+    return buf.getvalue()
+
+
+@pytest.mark.asyncio
+async def test_decode_backpressure():
+    data = _encode_tone(5.0)
+
+    async def _decode(decoder: AudioStreamDecoder, bounded: bool) -> int:
+        async def _push() -> None:
+            try:
+                for i in range(0, len(data), 1024):
+                    if bounded:
+                        await decoder.apush(data[i : i + 1024])
+                        # writes only wait once the buffer is full
+                        assert decoder._input_buf.size < 8192 + 1024
+                    else:
+                        decoder.push(data[i : i + 1024])
+            finally:
+                decoder.end_input()
+
+        push_task = asyncio.create_task(_push())
+        samples = 0
+        async for frame in decoder:
+            samples += frame.samples_per_channel
+        await push_task
+        await decoder.aclose()
+        return samples
+
+    unbounded = await _decode(AudioStreamDecoder(), bounded=False)
+    bounded = await _decode(AudioStreamDecoder(max_buffer_size=8192), bounded=True)
+    assert unbounded > 0
+    assert bounded == unbounded
+
+
+async def test_decoder_pool():
+    data = _encode_tone(1.0)
+    set_decoder_workers(1)
+    overflow = {"nodename": utils.nodename()}
+    overflow_before = REGISTRY.get_sample_value("lk_agents_audio_decoder_overflow_total", overflow)
+    try:
+        # the second decoder gets an extra thread instead of waiting for the first one
+        first = AudioStreamDecoder()
+        second = AudioStreamDecoder()
+        first.push(data)
+        second.push(data)
+        second.end_input()
+
+        second_samples = await asyncio.wait_for(_count_samples(second), 5.0)
+        assert first._decode_fut is not None and first._decode_fut.running()
+        overflow_after = REGISTRY.get_sample_value(
+            "lk_agents_audio_decoder_overflow_total", overflow
+        )
+        assert (overflow_after or 0) == (overflow_before or 0) + 1
+
+        first.end_input()
+        first_samples = await _count_samples(first)
+        assert first_samples > 0 and first_samples == second_samples
+        await first.aclose()
+        await second.aclose()
+
+        # the next decoder reuses a kept thread
+        await asyncio.sleep(0.1)
+        threads = {t for t in threading.enumerate() if t.name.startswith("AudioDecoder")}
+
+        decoder = AudioStreamDecoder()
+        decoder.push(data)
+        decoder.end_input()
+        assert await _count_samples(decoder) == first_samples
+        await decoder.aclose()
+        await asyncio.sleep(0.1)
+        assert {t for t in threading.enumerate() if t.name.startswith("AudioDecoder")} <= threads
+    finally:
+        set_decoder_workers(DEFAULT_DECODER_WORKERS)
+
+
+async def _count_samples(decoder: AudioStreamDecoder) -> int:
+    return sum([frame.samples_per_channel async for frame in decoder])
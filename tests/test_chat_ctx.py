@@ -1,4 +1,4 @@
-from livekit.agents.llm import AgentHandoff, FunctionCall, FunctionCallOutput, utils
+from livekit.agents.llm import AgentHandoff, ChatContext, FunctionCall, FunctionCallOutput, utils
 from livekit.plugins import openai
 
 # function_arguments_to_pydantic_model
@@ -24,6 +24,48 @@ def test_args_model():
     print(model.model_json_schema())
 
 
+def test_tool_schema_cache():
+    from unittest import mock
+
+    from livekit.agents.llm import function_tool
+    from livekit.agents.llm.tool_context import get_function_info
+
+    class _Tools:
+        @function_tool
+        async def lookup(self, city: str, days: int = 1) -> str:
+            """Look up the weather"""
+            return city
+
+    tools_a, tools_b = _Tools(), _Tools()
+    with mock.patch.object(
+        utils,
+        "function_arguments_to_pydantic_model",
+        wraps=utils.function_arguments_to_pydantic_model,
+    ) as build_model:
+        strict = utils.build_strict_openai_schema(tools_a.lookup)
+        legacy = utils.build_legacy_openai_schema(tools_a.lookup)
+        assert strict["function"]["parameters"] != legacy["function"]["parameters"]
+
+        # shared by the methods of every instance, across the formats
+        other = utils.build_strict_openai_schema(tools_b.lookup)
+        assert other["function"]["parameters"] is strict["function"]["parameters"]
+        assert other is not strict
+        assert build_model.call_count == 1
+
+        args, kwargs = utils.prepare_function_arguments(
+            fnc=tools_a.lookup, json_arguments='{"city": "Paris", "days": null}'
+        )
+        assert (args, kwargs) == (("Paris", 1), {})
+        assert build_model.call_count == 1
+
+        # rebuilt when the tool changes
+        get_function_info(tools_a.lookup).description = "Look up the forecast"
+        updated = utils.build_strict_openai_schema(tools_a.lookup)
+        assert updated["function"]["description"] == "Look up the forecast"
+        assert updated["function"]["parameters"] == strict["function"]["parameters"]
+        assert build_model.call_count == 2
+
+
 def test_dict():
     from livekit import rtc
     from livekit.agents.llm import ChatContext, ImageContent
@@ -217,3 +259,273 @@ async def test_summarize():
         summary = await chat_ctx.summarize(llm, keep_last_turns=1)
         print("\n=== Summary ===\n")
         print(json.dumps(summary.to_dict(), indent=2))
+
+
+def _lcs_length(old_ids: list[str], new_ids: list[str]) -> int:
+    dp = [[0] * (len(new_ids) + 1) for _ in range(len(old_ids) + 1)]
+    for i, old_id in enumerate(old_ids):
+        for j, new_id in enumerate(new_ids):
+            dp[i + 1][j + 1] = dp[i][j] + 1 if old_id == new_id else max(dp[i][j + 1], dp[i + 1][j])
+    return dp[-1][-1]
+
+
+def test_compute_lcs():
+    import random
+
+    rng = random.Random(42)
+    for _ in range(200):
+        ids = [f"item_{i}" for i in range(rng.randint(0, 30))]
+        old_ids = rng.sample(ids, rng.randint(0, len(ids)))
+        new_ids = rng.sample(ids, rng.randint(0, len(ids)))
+
+        lcs = utils._compute_lcs(old_ids, new_ids)
+        assert len(lcs) == _lcs_length(old_ids, new_ids)
+        # the lcs must be a subsequence of both lists
+        for ids_ in (old_ids, new_ids):
+            it = iter(ids_)
+            assert all(item_id in it for item_id in lcs)
+
+
+def test_chat_ctx_diff():
+    from livekit.agents.llm import ChatContext
+
+    old_ctx = ChatContext()
+    old_ctx.add_message(role="system", content="instructions", id="sys")
+    old_ctx.add_message(role="user", content="hello", id="msg_1")
+    old_ctx.items.append(FunctionCall(id="fnc_1", call_id="c1", name="get_weather", arguments="{}"))
+    old_ctx.items.append(
+        FunctionCallOutput(
+            id="out_1", call_id="c1", name="get_weather", output="sunny", is_error=False
+        )
+    )
+    old_ctx.add_message(role="assistant", content="it's sunny", id="msg_2")
+
+    new_ctx = old_ctx.copy()
+    new_ctx.items.pop(1)  # msg_1
+    new_ctx.items[1] = FunctionCall(
+        id="fnc_1", call_id="c1", name="get_weather", arguments='{"city": "paris"}'
+    )
+    # name and is_error aren't synced to the providers
+    new_ctx.items[2] = FunctionCallOutput(id="out_1", call_id="c1", output="sunny", is_error=True)
+    new_ctx.add_message(role="user", content="thanks", id="msg_3")
+
+    diff = utils.compute_chat_ctx_diff(old_ctx, new_ctx)
+    assert diff.to_remove == ["msg_1"]
+    assert diff.to_create == [("msg_2", "msg_3")]
+    assert diff.to_update == [("sys", "fnc_1")]
+
+    # reordered items are recreated after their new predecessor
+    reordered = ChatContext([old_ctx.items[i] for i in (0, 4, 1, 2, 3)])
+    diff = utils.compute_chat_ctx_diff(old_ctx, reordered)
+    assert diff.to_remove == ["msg_2"]
+    assert diff.to_create == [("sys", "msg_2")]
+    assert diff.to_update == []
+
+
+def _find_insertion_index(items: list, created_at: float) -> int:
+    for i in reversed(range(len(items))):
+        if items[i].created_at <= created_at:
+            return i + 1
+    return 0
+
+
+def test_chat_ctx_index():
+    import random
+
+    from livekit.agents.llm import ChatContext, ChatMessage
+
+    rng = random.Random(0)
+    chat_ctx = ChatContext()
+    next_id = 0
+
+    def _new_item() -> ChatMessage:
+        nonlocal next_id
+        next_id += 1
+        return ChatMessage(
+            id=f"item_{next_id}", role="user", content=["hi"], created_at=rng.uniform(0, 100)
+        )
+
+    for _ in range(500):
+        items = chat_ctx.items
+        op = rng.randrange(8)
+        if op == 0:
+            items.append(_new_item())
+        elif op == 1:
+            items.extend([_new_item() for _ in range(3)])
+        elif op == 2:
+            items.insert(rng.randint(-3, len(items) + 3), _new_item())
+        elif op == 3 and items:
+            items[rng.randrange(len(items))] = _new_item()
+        elif op == 4 and items:
+            items.pop(rng.randrange(len(items)))
+        elif op == 5:
+            chat_ctx.insert([_new_item() for _ in range(rng.randint(1, 4))])
+        elif op == 6:
+            chat_ctx.add_message(role="user", content="hello", created_at=rng.uniform(0, 100))
+        elif op == 7 and rng.random() < 0.1:
+            items.sort(key=lambda item: item.created_at)
+
+        for item_id in (f"item_{rng.randint(0, next_id + 1)}", items[-1].id if items else "x"):
+            expected = next((i for i, item in enumerate(items) if item.id == item_id), None)
+            assert chat_ctx.index_by_id(item_id) == expected
+            assert chat_ctx.get_by_id(item_id) is (
+                items[expected] if expected is not None else None
+            )
+
+        created_at = rng.uniform(0, 100)
+        assert chat_ctx.find_insertion_index(created_at=created_at) == _find_insertion_index(
+            items, created_at
+        )
+
+
+def test_chat_ctx_bulk_insert():
+    import random
+
+    from livekit.agents.llm import ChatContext, ChatMessage
+
+    rng = random.Random(1)
+    base = [
+        ChatMessage(id=f"base_{i}", role="user", content=["hi"], created_at=float(i // 2))
+        for i in range(50)
+    ]
+    new = [
+        ChatMessage(
+            id=f"new_{i}", role="user", content=["hi"], created_at=float(rng.randint(-1, 26))
+        )
+        for i in range(30)
+    ]
+
+    expected = list(base)
+    for item in new:
+        expected.insert(_find_insertion_index(expected, item.created_at), item)
+
+    chat_ctx = ChatContext(list(base))
+    chat_ctx.insert(new)
+    assert [item.id for item in chat_ctx.items] == [item.id for item in expected]
+
+    merged = ChatContext(list(base)).merge(ChatContext(new + base[:5]))
+    assert [item.id for item in merged.items] == [item.id for item in expected]
+    assert merged.index_by_id("new_0") == [item.id for item in expected].index("new_0")
+
+
+def test_readonly_chat_ctx_index():
+    import pytest
+
+    from livekit.agents.llm import ChatContext
+    from livekit.agents.llm.chat_context import _ReadOnlyChatContext
+
+    chat_ctx = ChatContext()
+    msg = chat_ctx.add_message(role="user", content="hello")
+    readonly = _ReadOnlyChatContext(chat_ctx.items)
+    assert readonly.get_by_id(msg.id) is msg
+    assert readonly.index_by_id("missing") is None
+
+    with pytest.raises(RuntimeError):
+        readonly.items.append(msg)
+
+
+def test_chat_ctx_copy_on_write():
+    import pytest
+
+    from livekit.agents.llm import ChatContext
+    from livekit.agents.llm.chat_context import _ReadOnlyChatContext
+
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="system", content="instructions", id="sys")
+    chat_ctx.add_message(role="user", content="hello", id="msg_1")
+    items = chat_ctx.items
+
+    copy = chat_ctx.copy()
+    filtered = chat_ctx.copy(exclude_instructions=True)
+    readonly = _ReadOnlyChatContext(chat_ctx.items)
+    readonly_copy = readonly.copy()
+
+    # mutating the original through a reference taken before copying
+    items.append(FunctionCall(id="fnc_1", call_id="c1", name="get_weather", arguments="{}"))
+    chat_ctx.add_message(role="assistant", content="sunny", id="msg_2")
+
+    assert [item.id for item in chat_ctx.items] == ["sys", "msg_1", "fnc_1", "msg_2"]
+    for snapshot in (copy, readonly, readonly_copy):
+        assert [item.id for item in snapshot.items] == ["sys", "msg_1"]
+        assert snapshot.get_by_id("msg_2") is None
+    assert [item.id for item in filtered.items] == ["msg_1"]
+
+    # mutating a copy doesn't change the original or the other copies
+    copy.items.pop(0)
+    readonly_copy.add_message(role="user", content="bye", id="msg_3")
+    assert [item.id for item in copy.items] == ["msg_1"]
+    assert [item.id for item in readonly_copy.items] == ["sys", "msg_1", "msg_3"]
+    assert [item.id for item in readonly.items] == ["sys", "msg_1"]
+    assert len(chat_ctx.items) == 4
+
+    assert readonly.readonly and not readonly_copy.readonly
+    with pytest.raises(RuntimeError):
+        readonly.items.append(chat_ctx.items[0])
+
+
+def _provider_format_ctx() -> ChatContext:
+    import base64
+
+    from livekit.agents.llm import ImageContent
+
+    pixel = base64.b64encode(b"\x89PNG\r\n\x1a\n" + b"\x00" * 32).decode()
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="system", content="be helpful")
+    chat_ctx.add_message(
+        role="user",
+        content=["what's this?", ImageContent(image=f"data:image/png;base64,{pixel}")],
+    )
+    chat_ctx.add_message(role="assistant", content="let me check", id="group_1")
+    chat_ctx.items.append(
+        FunctionCall(id="group_1/call", call_id="call_1", name="lookup", arguments='{"q": 1}')
+    )
+    chat_ctx.items.append(
+        FunctionCallOutput(call_id="call_1", name="lookup", output="found", is_error=False)
+    )
+    # without its output, ignored
+    chat_ctx.items.append(FunctionCall(call_id="call_2", name="lookup", arguments="{}"))
+    chat_ctx.add_message(role="assistant", content="it's a pixel")
+    chat_ctx.add_message(role="user", content="thanks")
+    return chat_ctx
+
+
+def test_provider_format_incremental():
+    from unittest import mock
+
+    from livekit.agents.llm import ChatMessage
+    from livekit.agents.llm._provider_format import utils as format_utils
+
+    def _full(chat_ctx: ChatContext, format: str) -> list[dict]:
+        # the conversion without reusing the converted items
+        with mock.patch.object(
+            format_utils._ConvertedItems, "get", lambda self, item: self._convert(item)
+        ):
+            return chat_ctx.to_provider_format(format)[0]
+
+    for format in ["openai", "anthropic", "google", "aws", "mistralai"]:
+        chat_ctx = _provider_format_ctx()
+        assert chat_ctx.to_provider_format(format)[0] == _full(chat_ctx, format)
+
+        # the providers can modify the messages without affecting the next requests
+        messages, _ = chat_ctx.to_provider_format(format)
+        for msg in messages:
+            msg["role"] = "modified"
+            if isinstance(msg.get("content"), list):
+                for block in msg["content"]:
+                    block["cache_control"] = {"type": "ephemeral"}
+        assert chat_ctx.to_provider_format(format)[0] == _full(chat_ctx, format)
+
+        # edited, replaced, appended and removed items
+        copy = chat_ctx.copy()
+        copy.items[-1].content = ["thanks a lot"]
+        output = copy.get_by_id(copy.items[4].id)
+        assert isinstance(output, FunctionCallOutput)
+        output.output = "not found"
+        copy.items[2] = ChatMessage(role="assistant", content=["checking"], id="group_1")
+        copy.add_message(role="assistant", content="you're welcome")
+        copy.add_message(role="user", content="bye")
+        del copy.items[1]
+        assert copy.to_provider_format(format)[0] == _full(copy, format)
+
+        # the copy didn't change the original context
+        assert chat_ctx.to_provider_format(format)[0] == _full(chat_ctx, format)
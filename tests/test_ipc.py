@@ -4,7 +4,10 @@ import asyncio
 import ctypes
 import io
 import multiprocessing as mp
+import os
 import socket
+import subprocess
+import sys
 import time
 import uuid
 from dataclasses import dataclass
@@ -12,8 +15,11 @@ from multiprocessing.context import BaseContext
 from typing import ClassVar
 
 import psutil
+import pytest
+from prometheus_client import REGISTRY
 
 from livekit.agents import JobContext, JobProcess, ipc, job, utils
+from livekit.agents.inference_runner import _InferenceRunner
 from livekit.protocol import agent
 
 
@@ -392,3 +398,558 @@ async def test_job_graceful_shutdown():
     assert proc.exitcode == 0, "process should have exited cleanly"
     assert not proc.killed
     assert start_args.shutdown_counter.value == 1
+
+
+class _BatchingRunner(_InferenceRunner):
+    INFERENCE_METHOD = "test_batching"
+    MAX_BATCH_SIZE = 4
+    BATCH_WINDOW = 0.05
+
+    def __init__(self) -> None:
+        self.batches: list[list[bytes]] = []
+
+    def initialize(self) -> None:
+        pass
+
+    def run(self, data: bytes) -> bytes | None:
+        return self.run_batch([data])[0]
+
+    def run_batch(self, data: list[bytes]) -> list[bytes | None]:
+        self.batches.append(data)
+        if b"invalid" in data:
+            raise ValueError("invalid request")
+        return [d.upper() for d in data]
+
+
+class _FakeProcClient:
+    def __init__(self) -> None:
+        self.sent: list[ipc.proto.InferenceResponse] = []
+
+    async def send(self, msg: ipc.proto.InferenceResponse) -> None:
+        self.sent.append(msg)
+
+
+async def test_inference_batcher():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from livekit.agents.ipc.inference_proc_lazy_main import _InferenceBatcher
+
+    runner = _BatchingRunner()
+    client = _FakeProcClient()
+    batcher = _InferenceBatcher(runner, executor=ThreadPoolExecutor(1), client=client)  # type: ignore
+
+    for i in range(6):
+        batcher.push(
+            ipc.proto.InferenceRequest(
+                method=_BatchingRunner.INFERENCE_METHOD, request_id=str(i), data=f"req{i}".encode()
+            )
+        )
+
+    await asyncio.sleep(0.2)
+    await batcher.aclose()
+
+    # the first batch is capped by MAX_BATCH_SIZE, the rest is flushed after BATCH_WINDOW
+    assert [len(b) for b in runner.batches] == [4, 2]
+    assert [(r.request_id, r.data) for r in client.sent] == [
+        (str(i), f"REQ{i}".encode()) for i in range(6)
+    ]
+
+
+async def test_inference_batcher_invalid_request():
+    from concurrent.futures import ThreadPoolExecutor
+
+    from livekit.agents.ipc.inference_proc_lazy_main import _InferenceBatcher
+
+    runner = _BatchingRunner()
+    client = _FakeProcClient()
+    batcher = _InferenceBatcher(runner, executor=ThreadPoolExecutor(1), client=client)  # type: ignore
+
+    for i, data in enumerate([b"req0", b"invalid", b"req2"]):
+        batcher.push(
+            ipc.proto.InferenceRequest(
+                method=_BatchingRunner.INFERENCE_METHOD, request_id=str(i), data=data
+            )
+        )
+
+    await asyncio.sleep(0.2)
+    await batcher.aclose()
+
+    # the failed batch is retried one request at a time, only the invalid one fails
+    assert [len(b) for b in runner.batches] == [3, 1, 1, 1]
+    assert [(r.request_id, r.data, r.error) for r in client.sent] == [
+        ("0", b"REQ0", ""),
+        ("1", None, "invalid request"),
+        ("2", b"REQ2", ""),
+    ]
+
+
+class _SlowEchoRunner(_InferenceRunner):
+    INFERENCE_METHOD = "test_slow_echo"
+
+    def initialize(self) -> None:
+        pass
+
+    def run(self, data: bytes) -> bytes | None:
+        time.sleep(0.5)
+        return data
+
+
+async def test_inference_proc_pool_restart():
+    pool = ipc.inference_proc_pool.InferenceProcPool(
+        runners={_SlowEchoRunner.INFERENCE_METHOD: _SlowEchoRunner},
+        num_processes=2,
+        cpu_affinity=False,
+        initialize_timeout=20.0,
+        close_timeout=5.0,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        ping_interval=2.5,
+        ping_timeout=20.0,
+        high_ping_threshold=1.0,
+        mp_ctx=mp.get_context("spawn"),
+        loop=asyncio.get_running_loop(),
+        http_proxy=None,
+    )
+    await pool.start()
+    await pool.initialize()
+
+    first = asyncio.create_task(pool.do_inference(_SlowEchoRunner.INFERENCE_METHOD, b"first"))
+    await asyncio.sleep(0)
+    second = asyncio.create_task(pool.do_inference(_SlowEchoRunner.INFERENCE_METHOD, b"second"))
+    await asyncio.sleep(0.1)
+
+    # requests are spread across the processes
+    assert pool.queue_depths() == [1, 1]
+
+    # the request in flight on the crashed process is retried on the other one
+    crashed_pid = pool._executors[0].pid
+    psutil.Process(crashed_pid).kill()
+
+    assert await first == b"first"
+    assert await second == b"second"
+
+    # the crashed process is restarted
+    for _ in range(100):
+        if pool.is_alive() and all(pool._ready):
+            break
+        await asyncio.sleep(0.1)
+
+    assert all(pool._ready)
+    assert pool._executors[0].pid != crashed_pid
+
+    await pool.aclose()
+
+
+def test_shm_ring_wraparound():
+    from livekit.agents.utils.aio.duplex_shm import _ShmRing
+
+    ring = _ShmRing.create(1024)
+    reader = _ShmRing.attach(ring.name)
+    try:
+        for i in range(20):
+            payload = bytes([i]) * 300
+            pos = ring.try_write(payload)
+            assert pos is not None
+            assert reader.read(pos, len(payload)) == payload
+
+        # the ring is full until the consumer releases the pending payloads
+        assert ring.try_write(b"a" * 600) is not None
+        assert ring.try_write(b"b" * 600) is None
+    finally:
+        reader.close()
+        ring.close()
+
+
+async def test_inference_shm_transport():
+    pool = ipc.inference_proc_pool.InferenceProcPool(
+        runners={_SlowEchoRunner.INFERENCE_METHOD: _SlowEchoRunner},
+        num_processes=1,
+        cpu_affinity=False,
+        initialize_timeout=20.0,
+        close_timeout=5.0,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        ping_interval=2.5,
+        ping_timeout=20.0,
+        high_ping_threshold=1.0,
+        mp_ctx=mp.get_context("spawn"),
+        loop=asyncio.get_running_loop(),
+        http_proxy=None,
+        shm_size=256 * 1024,
+    )
+    await pool.start()
+    await pool.initialize()
+    assert isinstance(pool._executors[0]._pch, utils.aio.duplex_shm._AsyncShmDuplex)
+
+    # small payloads go through the socket, large ones through the ring
+    # (and the socket again when they don't fit)
+    for size in (100, 100 * 1024, 200 * 1024, 1024 * 1024):
+        payload = bytes(range(256)) * (size // 256)
+        assert await pool.do_inference(_SlowEchoRunner.INFERENCE_METHOD, payload) == payload
+
+    await pool.aclose()
+
+
+async def test_job_process_reuse():
+    mp_ctx = mp.get_context("spawn")
+    start_args = _new_start_args(mp_ctx)
+    completed_q = asyncio.Queue()
+    proc = ipc.job_proc_executor.ProcJobExecutor(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_job_entrypoint,
+        session_end_fnc=None,
+        initialize_timeout=20.0,
+        close_timeout=10.0,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        ping_interval=2.5,
+        ping_timeout=10.0,
+        high_ping_threshold=1.0,
+        inference_executor=None,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=asyncio.get_running_loop(),
+        on_job_completed=completed_q.put_nowait,
+    )
+    proc.user_arguments = start_args
+    await proc.start()
+    await proc.initialize()
+
+    for i in range(2):
+        await proc.launch_job(_generate_fake_job())
+        await asyncio.wait_for(completed_q.get(), 10.0)
+        assert proc.running_job is None
+        assert proc.jobs_completed == i + 1
+
+    await proc.aclose()
+
+    assert proc.exitcode == 0
+    assert start_args.initialize_counter.value == 1
+    assert start_args.entrypoint_counter.value == 2
+    assert start_args.shutdown_counter.value == 2
+
+
+_leaked_tasks: list[asyncio.Task[None]] = []
+
+
+async def _leaky_job_entrypoint(job_ctx: JobContext) -> None:
+    start_args: _StartArgs = job_ctx.proc.user_arguments
+
+    with start_args.entrypoint_counter.get_lock():
+        start_args.entrypoint_counter.value += 1
+
+    # still running after the job ended
+    _leaked_tasks.append(asyncio.create_task(asyncio.Event().wait(), name="leaked_task"))
+    job_ctx.shutdown("leaving a task running")
+
+
+async def test_job_process_not_reused_with_leftovers():
+    mp_ctx = mp.get_context("spawn")
+    start_args = _new_start_args(mp_ctx)
+    completed_q = asyncio.Queue()
+    proc = ipc.job_proc_executor.ProcJobExecutor(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_leaky_job_entrypoint,
+        session_end_fnc=None,
+        initialize_timeout=20.0,
+        close_timeout=10.0,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        ping_interval=2.5,
+        ping_timeout=10.0,
+        high_ping_threshold=1.0,
+        inference_executor=None,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=asyncio.get_running_loop(),
+        on_job_completed=completed_q.put_nowait,
+    )
+    proc.user_arguments = start_args
+    await proc.start()
+    await proc.initialize()
+
+    await proc.launch_job(_generate_fake_job())
+    # the process exits instead of taking the next job
+    await asyncio.wait_for(proc.join(), 10.0)
+
+    assert completed_q.empty()
+    assert proc.jobs_completed == 0
+    assert proc.exitcode == 0
+    assert start_args.entrypoint_counter.value == 1
+
+
+async def test_proc_pool_reuse():
+    mp_ctx = mp.get_context("spawn")
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_job_entrypoint,
+        session_end_fnc=None,
+        num_idle_processes=1,
+        job_executor_type=job.JobExecutorType.PROCESS,
+        initialize_timeout=20.0,
+        close_timeout=20.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=asyncio.get_running_loop(),
+        max_jobs_per_process=2,
+    )
+
+    start_args = _new_start_args(mp_ctx)
+    completed_q = asyncio.Queue()
+    launched_pids = []
+
+    @pool.on("process_created")
+    def _process_created(proc: ipc.job_proc_executor.ProcJobExecutor):
+        proc.user_arguments = start_args
+
+    @pool.on("process_job_launched")
+    def _process_job_launched(proc: ipc.job_proc_executor.ProcJobExecutor):
+        launched_pids.append(proc.pid)
+
+    @pool.on("process_job_completed")
+    def _process_job_completed(proc: ipc.job_proc_executor.ProcJobExecutor):
+        completed_q.put_nowait(proc.jobs_completed)
+
+    def _started_jobs(recycled: str) -> float:
+        labels = {"nodename": utils.nodename(), "recycled": recycled}
+        value = REGISTRY.get_sample_value("lk_agents_job_start_latency_seconds_count", labels)
+        return value or 0.0
+
+    started_before = _started_jobs("false") + _started_jobs("true")
+    await pool.start()
+
+    num_jobs = 3
+    for _ in range(num_jobs):
+        await pool.launch_job(_generate_fake_job())
+        await asyncio.wait_for(completed_q.get(), 10.0)
+
+    await pool.aclose()
+
+    assert start_args.entrypoint_counter.value == num_jobs
+    # the start latency is observed when the process enters the entrypoint
+    assert _started_jobs("false") + _started_jobs("true") == started_before + num_jobs
+    assert not pool._launch_times
+    # at least one job ran on a process that already ran one, none ran more than 2
+    assert len(set(launched_pids)) < num_jobs
+    assert max(launched_pids.count(pid) for pid in launched_pids) <= 2
+
+
+async def _shared_job_entrypoint(job_ctx: JobContext) -> None:
+    start_args: _StartArgs = job_ctx.proc.user_arguments
+
+    with start_args.entrypoint_counter.get_lock():
+        start_args.entrypoint_counter.value += 1
+
+    if job_ctx.job.metadata == "fail":
+        raise RuntimeError("failing job")
+
+    if job_ctx.job.metadata == "hang":
+
+        async def _hang() -> None:
+            await asyncio.Event().wait()
+
+        job_ctx.add_shutdown_callback(_hang)
+
+    # the other jobs keep running until the main process closes them
+
+
+async def test_shared_proc_pool():
+    mp_ctx = mp.get_context("spawn")
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_shared_job_entrypoint,
+        session_end_fnc=None,
+        num_idle_processes=1,
+        job_executor_type=job.JobExecutorType.SHARED_PROCESS,
+        initialize_timeout=20.0,
+        close_timeout=2.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp_ctx,
+        loop=asyncio.get_running_loop(),
+        max_jobs_per_shared_process=8,
+    )
+
+    start_args = _new_start_args(mp_ctx)
+    completed_q = asyncio.Queue()
+
+    @pool.on("process_created")
+    def _process_created(proc: ipc.job_shared_proc_executor.SharedJobProcess):
+        proc.user_arguments = start_args
+
+    @pool.on("process_job_completed")
+    def _process_job_completed(executor: ipc.job_shared_proc_executor.SharedProcJobExecutor):
+        completed_q.put_nowait(executor)
+
+    await pool.start()
+
+    ok_jobs = [_generate_fake_job() for _ in range(2)]
+    failing_job, hanging_job = _generate_fake_job(), _generate_fake_job()
+    failing_job.job.metadata = "fail"
+    hanging_job.job.metadata = "hang"
+    for info in (*ok_jobs, failing_job, hanging_job):
+        await pool.launch_job(info)
+
+    # the failing job ends on its own
+    executor = await asyncio.wait_for(completed_q.get(), 10.0)
+    assert executor.running_job.job.id == failing_job.job.id
+    assert executor.status == ipc.job_executor.JobStatus.FAILED
+
+    # the hanging job is cancelled once the close timeout expires
+    await pool.get_by_job_id(hanging_job.job.id).aclose()
+    executor = await asyncio.wait_for(completed_q.get(), 10.0)
+    assert executor.running_job.job.id == hanging_job.job.id
+    assert executor.status == ipc.job_executor.JobStatus.FAILED
+
+    # the other jobs of the process weren't affected
+    running = [pool.get_by_job_id(info.job.id) for info in ok_jobs]
+    assert all(e is not None and e.status == ipc.job_executor.JobStatus.RUNNING for e in running)
+    assert len({e.process for e in running}) == 1
+    assert running[0].process.num_jobs == 2
+
+    await pool.aclose()
+
+    assert start_args.initialize_counter.value == 1
+    assert start_args.entrypoint_counter.value == 4
+    assert all(e.status == ipc.job_executor.JobStatus.SUCCESS for e in running)
+
+
+def test_idle_process_predictor():
+    predictor = ipc.proc_pool._IdleProcessPredictor(half_life=1.0)
+    predictor.proc_initialized(2.0)
+
+    # 10 jobs/s during 10 half-lives
+    for _ in range(100):
+        predictor._last_update -= 0.1
+        predictor.job_arrived()
+        predictor.update()
+
+    assert 9.5 < predictor.arrival_rate <= 10.0
+    # the jobs arriving during one process initialization
+    assert predictor.predicted_idle() == 20
+
+    predictor._last_update -= 5.0
+    predictor.update()
+    assert predictor.arrival_rate < 0.5
+
+
+async def test_proc_pool_predictive_idle(tmp_path):
+    pool = ipc.proc_pool.ProcPool(
+        initialize_process_fnc=_initialize_proc,
+        job_entrypoint_fnc=_job_entrypoint,
+        session_end_fnc=None,
+        num_idle_processes=2,
+        job_executor_type=job.JobExecutorType.PROCESS,
+        initialize_timeout=20.0,
+        close_timeout=20.0,
+        inference_executor=None,
+        memory_warn_mb=0,
+        memory_limit_mb=0,
+        http_proxy=None,
+        mp_ctx=mp.get_context("spawn"),
+        loop=asyncio.get_running_loop(),
+        max_idle_processes=8,
+    )
+
+    predictor = pool._predictor
+    predictor.proc_initialized(1.0)
+    assert pool._update_num_idle(0) == 2
+
+    predictor._arrival_rate = 5.0
+    assert pool._update_num_idle(0) == 5
+
+    predictor._arrival_rate = 20.0
+    assert pool._update_num_idle(0) == 8  # max_idle_processes
+
+    # the worker load bounds the idle processes
+    pool.set_target_idle_processes(3)
+    assert pool._update_num_idle(0) == 3
+    pool.set_target_idle_processes(8)
+
+    # only the warm processes fit in memory, never less than num_idle_processes
+    pool._proc_memory_mb = float(psutil.virtual_memory().total)
+    assert pool._update_num_idle(4) == 4
+    assert pool._update_num_idle(0) == 2
+
+    # the memory is the one of the cgroup in a container, not the one of the host
+    mb = 1024 * 1024
+    (tmp_path / "memory.current").write_text(str(400 * mb))
+    (tmp_path / "memory.max").write_text(str(1000 * mb))
+    (tmp_path / "memory.stat").write_text(f"inactive_file {100 * mb}\n")
+    pool._memory_monitor._memory_files = (
+        str(tmp_path / "memory.current"),
+        str(tmp_path / "memory.max"),
+        str(tmp_path / "memory.stat"),
+    )
+    pool._memory_monitor._inactive_file_key = "inactive_file"
+    pool._proc_memory_mb = 100.0
+    assert pool._headroom() == 6  # (1000 - 300 - 100 reserved) / 100
+    assert pool._update_num_idle(0) == 6
+
+
+def test_shared_assets(tmp_path, monkeypatch):
+    monkeypatch.delenv(ipc.shared_assets._ASSETS_ENV, raising=False)
+    monkeypatch.setattr(ipc.shared_assets, "_mapped", {})
+
+    path = tmp_path / "model.bin"
+    path.write_bytes(b"weights" * 1024)
+    ipc.shared_assets.declare_shared_assets({"model": str(path)})
+
+    # mapped once, the forkserver does it before forking the job processes
+    ipc.shared_assets._preload()
+    mapped = ipc.shared_assets._mapped["model"]
+    asset = ipc.shared_assets.get_shared_asset("model")
+    assert asset.readonly
+    assert bytes(asset[:7]) == b"weights" and len(asset) == 7 * 1024
+    assert ipc.shared_assets._mapped["model"] is mapped
+    asset.release()
+
+    with pytest.raises(KeyError):
+        ipc.shared_assets.get_shared_asset("unknown")
+
+    with pytest.raises(ValueError):
+        ipc.shared_assets.declare_shared_assets({"missing": str(tmp_path / "missing.bin")})
+
+
+async def test_proc_sampler():
+    child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(30)"])
+    sampler = ipc.proc_sampler.ProcSampler(
+        interval=0.05, pss_interval=0.2, loop=asyncio.get_running_loop()
+    )
+    samples: list[ipc.proc_sampler.ProcStats] = []
+    try:
+        sampler.register(child.pid, samples.append)
+        sampler.register(os.getpid(), lambda _: None)
+        assert sampler.num_processes == 2
+        await asyncio.sleep(0.5)
+
+        assert len(samples) > 2
+        stats = samples[-1]
+        assert stats.pid == child.pid
+        assert stats.rss > 0 and stats.cpu_time >= 0.0 and stats.num_fds > 0
+        if sys.platform.startswith("linux"):
+            # read on the first pass, kept on the following ones
+            assert all(s.pss is not None and s.pss > 0 for s in samples)
+
+        assert sampler.stats(child.pid) is stats
+
+        # the exited processes are skipped, the others are still sampled
+        child.kill()
+        child.wait()
+        num_samples = len(samples)
+        await asyncio.sleep(0.2)
+        assert len(samples) == num_samples
+        assert sampler.stats(os.getpid()) is not None
+
+        sampler.unregister(child.pid)
+        sampler.unregister(os.getpid())
+        await asyncio.sleep(0.1)
+        assert sampler._sample_atask is None  # stopped without processes to sample
+    finally:
+        child.kill()
+        await sampler.aclose()
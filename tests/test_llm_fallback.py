@@ -0,0 +1,79 @@
+from __future__ import annotations
+
+import time
+
+from livekit.agents import utils
+from livekit.agents.llm import ChatContext, FallbackAdapter
+
+from .fake_llm import FakeLLM, FakeLLMResponse
+
+
+def _fake_llm(content: str, ttft: float) -> FakeLLM:
+    return FakeLLM(
+        fake_responses=[FakeLLMResponse(input="hello", content=content, ttft=ttft, duration=ttft)]
+    )
+
+
+async def _chat(fallback_adapter: FallbackAdapter) -> str:
+    chat_ctx = ChatContext()
+    chat_ctx.add_message(role="user", content="hello")
+
+    text = ""
+    async with fallback_adapter.chat(chat_ctx=chat_ctx) as stream:
+        async for chunk in stream:
+            if chunk.delta and chunk.delta.content:
+                text += chunk.delta.content
+    return text
+
+
+async def test_llm_fallback_hedge() -> None:
+    slow = _fake_llm("slow response", ttft=1.0)
+    fast = _fake_llm("fast response", ttft=0.05)
+
+    # the slow LLM is waited for without hedging
+    fallback_adapter = FallbackAdapter([slow, fast])
+    assert await _chat(fallback_adapter) == "slow response"
+
+    fallback_adapter = FallbackAdapter([slow, fast], hedge=True, hedge_delay=0.1)
+    availability_changes = []
+    fallback_adapter.on("llm_availability_changed", availability_changes.append)
+
+    start = time.perf_counter()
+    assert await _chat(fallback_adapter) == "fast response"
+    assert time.perf_counter() - start < 0.5
+
+    # the slow LLM was cancelled, not failed
+    assert not availability_changes
+    assert all(status.available for status in fallback_adapter._status)
+
+    await fallback_adapter.aclose()
+
+
+async def test_llm_fallback_hedge_delay() -> None:
+    primary = _fake_llm("response", ttft=0.0)
+    fallback_adapter = FallbackAdapter(
+        [primary, _fake_llm("response", ttft=0.0)], hedge=True, hedge_percentile=0.9
+    )
+
+    # the initial hedge delay until enough times to first token are known
+    assert fallback_adapter._get_hedge_delay(primary) == 1.0
+
+    for ttft in range(1, 21):
+        fallback_adapter._record_ttft(primary, ttft / 100)
+    assert fallback_adapter._get_hedge_delay(primary) == 0.18
+
+    await fallback_adapter.aclose()
+
+
+def test_moving_percentile() -> None:
+    percentile = utils.MovingPercentile(window_size=4)
+    assert percentile.get_percentile(0.5) == 0
+
+    for sample in [4.0, 1.0, 3.0, 2.0, 10.0]:
+        percentile.add_sample(sample)
+
+    # 4.0 left the window
+    assert percentile.size() == 4
+    assert percentile.get_percentile(0.5) == 2.0
+    assert percentile.get_percentile(1.0) == 10.0
+    assert percentile.get_percentile(0.01) == 1.0
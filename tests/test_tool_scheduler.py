@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from livekit.agents import ToolError, function_tool
+from livekit.agents.llm import FunctionCall
+from livekit.agents.llm.tool_context import ToolFlag
+from livekit.agents.voice.tool_scheduler import ToolScheduler
+
+
+def _call(name: str, arguments: str = "{}") -> FunctionCall:
+    return FunctionCall(name=name, call_id=f"call_{name}", arguments=arguments)
+
+
+class _Counter:
+    def __init__(self) -> None:
+        self.running = 0
+        self.max_running = 0
+        self.calls = 0
+
+    async def run(self, delay: float = 0.05) -> str:
+        self.calls += 1
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self.running -= 1
+        return f"result {self.calls}"
+
+
+async def test_tool_max_concurrency() -> None:
+    counter = _Counter()
+
+    @function_tool(max_concurrency=1)
+    async def write_record() -> str:
+        return await counter.run()
+
+    scheduler = ToolScheduler()
+    await asyncio.gather(
+        *(scheduler.run(write_record, _call("write_record"), write_record) for _ in range(3))
+    )
+    assert counter.calls == 3
+    assert counter.max_running == 1
+
+
+async def test_session_max_concurrency() -> None:
+    counter = _Counter()
+
+    @function_tool
+    async def lookup() -> str:
+        return await counter.run()
+
+    @function_tool(max_concurrency=1)
+    async def write_record() -> str:
+        return await counter.run()
+
+    scheduler = ToolScheduler(max_concurrency=2)
+    await asyncio.gather(
+        *(scheduler.run(write_record, _call("write_record"), write_record) for _ in range(2)),
+        *(scheduler.run(lookup, _call("lookup"), lookup) for _ in range(4)),
+    )
+    assert counter.calls == 6
+    assert counter.max_running == 2
+
+    with pytest.raises(ValueError):
+        ToolScheduler(max_concurrency=0)
+
+
+async def test_tool_timeout() -> None:
+    @function_tool(timeout=0.05)
+    async def slow_lookup() -> str:
+        await asyncio.sleep(1.0)
+        return "never"
+
+    scheduler = ToolScheduler()
+    with pytest.raises(ToolError, match="timed out"):
+        await scheduler.run(slow_lookup, _call("slow_lookup"), slow_lookup)
+
+    # no cancellation of the task of the call is left pending
+    await asyncio.sleep(0.01)
+
+    with pytest.raises(ValueError):
+        function_tool(timeout=0)
+
+
+async def test_idempotent_tool_cache() -> None:
+    counter = _Counter()
+    fail = True
+
+    @function_tool(flags=ToolFlag.IDEMPOTENT)
+    async def get_weather(city: str, days: int) -> str:
+        if fail:
+            raise ToolError("unavailable")
+        return await counter.run()
+
+    scheduler = ToolScheduler()
+    call = _call("get_weather", '{"city": "Paris", "days": 1}')
+
+    # the failures aren't reused
+    with pytest.raises(ToolError):
+        await scheduler.run(get_weather, call, lambda: get_weather("Paris", 1))
+    fail = False
+
+    results = await asyncio.gather(
+        scheduler.run(get_weather, call, lambda: get_weather("Paris", 1)),
+        scheduler.run(
+            get_weather,
+            _call("get_weather", '{"days":1,"city":"Paris"}'),
+            lambda: get_weather("Paris", 1),
+        ),
+    )
+    assert results == ["result 1", "result 1"]
+    assert counter.calls == 1
+
+    await scheduler.run(
+        get_weather,
+        _call("get_weather", '{"city": "Lyon", "days": 1}'),
+        lambda: get_weather("Lyon", 1),
+    )
+    assert counter.calls == 2
+
+    # not cached when the tool is replaced (mocks)
+    await scheduler.run(get_weather, call, lambda: get_weather("Paris", 1), cache=False)
+    assert counter.calls == 3
+
+
+async def test_idempotent_tool_cancelled() -> None:
+    counter = _Counter()
+
+    @function_tool(flags=ToolFlag.IDEMPOTENT)
+    async def get_weather(city: str) -> str:
+        return await counter.run(delay=0.1)
+
+    scheduler = ToolScheduler()
+    call = _call("get_weather", '{"city": "Paris"}')
+
+    first = asyncio.create_task(scheduler.run(get_weather, call, lambda: get_weather("Paris")))
+    await asyncio.sleep(0.01)
+    second = asyncio.create_task(scheduler.run(get_weather, call, lambda: get_weather("Paris")))
+    third = asyncio.create_task(scheduler.run(get_weather, call, lambda: get_weather("Paris")))
+    await asyncio.sleep(0.01)
+
+    # the calls waiting for the output of the cancelled one run the tool instead
+    first.cancel()
+    assert await asyncio.gather(second, third) == ["result 2", "result 2"]
+    assert first.cancelled()
+    assert counter.calls == 2
+
+    # only the cancellation of its own task cancels a waiting call
+    call = _call("get_weather", '{"city": "Lyon"}')
+    running = asyncio.create_task(scheduler.run(get_weather, call, lambda: get_weather("Lyon")))
+    await asyncio.sleep(0.01)
+    waiting = asyncio.create_task(scheduler.run(get_weather, call, lambda: get_weather("Lyon")))
+    await asyncio.sleep(0.01)
+    waiting.cancel()
+    assert await running == "result 3"
+    assert waiting.cancelled()
@@ -263,3 +263,40 @@ async def test_timeout():
     assert await asyncio.wait_for(fake2.stream_ch.recv(), 1.0)
 
     await fallback_adapter.aclose()
+
+
+async def test_tts_hedge() -> None:
+    slow = FakeTTS(fake_timeout=1.0, fake_audio_duration=1.0)
+    fast = FakeTTS(fake_timeout=0.05, fake_audio_duration=2.0)
+
+    fallback_adapter = FallbackAdapter([slow, fast], hedge=True, hedge_delay=0.1)
+    availability_changes: list[AvailabilityChangedEvent] = []
+    fallback_adapter.on("tts_availability_changed", availability_changes.append)
+
+    start = asyncio.get_running_loop().time()
+    async with fallback_adapter.synthesize("hello test") as stream:
+        frames = [data.frame async for data in stream]
+
+    assert asyncio.get_running_loop().time() - start < 0.8
+    assert rtc.combine_audio_frames(frames).duration == 2.01
+    assert slow.synthesize_ch.recv_nowait()
+    assert fast.synthesize_ch.recv_nowait()
+
+    # stream, the text comes after the start of the stream
+    async with fallback_adapter.stream() as stream:
+        await asyncio.sleep(0.3)
+        start = asyncio.get_running_loop().time()
+        stream.push_text("hello test")
+        stream.end_input()
+
+        frames = [data.frame async for data in stream]
+
+    assert asyncio.get_running_loop().time() - start < 0.6
+    assert rtc.combine_audio_frames(frames).duration == 2.01
+    assert slow.stream_ch.recv_nowait()
+    assert fast.stream_ch.recv_nowait()
+
+    # the slow TTS was cancelled, not failed
+    assert not availability_changes
+
+    await fallback_adapter.aclose()
@@ -1,3 +1,6 @@
+from concurrent.futures import Future
+
+import numpy as np
 import pytest
 
 from livekit.agents import vad
@@ -83,3 +86,69 @@ async def test_file_vad(sample_rate):
 
     assert start_of_speech_i > 0, "no start of speech detected"
     assert start_of_speech_i == end_of_speech_i, "start and end of speech mismatch"
+
+
+def test_batched_inference() -> None:
+    from livekit.plugins.silero import onnx_model
+
+    session = onnx_model.new_inference_session(True)
+    batched = onnx_model.BatchedInference(onnx_session=session, sample_rate=16000)
+
+    rng = np.random.default_rng(0)
+    models = [onnx_model.OnnxModel(onnx_session=session, sample_rate=16000) for _ in range(4)]
+    ref_models = [onnx_model.OnnxModel(onnx_session=session, sample_rate=16000) for _ in range(4)]
+    try:
+        for _ in range(3):
+            # streams submitting a different number of windows end up in the same batch
+            windows = [
+                (rng.standard_normal((i + 1, 512)) * 0.1).astype(np.float32) for i in range(4)
+            ]
+            futs = [batched.submit(model, w) for model, w in zip(models, windows)]
+            for fut, model, w in zip(futs, ref_models, windows):
+                assert fut.result() == pytest.approx([model(x) for x in w], abs=1e-5)
+    finally:
+        batched.close()
+
+
+class _FakeSileroSession:
+    """returns the input state + 1 as the next state, and records the state inputs"""
+
+    def __init__(self) -> None:
+        self.states: list[np.ndarray] = []
+
+    def run(self, _: None, inputs: dict[str, np.ndarray]) -> tuple[np.ndarray, np.ndarray]:
+        self.states.append(inputs["state"].copy())
+        return np.zeros((inputs["input"].shape[0], 1), dtype=np.float32), inputs["state"] + 1
+
+
+def test_rnn_state_carried() -> None:
+    from livekit.plugins.silero import onnx_model
+
+    session = _FakeSileroSession()
+    model = onnx_model.OnnxModel(onnx_session=session, sample_rate=16000)  # type: ignore
+    for _ in range(3):
+        model(np.zeros(512, dtype=np.float32))
+    assert [float(state.max()) for state in session.states] == [0.0, 1.0, 2.0]
+
+    # the state of each stream is the state input of its row in the next step
+    session = _FakeSileroSession()
+    batched = onnx_model.BatchedInference(onnx_session=session, sample_rate=16000)  # type: ignore
+    models = [onnx_model.OnnxModel(onnx_session=session, sample_rate=16000) for _ in range(2)]  # type: ignore
+    models[1]._rnn_state = models[1]._rnn_state + 10
+    reqs = [
+        onnx_model._BatchRequest(
+            model=model, windows=np.zeros((n, 512), dtype=np.float32), fut=Future()
+        )
+        for model, n in zip(models, [3, 1])
+    ]
+    try:
+        batched._run_batch(reqs)
+    finally:
+        batched.close()
+
+    rows = [
+        [float(state[:, row].max()) for row in range(state.shape[1])] for state in session.states
+    ]
+    assert rows == [[0.0, 10.0], [1.0], [2.0]]
+    assert float(models[0]._rnn_state.max()) == 3.0
+    assert float(models[1]._rnn_state.max()) == 11.0
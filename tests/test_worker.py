@@ -0,0 +1,211 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+from unittest import mock
+
+import pytest
+
+from livekit.agents import AcceptPolicy, AgentServer, JobContext, JobRequest, telemetry, utils
+from livekit.agents.job import JobAcceptArguments, RunningJobInfo
+from livekit.agents.utils.hw import LoadMonitor, LoadSample
+from livekit.agents.worker import _DefaultLoadCalc
+from livekit.protocol import agent, models
+
+
+async def _entrypoint(ctx: JobContext) -> None:
+    pass
+
+
+async def _unused(*args: Any) -> None:
+    pass
+
+
+class _FakeProcPool:
+    def __init__(self) -> None:
+        self.launched: list[RunningJobInfo] = []
+
+    async def launch_job(self, info: RunningJobInfo) -> None:
+        self.launched.append(info)
+
+
+def _job(job_id: str, room_name: str) -> agent.Job:
+    return agent.Job(id=job_id, room=models.Room(name=room_name), agent_name="my_agent")
+
+
+def _new_server(policy: AcceptPolicy) -> tuple[AgentServer, _FakeProcPool]:
+    server = AgentServer()
+    server.rtc_session(_entrypoint, agent_name="my_agent", on_request=policy)
+
+    # the state created by AgentServer.run
+    pool = _FakeProcPool()
+    server._loop = asyncio.get_running_loop()
+    server._tasks = set()
+    server._pending_assignments = {}
+    server._msg_chan = utils.aio.Chan[agent.WorkerMessage](128)
+    server._proc_pool = pool  # type: ignore[assignment]
+    return server, pool
+
+
+def test_accept_policy_evaluate():
+    policy = AcceptPolicy(
+        identity="agent-{room_name}",
+        name="{agent_name}",
+        attributes={"job": "{job_id}"},
+        predicate=lambda req: req.room.name.startswith("support-"),
+    )
+
+    req = JobRequest(job=_job("job_1", "support-1"), on_reject=_unused, on_accept=_unused)
+    args = policy.evaluate(req)
+    assert args is not None
+    assert args.identity == "agent-support-1"
+    assert args.name == "my_agent"
+    assert args.attributes == {"job": "job_1"}
+
+    req = JobRequest(job=_job("job_2", "sales-1"), on_reject=_unused, on_accept=_unused)
+    assert policy.evaluate(req) is None
+
+    # accept all by default
+    args = AcceptPolicy().evaluate(req)
+    assert args is not None and args.identity == "agent-job_2"
+
+    # only the known fields are replaced
+    args = AcceptPolicy(
+        metadata='{"role": "agent", "room": "{room_name}"}', attributes={"tags": "{a}{job_id}"}
+    ).evaluate(req)
+    assert args is not None
+    assert args.metadata == '{"role": "agent", "room": "sales-1"}'
+    assert args.attributes == {"tags": "{a}job_2"}
+
+
+async def test_accept_policy_answer():
+    server, pool = _new_server(
+        AcceptPolicy(predicate=lambda req: req.room.name.startswith("support-"))
+    )
+
+    server._handle_availability(agent.AvailabilityRequest(job=_job("job_1", "support-1")))
+    server._handle_availability(agent.AvailabilityRequest(job=_job("job_2", "sales-1")))
+
+    # answered synchronously
+    accepted = server._msg_chan.recv_nowait().availability
+    rejected = server._msg_chan.recv_nowait().availability
+    assert accepted.job_id == "job_1" and accepted.available
+    assert accepted.participant_identity == "agent-job_1"
+    assert rejected.job_id == "job_2" and not rejected.available
+    assert list(server._pending_assignments) == ["job_1"]
+
+    server._handle_assignment(
+        agent.JobAssignment(job=_job("job_1", "support-1"), token="token", url="wss://test")
+    )
+    await asyncio.sleep(0)  # the assignment callback runs on the next loop iteration
+    await asyncio.gather(*server._tasks)
+
+    assert len(pool.launched) == 1
+    assert pool.launched[0].job.id == "job_1"
+    assert pool.launched[0].url == "wss://test"
+    assert pool.launched[0].accept_arguments.identity == "agent-job_1"
+
+
+def test_load_monitor(tmp_path):
+    (tmp_path / "cpu.pressure").write_text(
+        "some avg10=12.50 avg60=5.00 avg300=1.00 total=1000\n"
+        "full avg10=0.00 avg60=0.00 avg300=0.00 total=0\n"
+    )
+    (tmp_path / "memory.current").write_text(str(512 * 1024 * 1024))
+    (tmp_path / "memory.max").write_text(str(1024 * 1024 * 1024))
+
+    monitor = LoadMonitor()
+    monitor._cpu_pressure_file = str(tmp_path / "cpu.pressure")
+    monitor._memory_pressure_file = str(tmp_path / "missing.pressure")
+    monitor._memory_monitor._memory_files = (
+        str(tmp_path / "memory.current"),
+        str(tmp_path / "memory.max"),
+        str(tmp_path / "memory.stat"),
+    )
+    monitor._memory_monitor._inactive_file_key = "inactive_file"
+
+    sample = monitor.sample()
+    assert sample.cpu_pressure == 0.125
+    assert sample.memory_pressure == 0.0
+    assert sample.memory == 0.5
+    assert 0.0 <= sample.cpu <= 1.0
+
+    # the inactive page cache is reclaimable, it isn't counted
+    (tmp_path / "memory.stat").write_text(
+        f"anon {256 * 1024 * 1024}\nfile {512 * 1024 * 1024}\n"
+        f"active_file {256 * 1024 * 1024}\ninactive_file {256 * 1024 * 1024}\n"
+    )
+    assert monitor.sample().memory == 0.25
+
+    # no limit, relative to the system memory
+    (tmp_path / "memory.max").write_text("max")
+    assert monitor.sample().memory < 0.5
+
+
+def test_default_load_components():
+    class _FakeInference:
+        def queue_depths(self) -> list[int]:
+            return [8, 24]
+
+    class _FakeServer:
+        def __init__(self) -> None:
+            self.active_jobs: list[RunningJobInfo] = []
+            self._inference_executor = _FakeInference()
+
+    load_calc = _DefaultLoadCalc()
+    load_calc._monitor.sample = lambda: LoadSample(  # type: ignore[method-assign]
+        cpu=0.2, memory=0.3, cpu_pressure=0.1, memory_pressure=0.0
+    )
+    server = _FakeServer()
+    components: dict[str, float] = {}
+    with mock.patch.object(telemetry.metrics, "_update_load_components", components.update):
+        # 32 requests in flight over 2 processes saturate the inference processes
+        assert load_calc._update(server) == 1.0  # type: ignore[arg-type]
+        assert components["inference"] == 1.0
+
+        # the memory and the pressures are exported, not scored
+        server._inference_executor.queue_depths = lambda: [0, 0]  # type: ignore[method-assign]
+        assert load_calc._update(server) == 0.2  # type: ignore[arg-type]
+        assert components["memory"] == 0.3
+        assert components["cpu_pressure"] == 0.1
+
+        # the jobs just started count for the cpu they will use
+        server.active_jobs = [
+            RunningJobInfo(
+                accept_arguments=JobAcceptArguments(name="", identity="", metadata=""),
+                job=_job(f"job_{i}", "room"),
+                url="",
+                token="",
+                worker_id="",
+                fake_job=True,
+            )
+            for i in range(2)
+        ]
+        load_calc._job_cpu = 0.1
+        load_calc._update(server)  # type: ignore[arg-type]
+        assert components["jobs"] == pytest.approx(0.4)
+
+
+def test_default_load_no_cgroup():
+    class _FakeServer:
+        def __init__(self) -> None:
+            self.active_jobs: list[RunningJobInfo] = []
+            self._inference_executor = None
+
+    load_calc = _DefaultLoadCalc()
+    load_calc._monitor._memory_monitor._memory_files = None
+    load_calc._monitor._cpu_pressure_file = "/missing/cpu.pressure"
+    load_calc._monitor._memory_pressure_file = "/missing/memory.pressure"
+    load_calc._monitor._sample_cpu = lambda: 0.2  # type: ignore[method-assign]
+
+    # the memory of the host, used by the other tenants too
+    host_memory = mock.Mock(total=100 * 1024 * 1024, available=5 * 1024 * 1024)
+    components: dict[str, float] = {}
+    with (
+        mock.patch("psutil.virtual_memory", return_value=host_memory),
+        mock.patch.object(telemetry.metrics, "_update_load_components", components.update),
+    ):
+        assert load_calc._update(_FakeServer()) == pytest.approx(0.2)  # type: ignore[arg-type]
+
+    assert components["memory"] == pytest.approx(0.95)
+    assert components["inference"] == 0.0